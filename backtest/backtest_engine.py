@@ -1,19 +1,131 @@
 # backtest/backtest_engine.py
 
+import os
+import joblib
+import numpy as np
 import pandas as pd
-from utils.feature_engineering import prepare_features
+from utils.feature_store import FeatureStore
 from sklearn.metrics import accuracy_score
+from models.artifact import read_manifest
+from models.predict import load_model, predict_from_live_data, MODEL_PATH
+from models.registry import ModelRegistry
+from utils.tick_log import read_ticks, SOURCE_MODEL_INPUT, TICK_LOG_DIR
+from utils.rolling_features import RollingFeatureState
+from utils.helpers import session_date, session_timestamp
+from backtest.metrics import performance_summary
 
-def backtest(data_path='data/historical_data.csv', model_path='models/model.pkl'):
-    data = pd.read_csv(data_path)
-    data = data.dropna()
-    X = prepare_features(data)
-    y_true = data['direction']
+# Opt-in: score backtests with the registry pickle behind the live artifact (unpickles, so off by default)
+BACKTEST_USE_PICKLE = os.getenv('BACKTEST_USE_PICKLE', '0') == '1'
 
-    import joblib
-    model = joblib.load(model_path)
+
+def batch_model(model_path=MODEL_PATH, use_pickle=None, registry=None):
+    """
+    The model to score a backtest with: the live model, as load_model returns it.
+
+    With use_pickle (default BACKTEST_USE_PICKLE), the registry version the
+    artifact was exported from supplies its pickle instead, provided that
+    version's artifact is the one at model_path. Loading it unpickles, so only
+    enable it for a registry you trust.
+
+    Args:
+        model_path: Live model path, as for load_model
+        use_pickle: Load the registry pickle (default BACKTEST_USE_PICKLE)
+        registry: ModelRegistry holding the artifact's version (default env-configured)
+    """
+    model = load_model(model_path)
+    use_pickle = BACKTEST_USE_PICKLE if use_pickle is None else use_pickle
+    manifest = getattr(model, 'manifest', None)
+    if not use_pickle or not manifest or not manifest.get('model_version'):
+        return model
+    registry = registry or ModelRegistry()
+    version = manifest['model_version']
+    artifact, pickle_path = registry.artifact_path(version), registry.model_path(version)
+    if not (os.path.exists(artifact) and os.path.exists(pickle_path)):
+        return model
+    if read_manifest(artifact).get('created_at') != manifest.get('created_at'):
+        return model  # same version name in another registry
+    return joblib.load(pickle_path)
+
+
+def strategy_returns(raw: pd.DataFrame, y_pred) -> tuple:
+    """
+    Per-symbol returns of trading the predictions: long the underlying after a
+    CALL prediction, short after a PUT, held until the symbol's next bar.
+
+    Returns:
+        (returns, positions), both bar number x symbol
+    """
+    symbols = raw['symbol']
+    close = raw['underlying_close']
+    next_return = close.groupby(symbols).shift(-1) / close - 1
+    position = np.where(np.asarray(y_pred) == 1, 1.0, -1.0)
+    frame = pd.DataFrame({
+        'bar': raw.groupby('symbol').cumcount().to_numpy(),
+        'symbol': symbols.to_numpy(),
+        'return': position * next_return.to_numpy(),
+        'position': position,
+    })
+    returns = frame.pivot(index='bar', columns='symbol', values='return')
+    positions = frame.pivot(index='bar', columns='symbol', values='position')
+    return returns, positions
+
+
+def simulate(data_path='data/historical_data.csv', model_path=MODEL_PATH, store=None, use_pickle=None) -> tuple:
+    """
+    Score the dataset with the model (see batch_model) and trade its predictions per symbol.
+
+    Returns:
+        (accuracy, returns, positions), the frames as from strategy_returns
+    """
+    features = (store or FeatureStore()).load(data_path, target='direction', dropna=True)
+    X = features.to_frame()
+    y_true = features.y
+
+    model = batch_model(model_path, use_pickle)
     y_pred = model.predict(X)
 
-    acc = accuracy_score(y_true, y_pred)
+    raw = pd.read_csv(data_path).dropna().reset_index(drop=True)
+    returns, positions = strategy_returns(raw, y_pred)
+    return accuracy_score(y_true, y_pred), returns, positions
+
+
+def replay_signals(start: float, end: float, model_path=MODEL_PATH,
+                   directory: str = TICK_LOG_DIR, bars=None) -> pd.DataFrame:
+    """
+    Re-score the model inputs recorded live (utils/tick_log.py) in [start, end).
+
+    Each recorded cycle is scored as one batch, as it was live, so a new model
+    can be compared signal for signal with what was traded. Pass the live
+    run's BarCache (utils/bar_cache.py, e.g. BarCache() without a broker) to
+    restore each cycle's previous closes; without it underlying_return_1d is 0.
+    Rolling features are rebuilt in a RollingFeatureState of the replay's own,
+    with each cycle in the session of its timestamp, and the live prediction cache is neither read nor filled, so a replay in
+    the trading process leaves live scoring as it was.
+
+    Returns:
+        DataFrame with ts, symbol, prediction ('CALL'/'PUT') and confidence
+    """
+    ticks = read_ticks(start, end, directory, source=SOURCE_MODEL_INPUT)
+    rows = []
+    if not len(ticks):
+        return pd.DataFrame(rows, columns=['ts', 'symbol', 'prediction', 'confidence'])
+    state = RollingFeatureState()
+    for ts, cycle in ticks.groupby('ts', sort=True):
+        live = cycle.rename(columns={'last': 'underlying_close'}).assign(
+            direction=0, underlying_return_1d=0, session=session_timestamp(session_date(ts)))
+        if bars is not None:
+            live['prev_close'] = bars.prev_close(live['symbol'].tolist(), as_of=ts, refresh=False)
+        rows.extend((ts, s.symbol, s.prediction, s.confidence)
+                    for s in predict_from_live_data(live.reset_index(drop=True), model_path,
+                                                    rolling_state=state, use_cache=False))
+    return pd.DataFrame(rows, columns=['ts', 'symbol', 'prediction', 'confidence'])
+
+
+def backtest(data_path='data/historical_data.csv', model_path=MODEL_PATH, store=None, use_pickle=None):
+    acc, returns, positions = simulate(data_path, model_path, store, use_pickle)
     print(f"📉 Backtest Accuracy: {acc:.2%}")
-    # Add Sharpe, drawdown, etc. if needed
+
+    summary = performance_summary(returns, positions)
+    print("📊 Per-symbol performance:")
+    print(summary.round(3).to_string())
+    return summary
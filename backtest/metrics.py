@@ -1,22 +1,258 @@
 # backtest/metrics.py
 
+"""
+Vectorized performance metrics.
+
+Returns come in as a matrix with one row per timestamp and one column per
+strategy (the parameter sets of a sweep, the symbols of a backtest, ...).
+Every metric is a column-wise NumPy reduction, so all strategies are scored
+in one pass. Rolling versions use prefix sums, so their cost does not grow
+with the window; rolling max drawdown works block-wise in linear time, and
+only rolling drawdown duration walks each window, in bounded chunks.
+
+NaN returns mark periods a strategy was not running: they are left out of
+the statistics and count as flat for equity and drawdown. Ratios with a zero
+denominator (no periods, no volatility, no drawdown) are 0.
+"""
+
+from typing import Iterable, Optional
 import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 
-def compute_metrics(returns: list[float]):
-    returns = np.array(returns)
-    avg_return = np.mean(returns)
-    std_return = np.std(returns)
-    sharpe = (avg_return / std_return) * np.sqrt(252) if std_return > 0 else 0
+PERIODS_PER_YEAR = 252
+SUMMARY_COLUMNS = [
+    'periods', 'total_return', 'cagr', 'volatility', 'sharpe', 'sortino', 'calmar',
+    'max_drawdown', 'max_drawdown_duration', 'turnover', 'hit_rate',
+]
+ROLLING_COLUMNS = [
+    'return', 'volatility', 'sharpe', 'sortino', 'calmar',
+    'max_drawdown', 'max_drawdown_duration', 'turnover', 'hit_rate',
+]
+# Elements per (rows x strategies x window) block in rolling drawdown
+_DRAWDOWN_CHUNK = 1 << 20
+
+
+def _as_frame(data) -> pd.DataFrame:
+    if isinstance(data, pd.DataFrame):
+        return data
+    if isinstance(data, pd.Series):
+        return data.to_frame(data.name if data.name is not None else 'strategy')
+    values = np.asarray(data, dtype=np.float64)
+    return pd.DataFrame(values[:, None] if values.ndim == 1 else values)
+
+
+def _ratio(num, den):
+    num, den = np.broadcast_arrays(np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64))
+    return np.divide(num, den, out=np.zeros(num.shape), where=den != 0)
+
+
+def _window_sums(x: np.ndarray, window: int) -> np.ndarray:
+    """Trailing `window`-row sums of each column (NaN until the first full window)."""
+    prefix = np.zeros((len(x) + 1, x.shape[1]))
+    np.cumsum(x, axis=0, out=prefix[1:])
+    out = np.full(x.shape, np.nan)
+    out[window - 1:] = prefix[window:] - prefix[:-window]
+    return out
+
+
+def _log_growth(r: np.ndarray) -> np.ndarray:
+    # A -100% period is floored just above total loss so log sums stay finite
+    return np.log1p(np.maximum(r, -1 + 1e-12))
+
+
+def _log_equity(r: np.ndarray) -> np.ndarray:
+    """Log equity with a leading 0 row (the starting equity), shape (rows + 1, strategies)."""
+    log_equity = np.zeros((len(r) + 1, r.shape[1]))
+    np.cumsum(_log_growth(r), axis=0, out=log_equity[1:])
+    return log_equity
+
+
+def _drawdowns(log_equity: np.ndarray, axis: int = 0):
+    """Max drawdown and longest underwater stretch (in periods) along `axis`."""
+    peak = np.maximum.accumulate(log_equity, axis=axis)
+    max_drawdown = np.expm1((log_equity - peak).min(axis=axis))
+    shape = [1] * log_equity.ndim
+    shape[axis] = log_equity.shape[axis]
+    idx = np.arange(log_equity.shape[axis]).reshape(shape)
+    last_peak = np.maximum.accumulate(np.where(log_equity < peak, 0, idx), axis=axis)
+    return max_drawdown, (idx - last_peak).max(axis=axis)
+
+
+def _prepare(returns, positions):
+    frame = _as_frame(returns)
+    values = frame.to_numpy(dtype=np.float64)
+    valid = ~np.isnan(values)
+    r = np.where(valid, values, 0.0)
+    changes = None
+    if positions is not None:
+        held = _as_frame(positions).to_numpy(dtype=np.float64)
+        if held.shape != values.shape:
+            raise ValueError(f"positions shape {held.shape} does not match returns shape {values.shape}")
+        held = np.nan_to_num(held)
+        changes = np.abs(np.diff(held, axis=0, prepend=0.0))  # entering from flat counts
+    return frame, r, valid, changes
 
-    cumulative = np.cumprod(1 + returns)
-    peak = np.maximum.accumulate(cumulative)
-    drawdown = (cumulative - peak) / peak
-    max_drawdown = np.min(drawdown)
 
-    win_rate = np.sum(returns > 0) / len(returns)
+def performance_summary(returns, positions=None, periods_per_year: int = PERIODS_PER_YEAR) -> pd.DataFrame:
+    """
+    Whole-sample metrics for every strategy.
 
+    Args:
+        returns: Per-period returns, rows are timestamps and columns strategies
+            (a Series or 1-D array is a single strategy)
+        positions: Optional holdings of the same shape, for turnover
+        periods_per_year: Annualization factor (252 for daily bars)
+
+    Returns:
+        DataFrame indexed by strategy with SUMMARY_COLUMNS. Volatility, Sharpe,
+        Sortino, CAGR and turnover are annualized; drawdown duration is in periods.
+    """
+    frame, r, valid, changes = _prepare(returns, positions)
+    n = valid.sum(axis=0)
+    mean = _ratio(r.sum(axis=0), n)
+    std = np.sqrt(_ratio((np.where(valid, r - mean, 0.0) ** 2).sum(axis=0), n))
+    downside = np.sqrt(_ratio((np.minimum(r, 0.0) ** 2).sum(axis=0), n))
+    log_equity = _log_equity(r)
+    max_drawdown, duration = _drawdowns(log_equity)
+    cagr = np.expm1(_ratio(log_equity[-1] * periods_per_year, n))
+
+    annual = np.sqrt(periods_per_year)
+    summary = pd.DataFrame({
+        'periods': n,
+        'total_return': np.expm1(log_equity[-1]),
+        'cagr': cagr,
+        'volatility': std * annual,
+        'sharpe': _ratio(mean, std) * annual,
+        'sortino': _ratio(mean, downside) * annual,
+        'calmar': _ratio(cagr, -max_drawdown),
+        'max_drawdown': max_drawdown,
+        'max_drawdown_duration': duration,
+        'turnover': (changes.sum(axis=0) / max(len(r), 1) * periods_per_year
+                     if changes is not None else np.nan),
+        'hit_rate': _ratio((r > 0).sum(axis=0), n),
+    }, index=frame.columns)
+    summary.index.name = 'strategy'
+    return summary
+
+
+def _rolling_max_drawdown(log_equity: np.ndarray, window: int) -> np.ndarray:
+    """
+    Max drawdown of each trailing window in O(rows): the log equity is cut into
+    blocks one window long, so every window is a block suffix followed by a
+    block prefix, and its worst fall lies in the suffix, in the prefix, or
+    from the suffix's high to the prefix's low.
+    """
+    size = window + 1  # a window's returns plus the equity it started from
+    rows, strategies = log_equity.shape[0] - 1, log_equity.shape[1]
+    out = np.full((rows, strategies), np.nan)
+    if rows < window:
+        return out
+    blocks = -(-len(log_equity) // size)
+    padded = np.pad(log_equity, ((0, blocks * size - len(log_equity)), (0, 0)), mode='edge')
+    e = padded.reshape(blocks, size, strategies)
+    reverse = e[:, ::-1]
+
+    prefix_max = np.maximum.accumulate(e, axis=1)
+    prefix_min = np.minimum.accumulate(e, axis=1).reshape(-1, strategies)
+    prefix_fall = np.maximum.accumulate(prefix_max - e, axis=1).reshape(-1, strategies)
+    suffix_min = np.minimum.accumulate(reverse, axis=1)
+    suffix_max = np.maximum.accumulate(reverse, axis=1)[:, ::-1].reshape(-1, strategies)
+    suffix_fall = np.maximum.accumulate(reverse - suffix_min, axis=1)[:, ::-1].reshape(-1, strategies)
+
+    # Window starting at equity point s ends at b = s + window and is reported on row b - 1
+    s = np.arange(rows - window + 1)
+    b = s + window
+    fall = np.maximum(prefix_fall[b], np.maximum(suffix_fall[s], suffix_max[s] - prefix_min[b]))
+    aligned = (s % size == 0)[:, None]  # window is exactly one block: the prefix covers it
+    out[window - 1:] = -np.expm1(-np.where(aligned, prefix_fall[b], fall))
+    return -out
+
+
+def _rolling_drawdown_duration(log_equity: np.ndarray, window: int) -> np.ndarray:
+    rows, strategies = log_equity.shape[0] - 1, log_equity.shape[1]
+    out = np.full((rows, strategies), np.nan)
+    if rows < window:
+        return out
+    windows = sliding_window_view(log_equity, window + 1, axis=0)
+    chunk = max(1, _DRAWDOWN_CHUNK // (strategies * (window + 1)))
+    for start in range(0, len(windows), chunk):
+        block = windows[start:start + chunk]
+        out[window - 1 + start:window - 1 + start + len(block)] = _drawdowns(block, axis=2)[1]
+    return out
+
+
+def rolling_metrics(returns, window: int, positions=None, periods_per_year: int = PERIODS_PER_YEAR,
+                    metrics: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Trailing-window versions of the summary metrics, for every row and strategy.
+
+    Args:
+        returns: Per-period returns, rows are timestamps and columns strategies
+        window: Rows per window; rows before the first full window are NaN
+        positions: Optional holdings of the same shape, for turnover
+        periods_per_year: Annualization factor
+        metrics: Subset of ROLLING_COLUMNS to compute (default all)
+
+    Returns:
+        DataFrame on the returns' index with (metric, strategy) columns,
+        so rolling_metrics(...)['sharpe'] is a timestamps x strategies frame
+    """
+    metrics = list(metrics or ROLLING_COLUMNS)
+    unknown = set(metrics) - set(ROLLING_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown rolling metrics: {sorted(unknown)}")
+    if window < 1:
+        raise ValueError("window must be at least 1")
+
+    frame, r, valid, changes = _prepare(returns, positions)
+    out = {}
+    n = _window_sums(valid.astype(np.float64), window)
+    mean = _ratio(_window_sums(r, window), n)
+    var = np.maximum(_ratio(_window_sums(r * r, window), n) - mean * mean, 0.0)
+    std = np.sqrt(var)
+    annual = np.sqrt(periods_per_year)
+    log_growth = _window_sums(_log_growth(r), window)
+    cagr = np.expm1(_ratio(log_growth * periods_per_year, n))
+
+    out['return'] = np.expm1(log_growth)
+    out['volatility'] = std * annual
+    out['sharpe'] = _ratio(mean, std) * annual
+    if 'sortino' in metrics:
+        downside = np.sqrt(_ratio(_window_sums(np.minimum(r, 0.0) ** 2, window), n))
+        out['sortino'] = _ratio(mean, downside) * annual
+    if {'max_drawdown', 'max_drawdown_duration', 'calmar'} & set(metrics):
+        log_equity = _log_equity(r)
+        out['max_drawdown'] = _rolling_max_drawdown(log_equity, window)
+        out['calmar'] = _ratio(cagr, -out['max_drawdown'])
+        if 'max_drawdown_duration' in metrics:
+            out['max_drawdown_duration'] = _rolling_drawdown_duration(log_equity, window)
+    if 'turnover' in metrics:
+        out['turnover'] = (_window_sums(changes, window) / window * periods_per_year
+                           if changes is not None else np.full(r.shape, np.nan))
+    if 'hit_rate' in metrics:
+        out['hit_rate'] = _ratio(_window_sums((r > 0).astype(np.float64), window), n)
+
+    # Ratios built from NaN sums came out 0; rows without a full window stay NaN
+    head = min(window - 1, len(r))
+    blocks = []
+    for name in metrics:
+        values = out[name]
+        values[:head] = np.nan
+        blocks.append(values)
+    columns = pd.MultiIndex.from_product([metrics, frame.columns], names=['metric', 'strategy'])
+    data = np.concatenate(blocks, axis=1) if blocks else np.empty((len(r), 0))
+    return pd.DataFrame(data, index=frame.index, columns=columns)
+
+
+def compute_metrics(returns: list[float]):
+    """Headline metrics for a single return series (0 for an empty one)."""
+    row = performance_summary(np.asarray(returns, dtype=np.float64).ravel()).iloc[0]
     return {
-        'Sharpe Ratio': round(sharpe, 3),
-        'Max Drawdown': round(max_drawdown, 3),
-        'Win Rate': round(win_rate, 3)
+        'Sharpe Ratio': round(float(row['sharpe']), 3),
+        'Sortino Ratio': round(float(row['sortino']), 3),
+        'Calmar Ratio': round(float(row['calmar']), 3),
+        'Max Drawdown': round(float(row['max_drawdown']), 3),
+        'Max Drawdown Duration': int(row['max_drawdown_duration']),
+        'Win Rate': round(float(row['hit_rate']), 3),
     }
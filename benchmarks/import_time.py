@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# benchmarks/import_time.py
+
+"""
+Import-time benchmark for the main entry points, using `python -X importtime`.
+
+Each entry point is imported in a fresh interpreter. The benchmark reports the
+cumulative import time and fails if a broker SDK the entry point does not use
+gets imported, or if a saved baseline is exceeded by more than the tolerance.
+
+Usage:
+    python benchmarks/import_time.py                      # report + forbidden-import check
+    python benchmarks/import_time.py --save baseline.json
+    python benchmarks/import_time.py --baseline baseline.json --tolerance 0.25
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# name -> (code run in a fresh interpreter, top-level packages it must not import)
+ENTRY_POINTS = {
+    'brokers': ("import brokers", {'ib_insync', 'alpaca'}),
+    'main_ibkr': ("import execution.scheduler; "
+                  "from brokers.broker_factory import load_broker_class; load_broker_class('ibkr')",
+                  {'alpaca'}),
+    'main_alpaca': ("import execution.scheduler; "
+                    "from brokers.broker_factory import load_broker_class; load_broker_class('alpaca')",
+                    {'ib_insync'}),
+    'dashboard_deps': ("import models.predict, utils.perf_ring, backtest.backtest_engine", {'ib_insync', 'alpaca'}),
+    'backtest': ("import backtest.backtest_engine, backtest.metrics", {'ib_insync', 'alpaca'}),
+}
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$')
+
+
+def measure(code):
+    """
+    Run `code` under -X importtime and return (total_ms, set of imported top-level packages).
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed for {code!r}:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    packages = set()
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match is None:
+            continue
+        _, cumulative, indent, name = match.groups()
+        packages.add(name.split('.')[0])
+        if len(indent) == 1:  # top-level import: cumulative already includes its children
+            total_us += int(cumulative)
+    return total_us / 1000, packages
+
+
+def run(repeat=3):
+    results = {}
+    failures = []
+    for name, (code, forbidden) in ENTRY_POINTS.items():
+        runs = [measure(code) for _ in range(repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        leaked = sorted(forbidden & runs[0][1])
+        results[name] = round(best_ms, 1)
+        status = "✅" if not leaked else "❌"
+        print(f"{status} {name:<16} {best_ms:8.1f} ms" + (f"  imports {', '.join(leaked)}" if leaked else ""))
+        if leaked:
+            failures.append(f"{name} imports {', '.join(leaked)}")
+    return results, failures
+
+
+def compare(results, baseline, tolerance, min_delta_ms=20.0):
+    failures = []
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if ms > base * (1 + tolerance) and ms - base > min_delta_ms:
+            failures.append(f"{name}: {ms:.1f} ms vs baseline {base:.1f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per entry point (best is kept)")
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against this JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown vs baseline")
+    args = parser.parse_args()
+
+    print("⏱️ Import-time benchmark")
+    print("=" * 60)
+    results, failures = run(args.repeat)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(results, json.load(f), args.tolerance)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+
+    print("=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ No import-time regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
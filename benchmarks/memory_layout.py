@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# benchmarks/memory_layout.py
+
+"""
+Memory benchmark for contract, quote and signal representations.
+
+Compares the dict-per-row layout the live path used to carry with the
+compact types (slotted OptionContract / Signal, struct-of-arrays
+ContractTable / QuoteBatch):
+
+  contracts  traced bytes and allocated blocks for N contracts, scaled to 1M
+  hot loop   one live cycle (quotes -> model rows -> signals) for S symbols:
+             time, peak traced bytes (transient churn) and blocks still
+             allocated by the cycle's output
+
+Usage:
+    python benchmarks/memory_layout.py
+    python benchmarks/memory_layout.py --contracts 1000000 --symbols 2000 --save memory.json
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pandas as pd
+
+from brokers import SimBroker
+from brokers.base_broker import OPTION_CHAIN_COLUMNS
+from brokers.contracts import OptionContract, ContractTable
+from brokers.data_fetcher import build_option_rows_from_batch
+from models.predict import Signal
+
+PER = 1_000_000
+
+
+def _measure(build):
+    """Run build() and return (result, traced bytes held, blocks held, peak traced bytes, seconds)."""
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    try:
+        result = build()
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - blocks_before
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+    return result, current, blocks, peak, elapsed
+
+
+def _chain_columns(n, seed=0):
+    """Seeded synthetic option chain with OPTION_CHAIN_COLUMNS, as Python lists."""
+    rng = np.random.default_rng(seed)
+    symbols = [f"SYM{i}" for i in range(500)]
+    expiries = ['20250117', '20250124', '20250131', '20250207']
+    cols = {
+        'symbol': [symbols[i] for i in rng.integers(0, len(symbols), n)],
+        'expiry': [expiries[i] for i in rng.integers(0, len(expiries), n)],
+        'right': ['C' if c else 'P' for c in rng.integers(0, 2, n)],
+        'strike': (rng.integers(20, 500, n) * 1.0).tolist(),
+    }
+    for name in ('bid', 'ask', 'last', 'iv', 'delta', 'gamma', 'theta', 'vega'):
+        cols[name] = rng.random(n).round(4).tolist()
+    cols['timestamp'] = (1.7e9 + rng.random(n)).tolist()
+    cols['occ_symbol'] = [f"{s}{e[2:]}{r}{int(k * 1000):08d}" for s, e, r, k in
+                          zip(cols['symbol'], cols['expiry'], cols['right'], cols['strike'])]
+    return cols
+
+
+def bench_contracts(n):
+    cols = _chain_columns(n)
+    keys = OPTION_CHAIN_COLUMNS
+    identity = ('symbol', 'expiry', 'right', 'strike')
+    frame = pd.DataFrame(cols, columns=keys)
+
+    cases = {
+        'dict row (14 fields)': lambda: [dict(zip(keys, values)) for values in zip(*(cols[k] for k in keys))],
+        'ContractTable (14 fields)': lambda: ContractTable.from_frame(frame),
+        'dict contract (4 fields)': lambda: [dict(zip(identity, v)) for v in zip(*(cols[k] for k in identity))],
+        'OptionContract (4 fields)': lambda: [OptionContract(*v) for v in zip(*(cols[k] for k in identity))],
+    }
+    results = {}
+    for name, build in cases.items():
+        held, current, blocks, _, elapsed = _measure(build)
+        del held
+        results[name] = {
+            'mb_per_1m': round(current * PER / n / 1e6, 1),
+            'blocks_per_contract': round(blocks / n, 2),
+            'build_s_per_1m': round(elapsed * PER / n, 2),
+        }
+    return results
+
+
+# --- the dict-based live path as it was before the compact types ---
+
+def _dict_row(symbol, last_price):
+    return {
+        "symbol": symbol,
+        "delta": round(np.random.uniform(0.3, 0.7), 2),
+        "gamma": round(np.random.uniform(0.01, 0.15), 3),
+        "vega": round(np.random.uniform(0.05, 0.25), 3),
+        "theta": round(np.random.uniform(-0.1, -0.01), 3),
+        "iv": round(np.random.uniform(0.2, 0.5), 3),
+        "underlying_close": last_price if last_price else 100.0,
+        "volume": int(np.random.uniform(1000, 5000)),
+        "direction": 0,
+        "underlying_return_1d": 0,
+    }
+
+
+def _dict_cycle(broker, symbols, confidences):
+    rows = [_dict_row(s, broker.fetch_market_data(s).get('last_price', 100.0)) for s in symbols]
+    df = pd.DataFrame(rows)
+    return [{'symbol': row['symbol'], 'prediction': 'CALL', 'confidence': c}
+            for (_, row), c in zip(df.iterrows(), confidences)]
+
+
+def _compact_cycle(broker, symbols, confidences):
+    df = build_option_rows_from_batch(broker.fetch_quotes(symbols))
+    return [Signal(s, 'CALL', c) for s, c in zip(df['symbol'].tolist(), confidences)]
+
+
+def bench_hot_loop(num_symbols, cycles):
+    symbols = [f"SYM{i}" for i in range(num_symbols)]
+    confidences = np.random.default_rng(0).random(num_symbols).tolist()
+    results = {}
+    for name, cycle in (('dict path', _dict_cycle), ('compact path', _compact_cycle)):
+        broker = SimBroker(seed=0)
+        broker.connect()
+        cycle(broker, symbols, confidences)  # warm up RNGs and caches
+        times, peaks, blocks = [], [], []
+        for _ in range(cycles):
+            out, _, held_blocks, peak, elapsed = _measure(lambda: cycle(broker, symbols, confidences))
+            del out
+            times.append(elapsed)
+            peaks.append(peak)
+            blocks.append(held_blocks)
+        results[name] = {
+            'cycle_ms': round(float(np.median(times)) * 1000, 2),
+            'peak_kb': round(float(np.median(peaks)) / 1024, 1),
+            'output_blocks': int(np.median(blocks)),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--contracts', type=int, default=200_000, help="contracts built per layout")
+    parser.add_argument('--symbols', type=int, default=500, help="symbols per hot-loop cycle")
+    parser.add_argument('--cycles', type=int, default=20, help="hot-loop cycles (median is kept)")
+    parser.add_argument('--save', help="write results to this JSON file")
+    args = parser.parse_args()
+
+    print("🧠 Memory layout benchmark")
+    print("=" * 72)
+    contracts = bench_contracts(args.contracts)
+    print(f"{'contracts':<28}{'MB / 1M':>12}{'blocks/contract':>18}{'build s / 1M':>14}")
+    for name, r in contracts.items():
+        print(f"{name:<28}{r['mb_per_1m']:>12.1f}{r['blocks_per_contract']:>18.2f}{r['build_s_per_1m']:>14.2f}")
+
+    print("-" * 72)
+    hot = bench_hot_loop(args.symbols, args.cycles)
+    print(f"{f'hot loop ({args.symbols} symbols)':<28}{'cycle ms':>12}{'peak KB':>18}{'output blocks':>14}")
+    for name, r in hot.items():
+        print(f"{name:<28}{r['cycle_ms']:>12.2f}{r['peak_kb']:>18.1f}{r['output_blocks']:>14}")
+    print("=" * 72)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'contracts': contracts, 'hot_loop': hot}, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# benchmarks/pipeline.py
+
+"""
+End-to-end benchmark suite for the trading pipeline, with regression gates.
+
+Every dataset comes from utils/generate_fake_data.py with a fixed seed, so two
+runs on the same machine measure the same work:
+
+  features    prepare_features over N rows, base and rolling feature sets
+  model_load  reading the model from disk: compact artifact vs joblib pickle
+  inference   predict_proba at batch sizes 1 .. 10k, compact vs sklearn
+  greeks      filter_trades_by_greeks over N rows
+  backtest    backtest_engine.simulate over the N-row dataset (cached features)
+  cycle       a full SimBroker trading cycle: fetch -> predict -> orders
+
+Each case reports the median, min and max of its runs in ms (a run repeats
+the case enough times to take ~20ms, so sub-millisecond cases are not timer
+noise) and, where it processes rows, rows per second. Results are saved as JSON with the machine,
+library versions and git commit they came from; `compare` flags cases whose
+median slowed by more than the threshold against a baseline.
+
+Usage:
+    python benchmarks/pipeline.py run --save baseline.json
+    python benchmarks/pipeline.py run --quick --only inference,greeks
+    python benchmarks/pipeline.py run --save new.json --baseline baseline.json
+    python benchmarks/pipeline.py compare baseline.json new.json --threshold 0.15
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from brokers import SimBroker
+from brokers.data_fetcher import fetch_live_option_rows
+from backtest.backtest_engine import simulate
+from execution.order_manager import OrderManager
+from execution.scheduler import create_signal_store, trade_on_predictions
+from models.artifact import export_model
+from models.predict import read_model, predict_from_live_data
+from models.train_model import make_model
+from strategies.contract_selector import ContractSelector
+from strategies.greeks_optimizer import filter_trades_by_greeks
+from utils.feature_engineering import prepare_features, FEATURE_COLUMNS
+from utils.feature_store import FeatureStore
+from utils.generate_fake_data import generate_fake_option_data
+from utils.rolling_features import ROLLING_FEATURE_COLUMNS
+
+SEED = 42
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000)
+# Full run / --quick
+ROWS = (100_000, 10_000)
+TRAIN_ROWS = (20_000, 5_000)
+CYCLE_SYMBOLS = ((50, 500), (50,))
+MODEL_PARAMS = {'n_estimators': 100, 'max_depth': 16, 'min_samples_leaf': 5}
+
+MIN_RUN_SEC = 0.02
+
+
+def _time(fn, repeat):
+    """Median/min/max ms of one fn() call, over `repeat` runs of enough calls to last MIN_RUN_SEC."""
+    fn()  # first-call costs (imports, caches) are not what is measured
+    start = time.perf_counter()
+    fn()
+    number = max(1, int(MIN_RUN_SEC / max(time.perf_counter() - start, 1e-9)))
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) * 1000 / number)
+    return {'median_ms': float(np.median(runs)), 'min_ms': min(runs), 'max_ms': max(runs),
+            'runs': repeat, 'number': number}
+
+
+class Fixture:
+    """Seeded datasets and models shared by the benchmarks, built once in a temp directory."""
+
+    def __init__(self, tmp, quick=False):
+        self.tmp = tmp
+        self.rows = ROWS[quick]
+        self.cycle_symbols = CYCLE_SYMBOLS[quick]
+        self.data = generate_fake_option_data(self.rows, seed=SEED)
+        self.data_path = os.path.join(tmp, 'historical_data.csv')
+        self.data.to_csv(self.data_path, index=False)
+
+        train = self.data[:TRAIN_ROWS[quick]]
+        self.model = make_model('rf', MODEL_PARAMS).fit(prepare_features(train.copy()), train['direction'])
+        self.cmodel_path = os.path.join(tmp, 'model.cmodel')
+        self.pickle_path = os.path.join(tmp, 'model.pkl')
+        export_model(self.model, self.cmodel_path)
+        joblib.dump(self.model, self.pickle_path)
+        self.compact = read_model(self.cmodel_path)
+        self.X = prepare_features(self.data.copy())
+
+
+def bench_features(fx):
+    rolling = FEATURE_COLUMNS + list(ROLLING_FEATURE_COLUMNS)
+    for rows in (fx.rows // 10, fx.rows):
+        df = fx.data[:rows]
+        yield f'base.rows_{rows}', rows, lambda df=df: prepare_features(df.copy())
+        yield f'rolling.rows_{rows}', rows, lambda df=df: prepare_features(df.copy(), rolling)
+
+
+def bench_model_load(fx):
+    yield 'compact', None, lambda: read_model(fx.cmodel_path)
+    yield 'joblib', None, lambda: read_model(fx.pickle_path)
+
+
+def bench_inference(fx):
+    for size in BATCH_SIZES:
+        X = fx.X[:size]
+        yield f'compact.batch_{size}', size, lambda X=X: fx.compact.predict_proba(X)
+        yield f'sklearn.batch_{size}', size, lambda X=X: fx.model.predict_proba(X)
+
+
+def bench_greeks(fx):
+    for rows in (fx.rows // 10, fx.rows):
+        df = fx.data[:rows]
+        yield f'rows_{rows}', rows, lambda df=df: filter_trades_by_greeks(df)
+
+
+def bench_backtest(fx):
+    store = FeatureStore(os.path.join(fx.tmp, 'features'))
+    yield f'rows_{fx.rows}', fx.rows, lambda: simulate(fx.data_path, fx.cmodel_path, store)
+
+
+def bench_cycle(fx):
+    for count in fx.cycle_symbols:
+        broker = SimBroker(seed=SEED)
+        broker.connect()
+        orders = OrderManager(broker)
+        signals = create_signal_store(broker, orders)
+        selector = ContractSelector(broker)
+        symbols = [f'S{i:04d}' for i in range(count)]
+
+        def cycle():
+            df = fetch_live_option_rows(broker, symbols)
+            predictions = predict_from_live_data(df, fx.cmodel_path)
+            trade_on_predictions(orders, predictions, signals, selector,
+                                 dict(zip(df['symbol'], df['underlying_close'])))
+
+        yield f'symbols_{count}', count, cycle
+
+
+BENCHMARKS = {
+    'features': bench_features,
+    'model_load': bench_model_load,
+    'inference': bench_inference,
+    'greeks': bench_greeks,
+    'backtest': bench_backtest,
+    'cycle': bench_cycle,
+}
+
+
+def _git_commit():
+    try:
+        head = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return head + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_metadata():
+    """Where and with what a run was measured."""
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'git_commit': _git_commit(),
+    }
+
+
+def run(only=None, repeat=5, quick=False):
+    """
+    Run the benchmarks (all, or those named in `only`).
+
+    Returns:
+        Dict with 'meta' (machine_metadata), 'config' and 'results' {benchmark.case: timings}
+    """
+    names = list(only or BENCHMARKS)
+    unknown = sorted(set(names) - set(BENCHMARKS))
+    if unknown:
+        raise ValueError(f"Unknown benchmark(s): {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        print("🧪 Building seeded datasets and models...")
+        fx = Fixture(tmp, quick)
+        for name in names:
+            for case, rows, fn in BENCHMARKS[name](fx):
+                with contextlib.redirect_stdout(devnull):  # the trading cycle prints per order
+                    timing = _time(fn, repeat)
+                throughput = ''
+                if rows:
+                    timing['rows'] = rows
+                    timing['rows_per_sec'] = rows / timing['median_ms'] * 1000
+                    throughput = f", {timing['rows_per_sec']:,.0f} rows/s"
+                results[f'{name}.{case}'] = timing
+                print(f"  {f'{name}.{case}':<32} {timing['median_ms']:10.3f} ms  "
+                      f"(min {timing['min_ms']:.3f}{throughput})")
+    config = {'seed': SEED, 'rows': fx.rows, 'quick': quick, 'repeat': repeat}
+    return {'meta': machine_metadata(), 'config': config, 'results': results}
+
+
+def compare(current, baseline, threshold=0.15, min_delta_ms=0.05):
+    """
+    Compare two run() outputs case by case, on median time.
+
+    A case regresses when it is more than `threshold` (a fraction) and more
+    than `min_delta_ms` slower than the baseline.
+
+    Returns:
+        List of regression messages (empty if none)
+    """
+    dataset = ('seed', 'rows', 'quick')
+    if any(current['config'].get(k) != baseline['config'].get(k) for k in dataset):
+        print("⚠️ Baseline used different datasets; results are not like for like: "
+              + ', '.join(f"{k} {baseline['config'].get(k)} -> {current['config'].get(k)}" for k in dataset))
+    machine = ('machine', 'processor', 'cpu_count', 'python')
+    if any(current['meta'].get(k) != baseline['meta'].get(k) for k in machine):
+        print("⚠️ Baseline was measured on a different machine or Python: "
+              + ', '.join(f"{k} {baseline['meta'].get(k)} -> {current['meta'].get(k)}"
+                          for k in machine if current['meta'].get(k) != baseline['meta'].get(k)))
+
+    failures = []
+    print(f"{'case':<34} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, timing in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"  {name:<32} {'-':>12} {timing['median_ms']:10.3f}ms {'new':>8}")
+            continue
+        before, after = base['median_ms'], timing['median_ms']
+        change = after / before - 1
+        regressed = change > threshold and after - before > min_delta_ms
+        icon = '❌' if regressed else ('🚀' if change < -threshold else '  ')
+        print(f"{icon}{name:<32} {before:10.3f}ms {after:10.3f}ms {change:+8.1%}")
+        if regressed:
+            failures.append(f"{name}: {after:.3f} ms vs baseline {before:.3f} ms ({change:+.0%})")
+    for name in sorted(set(baseline['results']) - set(current['results'])):
+        print(f"  {name:<32} (not run)")
+    return failures
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _report(failures, threshold):
+    print("=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print(f"✅ No regressions beyond {threshold:.0%}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('--only', help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    run_parser.add_argument('--repeat', type=int, default=5, help="timed runs per case (median is compared)")
+    run_parser.add_argument('--quick', action='store_true', help="smaller datasets, for a smoke run")
+    run_parser.add_argument('--save', help="write results to this JSON file")
+    run_parser.add_argument('--baseline', help="compare against this JSON file")
+
+    compare_parser = commands.add_parser('compare', help="compare two saved results")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+
+    for p in (run_parser, compare_parser):
+        p.add_argument('--threshold', type=float, default=0.15, help="allowed slowdown vs baseline (fraction)")
+        p.add_argument('--min-delta-ms', type=float, default=0.05,
+                       help="slowdowns smaller than this are never flagged")
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        print("⚖️ Pipeline benchmark comparison")
+        print("=" * 60)
+        failures = compare(_load(args.current), _load(args.baseline), args.threshold, args.min_delta_ms)
+        return _report(failures, args.threshold)
+
+    print("⏱️ Pipeline benchmark")
+    print("=" * 60)
+    current = run(args.only.split(',') if args.only else None, args.repeat, args.quick)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+    failures = []
+    if args.baseline:
+        print("=" * 60)
+        failures = compare(current, _load(args.baseline), args.threshold, args.min_delta_ms)
+    return _report(failures, args.threshold)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
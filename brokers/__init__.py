@@ -1,8 +1,28 @@
 # brokers/__init__.py
 
+import importlib
 from .base_broker import BaseBroker
-from .ibkr_broker import IBKRBroker
-from .alpaca_broker import AlpacaBroker
-from .broker_factory import BrokerFactory
+from .quote_batch import QuoteBatch
+from .broker_factory import BrokerFactory, register_broker
 
-__all__ = ['BaseBroker', 'IBKRBroker', 'AlpacaBroker', 'BrokerFactory']
+# Concrete brokers are imported on first access, so code that uses one broker
+# does not pay for (or need) the other brokers' SDKs.
+_LAZY_EXPORTS = {
+    'IBKRBroker': '.ibkr_broker',
+    'AlpacaBroker': '.alpaca_broker',
+    'SimBroker': '.sim_broker',
+    'ReplayBroker': '.replay_broker',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['BaseBroker', 'QuoteBatch', 'IBKRBroker', 'AlpacaBroker', 'SimBroker',
+           'ReplayBroker', 'BrokerFactory', 'register_broker']
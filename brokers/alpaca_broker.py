@@ -1,27 +1,80 @@
 # brokers/alpaca_broker.py
 
-from typing import Dict, Any, Optional
-from .base_broker import BaseBroker
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List
+import pandas as pd
+from utils.helpers import parse_occ_symbol, build_occ_symbol, session_timestamp
+from .base_broker import (
+    BaseBroker, QuoteBatch, QuoteCallback, OrderUpdateCallback, OPTION_CHAIN_COLUMNS, BAR_COLUMNS,
+    ORDER_ACKED, ORDER_PARTIALLY_FILLED, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED,
+)
 
 try:
     from alpaca.trading.client import TradingClient
     from alpaca.trading.requests import MarketOrderRequest
-    from alpaca.trading.enums import OrderSide, TimeInForce
-    from alpaca.data.historical import StockHistoricalDataClient
-    from alpaca.data.requests import StockLatestQuoteRequest
+    from alpaca.trading.enums import OrderSide, TimeInForce, ContractType
+    from alpaca.trading.stream import TradingStream
+    from alpaca.data.historical import StockHistoricalDataClient, OptionHistoricalDataClient
+    from alpaca.data.requests import (StockLatestQuoteRequest, StockBarsRequest, OptionSnapshotRequest,
+                                      OptionChainRequest)
+    from alpaca.data.timeframe import TimeFrame
+    from alpaca.data.live import StockDataStream
     ALPACA_AVAILABLE = True
 except ImportError:
+    # Reported when an AlpacaBroker is created, not at import time
     ALPACA_AVAILABLE = False
-    print("⚠️ alpaca-py not installed. Install with: pip install alpaca-py")
+
+# Alpaca trade update event -> normalized status (pending_new etc. are not reported)
+_ALPACA_ORDER_EVENTS = {
+    'new': ORDER_ACKED,
+    'accepted': ORDER_ACKED,
+    'partial_fill': ORDER_PARTIALLY_FILLED,
+    'fill': ORDER_FILLED,
+    'canceled': ORDER_CANCELLED,
+    'expired': ORDER_CANCELLED,
+    'rejected': ORDER_REJECTED,
+}
+
+OPTION_SNAPSHOT_CHUNK = 100  # max symbols per multi-symbol snapshot request
+
+
+def _snapshots_to_frame(snapshots: Dict[str, Any]) -> pd.DataFrame:
+    """Flatten alpaca-py OptionsSnapshot objects keyed by OCC symbol into OPTION_CHAIN_COLUMNS."""
+    columns = {name: [] for name in OPTION_CHAIN_COLUMNS}
+    nan = float('nan')
+    for occ, snap in snapshots.items():
+        parsed = parse_occ_symbol(occ)
+        if parsed is None:
+            continue
+        quote, trade, greeks = snap.latest_quote, snap.latest_trade, snap.greeks
+        columns['occ_symbol'].append(occ)
+        columns['symbol'].append(parsed[0])
+        columns['expiry'].append(parsed[1])
+        columns['right'].append(parsed[2])
+        columns['strike'].append(parsed[3])
+        columns['bid'].append(quote.bid_price if quote else nan)
+        columns['ask'].append(quote.ask_price if quote else nan)
+        columns['last'].append(trade.price if trade else nan)
+        columns['iv'].append(snap.implied_volatility if snap.implied_volatility is not None else nan)
+        columns['delta'].append(greeks.delta if greeks else nan)
+        columns['gamma'].append(greeks.gamma if greeks else nan)
+        columns['theta'].append(greeks.theta if greeks else nan)
+        columns['vega'].append(greeks.vega if greeks else nan)
+        columns['timestamp'].append(quote.timestamp.timestamp() if quote else nan)
+    return pd.DataFrame(columns, columns=OPTION_CHAIN_COLUMNS)
 
 
 class AlpacaBroker(BaseBroker):
     """
     Alpaca Markets implementation of the broker interface.
-    Note: Alpaca primarily supports stock trading. Options support is limited.
+    
+    Options are traded by OCC symbol; the account needs options trading enabled.
     """
     
-    def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None, paper: bool = True):
+    def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None, paper: bool = True,
+                 url_override: Optional[str] = None):
         """
         Initialize Alpaca broker connection parameters.
         
@@ -29,6 +82,8 @@ class AlpacaBroker(BaseBroker):
             api_key: Alpaca API key
             secret_key: Alpaca secret key
             paper: Use paper trading (True) or live trading (False)
+            url_override: Base URL for all REST clients, e.g. a local
+                brokers.alpaca_stub server for offline testing
         """
         if not ALPACA_AVAILABLE:
             raise ImportError("alpaca-py package is required. Install with: pip install alpaca-py")
@@ -36,9 +91,33 @@ class AlpacaBroker(BaseBroker):
         self.api_key = api_key
         self.secret_key = secret_key
         self.paper = paper
+        self.url_override = url_override
         self.trading_client = None
         self.data_client = None
+        self.option_data_client = None
         self._connected = False
+        self._stream = None
+        self._stream_thread = None
+        self._trade_stream = None
+        self._trade_stream_thread = None
+    
+    @classmethod
+    def from_env(cls, **kwargs) -> 'AlpacaBroker':
+        """
+        Create Alpaca broker instance with defaults from environment variables.
+        """
+        api_key = kwargs.get('api_key', os.getenv('ALPACA_API_KEY'))
+        secret_key = kwargs.get('secret_key', os.getenv('ALPACA_SECRET_KEY'))
+        paper = kwargs.get('paper', os.getenv('ALPACA_PAPER', 'true').lower() == 'true')
+        url_override = kwargs.get('url_override', os.getenv('ALPACA_URL_OVERRIDE') or None)
+        
+        if not api_key or not secret_key:
+            raise ValueError(
+                "Alpaca API credentials required. Set ALPACA_API_KEY and ALPACA_SECRET_KEY "
+                "environment variables or pass api_key and secret_key parameters."
+            )
+        
+        return cls(api_key=api_key, secret_key=secret_key, paper=paper, url_override=url_override)
     
     def connect(self) -> None:
         """
@@ -51,11 +130,18 @@ class AlpacaBroker(BaseBroker):
             self.trading_client = TradingClient(
                 api_key=self.api_key,
                 secret_key=self.secret_key,
-                paper=self.paper
+                paper=self.paper,
+                url_override=self.url_override
             )
             self.data_client = StockHistoricalDataClient(
                 api_key=self.api_key,
-                secret_key=self.secret_key
+                secret_key=self.secret_key,
+                url_override=self.url_override
+            )
+            self.option_data_client = OptionHistoricalDataClient(
+                api_key=self.api_key,
+                secret_key=self.secret_key,
+                url_override=self.url_override
             )
             
             # Test connection by getting account info
@@ -76,6 +162,7 @@ class AlpacaBroker(BaseBroker):
         self._connected = False
         self.trading_client = None
         self.data_client = None
+        self.option_data_client = None
         print("✅ Disconnected from Alpaca")
     
     def is_connected(self) -> bool:
@@ -85,20 +172,19 @@ class AlpacaBroker(BaseBroker):
         return self._connected and self.trading_client is not None
     
     def place_option_trade(self, symbol: str, right: str, strike: float, 
-                          expiry: str, action: str = 'BUY', quantity: int = 1) -> Any:
+                          expiry: str, action: str = 'BUY', quantity: int = 1,
+                          client_order_id: Optional[str] = None) -> Any:
         """
-        Place an option trade on Alpaca.
-        
-        Note: Alpaca's options trading support is limited. This implementation
-        provides the interface but may not work for all option strategies.
+        Place a market order for an option contract on Alpaca.
         
         Args:
-            symbol: Stock symbol (e.g., 'AAPL')
+            symbol: Underlying symbol (e.g., 'AAPL')
             right: 'C' for Call or 'P' for Put
             strike: Strike price
-            expiry: Expiration date
+            expiry: Expiration date (YYYYMMDD)
             action: 'BUY' or 'SELL'
             quantity: Number of contracts
+            client_order_id: Passed to Alpaca, which rejects duplicate ids
             
         Returns:
             Order object from Alpaca
@@ -106,26 +192,21 @@ class AlpacaBroker(BaseBroker):
         if not self.is_connected():
             raise RuntimeError("Not connected to Alpaca. Call connect() first.")
         
-        # Construct option symbol in OCC format: SYMBOL + YYMMDD + C/P + STRIKE_PRICE
-        # Example: AAPL230120C00150000 (AAPL Call expiring Jan 20, 2023 with strike 150)
-        
-        # Note: This is a simplified implementation. Full options support would require
-        # proper OCC symbol formatting and verification that Alpaca supports options trading.
-        print(f"⚠️ Alpaca options trading support is limited. Placing order for: {action} {right} {symbol} @ {strike}")
-        
-        # For demonstration, we'll place a stock order instead
-        # In production, you'd need to properly format the option symbol
+        # OCC format: ROOT + YYMMDD + C/P + strike * 1000 (8 digits), e.g. AAPL230120C00150000
+        occ_symbol = build_occ_symbol(symbol, expiry, right, strike)
         side = OrderSide.BUY if action == 'BUY' else OrderSide.SELL
         
+        # Alpaca only accepts whole-contract, DAY market orders for options
         market_order_data = MarketOrderRequest(
-            symbol=symbol,
+            symbol=occ_symbol,
             qty=quantity,
             side=side,
-            time_in_force=TimeInForce.DAY
+            time_in_force=TimeInForce.DAY,
+            client_order_id=client_order_id
         )
         
         order = self.trading_client.submit_order(order_data=market_order_data)
-        print(f"✅ Order placed: {action} {quantity} shares of {symbol}")
+        print(f"✅ Order placed: {action} {quantity} {occ_symbol}")
         return order
     
     def fetch_market_data(self, symbol: str) -> Dict[str, Any]:
@@ -141,6 +222,14 @@ class AlpacaBroker(BaseBroker):
         if not self.is_connected():
             raise RuntimeError("Not connected to Alpaca. Call connect() first.")
         
+        if parse_occ_symbol(symbol) is not None:
+            chain = self.fetch_option_snapshots([symbol])
+            if chain.empty:
+                raise ValueError(f"No option snapshot for {symbol}")
+            row = chain.iloc[0].to_dict()
+            row['last_price'] = row['last'] if pd.notna(row['last']) else (row['bid'] + row['ask']) / 2
+            return row
+        
         request = StockLatestQuoteRequest(symbol_or_symbols=symbol)
         latest_quote = self.data_client.get_stock_latest_quote(request)
         
@@ -158,6 +247,90 @@ class AlpacaBroker(BaseBroker):
         
         return market_data
     
+    def fetch_quotes(self, symbols: List[str], costs: Optional[Dict[str, float]] = None) -> QuoteBatch:
+        """
+        Fetch latest quotes for all symbols in a single multi-symbol request
+        (so no symbol is timed on its own in `costs`).
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        
+        request = StockLatestQuoteRequest(symbol_or_symbols=list(symbols))
+        latest = self.data_client.get_stock_latest_quote(request)
+        present = [s for s in symbols if s in latest]
+        
+        bid = [latest[s].bid_price or float('nan') for s in present]
+        ask = [latest[s].ask_price or float('nan') for s in present]
+        return QuoteBatch.from_arrays(
+            present,
+            bid=bid,
+            ask=ask,
+            last=[(b + a) / 2 for b, a in zip(bid, ask)],  # quotes carry no last trade; use mid
+            timestamp=[latest[s].timestamp.timestamp() for s in present],
+        )
+    
+    def fetch_option_snapshots(self, occ_symbols: List[str]) -> pd.DataFrame:
+        """
+        Fetch quote, IV and greeks for many option contracts, OPTION_SNAPSHOT_CHUNK symbols per request.
+        
+        Returns:
+            DataFrame with OPTION_CHAIN_COLUMNS, one row per contract found
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        
+        snapshots = {}
+        for i in range(0, len(occ_symbols), OPTION_SNAPSHOT_CHUNK):
+            request = OptionSnapshotRequest(symbol_or_symbols=list(occ_symbols[i:i + OPTION_SNAPSHOT_CHUNK]))
+            snapshots.update(self.option_data_client.get_option_snapshot(request))
+        return _snapshots_to_frame(snapshots)
+    
+    def fetch_option_chain(self, symbol: str, expiry: Optional[str] = None, right: Optional[str] = None,
+                           min_strike: Optional[float] = None, max_strike: Optional[float] = None) -> pd.DataFrame:
+        """
+        Fetch the option chain for an underlying (paged by alpaca-py, 1000 contracts per request).
+        
+        Args:
+            symbol: Underlying symbol
+            expiry: Only this expiration (YYYYMMDD)
+            right: Only calls ('C') or puts ('P')
+            min_strike, max_strike: Inclusive strike bounds
+            
+        Returns:
+            DataFrame with OPTION_CHAIN_COLUMNS
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        
+        request = OptionChainRequest(
+            underlying_symbol=symbol,
+            expiration_date=f"{expiry[:4]}-{expiry[4:6]}-{expiry[6:]}" if expiry else None,
+            type=(ContractType.CALL if right.upper()[0] == 'C' else ContractType.PUT) if right else None,
+            strike_price_gte=min_strike,
+            strike_price_lte=max_strike,
+        )
+        return _snapshots_to_frame(self.option_data_client.get_option_chain(request))
+    
+    def fetch_historical_bars(self, symbol: str, start: float, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Fetch daily bars (paged by alpaca-py, 10,000 bars per request).
+        
+        Alpaca stamps a daily bar at midnight New York time, which is on the
+        session date in UTC as well.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        
+        request = StockBarsRequest(
+            symbol_or_symbols=symbol,
+            timeframe=TimeFrame.Day,
+            start=datetime.fromtimestamp(start, timezone.utc),
+            end=None if end is None else datetime.fromtimestamp(end, timezone.utc),
+        )
+        bars = self.data_client.get_stock_bars(request).data.get(symbol, [])
+        return pd.DataFrame([(session_timestamp(b.timestamp.astimezone(timezone.utc)), b.open, b.high, b.low,
+                              b.close, b.volume) for b in bars], columns=BAR_COLUMNS)
+    
     def get_account_info(self) -> Dict[str, Any]:
         """
         Get Alpaca account information.
@@ -181,3 +354,91 @@ class AlpacaBroker(BaseBroker):
         }
         
         return account_info
+    
+    def get_option_positions(self) -> Dict[tuple, float]:
+        """
+        Aggregate Alpaca option positions (OCC symbols) by (symbol, right).
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        
+        positions = {}
+        for pos in self.trading_client.get_all_positions():
+            parsed = parse_occ_symbol(pos.symbol)
+            if parsed is None:
+                continue  # stock position
+            key = (parsed[0], parsed[2])
+            positions[key] = positions.get(key, 0) + float(pos.qty)
+        return positions
+    
+    def subscribe_quotes(self, symbols: List[str], callback: QuoteCallback) -> None:
+        """
+        Stream stock quotes over Alpaca's websocket in a background thread.
+        
+        The callback runs on the stream thread with the bid/ask midpoint as price;
+        Alpaca does not stream implied volatility for the underlying, so iv is None.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        if self.url_override:
+            raise NotImplementedError("Quote streaming is not available with url_override")
+        
+        async def on_quote(quote):
+            if quote.bid_price and quote.ask_price:
+                callback(quote.symbol, (quote.bid_price + quote.ask_price) / 2, None)
+        
+        if self._stream is None:
+            self._stream = StockDataStream(api_key=self.api_key, secret_key=self.secret_key)
+        self._stream.subscribe_quotes(on_quote, *symbols)
+        
+        if self._stream_thread is None:
+            self._stream_thread = threading.Thread(target=self._stream.run, name="alpaca-quotes", daemon=True)
+            self._stream_thread.start()
+    
+    def unsubscribe_quotes(self) -> None:
+        """
+        Stop the websocket quote stream.
+        """
+        if self._stream is not None:
+            self._stream.stop()
+        self._stream = None
+        self._stream_thread = None
+    
+    def subscribe_order_updates(self, callback: OrderUpdateCallback) -> None:
+        """
+        Stream trade updates over Alpaca's websocket in a background thread.
+        
+        The callback runs on the stream thread.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to Alpaca. Call connect() first.")
+        if self.url_override:
+            raise NotImplementedError("Trade update streaming is not available with url_override")
+        
+        async def on_trade_update(data):
+            status = _ALPACA_ORDER_EVENTS.get(str(getattr(data.event, 'value', data.event)))
+            order = data.order
+            if status is None or not order.client_order_id:
+                return
+            filled = float(order.filled_qty or 0)
+            avg_price = float(order.filled_avg_price) if order.filled_avg_price else None
+            callback(order.client_order_id, status, filled, avg_price)
+        
+        if self._trade_stream is None:
+            self._trade_stream = TradingStream(api_key=self.api_key, secret_key=self.secret_key, paper=self.paper)
+        self._trade_stream.subscribe_trade_updates(on_trade_update)
+        
+        if self._trade_stream_thread is None:
+            self._trade_stream_thread = threading.Thread(target=self._trade_stream.run, name="alpaca-trades", daemon=True)
+            self._trade_stream_thread.start()
+    
+    def find_order(self, client_order_id: str) -> Optional[Any]:
+        """
+        Look up an order by client order id via the REST API.
+        """
+        if not self.is_connected():
+            return None
+        try:
+            return self.trading_client.get_order_by_client_id(client_order_id)
+        except Exception:
+            return None
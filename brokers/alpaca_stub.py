@@ -0,0 +1,338 @@
+# brokers/alpaca_stub.py
+
+"""
+Local HTTP stand-in for the Alpaca trading and market data REST APIs.
+
+Serves the endpoints AlpacaBroker uses (account, orders, positions, latest
+stock quotes, daily stock bars, option snapshots and option chains) from a deterministic,
+in-memory option market, so option order flow and batched chain fetches can
+be tested and benchmarked offline. Point the broker at it with
+`AlpacaBroker(..., url_override=server.url)` or ALPACA_URL_OVERRIDE.
+
+    python -m brokers.alpaca_stub --port 8765
+"""
+
+import json
+import math
+import time
+import uuid
+import zlib
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+from utils.helpers import build_occ_symbol, parse_occ_symbol
+from utils.pricing import black_scholes, CHAIN_EXPIRIES, CHAIN_STRIKES
+
+MAX_SNAPSHOT_SYMBOLS = 100  # Alpaca rejects larger multi-symbol snapshot requests
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class StubMarket:
+    """
+    Deterministic option market: each underlying gets a fixed spot and IV
+    level derived from its name, weekly expiries and strikes around spot.
+    """
+
+    def __init__(self, seed: int = 0, today: Optional[datetime] = None):
+        self.seed = seed
+        self.today = (today or datetime.now(timezone.utc)).date()
+        self._chains: Dict[str, Dict[str, dict]] = {}
+        self._lock = threading.Lock()
+
+    def spot(self, underlying: str) -> float:
+        return 20 + (zlib.crc32(f"{self.seed}:{underlying}".encode()) % 48000) / 100
+
+    def daily_close(self, underlying: str, day) -> float:
+        """Close of a session: spot today, a fixed pseudo-random level within 10% of it before."""
+        spot = self.spot(underlying)
+        if day >= self.today:
+            return spot
+        u = zlib.crc32(f"{self.seed}:{underlying}:{day.isoformat()}".encode()) % 10000 / 10000
+        return round(spot * (0.9 + 0.2 * u), 2)
+
+    def expiries(self) -> List[str]:
+        first = self.today + timedelta(days=(4 - self.today.weekday()) % 7 or 7)
+        return [(first + timedelta(weeks=i)).strftime('%Y%m%d') for i in range(CHAIN_EXPIRIES)]
+
+    def chain(self, underlying: str) -> Dict[str, dict]:
+        """OCC symbol -> raw Alpaca snapshot JSON for every contract on `underlying`."""
+        with self._lock:
+            chain = self._chains.get(underlying)
+            if chain is None:
+                chain = self._chains[underlying] = self._build_chain(underlying)
+            return chain
+
+    def _build_chain(self, underlying: str) -> Dict[str, dict]:
+        spot = self.spot(underlying)
+        level = 0.2 + (zlib.crc32(underlying.encode()) % 30) / 100
+        step = 1.0 if spot < 100 else 5.0
+        atm = round(spot / step) * step
+        strikes = [atm + step * (i - CHAIN_STRIKES // 2) for i in range(CHAIN_STRIKES)]
+        ts = _now_iso()
+
+        chain = {}
+        for expiry in self.expiries():
+            days = (datetime.strptime(expiry, '%Y%m%d').date() - self.today).days
+            years = max(days, 1) / 365
+            for strike in strikes:
+                if strike <= 0:
+                    continue
+                iv = level + math.log(strike / spot) ** 2  # simple smile
+                for right in ('C', 'P'):
+                    bs = black_scholes(spot, strike, years, iv, right)
+                    half_spread = max(0.01, round(bs['price'] * 0.01, 2))
+                    mid = round(bs['price'], 2)
+                    chain[build_occ_symbol(underlying, expiry, right, strike)] = {
+                        'latestQuote': {'t': ts, 'bp': max(0.01, mid - half_spread), 'bs': 10,
+                                        'ap': mid + half_spread, 'as': 10, 'bx': 'N', 'ax': 'N', 'c': ' '},
+                        'latestTrade': {'t': ts, 'p': mid, 's': 1, 'x': 'N', 'c': 'I'},
+                        'impliedVolatility': round(iv, 4),
+                        'greeks': {k: round(bs[k], 4) for k in ('delta', 'gamma', 'theta', 'vega', 'rho')},
+                    }
+        return chain
+
+    def snapshot(self, occ_symbol: str) -> Optional[dict]:
+        parsed = parse_occ_symbol(occ_symbol)
+        if parsed is None:
+            return None
+        return self.chain(parsed[0]).get(occ_symbol)
+
+
+class AlpacaStubServer:
+    """
+    Threaded local HTTP server speaking the subset of Alpaca's REST API used by AlpacaBroker.
+
+    Orders fill immediately at the contract's mid; duplicate client order ids
+    are rejected like the real API. `latency` adds a fixed delay per request,
+    and `requests` counts requests per endpoint.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, seed: int = 0, latency: float = 0.0):
+        self.market = StubMarket(seed)
+        self.latency = latency
+        self.orders: Dict[str, dict] = {}  # client_order_id -> order JSON
+        self.positions: Dict[str, float] = {}
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'AlpacaStubServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="alpaca-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'AlpacaStubServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- endpoint implementations: (status, body) ---
+
+    def _account(self) -> tuple:
+        return 200, {'id': str(uuid.UUID(int=1)), 'account_number': 'STUB0001', 'status': 'ACTIVE',
+                     'cash': '100000', 'portfolio_value': '100000', 'buying_power': '200000',
+                     'equity': '100000', 'options_trading_level': 2}
+
+    def _submit_order(self, body: dict) -> tuple:
+        symbol = body.get('symbol', '')
+        client_order_id = body.get('client_order_id') or str(uuid.uuid4())
+        snapshot = self.market.snapshot(symbol)
+        if snapshot is None:
+            return 422, {'code': 42210000, 'message': f"asset {symbol} not found"}
+        if body.get('time_in_force') != 'day':
+            return 422, {'code': 42210000, 'message': "options orders must use time_in_force=day"}
+        qty = float(body.get('qty', 0))
+        if qty <= 0 or qty != int(qty):
+            return 422, {'code': 40010001, 'message': "qty must be a positive whole number for options"}
+
+        with self._lock:
+            if client_order_id in self.orders:
+                return 422, {'code': 40010001, 'message': "client_order_id must be unique"}
+            quote = snapshot['latestQuote']
+            price = round((quote['bp'] + quote['ap']) / 2, 2)
+            now = _now_iso()
+            order = {
+                'id': str(uuid.uuid4()), 'client_order_id': client_order_id,
+                'created_at': now, 'updated_at': now, 'submitted_at': now, 'filled_at': now,
+                'asset_id': str(uuid.UUID(int=zlib.crc32(symbol.encode()))), 'symbol': symbol,
+                'asset_class': 'us_option', 'qty': str(int(qty)), 'filled_qty': str(int(qty)),
+                'filled_avg_price': str(price), 'order_class': 'simple', 'order_type': 'market',
+                'type': 'market', 'side': body.get('side', 'buy'), 'time_in_force': 'day',
+                'status': 'filled', 'extended_hours': False,
+            }
+            self.orders[client_order_id] = order
+            signed = qty if order['side'] == 'buy' else -qty
+            self.positions[symbol] = self.positions.get(symbol, 0) + signed
+        return 200, order
+
+    def _order_by_client_id(self, client_order_id: str) -> tuple:
+        order = self.orders.get(client_order_id)
+        return (200, order) if order else (404, {'code': 40410000, 'message': "order not found"})
+
+    def _positions(self) -> tuple:
+        with self._lock:
+            held = [(s, q) for s, q in self.positions.items() if q]
+        return 200, [{
+            'asset_id': str(uuid.UUID(int=zlib.crc32(symbol.encode()))), 'symbol': symbol,
+            'exchange': '', 'asset_class': 'us_option', 'avg_entry_price': '1.00',
+            'qty': str(int(qty)), 'side': 'long' if qty > 0 else 'short', 'cost_basis': str(100 * qty),
+        } for symbol, qty in held]
+
+    def _stock_quotes(self, params: dict) -> tuple:
+        symbols = [s for s in params.get('symbols', [''])[0].split(',') if s]
+        quotes = {}
+        for symbol in symbols:
+            spot = self.market.spot(symbol)
+            quotes[symbol] = {'t': _now_iso(), 'bp': round(spot - 0.01, 2), 'bs': 1,
+                              'ap': round(spot + 0.01, 2), 'as': 1, 'bx': 'V', 'ax': 'V', 'c': ['R'], 'z': 'C'}
+        return 200, {'quotes': quotes}
+
+    def _stock_bars(self, params: dict) -> tuple:
+        get = lambda key: params.get(key, [None])[0]
+        if get('timeframe') != '1Day':
+            return 400, {'message': f"stub serves daily bars only, got {get('timeframe')}"}
+        symbols = [s for s in (get('symbols') or '').split(',') if s]
+        first = datetime.fromisoformat(get('start').replace('Z', '+00:00')).date()
+        last = datetime.fromisoformat(get('end').replace('Z', '+00:00')).date() if get('end') else self.market.today
+        bars = {}
+        for symbol in symbols:
+            rows = []
+            day = first
+            while day <= min(last, self.market.today):
+                if day.weekday() < 5:
+                    close = self.market.daily_close(symbol, day)
+                    rows.append({'t': f"{day.isoformat()}T04:00:00Z", 'o': close, 'h': round(close * 1.01, 2),
+                                 'l': round(close * 0.99, 2), 'c': close, 'v': 1_000_000, 'n': 1000, 'vw': close})
+                day += timedelta(days=1)
+            bars[symbol] = rows
+        return 200, {'bars': bars, 'next_page_token': None}
+
+    def _option_snapshots(self, params: dict) -> tuple:
+        symbols = [s for s in params.get('symbols', [''])[0].split(',') if s]
+        if len(symbols) > MAX_SNAPSHOT_SYMBOLS:
+            return 400, {'message': f"too many symbols ({len(symbols)} > {MAX_SNAPSHOT_SYMBOLS})"}
+        snapshots = {}
+        for symbol in symbols:
+            snapshot = self.market.snapshot(symbol)
+            if snapshot is not None:
+                snapshots[symbol] = snapshot
+        return 200, {'snapshots': snapshots, 'next_page_token': None}
+
+    def _option_chain(self, underlying: str, params: dict) -> tuple:
+        get = lambda key: params.get(key, [None])[0]
+        expiry = (get('expiration_date') or '').replace('-', '')
+        kind = get('type')
+        gte, lte = get('strike_price_gte'), get('strike_price_lte')
+        limit = int(get('limit') or 100)
+        offset = int(get('page_token') or 0)
+
+        selected = []
+        for occ in self.market.chain(underlying):
+            _, occ_expiry, right, strike = parse_occ_symbol(occ)
+            if expiry and occ_expiry != expiry:
+                continue
+            if kind and right != kind[0].upper():
+                continue
+            if (gte and strike < float(gte)) or (lte and strike > float(lte)):
+                continue
+            selected.append(occ)
+
+        chain = self.market.chain(underlying)
+        page = selected[offset:offset + limit]
+        next_token = str(offset + limit) if offset + limit < len(selected) else None
+        return 200, {'snapshots': {occ: chain[occ] for occ in page}, 'next_page_token': next_token}
+
+    def _route(self, method: str, path: str, params: dict, body: Optional[dict]) -> tuple:
+        if method == 'GET' and path == '/v2/account':
+            return 'account', self._account()
+        if method == 'POST' and path == '/v2/orders':
+            return 'submit_order', self._submit_order(body or {})
+        if method == 'GET' and path == '/v2/orders:by_client_order_id':
+            return 'get_order', self._order_by_client_id(params.get('client_order_id', [''])[0])
+        if method == 'GET' and path == '/v2/positions':
+            return 'positions', self._positions()
+        if method == 'GET' and path == '/v2/stocks/quotes/latest':
+            return 'stock_quotes', self._stock_quotes(params)
+        if method == 'GET' and path == '/v2/stocks/bars':
+            return 'stock_bars', self._stock_bars(params)
+        if method == 'GET' and path == '/v1beta1/options/snapshots':
+            return 'option_snapshots', self._option_snapshots(params)
+        if method == 'GET' and path.startswith('/v1beta1/options/snapshots/'):
+            return 'option_chain', self._option_chain(path.rsplit('/', 1)[1], params)
+        return 'unknown', (404, {'message': f"no stub for {method} {path}"})
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self, method: str) -> None:
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlparse(self.path)
+                body = None
+                if method == 'POST':
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                if not self.headers.get('APCA-API-KEY-ID'):
+                    name, (status, payload) = 'unauthorized', (401, {'message': "missing API key"})
+                else:
+                    name, (status, payload) = server._route(method, url.path, parse_qs(url.query), body)
+                server.requests[name] += 1
+
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Alpaca REST API stand-in")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    server = AlpacaStubServer(port=args.port, latency=args.latency)
+    print(f"✅ Alpaca stub listening on {server.url}")
+    print(f"   Set ALPACA_URL_OVERRIDE={server.url} to point AlpacaBroker at it")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
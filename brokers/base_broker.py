@@ -1,7 +1,34 @@
 # brokers/base_broker.py
 
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
+from .quote_batch import QuoteBatch
+from .contracts import OrderLeg
+
+# Columns of the DataFrame returned by fetch_option_chain(); expiry is 'YYYYMMDD',
+# right 'C'/'P', timestamp epoch seconds
+OPTION_CHAIN_COLUMNS = [
+    'occ_symbol', 'symbol', 'expiry', 'right', 'strike',
+    'bid', 'ask', 'last', 'iv', 'delta', 'gamma', 'theta', 'vega', 'timestamp',
+]
+
+# Columns of the DataFrame returned by fetch_historical_bars(); timestamp is the
+# session date at 00:00 UTC in epoch seconds
+BAR_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+# callback(symbol, price, iv) -- iv is None when the broker does not stream it
+QuoteCallback = Callable[[str, float, Optional[float]], None]
+
+# Normalized order statuses reported through subscribe_order_updates()
+ORDER_ACKED = 'ACKED'
+ORDER_PARTIALLY_FILLED = 'PARTIALLY_FILLED'
+ORDER_FILLED = 'FILLED'
+ORDER_CANCELLED = 'CANCELLED'
+ORDER_REJECTED = 'REJECTED'
+
+# callback(client_order_id, status, filled_qty, avg_fill_price)
+OrderUpdateCallback = Callable[[str, str, float, Optional[float]], None]
 
 
 class BaseBroker(ABC):
@@ -10,6 +37,18 @@ class BaseBroker(ABC):
     All broker connectors must implement these methods.
     """
     
+    # RateLimiter (brokers/rate_limiter.py) pacing this connection's messages, if the broker has limits
+    limiter = None
+    
+    @classmethod
+    def from_env(cls, **kwargs) -> 'BaseBroker':
+        """
+        Create an instance, filling parameters not given in kwargs from environment variables.
+        
+        Used by BrokerFactory; brokers with env-configurable settings override it.
+        """
+        return cls(**kwargs)
+    
     @abstractmethod
     def connect(self) -> None:
         """
@@ -33,7 +72,8 @@ class BaseBroker(ABC):
     
     @abstractmethod
     def place_option_trade(self, symbol: str, right: str, strike: float, 
-                          expiry: str, action: str = 'BUY', quantity: int = 1) -> Any:
+                          expiry: str, action: str = 'BUY', quantity: int = 1,
+                          client_order_id: Optional[str] = None) -> Any:
         """
         Place an option trade.
         
@@ -44,12 +84,33 @@ class BaseBroker(ABC):
             expiry: Expiration date
             action: 'BUY' or 'SELL'
             quantity: Number of contracts
+            client_order_id: Caller-assigned id attached to the order, used to
+                match status updates and to look the order up after a failed submit
             
         Returns:
             Trade object/confirmation
         """
         pass
-    
+
+    def place_combo_order(self, symbol: str, legs: List[OrderLeg], action: str = 'BUY',
+                          quantity: int = 1, limit_price: Optional[float] = None,
+                          client_order_id: Optional[str] = None) -> Any:
+        """
+        Place a multi-leg option order that fills as one unit.
+
+        Args:
+            symbol: Underlying symbol shared by every leg
+            legs: One OrderLeg per leg (contract, BUY/SELL, ratio)
+            action: 'BUY' or 'SELL' the combo as a whole
+            quantity: Number of combos
+            limit_price: Net price per combo (negative for a credit); None for a market order
+            client_order_id: Caller-assigned id attached to the order
+
+        Returns:
+            Trade object/confirmation
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support combo orders")
+
     @abstractmethod
     def fetch_market_data(self, symbol: str) -> Dict[str, Any]:
         """
@@ -63,6 +124,34 @@ class BaseBroker(ABC):
         """
         pass
     
+    def fetch_quotes(self, symbols: List[str], costs: Optional[Dict[str, float]] = None) -> QuoteBatch:
+        """
+        Fetch current quotes for many symbols as one columnar batch.
+        
+        The default calls fetch_market_data() per symbol; brokers with a
+        multi-symbol API override it to use a single batched request.
+        Symbols that fail to fetch are left out of the batch.
+        
+        Args:
+            symbols: Stock symbols
+            costs: Optional dict that receives the request time (seconds) of
+                each symbol the broker can time on its own; a symbol fetched
+                in one request with others is left out
+            
+        Returns:
+            QuoteBatch with one row per fetched symbol
+        """
+        records = []
+        for symbol in symbols:
+            start = time.perf_counter()
+            try:
+                records.append(self.fetch_market_data(symbol))
+            except Exception as e:
+                print(f"❌ Error fetching data for {symbol}: {e}")
+            if costs is not None:
+                costs[symbol] = time.perf_counter() - start
+        return QuoteBatch.from_records(records)
+    
     @abstractmethod
     def get_account_info(self) -> Dict[str, Any]:
         """
@@ -72,3 +161,106 @@ class BaseBroker(ABC):
             Dictionary with account details (balance, positions, etc.)
         """
         pass
+    
+    def get_option_positions(self) -> Dict[tuple, float]:
+        """
+        Get current option positions aggregated by underlying and right.
+        
+        Returns:
+            Dictionary mapping (symbol, right) to signed contract count, e.g. {('AAPL', 'C'): 2}
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not report option positions")
+
+    def fetch_option_chain(self, symbol: str, expiry: Optional[str] = None, right: Optional[str] = None,
+                           min_strike: Optional[float] = None, max_strike: Optional[float] = None):
+        """
+        Fetch quotes, IV and greeks for the listed option contracts on an underlying.
+
+        Args:
+            symbol: Underlying symbol
+            expiry: Only this expiration (YYYYMMDD)
+            right: Only calls ('C') or puts ('P')
+            min_strike, max_strike: Inclusive strike bounds
+
+        Returns:
+            pandas DataFrame with OPTION_CHAIN_COLUMNS, one row per contract
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not provide option chains")
+
+    def fetch_historical_bars(self, symbol: str, start: float, end: Optional[float] = None):
+        """
+        Fetch daily bars for an underlying.
+
+        Callers normally go through utils/bar_cache.py, which keeps the bars on
+        disk and asks only for the missing tail.
+
+        Args:
+            symbol: Stock symbol
+            start: Earliest bar timestamp to include
+            end: Latest bar timestamp to include; default now
+
+        Returns:
+            pandas DataFrame with BAR_COLUMNS in session order; the current
+            session's bar, if any, is partial
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not provide historical bars")
+
+    def qualify_contracts(self, symbols: List[str]) -> List[str]:
+        """
+        Resolve the broker's contract details for underlyings ahead of trading.
+        
+        Brokers that look contracts up by symbol on every request cache the
+        result, so later quote, bar and streaming requests skip the lookup.
+        Brokers that address instruments by symbol alone keep this default.
+        
+        Returns:
+            The symbols the broker can trade, in the given order
+        """
+        return list(symbols)
+
+    def subscribe_quotes(self, symbols: List[str], callback: QuoteCallback) -> None:
+        """
+        Start streaming quote updates for symbols.
+        
+        Brokers without streaming support keep this default, and callers fall
+        back to polling fetch_market_data().
+        
+        Args:
+            symbols: Stock symbols to stream
+            callback: Called as callback(symbol, price, iv) on every update
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support quote streaming")
+    
+    def unsubscribe_quotes(self) -> None:
+        """
+        Stop all quote streams started by subscribe_quotes().
+        """
+        pass
+    
+    def subscribe_order_updates(self, callback: OrderUpdateCallback) -> None:
+        """
+        Receive order status changes as they happen.
+        
+        Args:
+            callback: Called as callback(client_order_id, status, filled_qty, avg_fill_price)
+                with one of the normalized ORDER_* statuses
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support order update events")
+    
+    def find_order(self, client_order_id: str) -> Optional[Any]:
+        """
+        Look up an order by client order id.
+        
+        Returns:
+            The broker's order/trade object, or None if the broker has no such order
+        """
+        return None
+    
+    def poll_events(self, timeout: float) -> None:
+        """
+        Wait `timeout` seconds while letting the broker deliver streamed events.
+        
+        Brokers whose events are dispatched by their own event loop (IBKR)
+        override this so callbacks fire on the caller's thread.
+        """
+        time.sleep(timeout)
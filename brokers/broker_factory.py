@@ -1,10 +1,92 @@
 # brokers/broker_factory.py
 
 import os
-from typing import Optional
+import importlib
+from importlib.metadata import entry_points
+from typing import Dict, Type, Union
 from .base_broker import BaseBroker
-from .ibkr_broker import IBKRBroker
-from .alpaca_broker import AlpacaBroker
+
+# Brokers are located by 'module:Class' and imported only when first created,
+# so e.g. `main.py ibkr` never imports alpaca-py. Third-party packages can add
+# brokers under the ENTRY_POINT_GROUP entry point group, or in-process code can
+# call register_broker().
+BUILTIN_BROKERS = {
+    'ibkr': 'brokers.ibkr_broker:IBKRBroker',
+    'alpaca': 'brokers.alpaca_broker:AlpacaBroker',
+    'sim': 'brokers.sim_broker:SimBroker',
+    'replay': 'brokers.replay_broker:ReplayBroker',
+}
+ENTRY_POINT_GROUP = 'ai_options_trader.brokers'
+
+_registered: Dict[str, Union[str, Type[BaseBroker]]] = {}
+_broker_classes: Dict[str, Type[BaseBroker]] = {}
+
+
+def register_broker(name: str, target: Union[str, Type[BaseBroker], None] = None):
+    """
+    Register a broker under `name`, replacing any earlier registration.
+    
+    `target` is a BaseBroker subclass or a lazy 'module:Class' string. Without
+    a target this returns a class decorator:
+    
+        @register_broker('paper')
+        class PaperBroker(BaseBroker): ...
+    
+    The broker is created with `cls.from_env(**kwargs)`.
+    """
+    name = name.lower()
+    
+    def register(target):
+        if not isinstance(target, str) and not (isinstance(target, type) and issubclass(target, BaseBroker)):
+            raise TypeError(f"Broker target must be a BaseBroker subclass or 'module:Class', got {target!r}")
+        _registered[name] = target
+        _broker_classes.pop(name, None)
+        return target
+    
+    return register if target is None else register(target)
+
+
+def available_brokers() -> Dict[str, Union[str, Type[BaseBroker]]]:
+    """
+    Return all known broker names mapped to their class or 'module:Class' location, without importing them.
+    
+    register_broker() registrations override built-ins; entry points only add new names.
+    """
+    brokers = dict(BUILTIN_BROKERS)
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        brokers.setdefault(ep.name.lower(), ep.value)
+    brokers.update(_registered)
+    return brokers
+
+
+def load_broker_class(broker_type: str) -> Type[BaseBroker]:
+    """
+    Import and return the broker class registered under broker_type.
+    
+    Raises:
+        ValueError: If broker_type is not registered
+        ImportError: If the broker's SDK is not installed
+    """
+    broker_type = broker_type.lower()
+    cls = _broker_classes.get(broker_type)
+    if cls is not None:
+        return cls
+    
+    brokers = available_brokers()
+    if broker_type not in brokers:
+        supported = ', '.join(f"'{name}'" for name in brokers)
+        raise ValueError(f"Unsupported broker type: {broker_type}. Supported: {supported}")
+    
+    target = brokers[broker_type]
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(':')
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            raise ImportError(f"Broker '{broker_type}' could not be loaded: {e}") from e
+        target = getattr(module, class_name)
+    _broker_classes[broker_type] = target
+    return target
 
 
 class BrokerFactory:
@@ -18,51 +100,17 @@ class BrokerFactory:
         Create and return a broker instance.
         
         Args:
-            broker_type: Type of broker ('ibkr' or 'alpaca')
-            **kwargs: Additional parameters for broker initialization
+            broker_type: Registered broker name ('ibkr', 'alpaca', 'sim' or a plugin)
+            **kwargs: Parameters for the broker's from_env(); unset ones come from the environment
             
         Returns:
             BaseBroker instance
             
         Raises:
             ValueError: If broker_type is not supported
+            ImportError: If the broker's SDK is not installed
         """
-        broker_type = broker_type.lower()
-        
-        if broker_type == 'ibkr':
-            return BrokerFactory._create_ibkr_broker(**kwargs)
-        elif broker_type == 'alpaca':
-            return BrokerFactory._create_alpaca_broker(**kwargs)
-        else:
-            raise ValueError(f"Unsupported broker type: {broker_type}. Supported: 'ibkr', 'alpaca'")
-    
-    @staticmethod
-    def _create_ibkr_broker(**kwargs) -> IBKRBroker:
-        """
-        Create IBKR broker instance with defaults from environment variables.
-        """
-        host = kwargs.get('host', os.getenv('IBKR_HOST', '127.0.0.1'))
-        port = kwargs.get('port', int(os.getenv('IBKR_PORT', '7497')))
-        client_id = kwargs.get('client_id', int(os.getenv('IBKR_CLIENT_ID', '1')))
-        
-        return IBKRBroker(host=host, port=port, client_id=client_id)
-    
-    @staticmethod
-    def _create_alpaca_broker(**kwargs) -> AlpacaBroker:
-        """
-        Create Alpaca broker instance with defaults from environment variables.
-        """
-        api_key = kwargs.get('api_key', os.getenv('ALPACA_API_KEY'))
-        secret_key = kwargs.get('secret_key', os.getenv('ALPACA_SECRET_KEY'))
-        paper = kwargs.get('paper', os.getenv('ALPACA_PAPER', 'true').lower() == 'true')
-        
-        if not api_key or not secret_key:
-            raise ValueError(
-                "Alpaca API credentials required. Set ALPACA_API_KEY and ALPACA_SECRET_KEY "
-                "environment variables or pass api_key and secret_key parameters."
-            )
-        
-        return AlpacaBroker(api_key=api_key, secret_key=secret_key, paper=paper)
+        return load_broker_class(broker_type).from_env(**kwargs)
     
     @staticmethod
     def get_default_broker() -> BaseBroker:
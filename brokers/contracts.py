@@ -0,0 +1,161 @@
+# brokers/contracts.py
+
+import sys
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from utils.helpers import build_occ_symbol, parse_occ_symbol
+
+# Process-wide symbol interning: each underlying is stored once and referred to
+# by a small integer code in ContractTable.
+_symbol_codes: Dict[str, int] = {}
+_symbol_names: List[str] = []
+_symbol_lock = threading.Lock()
+
+
+def symbol_code(symbol: str) -> int:
+    """Return the interned integer code for `symbol`, assigning one on first use."""
+    code = _symbol_codes.get(symbol)
+    if code is None:
+        with _symbol_lock:
+            code = _symbol_codes.get(symbol)
+            if code is None:
+                code = len(_symbol_names)
+                _symbol_names.append(sys.intern(symbol))
+                _symbol_codes[_symbol_names[code]] = code
+    return code
+
+
+def symbol_name(code: int) -> str:
+    return _symbol_names[code]
+
+
+class OptionContract:
+    """
+    One listed option contract. Slotted, with interned symbol and expiry
+    strings, so each contract costs 72 bytes plus its strike float.
+    """
+    __slots__ = ('symbol', 'expiry', 'right', 'strike')
+
+    def __init__(self, symbol: str, expiry: str, right: str, strike: float):
+        self.symbol = sys.intern(symbol)
+        self.expiry = sys.intern(expiry.replace('-', ''))
+        self.right = 'C' if right.upper()[0] == 'C' else 'P'
+        self.strike = float(strike)
+
+    @classmethod
+    def from_occ(cls, occ_symbol: str) -> Optional['OptionContract']:
+        parsed = parse_occ_symbol(occ_symbol)
+        return None if parsed is None else cls(*parsed)
+
+    @property
+    def occ_symbol(self) -> str:
+        return build_occ_symbol(self.symbol, self.expiry, self.right, self.strike)
+
+    def _key(self):
+        return (self.symbol, self.expiry, self.right, self.strike)
+
+    def __eq__(self, other):
+        return isinstance(other, OptionContract) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"OptionContract({self.symbol} {self.expiry} {self.right}{self.strike:g})"
+
+
+class OrderLeg:
+    """One leg of a combo order: a contract, 'BUY' or 'SELL', and a ratio per combo."""
+    __slots__ = ('contract', 'action', 'ratio')
+
+    def __init__(self, contract: OptionContract, action: str, ratio: int = 1):
+        self.contract = contract
+        self.action = action.upper()
+        self.ratio = int(ratio)
+
+    def __eq__(self, other):
+        return isinstance(other, OrderLeg) and \
+            (self.contract, self.action, self.ratio) == (other.contract, other.action, other.ratio)
+
+    def __repr__(self):
+        return f"OrderLeg({self.action} {self.ratio}x {self.contract.expiry} {self.contract.right}{self.contract.strike:g})"
+
+
+# float32 holds prices, strikes and greeks to ~7 significant digits, which is
+# finer than any quoted increment; timestamps keep float64.
+_FLOAT32_COLUMNS = ('strike', 'bid', 'ask', 'last', 'iv', 'delta', 'gamma', 'theta', 'vega')
+
+
+class ContractTable:
+    """
+    Struct-of-arrays view of many option contracts and their quotes.
+
+    Per contract: int32 symbol code, int32 expiry (YYYYMMDD), bool is_call,
+    nine float32 columns and a float64 timestamp -- 53 bytes, versus about
+    470 bytes for a 14-key dict before counting its value objects.
+    """
+    __slots__ = ('symbol_code', 'expiry', 'is_call', 'timestamp') + _FLOAT32_COLUMNS
+
+    def __init__(self, symbol_code: np.ndarray, expiry: np.ndarray, is_call: np.ndarray,
+                 timestamp: Optional[np.ndarray] = None, **columns):
+        n = len(symbol_code)
+        self.symbol_code = np.asarray(symbol_code, dtype=np.int32)
+        self.expiry = np.asarray(expiry, dtype=np.int32)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        self.timestamp = (np.full(n, np.nan) if timestamp is None
+                          else np.asarray(timestamp, dtype=np.float64))
+        for name in _FLOAT32_COLUMNS:
+            values = columns.get(name)
+            setattr(self, name, np.full(n, np.nan, dtype=np.float32) if values is None
+                    else np.asarray(values, dtype=np.float32))
+
+    @classmethod
+    def from_frame(cls, df) -> 'ContractTable':
+        """Build from a DataFrame with OPTION_CHAIN_COLUMNS (as returned by fetch_option_chain)."""
+        # Symbols and expiries repeat across a chain, so convert each distinct value once
+        codes = {s: symbol_code(s) for s in df['symbol'].unique()}
+        expiries = {e: int(str(e).replace('-', '')) for e in df['expiry'].unique()}
+        return cls(
+            symbol_code=df['symbol'].map(codes).to_numpy(),
+            expiry=df['expiry'].map(expiries).to_numpy(),
+            is_call=(df['right'].to_numpy() == 'C'),
+            timestamp=df['timestamp'].to_numpy(dtype=np.float64, na_value=np.nan),
+            **{name: df[name].to_numpy(dtype=np.float32, na_value=np.nan) for name in _FLOAT32_COLUMNS},
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbol_code)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    @property
+    def symbols(self) -> np.ndarray:
+        """Symbol names per row (object array of interned strings)."""
+        names = np.array(_symbol_names, dtype=object)
+        return names[self.symbol_code]
+
+    def select(self, mask_or_index) -> 'ContractTable':
+        """Rows picked by a boolean mask or integer index array."""
+        table = ContractTable.__new__(ContractTable)
+        for name in self.__slots__:
+            setattr(table, name, getattr(self, name)[mask_or_index])
+        return table
+
+    def contract(self, i: int) -> OptionContract:
+        return OptionContract(symbol_name(int(self.symbol_code[i])), str(int(self.expiry[i])),
+                              'C' if self.is_call[i] else 'P', round(float(self.strike[i]), 3))
+
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame({
+            'symbol': self.symbols,
+            'expiry': self.expiry.astype(str),
+            'right': np.where(self.is_call, 'C', 'P'),
+        })
+        for name in _FLOAT32_COLUMNS:
+            df[name] = getattr(self, name)
+        df['timestamp'] = self.timestamp
+        return df
@@ -1,50 +1,127 @@
 # brokers/data_fetcher.py
 
+import time
 import pandas as pd
 import numpy as np
-from typing import List
+from typing import List, Dict, Optional
 from .base_broker import BaseBroker
+from .quote_batch import QuoteBatch
 
 
-def fetch_live_option_data(broker: BaseBroker, symbols: List[str]) -> None:
+def _option_rows(symbols: List[str], price: np.ndarray, iv: Optional[np.ndarray] = None,
+                 prev_close: Optional[np.ndarray] = None) -> pd.DataFrame:
     """
-    Fetch live market data for given symbols using the provided broker.
-    
+    Model input rows for many symbols, built one column at a time.
+
+    Args:
+        symbols: Underlying symbols
+        price: Last price per symbol; NaN or 0 falls back to 100.0
+        iv: Implied volatility per symbol; NaN (or no array) is mocked
+        prev_close: Previous session's close per symbol (utils/bar_cache.py); NaN where unknown
+    """
+    n = len(symbols)
+    mocked_iv = np.random.uniform(0.2, 0.5, n)
+    iv = mocked_iv if iv is None else np.where(np.isnan(iv), mocked_iv, iv)
+    prev_close = np.full(n, np.nan) if prev_close is None else prev_close
+    # TEMP: mocked Greeks for now (to be replaced with live values later)
+    return pd.DataFrame({
+        "symbol": symbols,
+        "delta": np.round(np.random.uniform(0.3, 0.7, n), 2),
+        "gamma": np.round(np.random.uniform(0.01, 0.15, n), 3),
+        "vega": np.round(np.random.uniform(0.05, 0.25, n), 3),
+        "theta": np.round(np.random.uniform(-0.1, -0.01, n), 3),
+        "iv": np.round(iv, 3),
+        "underlying_close": np.where(np.isnan(price) | (price == 0), 100.0, price),
+        "prev_close": prev_close,  # underlying_return_1d is calculated from it in feature_engineering
+        "volume": np.random.uniform(1000, 5000, n).astype(int),
+        "direction": np.zeros(n, dtype=int),  # Dummy for now, model ignores this in live
+        "underlying_return_1d": np.zeros(n, dtype=int),
+    })
+
+
+def build_live_option_rows(quotes: Dict[str, tuple], bars=None) -> pd.DataFrame:
+    """
+    Build model input rows from already-streamed quotes without another broker round-trip.
+
+    Args:
+        quotes: Mapping of symbol -> (price, iv); iv may be None
+        bars: Optional BarCache for previous closes, read from memory only
+
+    Returns:
+        DataFrame with one row per symbol
+    """
+    symbols = list(quotes)
+    price = np.array([p if p is not None else np.nan for p, _ in quotes.values()], dtype=np.float64)
+    iv = np.array([v if v is not None else np.nan for _, v in quotes.values()], dtype=np.float64)
+    prev_close = bars.prev_close(symbols, refresh=False) if bars is not None else None
+    return _option_rows(symbols, price, iv, prev_close)
+
+
+def build_option_rows_from_batch(batch: QuoteBatch, prev_close: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Build model input rows for every symbol in a QuoteBatch.
+    """
+    return _option_rows(batch.symbols, batch.price, prev_close=prev_close)
+
+
+def fetch_live_option_rows(broker: BaseBroker, symbols: List[str],
+                           costs: Optional[Dict[str, float]] = None, bars=None) -> pd.DataFrame:
+    """
+    Fetch live market data for given symbols and return it as model input rows.
+
     Args:
         broker: Broker instance implementing BaseBroker interface
         symbols: List of stock symbols to fetch data for
+        costs: Optional dict that receives the fetch time (seconds) per symbol:
+            its own request time where the broker times it (see
+            BaseBroker.fetch_quotes), and an even share of the rest of the
+            fetch wall time for symbols quoted together in one request
+        bars: Optional BarCache (utils/bar_cache.py) supplying each symbol's
+            previous close, for underlying_return_1d
+
+    Returns:
+        DataFrame with one row per successfully fetched symbol
     """
     if not broker.is_connected():
         broker.connect()
-    
-    data = []
-    
-    for symbol in symbols:
-        print(f"🔍 Fetching market data for {symbol}...")
-        
-        try:
-            market_data = broker.fetch_market_data(symbol)
-            last_price = market_data.get('last_price', 100.0)
-            
-            # TEMP: mocked Greeks for now (to be replaced with live values later)
-            row = {
-                "symbol": symbol,
-                "delta": round(np.random.uniform(0.3, 0.7), 2),
-                "gamma": round(np.random.uniform(0.01, 0.15), 3),
-                "vega": round(np.random.uniform(0.05, 0.25), 3),
-                "theta": round(np.random.uniform(-0.1, -0.01), 3),
-                "iv": round(np.random.uniform(0.2, 0.5), 3),
-                "underlying_close": last_price if last_price else 100.0,
-                "volume": int(np.random.uniform(1000, 5000)),
-                "direction": 0,  # Dummy for now, model ignores this in live
-                "underlying_return_1d": 0  # Will be calculated inside feature_engineering
-            }
-            
-            data.append(row)
-        except Exception as e:
-            print(f"❌ Error fetching data for {symbol}: {e}")
-            continue
-    
-    df = pd.DataFrame(data)
+
+    print(f"🔍 Fetching market data for {len(symbols)} symbols...")
+    start = time.perf_counter()
+    timed: Dict[str, float] = {}
+    try:
+        batch = broker.fetch_quotes(symbols, costs=timed)
+    except Exception as e:
+        print(f"❌ Error fetching quotes: {e}")
+        batch = QuoteBatch.empty()
+    finally:
+        if costs is not None and symbols:
+            untimed = [symbol for symbol in symbols if symbol not in timed]
+            rest = max(time.perf_counter() - start - sum(timed.values()), 0.0)
+            costs.update(timed)
+            costs.update((symbol, rest / len(untimed)) for symbol in untimed)
+
+    if len(batch) < len(symbols):
+        missing = sorted(set(symbols) - set(batch.index))
+        print(f"⚠️ No quotes for: {', '.join(missing)}")
+    if not len(batch):
+        return pd.DataFrame()
+    prev_close = bars.prev_close(batch.symbols) if bars is not None else None
+    return build_option_rows_from_batch(batch, prev_close)
+
+
+def fetch_live_option_data(broker: BaseBroker, symbols: List[str], recorder=None, bars=None) -> None:
+    """
+    Fetch live market data for given symbols using the provided broker.
+
+    Args:
+        broker: Broker instance implementing BaseBroker interface
+        symbols: List of stock symbols to fetch data for
+        recorder: Optional TickRecorder (utils/tick_log.py) that keeps every
+            cycle's rows, since live_input.csv is overwritten
+        bars: Optional BarCache supplying previous closes
+    """
+    df = fetch_live_option_rows(broker, symbols, bars=bars)
+    if recorder is not None:
+        recorder.record_frame(df)
     df.to_csv('data/live_input.csv', index=False)
     print("✅ Live input updated: data/live_input.csv")
@@ -1,16 +1,43 @@
 # brokers/ibkr_broker.py
 
-from ib_insync import IB, Option, Stock, MarketOrder
-from typing import Dict, Any
-from .base_broker import BaseBroker
+import os
+import math
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from ib_insync import IB, Option, Stock, Contract, ComboLeg, MarketOrder, LimitOrder
+from typing import Dict, Any, List, Optional
+from utils.helpers import session_timestamp
+from .contracts import OrderLeg
+from .rate_limiter import RateLimiter, PRIORITY_ORDER, PRIORITY_DATA
+from .base_broker import (
+    BaseBroker, QuoteBatch, QuoteCallback, OrderUpdateCallback, BAR_COLUMNS,
+    ORDER_ACKED, ORDER_PARTIALLY_FILLED, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED,
+)
+
+# ib_insync OrderStatus.status -> normalized status (pre-ack states are not reported)
+_IB_ORDER_STATUS = {
+    'PreSubmitted': ORDER_ACKED,
+    'Submitted': ORDER_ACKED,
+    'Filled': ORDER_FILLED,
+    'Cancelled': ORDER_CANCELLED,
+    'ApiCancelled': ORDER_CANCELLED,
+    'Inactive': ORDER_REJECTED,
+}
 
 
 class IBKRBroker(BaseBroker):
     """
     Interactive Brokers implementation of the broker interface.
+    
+    Every message goes through self.limiter first: orders ahead of data
+    requests, market data requests within the line allowance. ib_insync's own
+    throttle is FIFO, so pacing here keeps its queue empty and orders never
+    wait behind a burst of data requests.
     """
     
-    def __init__(self, host: str = '127.0.0.1', port: int = 7497, client_id: int = 1):
+    def __init__(self, host: str = '127.0.0.1', port: int = 7497, client_id: int = 1,
+                 limiter: Optional[RateLimiter] = None):
         """
         Initialize IBKR broker connection parameters.
         
@@ -18,11 +45,29 @@ class IBKRBroker(BaseBroker):
             host: TWS/Gateway host address
             port: TWS/Gateway port (7497 for TWS paper, 7496 for TWS live, 4002 for Gateway paper, 4001 for Gateway live)
             client_id: Unique client identifier
+            limiter: Message and market data line pacing (default: IBKR limits)
         """
         self.host = host
         self.port = port
         self.client_id = client_id
+        self.limiter = limiter if limiter is not None else RateLimiter()
         self.ib = IB()
+        self._stocks = {}  # symbol -> qualified Stock, kept for the connection's lifetime
+        self._stream_tickers = {}
+        self._quote_callback = None
+        self._order_callback = None
+    
+    @classmethod
+    def from_env(cls, **kwargs) -> 'IBKRBroker':
+        """
+        Create IBKR broker instance with defaults from environment variables.
+        """
+        return cls(
+            host=kwargs.get('host', os.getenv('IBKR_HOST', '127.0.0.1')),
+            port=kwargs.get('port', int(os.getenv('IBKR_PORT', '7497'))),
+            client_id=kwargs.get('client_id', int(os.getenv('IBKR_CLIENT_ID', '1'))),
+            limiter=kwargs.get('limiter') or RateLimiter.from_env('IBKR'),
+        )
     
     def connect(self) -> None:
         """
@@ -50,7 +95,8 @@ class IBKRBroker(BaseBroker):
         return self.ib.isConnected()
     
     def place_option_trade(self, symbol: str, right: str, strike: float, 
-                          expiry: str, action: str = 'BUY', quantity: int = 1) -> Any:
+                          expiry: str, action: str = 'BUY', quantity: int = 1,
+                          client_order_id: Optional[str] = None) -> Any:
         """
         Place an option trade on IBKR.
         
@@ -61,6 +107,7 @@ class IBKRBroker(BaseBroker):
             expiry: Expiration date in YYYYMMDD format
             action: 'BUY' or 'SELL'
             quantity: Number of contracts
+            client_order_id: Stored in the order's orderRef
             
         Returns:
             Trade object from ib_insync
@@ -72,12 +119,59 @@ class IBKRBroker(BaseBroker):
             right=right, 
             exchange='SMART'
         )
+        self.limiter.acquire(2, PRIORITY_ORDER)  # qualify + place
         self.ib.qualifyContracts(contract)
         
         order = MarketOrder(action, quantity)
+        if client_order_id:
+            order.orderRef = client_order_id
         trade = self.ib.placeOrder(contract, order)
         print(f"✅ Order placed: {action} {right} {symbol} @ {strike}")
         return trade
+
+    def place_combo_order(self, symbol: str, legs: List[OrderLeg], action: str = 'BUY',
+                          quantity: int = 1, limit_price: Optional[float] = None,
+                          client_order_id: Optional[str] = None) -> Any:
+        """
+        Place a multi-leg option order on IBKR as one BAG contract.
+
+        Each leg is qualified for its conId; the combo is routed SMART and
+        priced as a whole, so the legs fill together or not at all.
+
+        Args:
+            symbol: Underlying symbol
+            legs: One OrderLeg per leg
+            action: 'BUY' or 'SELL' the combo
+            quantity: Number of combos
+            limit_price: Net price per combo (negative for a credit); None for a market order
+            client_order_id: Stored in the order's orderRef
+
+        Returns:
+            Trade object from ib_insync
+        """
+        options = [Option(symbol=symbol, lastTradeDateOrContractMonth=leg.contract.expiry,
+                          strike=leg.contract.strike, right=leg.contract.right, exchange='SMART')
+                   for leg in legs]
+        for chunk in self.limiter.batches(options, PRIORITY_ORDER):
+            self.ib.qualifyContracts(*chunk)
+        missing = [leg for leg, option in zip(legs, options) if not option.conId]
+        if missing:
+            raise ValueError(f"Could not qualify combo legs: {missing}")
+
+        combo = Contract(
+            secType='BAG', symbol=symbol, currency='USD', exchange='SMART',
+            comboLegs=[ComboLeg(conId=option.conId, ratio=leg.ratio, action=leg.action, exchange='SMART')
+                       for leg, option in zip(legs, options)],
+        )
+        order = (MarketOrder(action, quantity) if limit_price is None
+                 else LimitOrder(action, quantity, round(limit_price, 2)))
+        if client_order_id:
+            order.orderRef = client_order_id
+        self.limiter.acquire(1, PRIORITY_ORDER)
+        trade = self.ib.placeOrder(combo, order)
+        print(f"✅ Combo order placed: {action} {quantity} {symbol} {len(legs)}-leg BAG"
+              f"{'' if limit_price is None else f' @ {limit_price:.2f}'}")
+        return trade
     
     def fetch_market_data(self, symbol: str) -> Dict[str, Any]:
         """
@@ -89,16 +183,21 @@ class IBKRBroker(BaseBroker):
         Returns:
             Dictionary with market data
         """
-        stock = Stock(symbol, 'SMART', 'USD')
-        self.ib.qualifyContracts(stock)
+        stock = self._stock(symbol)
         
-        ticker = self.ib.reqMktData(stock, "", False, False)
-        self.ib.sleep(2)  # Give IBKR time to respond
+        with self.limiter.lines(1):
+            self.limiter.acquire(1, PRIORITY_DATA)
+            ticker = self.ib.reqMktData(stock, "", False, False)
+            self.ib.sleep(2)  # Give IBKR time to respond
+            
+            # Cancel the market data request to avoid resource lock
+            self.limiter.acquire(1, PRIORITY_DATA)
+            self.ib.cancelMktData(ticker)
         
         # Fallback in case ticker.last is None
         last_price = ticker.last if ticker.last is not None else (ticker.close if ticker.close else None)
         
-        market_data = {
+        return {
             'symbol': symbol,
             'last_price': last_price,
             'close': ticker.close,
@@ -106,11 +205,86 @@ class IBKRBroker(BaseBroker):
             'ask': ticker.ask,
             'volume': ticker.volume
         }
+    
+    def fetch_quotes(self, symbols: List[str], costs: Optional[Dict[str, float]] = None) -> QuoteBatch:
+        """
+        Fetch snapshot quotes for all symbols.
         
-        # Cancel the market data request to avoid resource lock
-        self.ib.cancelMktData(ticker)
+        Contracts are qualified once per connection (see qualify_contracts) and
+        snapshots requested in as few round-trips as the message rate and free
+        market data lines allow. Each round-trip's time goes to `costs` split
+        over its symbols.
+        """
+        qualified = self._qualified_stocks(symbols)
+        
+        tickers = []
+        while qualified:
+            with self.limiter.lines(len(qualified)) as leased:
+                for chunk in self.limiter.batches(qualified[:leased]):
+                    start = time.perf_counter()
+                    tickers += self.ib.reqTickers(*chunk)
+                    if costs is not None:
+                        share = (time.perf_counter() - start) / len(chunk)
+                        costs.update((contract.symbol, share) for contract in chunk)
+            qualified = qualified[leased:]
         
-        return market_data
+        return QuoteBatch.from_records([{
+            'symbol': t.contract.symbol,
+            'bid': t.bid,
+            'ask': t.ask,
+            'last': t.last,
+            'close': t.close,
+            'volume': t.volume,
+            'timestamp': t.time,
+        } for t in tickers])
+    
+    def fetch_historical_bars(self, symbol: str, start: float, end: Optional[float] = None) -> pd.DataFrame:
+        """
+        Fetch daily TRADES bars (regular trading hours) with one reqHistoricalData request.
+        
+        IBKR paces historical requests separately (no identical request within
+        15 seconds, 60 per 10 minutes); utils/bar_cache.py asks once per symbol
+        per refresh interval, and only for the missing tail.
+        """
+        now = time.time()
+        end = now if end is None else end
+        days = max(1, int((end - start) // 86400) + 1)
+        stock = self._stock(symbol)
+        self.limiter.acquire(1, PRIORITY_DATA)
+        bars = self.ib.reqHistoricalData(
+            stock,
+            endDateTime='' if end >= now else datetime.fromtimestamp(end, timezone.utc),
+            durationStr=f"{days} D" if days <= 365 else f"{math.ceil(days / 365)} Y",
+            barSizeSetting='1 day',
+            whatToShow='TRADES',
+            useRTH=True,
+            formatDate=2,
+        )
+        frame = pd.DataFrame([(session_timestamp(b.date), b.open, b.high, b.low, b.close, b.volume) for b in bars],
+                             columns=BAR_COLUMNS)
+        return frame[(frame['timestamp'] >= start) & (frame['timestamp'] <= end)].reset_index(drop=True)
+    
+    def _qualified_stocks(self, symbols: List[str]) -> List[Stock]:
+        """Qualified Stock contracts for symbols, looking up only those not cached yet."""
+        missing = [Stock(s, 'SMART', 'USD') for s in dict.fromkeys(symbols) if s not in self._stocks]
+        for chunk in self.limiter.batches(missing):
+            for stock in self.ib.qualifyContracts(*chunk):
+                if stock.conId:
+                    self._stocks[stock.symbol] = stock
+        return [self._stocks[s] for s in symbols if s in self._stocks]
+    
+    def _stock(self, symbol: str) -> Stock:
+        stocks = self._qualified_stocks([symbol])
+        if not stocks:
+            raise ValueError(f"IBKR could not qualify a stock contract for {symbol}")
+        return stocks[0]
+    
+    def qualify_contracts(self, symbols: List[str]) -> List[str]:
+        """
+        Qualify the stock contracts for symbols in paced batches and keep them,
+        so quotes, bars and streams need no qualification round-trip later.
+        """
+        return [stock.symbol for stock in self._qualified_stocks(symbols)]
     
     def get_account_info(self) -> Dict[str, Any]:
         """
@@ -129,3 +303,93 @@ class IBKRBroker(BaseBroker):
         }
         
         return account_info
+    
+    def get_option_positions(self) -> Dict[tuple, float]:
+        """
+        Aggregate IBKR option positions by (symbol, right).
+        """
+        positions = {}
+        for pos in self.ib.positions():
+            if pos.contract.secType != 'OPT':
+                continue
+            key = (pos.contract.symbol, pos.contract.right)
+            positions[key] = positions.get(key, 0) + pos.position
+        return positions
+    
+    def subscribe_quotes(self, symbols: List[str], callback: QuoteCallback) -> None:
+        """
+        Stream underlying quotes and option implied volatility (generic tick 106).
+        
+        Updates are delivered from ib_insync's event loop, i.e. while poll_events() runs.
+        Each stream holds a market data line; symbols beyond the free lines are not streamed.
+        """
+        contracts = self._qualified_stocks([s for s in symbols if s not in self._stream_tickers])
+        held = self.limiter.hold_lines(len(contracts))
+        if held < len(contracts):
+            print(f"⚠️ Market data lines exhausted: not streaming "
+                  f"{', '.join(c.symbol for c in contracts[held:])}")
+        for chunk in self.limiter.batches(contracts[:held]):
+            for contract in chunk:
+                self._stream_tickers[contract.symbol] = self.ib.reqMktData(contract, "106", False, False)
+        
+        if self._quote_callback is None:
+            self.ib.pendingTickersEvent += self._on_pending_tickers
+        self._quote_callback = callback
+    
+    def _on_pending_tickers(self, tickers) -> None:
+        for ticker in tickers:
+            symbol = ticker.contract.symbol
+            if symbol not in self._stream_tickers:
+                continue
+            price = ticker.marketPrice()
+            if price is None or math.isnan(price):
+                continue
+            iv = ticker.impliedVolatility
+            self._quote_callback(symbol, price, None if iv is None or math.isnan(iv) else iv)
+    
+    def unsubscribe_quotes(self) -> None:
+        """
+        Cancel all streaming market data lines.
+        """
+        tickers = list(self._stream_tickers.values())
+        for chunk in self.limiter.batches(tickers):
+            for ticker in chunk:
+                self.ib.cancelMktData(ticker.contract)
+        self.limiter.release_lines(len(tickers))
+        self._stream_tickers = {}
+        if self._quote_callback is not None:
+            self.ib.pendingTickersEvent -= self._on_pending_tickers
+            self._quote_callback = None
+    
+    def subscribe_order_updates(self, callback: OrderUpdateCallback) -> None:
+        """
+        Forward ib_insync orderStatusEvent for orders placed with a client order id.
+        """
+        if self._order_callback is None:
+            self.ib.orderStatusEvent += self._on_order_status
+        self._order_callback = callback
+    
+    def _on_order_status(self, trade) -> None:
+        status = _IB_ORDER_STATUS.get(trade.orderStatus.status)
+        if status is None or not trade.order.orderRef:
+            return
+        filled = trade.orderStatus.filled
+        if status == ORDER_ACKED and filled:
+            status = ORDER_PARTIALLY_FILLED
+        avg_price = trade.orderStatus.avgFillPrice or None
+        self._order_callback(trade.order.orderRef, status, filled, avg_price)
+    
+    def find_order(self, client_order_id: str) -> Optional[Any]:
+        """
+        Find a trade placed in this session by its orderRef.
+        """
+        for trade in self.ib.trades():
+            if trade.order.orderRef == client_order_id:
+                return trade
+        return None
+    
+    def poll_events(self, timeout: float) -> None:
+        """
+        Run the ib_insync event loop for `timeout` seconds.
+        """
+        self.ib.sleep(timeout)
@@ -0,0 +1,121 @@
+# brokers/quote_batch.py
+
+import sys
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Sequence
+import numpy as np
+
+_COLUMNS = ('bid', 'ask', 'last', 'volume', 'timestamp')
+# Prices fit float32 (~7 significant digits); volume and epoch timestamps need float64
+_DTYPES = {'bid': np.float32, 'ask': np.float32, 'last': np.float32,
+           'volume': np.float64, 'timestamp': np.float64}
+
+
+def _to_epoch(value: Any) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _to_float(value: Any) -> float:
+    if value is None:
+        return math.nan
+    value = float(value)
+    return value if value >= 0 else math.nan  # IBKR reports -1 for "no data"
+
+
+@dataclass
+class QuoteBatch:
+    """
+    Quotes for many symbols as parallel numpy columns.
+
+    Row i of every column belongs to symbols[i]. Symbols are interned strings,
+    bid/ask/last are float32, volume and timestamp (epoch seconds) float64.
+    Missing values are NaN.
+    """
+    symbols: np.ndarray
+    bid: np.ndarray
+    ask: np.ndarray
+    last: np.ndarray
+    volume: np.ndarray
+    timestamp: np.ndarray
+    _index: Optional[Dict[str, int]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def empty(cls) -> 'QuoteBatch':
+        return cls.from_arrays([])
+
+    @classmethod
+    def from_arrays(cls, symbols: Sequence[str], **columns) -> 'QuoteBatch':
+        """
+        Build a batch from a symbol list and any of the bid/ask/last/volume/timestamp columns.
+        Columns not given are filled with NaN.
+        """
+        n = len(symbols)
+        arrays = {}
+        for name in _COLUMNS:
+            values = columns.get(name)
+            arrays[name] = (np.full(n, np.nan, dtype=_DTYPES[name]) if values is None
+                            else np.asarray(values, dtype=_DTYPES[name]).reshape(n))
+        interned = np.empty(n, dtype=object)
+        interned[:] = [sys.intern(str(s)) for s in symbols]
+        return cls(symbols=interned, **arrays)
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'QuoteBatch':
+        """
+        Build a batch from fetch_market_data() dicts.
+
+        'last' falls back to 'last_price' and then 'close'; 'timestamp' may be a
+        datetime or epoch seconds.
+        """
+        def last_of(r):
+            for key in ('last', 'last_price', 'close'):
+                value = _to_float(r.get(key))
+                if not math.isnan(value):
+                    return value
+            return math.nan
+
+        return cls.from_arrays(
+            [r['symbol'] for r in records],
+            bid=[_to_float(r.get('bid')) for r in records],
+            ask=[_to_float(r.get('ask')) for r in records],
+            last=[last_of(r) for r in records],
+            volume=[_to_float(r.get('volume')) for r in records],
+            timestamp=[_to_epoch(r.get('timestamp')) for r in records],
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """Symbol -> row number."""
+        if self._index is None:
+            self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._index
+
+    @property
+    def mid(self) -> np.ndarray:
+        return (self.bid + self.ask) / 2
+
+    @property
+    def price(self) -> np.ndarray:
+        """Best available price per row: last trade, else mid, else NaN."""
+        return np.where(np.isnan(self.last), self.mid, self.last)
+
+    def row(self, symbol: str) -> Dict[str, Any]:
+        """One symbol's quote as a dict (KeyError if absent)."""
+        i = self.index[symbol]
+        quote = {'symbol': symbol}
+        for name in _COLUMNS:
+            quote[name] = float(getattr(self, name)[i])
+        return quote
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame({'symbol': self.symbols, **{name: getattr(self, name) for name in _COLUMNS}})
@@ -0,0 +1,265 @@
+# brokers/rate_limiter.py
+
+"""
+Request pacing for one broker connection.
+
+IBKR disconnects clients that exceed its message rate (50 messages per second
+through TWS/Gateway) and refuses market data requests beyond the account's
+concurrent line allowance (100 by default). A pacing violation costs far more
+than waiting, so every message a broker sends first takes a token here:
+
+- Tokens come from one bucket holding `burst` tokens and refilling at
+  (limit - burst) / window per second. No window of `window` seconds can
+  then carry more than `limit` messages, however the requests arrive.
+- Waiters are served by priority, then arrival: a pending order is granted
+  before any queued data request. Data requests also leave `order_reserve`
+  tokens in the bucket, so an order normally goes out without waiting.
+- Market data lines are a counted pool. Streaming subscriptions hold lines
+  until cancelled. Snapshot requests lease as many lines as are free and
+  release them when the snapshot is done.
+
+Callers that send many messages at once (qualifying a batch of contracts,
+snapshot quotes for a watchlist) use batches(). It yields chunks as large as
+the tokens currently available, so a synchronous round-trip per chunk runs at
+the bucket's rate rather than in one burst.
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+PRIORITY_ORDER = 0   # order placement, cancels, and the contract lookups they need
+PRIORITY_DATA = 1    # quotes, chains, subscriptions
+
+PRIORITY_NAMES = {PRIORITY_ORDER: 'order', PRIORITY_DATA: 'data'}
+
+
+class RateLimiter:
+    """
+    Token-bucket message pacing with order priority and a market data line pool.
+
+    Thread-safe. One instance is shared by everything that sends over the same
+    broker connection.
+    """
+
+    def __init__(self, limit: float = 45, window: float = 1.0, burst: int = 10,
+                 order_reserve: int = 2, max_lines: Optional[int] = 100, stream_reserve: int = 10,
+                 clock=time.monotonic):
+        """
+        Args:
+            limit: Max messages in any `window` seconds
+            window: Window length in seconds
+            burst: Bucket size; the sustained rate is (limit - burst) / window
+            order_reserve: Tokens data requests leave in the bucket for orders
+            max_lines: Concurrent market data lines (None = unlimited)
+            stream_reserve: Lines streaming subscriptions leave free for snapshots
+            clock: Monotonic time source in seconds
+        """
+        if not 0 < burst < limit:
+            raise ValueError(f"burst must be between 0 and limit ({limit}), got {burst}")
+        if not 0 <= order_reserve < burst:
+            raise ValueError(f"order_reserve must be below burst ({burst}), got {order_reserve}")
+        self.limit = limit
+        self.window = window
+        self.burst = burst
+        self.rate = (limit - burst) / window
+        self.order_reserve = order_reserve
+        self.max_lines = max_lines
+        self.stream_reserve = stream_reserve if max_lines is not None else 0
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+        self._lines_leased = 0
+        self._lines_streaming = 0
+
+        self._started = self._refilled_at
+        self._sent = {p: 0 for p in PRIORITY_NAMES}
+        self._waited = {p: 0.0 for p in PRIORITY_NAMES}
+        self._throttled = 0
+        self._lines_peak = 0
+        self._sampled_at = self._refilled_at
+        self._sampled = ({p: 0 for p in PRIORITY_NAMES}, {p: 0.0 for p in PRIORITY_NAMES})
+
+    @classmethod
+    def from_env(cls, prefix: str = 'IBKR', **kwargs) -> 'RateLimiter':
+        """
+        Create a limiter from {prefix}_MAX_MSGS_PER_SEC, {prefix}_MSG_BURST, {prefix}_ORDER_RESERVE,
+        {prefix}_MARKET_DATA_LINES and {prefix}_STREAM_RESERVE_LINES.
+        """
+        lines = kwargs.pop('max_lines', os.getenv(f'{prefix}_MARKET_DATA_LINES', '100'))
+        return cls(
+            limit=kwargs.pop('limit', float(os.getenv(f'{prefix}_MAX_MSGS_PER_SEC', '45'))),
+            burst=kwargs.pop('burst', int(os.getenv(f'{prefix}_MSG_BURST', '10'))),
+            order_reserve=kwargs.pop('order_reserve', int(os.getenv(f'{prefix}_ORDER_RESERVE', '2'))),
+            max_lines=int(lines) if lines not in (None, '', '0') else None,
+            stream_reserve=kwargs.pop('stream_reserve', int(os.getenv(f'{prefix}_STREAM_RESERVE_LINES', '10'))),
+            **kwargs,
+        )
+
+    # -- message tokens -----------------------------------------------------
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _take(self, want: int, priority: int, exact: bool) -> int:
+        floor = 0 if priority == PRIORITY_ORDER else self.order_reserve
+        if exact and want > self.burst - floor:
+            raise ValueError(f"Cannot take {want} tokens at once; the bucket holds {self.burst - floor}")
+        ticket = (priority, next(self._seq))
+        start = self._clock()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            self._cond.notify_all()
+            try:
+                while True:
+                    self._refill()
+                    available = int(self._tokens - floor + 1e-9)
+                    need = want if exact else 1
+                    if self._waiting[0] == ticket and available >= need:
+                        break
+                    # Only the head of the queue waits on the refill; the rest wait for it to leave
+                    self._cond.wait((need - available) / self.rate if self._waiting[0] == ticket else None)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+            granted = want if exact else min(want, available)
+            self._tokens -= granted
+            waited = self._clock() - start
+            self._sent[priority] += granted
+            self._waited[priority] += waited
+            if waited > 0.001:
+                self._throttled += 1
+        return granted
+
+    def acquire(self, cost: int = 1, priority: int = PRIORITY_DATA) -> None:
+        """
+        Block until `cost` messages may be sent.
+
+        Args:
+            cost: Number of messages about to be sent (at most burst, less order_reserve for data)
+            priority: PRIORITY_ORDER or PRIORITY_DATA
+        """
+        self._take(cost, priority, exact=True)
+
+    def batches(self, items: Sequence, priority: int = PRIORITY_DATA) -> Iterator[Sequence]:
+        """
+        Yield consecutive chunks of `items`, one message per item, each as large
+        as the tokens available when it is yielded (at least one).
+        """
+        i = 0
+        while i < len(items):
+            n = self._take(len(items) - i, priority, exact=False)
+            yield items[i:i + n]
+            i += n
+
+    # -- market data lines --------------------------------------------------
+
+    @property
+    def lines_in_use(self) -> int:
+        return self._lines_leased + self._lines_streaming
+
+    def _free_lines(self) -> float:
+        if self.max_lines is None:
+            return float('inf')
+        return self.max_lines - self.lines_in_use
+
+    def _track_lines(self) -> None:
+        self._lines_peak = max(self._lines_peak, self.lines_in_use)
+
+    @contextmanager
+    def lines(self, wanted: int) -> Iterator[int]:
+        """
+        Lease up to `wanted` market data lines for snapshot requests.
+
+        Waits until at least one line is free and yields the number leased;
+        the caller requests that many and the lines return on exit.
+        """
+        with self._cond:
+            while self._free_lines() < 1:
+                self._cond.wait()
+            leased = int(min(wanted, self._free_lines()))
+            self._lines_leased += leased
+            self._track_lines()
+        try:
+            yield leased
+        finally:
+            with self._cond:
+                self._lines_leased -= leased
+                self._cond.notify_all()
+
+    def hold_lines(self, wanted: int) -> int:
+        """
+        Hold up to `wanted` lines for streaming subscriptions, without waiting.
+
+        Leaves stream_reserve lines for snapshots. Returns the number held;
+        give them back with release_lines() when the subscriptions are cancelled.
+        """
+        with self._cond:
+            held = int(max(0, min(wanted, self._free_lines() - self.stream_reserve)))
+            self._lines_streaming += held
+            self._track_lines()
+        return held
+
+    def release_lines(self, count: int) -> None:
+        """Give back lines taken with hold_lines()."""
+        with self._cond:
+            self._lines_streaming = max(0, self._lines_streaming - count)
+            self._cond.notify_all()
+
+    # -- metrics ------------------------------------------------------------
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Cumulative utilization since the limiter was created.
+
+        Returns:
+            Dict with messages sent and seconds waited per priority, the number
+            of throttled requests, message-rate utilization (sent / allowed at
+            `limit`), and market data lines in use, streaming, peak and max
+        """
+        with self._cond:
+            elapsed = max(self._clock() - self._started, 1e-9)
+            sent = sum(self._sent.values())
+            stats = {f'{name}_msgs': self._sent[p] for p, name in PRIORITY_NAMES.items()}
+            stats.update({f'{name}_wait_sec': self._waited[p] for p, name in PRIORITY_NAMES.items()})
+            stats.update({
+                'throttled': self._throttled,
+                'msg_utilization': sent / (self.limit * elapsed / self.window),
+                'lines_in_use': self.lines_in_use,
+                'lines_streaming': self._lines_streaming,
+                'lines_peak': self._lines_peak,
+                'max_lines': self.max_lines,
+            })
+        return stats
+
+    def perf_samples(self) -> List[Tuple[str, float]]:
+        """
+        Utilization since the previous call, as (metric, value) pairs for PerfRing.record_many().
+        """
+        with self._cond:
+            now = self._clock()
+            elapsed = max(now - self._sampled_at, 1e-9)
+            sent_before, waited_before = self._sampled
+            sent = sum(self._sent[p] - sent_before[p] for p in PRIORITY_NAMES)
+            samples = [
+                ('broker_msgs', sent),
+                ('broker_msg_util', sent / (self.limit * elapsed / self.window)),
+                ('broker_order_wait_ms', (self._waited[PRIORITY_ORDER] - waited_before[PRIORITY_ORDER]) * 1000),
+                ('broker_data_wait_ms', (self._waited[PRIORITY_DATA] - waited_before[PRIORITY_DATA]) * 1000),
+                ('md_lines', self.lines_in_use),
+            ]
+            self._sampled_at = now
+            self._sampled = (dict(self._sent), dict(self._waited))
+        return samples
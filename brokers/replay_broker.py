@@ -0,0 +1,179 @@
+# brokers/replay_broker.py
+
+import os
+import time
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+from utils.helpers import build_occ_symbol
+from utils.tick_log import TickLog, SOURCE_QUOTE, SOURCE_CHAIN
+from .base_broker import QuoteBatch, OPTION_CHAIN_COLUMNS
+from .sim_broker import SimBroker
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Unix seconds from a number or an ISO timestamp (local time); None for ''."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return pd.Timestamp(value).tz_localize(None).to_pydatetime().timestamp()
+
+
+class ReplayBroker(SimBroker):
+    """
+    Replays a recorded tick range (utils/tick_log.py) through the broker interface.
+
+    A replay clock starts at the first tick of the range. poll_events(timeout)
+    advances it by `timeout` seconds and delivers the streamed quotes recorded
+    in that span to the quote callback, in their original order. Quotes and
+    option chains are the latest recorded as of the clock. Orders fill
+    immediately, as on SimBroker, at the replayed price.
+    """
+
+    def __init__(self, path: str, start: Optional[float] = None, end: Optional[float] = None,
+                 pace: float = 0.0, **kwargs):
+        """
+        Args:
+            path: Tick file (data/ticks/ticks-YYYYMMDD.tick)
+            start, end: Unix-second range to replay [start, end); default the whole file
+            pace: Wall seconds slept per replayed second in poll_events (0 = as fast as possible)
+            **kwargs: Passed to SimBroker (starting_cash, ...)
+        """
+        super().__init__(**kwargs)
+        self.log = TickLog(path)
+        self.ticks = self.log.between(start, end)
+        self._ts = self.ticks['ts']
+        self.pace = pace
+        self.clock = float(self._ts[0]) if len(self.ticks) else (start or 0.0)
+        self._cursor = 0
+        self._latest: Dict[str, tuple] = {}  # symbol -> (bid, ask, last, iv, volume, ts)
+        self._chains: Dict[str, float] = {}  # symbol -> timestamp of its latest chain snapshot
+        self._has_chains = bool(len(self.ticks)) and bool((self.ticks['source'] == SOURCE_CHAIN).any())
+        self._advance(self.clock)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'ReplayBroker':
+        """
+        Create a replay broker from TICK_REPLAY_PATH and optional TICK_REPLAY_START / TICK_REPLAY_END
+        (Unix seconds or ISO timestamps) and TICK_REPLAY_PACE.
+        """
+        return cls(
+            path=kwargs.pop('path', os.getenv('TICK_REPLAY_PATH', '')),
+            start=kwargs.pop('start', _parse_time(os.getenv('TICK_REPLAY_START', ''))),
+            end=kwargs.pop('end', _parse_time(os.getenv('TICK_REPLAY_END', ''))),
+            pace=kwargs.pop('pace', float(os.getenv('TICK_REPLAY_PACE', '0'))),
+            **kwargs,
+        )
+
+    @property
+    def exhausted(self) -> bool:
+        """True once every tick of the range has been replayed."""
+        return self._cursor >= len(self.ticks)
+
+    def _advance(self, until: float) -> None:
+        # Apply every tick with ts <= until, in recorded order
+        stop = int(np.searchsorted(self._ts, until, 'right'))
+        if stop <= self._cursor:
+            return
+        chunk = self.ticks[self._cursor:stop]
+        self._cursor = stop
+        symbols = self.log.symbols
+
+        underlying = chunk[chunk['right'] == 0]
+        if self._quote_callback is not None:
+            streamed = underlying[underlying['source'] == SOURCE_QUOTE]
+            subscribed = set(self._stream_symbols)
+            for code, last, iv in zip(streamed['symbol'].tolist(), streamed['last'].tolist(),
+                                      streamed['iv'].tolist()):
+                if symbols[code] in subscribed:
+                    self._quote_callback(symbols[code], last, None if iv != iv else iv)
+
+        # Latest underlying state per symbol: last occurrence in the chunk
+        codes = underlying['symbol'][::-1]
+        _, first = np.unique(codes, return_index=True)
+        for row in underlying[::-1][first]:
+            symbol = symbols[row['symbol']]
+            self._latest[symbol] = (row['bid'], row['ask'], row['last'], row['iv'], row['volume'], row['ts'])
+            self._prices[symbol] = float(row['last'])
+
+        chains = chunk[chunk['source'] == SOURCE_CHAIN]
+        for code, ts in zip(chains['symbol'].tolist(), chains['ts'].tolist()):
+            self._chains[symbols[code]] = ts
+
+    def poll_events(self, timeout: float) -> None:
+        """
+        Advance the replay clock by `timeout` seconds, delivering the recorded quotes in that span.
+        """
+        self.clock += timeout
+        self._advance(self.clock)
+        if self.pace:
+            time.sleep(timeout * self.pace)
+
+    def _quote(self, symbol: str) -> tuple:
+        latest = self._latest.get(symbol)
+        if latest is None:
+            raise KeyError(f"No recorded quote for {symbol} as of {self.clock:.3f}")
+        return latest
+
+    def fetch_market_data(self, symbol: str) -> Dict[str, Any]:
+        if not self.is_connected():
+            raise RuntimeError("Not connected to ReplayBroker. Call connect() first.")
+        bid, ask, last, _, volume, _ = self._quote(symbol)
+        return {'symbol': symbol, 'last_price': last, 'close': last, 'bid': bid, 'ask': ask, 'volume': volume}
+
+    def fetch_quotes(self, symbols: List[str], costs: Optional[Dict[str, float]] = None) -> QuoteBatch:
+        """
+        Latest recorded quote per symbol as of the replay clock; symbols never quoted are left out.
+        Nothing is timed in `costs`.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to ReplayBroker. Call connect() first.")
+        known = [s for s in symbols if s in self._latest]
+        rows = np.array([self._latest[s] for s in known], dtype=np.float64).reshape(len(known), 6)
+        return QuoteBatch.from_arrays(known, bid=rows[:, 0], ask=rows[:, 1], last=rows[:, 2],
+                                      volume=rows[:, 4], timestamp=rows[:, 5])
+
+    def fetch_historical_bars(self, symbol: str, start: float, end: Optional[float] = None):
+        """
+        Not recorded; replays read the bars the live run cached (utils/bar_cache.py).
+        """
+        raise NotImplementedError("ReplayBroker does not provide historical bars")
+
+    def fetch_option_chain(self, symbol: str, expiry: Optional[str] = None, right: Optional[str] = None,
+                           min_strike: Optional[float] = None, max_strike: Optional[float] = None):
+        """
+        The symbol's latest recorded chain snapshot as of the replay clock.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to ReplayBroker. Call connect() first.")
+        if not self._has_chains:
+            raise NotImplementedError("ReplayBroker recording has no option chains")
+        ts = self._chains.get(symbol)
+        if ts is None:
+            return pd.DataFrame(columns=OPTION_CHAIN_COLUMNS)
+
+        # A snapshot is written with one timestamp, so it is one contiguous time range
+        lo, hi = np.searchsorted(self._ts, ts, 'left'), np.searchsorted(self._ts, ts, 'right')
+        rows = self.ticks[lo:hi]
+        rows = rows[(rows['source'] == SOURCE_CHAIN) & (rows['symbol'] == self.log.symbols.index(symbol))]
+        chain = pd.DataFrame({
+            'symbol': symbol,
+            'expiry': rows['expiry'].astype(str),
+            'right': np.where(rows['right'] == 1, 'C', 'P'),
+            'strike': rows['strike'],
+            **{name: rows[name] for name in ('bid', 'ask', 'last', 'iv', 'delta', 'gamma', 'theta', 'vega')},
+            'timestamp': rows['ts'],
+        })
+        if expiry:
+            chain = chain[chain['expiry'] == expiry.replace('-', '')]
+        if right:
+            chain = chain[chain['right'] == right.upper()[0]]
+        if min_strike is not None:
+            chain = chain[chain['strike'] >= min_strike]
+        if max_strike is not None:
+            chain = chain[chain['strike'] <= max_strike]
+        chain.insert(0, 'occ_symbol', [build_occ_symbol(symbol, e, r, k) for e, r, k in
+                                       zip(chain['expiry'], chain['right'], chain['strike'])])
+        return chain[OPTION_CHAIN_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,299 @@
+# brokers/sim_broker.py
+
+import os
+import time
+import zlib
+import numpy as np
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+from utils.helpers import build_occ_symbol, session_timestamp, session_date
+from utils.pricing import black_scholes, CHAIN_EXPIRIES, CHAIN_STRIKES
+from .contracts import OrderLeg
+from .base_broker import (BaseBroker, QuoteBatch, QuoteCallback, OrderUpdateCallback,
+                          ORDER_ACKED, ORDER_FILLED, OPTION_CHAIN_COLUMNS, BAR_COLUMNS)
+
+
+class SimBroker(BaseBroker):
+    """
+    In-process simulated broker for offline runs and end-to-end tests.
+
+    Prices follow a per-symbol seeded random walk, so two SimBroker instances
+    (e.g. in different worker processes) quote the same path for a symbol.
+    Orders are acked and filled immediately and kept in `orders`; set
+    `fail_next_orders` to make the next submissions raise, for retry testing.
+    """
+
+    def __init__(self, client_id: int = 1, seed: int = 0, fetch_latency: float = 0.0,
+                 starting_cash: float = 100_000.0):
+        """
+        Initialize the simulated broker.
+
+        Args:
+            client_id: Client identifier (kept for parity with IBKR connections)
+            seed: Base seed for the simulated price paths
+            fetch_latency: Seconds to sleep per fetch_market_data call
+            starting_cash: Initial account cash
+        """
+        self.client_id = client_id
+        self.seed = seed
+        self.fetch_latency = fetch_latency
+        self.cash = starting_cash
+        self.orders: List[Dict[str, Any]] = []
+        self.positions: Dict[tuple, int] = {}
+        self._prices: Dict[str, float] = {}
+        self._rngs: Dict[str, np.random.Generator] = {}
+        self._stream_symbols: List[str] = []
+        self._quote_callback = None
+        self._order_callback = None
+        self.fail_next_orders = 0
+        self._connected = False
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'SimBroker':
+        """
+        Create simulated broker instance with defaults from environment variables.
+        """
+        return cls(
+            client_id=kwargs.get('client_id', int(os.getenv('IBKR_CLIENT_ID', '1'))),
+            seed=kwargs.get('seed', int(os.getenv('SIM_SEED', '0'))),
+            fetch_latency=kwargs.get('fetch_latency', float(os.getenv('SIM_FETCH_LATENCY', '0'))),
+            starting_cash=kwargs.get('starting_cash', 100_000.0),
+        )
+
+    def connect(self) -> None:
+        self._connected = True
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def _next_iv(self, symbol: str) -> float:
+        # IV jitters around a fixed per-symbol level
+        rng = self._rngs[symbol]
+        level = 0.2 + (zlib.crc32(symbol.encode()) % 30) / 100
+        return max(0.05, level + float(rng.normal(0, 0.01)))
+
+    def _next_price(self, symbol: str) -> float:
+        rng = self._rngs.get(symbol)
+        if rng is None:
+            rng = np.random.default_rng(self.seed + zlib.crc32(symbol.encode()))
+            self._rngs[symbol] = rng
+            self._prices[symbol] = float(rng.uniform(20, 500))
+        self._prices[symbol] *= float(np.exp(rng.normal(0, 0.002)))
+        return self._prices[symbol]
+
+    def place_option_trade(self, symbol: str, right: str, strike: float,
+                          expiry: str, action: str = 'BUY', quantity: int = 1,
+                          client_order_id: Optional[str] = None) -> Any:
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+        if self.fail_next_orders > 0:
+            self.fail_next_orders -= 1
+            raise ConnectionError("Simulated transient order submission failure")
+
+        order = {
+            'order_id': len(self.orders) + 1,
+            'symbol': symbol,
+            'right': right,
+            'strike': strike,
+            'expiry': expiry,
+            'action': action,
+            'quantity': quantity,
+            'status': 'Filled',
+            'client_order_id': client_order_id,
+            'timestamp': time.time(),
+        }
+        self.orders.append(order)
+        key = (symbol, right, strike, expiry)
+        signed = quantity if action == 'BUY' else -quantity
+        self.positions[key] = self.positions.get(key, 0) + signed
+
+        if self._order_callback is not None and client_order_id:
+            fill_price = round(self._prices.get(symbol, 100.0) * 0.02, 2)
+            self._order_callback(client_order_id, ORDER_ACKED, 0, None)
+            self._order_callback(client_order_id, ORDER_FILLED, quantity, fill_price)
+        return order
+
+    def place_combo_order(self, symbol: str, legs: List[OrderLeg], action: str = 'BUY',
+                          quantity: int = 1, limit_price: Optional[float] = None,
+                          client_order_id: Optional[str] = None) -> Any:
+        """
+        Fill a combo at once: one order with right 'BAG', positions per leg,
+        filled at `limit_price` (or 0 for a market combo).
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+        if self.fail_next_orders > 0:
+            self.fail_next_orders -= 1
+            raise ConnectionError("Simulated transient order submission failure")
+
+        order = {
+            'order_id': len(self.orders) + 1,
+            'symbol': symbol,
+            'right': 'BAG',
+            'legs': list(legs),
+            'limit_price': limit_price,
+            'action': action,
+            'quantity': quantity,
+            'status': 'Filled',
+            'client_order_id': client_order_id,
+            'timestamp': time.time(),
+        }
+        self.orders.append(order)
+        sign = 1 if action == 'BUY' else -1
+        for leg in legs:
+            contract = leg.contract
+            key = (symbol, contract.right, contract.strike, contract.expiry)
+            signed = sign * (1 if leg.action == 'BUY' else -1) * leg.ratio * quantity
+            self.positions[key] = self.positions.get(key, 0) + signed
+
+        if self._order_callback is not None and client_order_id:
+            self._order_callback(client_order_id, ORDER_ACKED, 0, None)
+            self._order_callback(client_order_id, ORDER_FILLED, quantity, limit_price or 0.0)
+        return order
+
+    def fetch_market_data(self, symbol: str) -> Dict[str, Any]:
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+
+        last = self._next_price(symbol)
+        return {
+            'symbol': symbol,
+            'last_price': last,
+            'close': last,
+            'bid': round(last - 0.01, 2),
+            'ask': round(last + 0.01, 2),
+            'volume': 1000,
+        }
+
+    def fetch_quotes(self, symbols: List[str], costs: Optional[Dict[str, float]] = None) -> QuoteBatch:
+        """
+        Quote all symbols at once; `fetch_latency` is paid once per batch, not
+        per symbol, so no symbol is timed on its own in `costs`.
+        """
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+
+        last = np.array([self._next_price(symbol) for symbol in symbols], dtype=np.float64)
+        return QuoteBatch.from_arrays(
+            symbols,
+            bid=np.round(last - 0.01, 2),
+            ask=np.round(last + 0.01, 2),
+            last=last,
+            volume=np.full(len(symbols), 1000.0),
+            timestamp=np.full(len(symbols), time.time()),
+        )
+
+    def fetch_option_chain(self, symbol: str, expiry: Optional[str] = None, right: Optional[str] = None,
+                           min_strike: Optional[float] = None, max_strike: Optional[float] = None):
+        """
+        Black-Scholes chain around the symbol's current simulated price, listed
+        like the Alpaca stub market: weekly expiries, strikes centred on spot.
+        """
+        import pandas as pd
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+
+        spot = self._prices.get(symbol) or self._next_price(symbol)
+        level = 0.2 + (zlib.crc32(symbol.encode()) % 30) / 100
+        step = 1.0 if spot < 100 else 5.0
+        atm = round(spot / step) * step
+        today = date.today()
+        first = today + timedelta(days=(4 - today.weekday()) % 7 or 7)
+        now = time.time()
+
+        rows = []
+        for week in range(CHAIN_EXPIRIES):
+            listed = (first + timedelta(weeks=week)).strftime('%Y%m%d')
+            if expiry and listed != expiry.replace('-', ''):
+                continue
+            years = (first + timedelta(weeks=week) - today).days / 365
+            for i in range(CHAIN_STRIKES):
+                strike = atm + step * (i - CHAIN_STRIKES // 2)
+                if strike <= 0 or (min_strike is not None and strike < min_strike) \
+                        or (max_strike is not None and strike > max_strike):
+                    continue
+                iv = level + float(np.log(strike / spot)) ** 2
+                for side in ('C', 'P'):
+                    if right and side != right.upper()[0]:
+                        continue
+                    bs = black_scholes(spot, strike, years, iv, side)
+                    mid = round(bs['price'], 2)
+                    half_spread = max(0.01, round(bs['price'] * 0.01, 2))
+                    rows.append((build_occ_symbol(symbol, listed, side, strike), symbol, listed, side, strike,
+                                 max(0.01, mid - half_spread), mid + half_spread, mid, round(iv, 4),
+                                 bs['delta'], bs['gamma'], bs['theta'], bs['vega'], now))
+        return pd.DataFrame(rows, columns=OPTION_CHAIN_COLUMNS)
+
+    def fetch_historical_bars(self, symbol: str, start: float, end: Optional[float] = None):
+        """
+        Weekday bars whose closes are fixed per (seed, symbol, date) draws around
+        the symbol's starting price; today's bar closes at the current price.
+        """
+        import pandas as pd
+        if not self.is_connected():
+            raise RuntimeError("Not connected to SimBroker. Call connect() first.")
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+
+        code = zlib.crc32(symbol.encode())
+        base = float(np.random.default_rng(self.seed + code).uniform(20, 500))  # as in _next_price
+        today = date.today()
+        day, last = session_date(start), min(session_date(time.time() if end is None else end), today)
+        rows = []
+        while day <= last:
+            if day.weekday() < 5:
+                if day == today:
+                    close = self._prices.get(symbol, base)
+                else:
+                    close = base * float(np.exp(np.random.default_rng([self.seed, code, day.toordinal()])
+                                                .normal(0, 0.05)))
+                rows.append((session_timestamp(day), close, close * 1.01, close * 0.99, close, 1_000_000.0))
+            day += timedelta(days=1)
+        return pd.DataFrame(rows, columns=BAR_COLUMNS)
+
+    def get_option_positions(self) -> Dict[tuple, float]:
+        positions = {}
+        for (symbol, right, _, _), qty in self.positions.items():
+            positions[(symbol, right)] = positions.get((symbol, right), 0) + qty
+        return positions
+
+    def subscribe_quotes(self, symbols: List[str], callback: QuoteCallback) -> None:
+        self._stream_symbols = list(dict.fromkeys(self._stream_symbols + list(symbols)))
+        self._quote_callback = callback
+
+    def unsubscribe_quotes(self) -> None:
+        self._stream_symbols = []
+        self._quote_callback = None
+
+    def poll_events(self, timeout: float) -> None:
+        """
+        Emit one simulated quote per subscribed symbol, then wait `timeout` seconds.
+        """
+        if self._quote_callback is not None:
+            for symbol in self._stream_symbols:
+                price = self._next_price(symbol)
+                self._quote_callback(symbol, price, self._next_iv(symbol))
+        time.sleep(timeout)
+
+    def subscribe_order_updates(self, callback: OrderUpdateCallback) -> None:
+        self._order_callback = callback
+
+    def find_order(self, client_order_id: str) -> Optional[Any]:
+        for order in self.orders:
+            if order['client_order_id'] == client_order_id:
+                return order
+        return None
+
+    def get_account_info(self) -> Dict[str, Any]:
+        return {
+            'cash': self.cash,
+            'positions': dict(self.positions),
+            'orders': list(self.orders),
+        }
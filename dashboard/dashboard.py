@@ -8,26 +8,33 @@ import sys
 
 # Make project root accessible
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from models.predict import predict_from_live_data
+from models.predict import predict_from_live_data, MODEL_PATH
+from utils.perf_ring import PerfRing, PERF_RING_PATH
+from backtest.backtest_engine import simulate
+from backtest.metrics import performance_summary, rolling_metrics
 
 st.set_page_config(page_title="AI Options Trading Dashboard", layout="wide")
 st.title("📈 AI Options Trading Dashboard")
 
-st.markdown("Auto-loading `data/live_input.csv` every 30 seconds. No manual upload needed.")
-
 DATA_PATH = "data/live_input.csv"
+HISTORICAL_PATH = "data/historical_data.csv"
+LATENCY_METRICS = ['fetch_ms', 'predict_ms', 'execute_ms', 'cycle_ms']
+
+page = st.sidebar.radio("Page", ["Live Predictions", "Performance", "Backtest"])
+window_min = st.sidebar.slider("Performance window (minutes)", 15, 24 * 60, 240, step=15)
+rolling_window = st.sidebar.slider("Backtest rolling window (bars)", 5, 100, 21)
 
 # Set up auto-refresh
 refresh_interval = 30  # seconds
 st_autorefresh = st.empty()
 
-while True:
-    st_autorefresh.empty()
+
+def render_predictions():
+    st.markdown("Auto-loading `data/live_input.csv` every 30 seconds. No manual upload needed.")
 
     if not os.path.exists(DATA_PATH):
         st.warning("Waiting for live_input.csv to be created...")
-        time.sleep(refresh_interval)
-        continue
+        return
 
     # Load the live input
     df = pd.read_csv(DATA_PATH)
@@ -37,12 +44,127 @@ while True:
 
     # Display predictions
     st.subheader("🔮 Model Predictions")
-    st.dataframe(pd.DataFrame(predictions))
+    st.dataframe(pd.DataFrame([p.to_dict() for p in predictions]))
 
     # Display raw features
     st.subheader("📊 Raw Live Input")
     st.dataframe(df)
 
+
+def render_performance():
+    if not os.path.exists(PERF_RING_PATH):
+        st.warning(f"Waiting for the trading process to create {PERF_RING_PATH}...")
+        return
+
+    samples = PerfRing(readonly=True).read(window_sec=window_min * 60)
+    if samples.empty:
+        st.info("No performance samples in the selected window yet.")
+        return
+
+    by_metric = dict(tuple(samples.groupby('metric')))
+
+    # Per-stage latency percentiles over the window
+    st.subheader("⏱️ Cycle Latency by Stage (ms)")
+    rows = []
+    for name in LATENCY_METRICS + ['order_submit_ms', 'order_ack_ms', 'reaction_ms', 'shadow_ms', 'warmup_ms', 'state_snapshot_ms', 'state_restore_ms']:
+        if name in by_metric:
+            values = by_metric[name]['value']
+            rows.append({
+                'stage': name.replace('_ms', ''),
+                'p50': values.quantile(0.50),
+                'p90': values.quantile(0.90),
+                'p99': values.quantile(0.99),
+                'max': values.max(),
+                'samples': len(values),
+            })
+    st.dataframe(pd.DataFrame(rows).round(1))
+
+    latency = samples[samples['metric'].isin(LATENCY_METRICS)]
+    if not latency.empty:
+        st.line_chart(latency.pivot_table(index='ts', columns='metric', values='value'))
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("📦 Symbols per Cycle")
+        if 'symbols' in by_metric:
+            st.line_chart(by_metric['symbols'].set_index('ts')['value'])
+
+        st.subheader("📨 Order Submit Call and Submit → Ack (ms)")
+        orders = samples[samples['metric'].isin(['order_submit_ms', 'order_ack_ms'])]
+        if not orders.empty:
+            st.line_chart(orders.pivot_table(index='ts', columns='metric', values='value'))
+            if 'order_ack_ms' not in by_metric:
+                st.caption("No ack latency: the broker does not send order events.")
+        else:
+            st.caption("No orders in the selected window.")
+
+    with col2:
+        st.subheader("🎯 Cache Hit Rates")
+        for label, prefix in [("Model", 'model_cache'), ("Prediction", 'pred_cache')]:
+            hits = by_metric.get(f'{prefix}_hit')
+            misses = by_metric.get(f'{prefix}_miss')
+            if hits is None or misses is None:
+                continue
+            hit_series = hits.set_index('ts')['value']
+            total_series = hit_series + misses.set_index('ts')['value']
+            total = total_series.sum()
+            st.metric(f"{label} cache hit rate", f"{hit_series.sum() / total:.1%}" if total else "n/a")
+            st.line_chart((hit_series / total_series.where(total_series > 0)).rename(f"{label} hit rate"))
+
+    if 'broker_msg_util' in by_metric:
+        st.subheader("🚦 Broker Pacing")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption("Message rate as a fraction of the broker's limit")
+            st.line_chart(by_metric['broker_msg_util'].set_index('ts')['value'].rename('utilization'))
+            st.caption("Market data lines in use")
+            st.line_chart(by_metric['md_lines'].set_index('ts')['value'].rename('lines'))
+        with col2:
+            st.caption("Time spent waiting for rate-limit tokens (ms)")
+            waits = samples[samples['metric'].isin(['broker_order_wait_ms', 'broker_data_wait_ms'])]
+            st.line_chart(waits.pivot_table(index='ts', columns='metric', values='value'))
+
+
+@st.cache_data
+def _simulate(data_path, model_path, model_mtime):
+    # Cached per model file version, so auto-refresh does not re-run the backtest
+    _, returns, positions = simulate(data_path, model_path)
+    return returns, positions
+
+
+def render_backtest():
+    if not os.path.exists(MODEL_PATH) or not os.path.exists(HISTORICAL_PATH):
+        st.warning(f"Backtest needs {MODEL_PATH} and {HISTORICAL_PATH}.")
+        return
+
+    returns, positions = _simulate(HISTORICAL_PATH, MODEL_PATH, os.path.getmtime(MODEL_PATH))
+    st.subheader("📊 Per-Symbol Performance")
+    st.dataframe(performance_summary(returns, positions).round(3))
+
+    rolling = rolling_metrics(returns, rolling_window, positions,
+                              metrics=['sharpe', 'max_drawdown', 'hit_rate'])
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader(f"📈 Rolling Sharpe ({rolling_window} bars)")
+        st.line_chart(rolling['sharpe'])
+        st.subheader("🎯 Rolling Hit Rate")
+        st.line_chart(rolling['hit_rate'])
+    with col2:
+        st.subheader("📉 Rolling Max Drawdown")
+        st.line_chart(rolling['max_drawdown'])
+
+
+while True:
+    st_autorefresh.empty()
+
+    with st_autorefresh.container():
+        if page == "Performance":
+            render_performance()
+        elif page == "Backtest":
+            render_backtest()
+        else:
+            render_predictions()
+
     # Wait and refresh
     time.sleep(refresh_interval)
-    st_autorefresh.empty()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# examples/test_alpaca_options.py
+
+"""
+Tests Alpaca option support against the local Alpaca REST stand-in (brokers/alpaca_stub.py).
+No Alpaca account or network access is needed.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brokers import AlpacaBroker
+from brokers.alpaca_stub import AlpacaStubServer
+from brokers.alpaca_broker import OPTION_SNAPSHOT_CHUNK
+from execution.order_manager import OrderManager
+from utils.helpers import build_occ_symbol, parse_occ_symbol
+
+
+def _connected_broker(server):
+    broker = AlpacaBroker(api_key='test', secret_key='test', url_override=server.url)
+    broker.connect()
+    return broker
+
+
+def test_occ_symbols():
+    """Test OCC symbol construction and parsing round-trip."""
+    print("\n📝 Testing OCC symbols...")
+
+    assert build_occ_symbol('AAPL', '20240119', 'C', 150) == 'AAPL240119C00150000'
+    assert build_occ_symbol('spy', '2024-03-15', 'PUT', 512.5) == 'SPY240315P00512500'
+    assert parse_occ_symbol('SPY240315P00512500') == ('SPY', '20240315', 'P', 512.5)
+    try:
+        build_occ_symbol('AAPL', '240119', 'C', 150)
+        assert False, "Should have raised ValueError"
+    except ValueError:
+        pass
+    print("✅ OCC symbols build and parse")
+
+
+def test_option_order_flow():
+    """Test that orders go out as OCC option orders and are deduplicated by client order id."""
+    print("\n📝 Testing Alpaca option orders...")
+
+    with AlpacaStubServer() as server:
+        broker = _connected_broker(server)
+        chain = broker.fetch_option_chain('AAPL', right='C')
+        contract = chain.iloc[len(chain) // 2]
+
+        orders = OrderManager(broker)
+        order = orders.submit('AAPL', 'C', contract.strike, contract.expiry, 'BUY', 2, client_order_id='t-1')
+        again = orders.submit('AAPL', 'C', contract.strike, contract.expiry, 'BUY', 2, client_order_id='t-1')
+
+        assert order is again and order.trade.symbol == contract.occ_symbol
+        assert list(server.orders) == ['t-1'] and server.requests['submit_order'] == 1
+        assert broker.get_option_positions() == {('AAPL', 'C'): 2.0}
+        assert broker.find_order('t-1').symbol == contract.occ_symbol
+        print(f"✅ Submitted {order.trade.symbol} once and saw it as an option position")
+
+
+def test_chain_and_snapshot_batches():
+    """Test chain filters, chunked snapshot requests and snapshot throughput."""
+    print("\n📝 Testing option chain and snapshot batches...")
+
+    with AlpacaStubServer() as server:
+        broker = _connected_broker(server)
+        chain = broker.fetch_option_chain('MSFT')
+        expiry = chain['expiry'].iloc[0]
+        puts = broker.fetch_option_chain('MSFT', expiry=expiry, right='P', min_strike=chain['strike'].median())
+        assert len(puts) and set(puts['right']) == {'P'} and set(puts['expiry']) == {expiry}
+        assert puts['strike'].min() >= chain['strike'].median()
+        assert chain[['bid', 'ask', 'iv', 'delta']].notna().all().all()
+
+        occ_symbols = []
+        for symbol in ['AAPL', 'MSFT', 'SPY', 'QQQ', 'NVDA', 'TSLA']:
+            occ_symbols += list(broker.fetch_option_chain(symbol)['occ_symbol'])
+
+        server.requests.clear()
+        start = time.perf_counter()
+        snapshots = broker.fetch_option_snapshots(occ_symbols)
+        elapsed = time.perf_counter() - start
+
+        expected_requests = -(-len(occ_symbols) // OPTION_SNAPSHOT_CHUNK)
+        assert sorted(snapshots['occ_symbol']) == sorted(occ_symbols)
+        assert server.requests['option_snapshots'] == expected_requests
+        print(f"✅ {len(snapshots)} snapshots in {expected_requests} requests "
+              f"({len(snapshots) / elapsed:.0f} contracts/s)")
+
+
+def main():
+    print("🧪 Running Alpaca Options Tests")
+    print("=" * 60)
+
+    try:
+        test_occ_symbols()
+        test_option_order_flow()
+        test_chain_and_snapshot_batches()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# examples/test_bar_cache.py
+
+"""
+Tests for the daily bar cache (utils/bar_cache.py): tail-only downloads,
+coalesced concurrent requests, the disk cache, and the live
+underlying_return_1d feature it feeds.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from brokers import SimBroker, AlpacaBroker
+from brokers.alpaca_stub import AlpacaStubServer
+from brokers.data_fetcher import fetch_live_option_rows
+from utils.bar_cache import BarCache
+from utils.feature_engineering import prepare_features
+from utils.helpers import session_timestamp
+
+SYMBOLS = ['AAPL', 'TSLA', 'SPY', 'NVDA']
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+
+
+class _CountingBroker(SimBroker):
+    """SimBroker that records every historical bar request."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bar_requests = []
+
+    def fetch_historical_bars(self, symbol, start, end=None):
+        self.bar_requests.append((symbol, start))
+        return super().fetch_historical_bars(symbol, start, end)
+
+
+def _previous_session(day=None):
+    day = (day or date.today()) - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def test_incremental_downloads():
+    """Test that history is downloaded once and later requests ask only for the tail."""
+    print("\n📝 Testing incremental bar downloads...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        broker = _CountingBroker()
+        broker.connect()
+        cache = BarCache(broker, tmp, history_days=400, refresh_sec=3600)
+        full = cache.bars('AAPL')
+        assert len(full) > 250 and (np.diff(full['timestamp']) > 0).all()
+        assert cache.bars('AAPL') is full and len(broker.bar_requests) == 1  # served from memory
+
+        cache.refresh_sec = 0
+        broker.fetch_quotes(['AAPL'])  # moves today's (partial) close
+        tail = cache.bars('AAPL')
+        assert broker.bar_requests[-1] == ('AAPL', full['timestamp'][-1])
+        assert cache.stats['bars_downloaded'] <= len(full) + 1
+        assert len(tail) == len(full) and (tail[:-1] == full[:-1]).all()
+        assert tail['close'][-1] == broker._prices['AAPL'] != full['close'][-1]
+
+        # A fresh process loads the disk cache and still downloads only the tail
+        restarted = BarCache(broker, tmp, refresh_sec=0)
+        again = restarted.bars('AAPL')
+        assert restarted.stats['disk_loads'] == 1 and restarted.stats['bars_downloaded'] == 1
+        assert (again == tail).all()
+        offline = BarCache(None, tmp)
+        assert (offline.bars('AAPL') == tail).all() and len(offline.bars('MSFT')) == 0
+    print(f"✅ {len(full)} bars downloaded once; refreshes fetch {restarted.stats['bars_downloaded']} bar")
+
+
+def test_concurrent_requests_coalesce():
+    """Test that concurrent requests for one symbol share a single download."""
+    print("\n📝 Testing request coalescing...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        broker = _CountingBroker(fetch_latency=0.2)
+        broker.connect()
+        cache = BarCache(broker, tmp)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.bars('SPY'))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(broker.bar_requests) == 1 and cache.stats['coalesced'] == 7
+        assert all(r is results[0] for r in results)
+    print("✅ 8 concurrent requests, 1 download")
+
+
+def test_live_return_feature():
+    """Test that live rows get a real 1-day return and history rows a per-symbol one."""
+    print("\n📝 Testing underlying_return_1d...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        broker = SimBroker()
+        broker.connect()
+        cache = BarCache(broker, tmp)
+        df = fetch_live_option_rows(broker, SYMBOLS, bars=cache)
+        prev = np.array([cache.bars(s)['close'][-2] for s in SYMBOLS])  # the last bar is today's
+        assert np.allclose(df['prev_close'], prev)
+        returns = prepare_features(df.copy())['underlying_return_1d']
+        assert np.allclose(returns, df['underlying_close'] / prev - 1) and (returns != 0).all()
+
+        # Without a cache (or for an unknown symbol) the return is 0, as before
+        assert (prepare_features(fetch_live_option_rows(broker, SYMBOLS))['underlying_return_1d'] == 0).all()
+
+    data = pd.read_csv(DATA_PATH)
+    returns = prepare_features(data.copy())['underlying_return_1d']
+    expected = data.groupby('symbol')['underlying_close'].pct_change().fillna(0)
+    assert np.allclose(returns, expected)
+    first_rows = ~data['symbol'].duplicated()
+    assert (returns[first_rows] == 0).all() and (returns[~first_rows] != 0).all()
+    print("✅ Live return = close / previous session close - 1; history returns stay within each symbol")
+
+
+def test_alpaca_bars_and_offline_replay():
+    """Test Alpaca bars through the stub, and serving the same closes from disk without a broker."""
+    print("\n📝 Testing Alpaca bars...")
+
+    server = AlpacaStubServer(port=0)
+    server.start()
+    try:
+        broker = AlpacaBroker(api_key='key', secret_key='secret', url_override=server.url)
+        broker.connect()
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = BarCache(broker, tmp, history_days=30)
+            prev = cache.prev_close(SYMBOLS)
+            previous = _previous_session(server.market.today)
+            assert list(prev) == [server.market.daily_close(s, previous) for s in SYMBOLS]
+            assert server.requests['stock_bars'] == len(SYMBOLS)
+            cache.prev_close(SYMBOLS)
+            assert server.requests['stock_bars'] == len(SYMBOLS)  # within the refresh interval
+
+            # As of an earlier day, from disk only (as a backtest replay would read it)
+            week_ago = time.time() - 7 * 86400
+            offline = BarCache(None, tmp).prev_close(SYMBOLS, as_of=week_ago)
+            day = _previous_session(date.fromtimestamp(week_ago))
+            assert list(offline) == [server.market.daily_close(s, day) for s in SYMBOLS]
+            bars = cache.bars('AAPL')
+            assert bars['timestamp'][-1] == session_timestamp(server.market.today)
+    finally:
+        server.stop()
+    print(f"✅ Previous closes match the stub; {server.requests['stock_bars']} bar requests for {len(SYMBOLS)} symbols")
+
+
+def main():
+    print("🧪 Running Bar Cache Tests")
+    print("=" * 60)
+
+    try:
+        test_incremental_downloads()
+        test_concurrent_requests_coalesce()
+        test_live_return_feature()
+        test_alpaca_bars_and_offline_replay()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,9 @@ import sys
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from brokers import BaseBroker, IBKRBroker, AlpacaBroker, BrokerFactory
+import numpy as np
+
+from brokers import BaseBroker, IBKRBroker, AlpacaBroker, SimBroker, BrokerFactory, QuoteBatch, register_broker
 
 
 def test_base_broker_interface():
@@ -96,6 +98,46 @@ def test_broker_factory():
         print("✅ BrokerFactory raises error for invalid type")
 
 
+def test_register_broker():
+    """Test that brokers can be added through the registry without editing the factory."""
+    print("\n📝 Testing register_broker...")
+    
+    @register_broker('test-sim')
+    class TaggedSimBroker(SimBroker):
+        pass
+    
+    broker = BrokerFactory.create_broker('test-sim', seed=7)
+    assert isinstance(broker, TaggedSimBroker) and broker.seed == 7
+    print("✅ Decorated broker is created through from_env()")
+    
+    register_broker('test-sim', 'brokers.sim_broker:SimBroker')
+    assert type(BrokerFactory.create_broker('test-sim')) is SimBroker
+    print("✅ Lazy 'module:Class' registration replaces the earlier one")
+
+
+def test_quote_batch():
+    """Test the columnar QuoteBatch returned by fetch_quotes()."""
+    print("\n📝 Testing QuoteBatch...")
+    
+    batch = QuoteBatch.from_records([
+        {'symbol': 'AAA', 'bid': 9.9, 'ask': 10.1, 'last_price': 10.0, 'volume': 100},
+        {'symbol': 'BBB', 'bid': 19.0, 'ask': 21.0, 'last': -1.0},
+    ])
+    assert len(batch) == 2 and batch.index == {'AAA': 0, 'BBB': 1}
+    assert np.allclose(batch.price, [10.0, 20.0])  # missing last falls back to mid
+    assert np.isnan(batch.volume[1]) and batch.row('AAA')['volume'] == 100
+    print("✅ QuoteBatch normalizes records into numpy columns")
+    
+    broker = SimBroker()
+    broker.connect()
+    symbols = ['AAPL', 'MSFT', 'SPY']
+    quotes = broker.fetch_quotes(symbols)
+    assert list(quotes.symbols) == symbols
+    assert quotes.bid.dtype == np.float32 and quotes.timestamp.dtype == np.float64
+    assert (quotes.ask > quotes.bid).all()
+    print("✅ SimBroker.fetch_quotes returns one QuoteBatch for all symbols")
+
+
 def test_broker_methods_exist():
     """Test that all broker methods exist."""
     print("\n📝 Testing broker methods exist...")
@@ -122,6 +164,18 @@ def test_broker_methods_exist():
         print(f"✅ {broker_name} has all required methods")
 
 
+def test_lazy_broker_imports():
+    """Test that importing the brokers package does not import any broker SDK."""
+    print("\n📝 Testing lazy broker imports...")
+    
+    import subprocess
+    code = "import sys, brokers; print(sorted(m for m in ('ib_insync', 'alpaca') if m in sys.modules))"
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         cwd=os.path.join(os.path.dirname(__file__), '..'), check=True).stdout
+    assert out.strip() == '[]', f"brokers imported broker SDKs: {out.strip()}"
+    print("✅ brokers package imports no broker SDK until a broker is used")
+
+
 def main():
     print("🧪 Running Broker Tests")
     print("=" * 60)
@@ -131,7 +185,10 @@ def main():
         test_ibkr_broker()
         test_alpaca_broker()
         test_broker_factory()
+        test_register_broker()
+        test_quote_batch()
         test_broker_methods_exist()
+        test_lazy_broker_imports()
         
         print("\n" + "=" * 60)
         print("✅ All tests passed!")
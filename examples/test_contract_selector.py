@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# examples/test_contract_selector.py
+
+"""
+Tests for per-signal contract selection (strategies/contract_selector.py)
+against brute-force searches of SimBroker option chains.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from brokers import SimBroker
+from execution.order_manager import OrderManager
+from execution.scheduler import submit_signal
+from models.predict import Signal
+from strategies.contract_selector import ContractSelector, MAX_SPREAD_PCT
+from strategies.rules import ChainColumns
+from utils.helpers import get_next_friday
+
+SYMBOLS = ['AAPL', 'TSLA', 'SPY', 'NVDA']
+
+
+class _CountingBroker(SimBroker):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.chain_fetches = 0
+
+    def fetch_option_chain(self, symbol, **kwargs):
+        self.chain_fetches += 1
+        return super().fetch_option_chain(symbol, **kwargs)
+
+
+class _NoChainBroker(SimBroker):
+    def fetch_option_chain(self, symbol, **kwargs):
+        raise NotImplementedError("NoChainBroker does not provide option chains")
+
+
+def _brute_force(chain, right, target, by, spot=None, min_dte=1, max_dte=45):
+    """Score every eligible contract of the chain the slow way."""
+    columns = ChainColumns(chain)
+    ok = ((columns['right'] == right) & (columns['abs_delta'] >= 0.3) & (columns['abs_delta'] <= 0.7)
+          & (columns['spread_pct'] < MAX_SPREAD_PCT) & (chain['bid'].to_numpy() > 0)
+          & (columns['dte'] >= min_dte) & (columns['dte'] <= max_dte))
+    key = columns['abs_delta'] if by == 'delta' else chain['strike'].to_numpy()
+    distance = np.abs(key - target) / (1 if by == 'delta' else target)
+    score = np.where(ok, distance + columns['spread_pct'], np.inf)
+    best = int(np.argmin(score))
+    return chain.iloc[best] if np.isfinite(score[best]) else None
+
+
+def test_selection_matches_brute_force():
+    """Test delta and moneyness selection for calls and puts on several underlyings."""
+    print("\n📝 Testing contract selection...")
+
+    broker = _CountingBroker()
+    broker.connect()
+    by_delta = ContractSelector(broker, target_delta=0.4)
+    by_moneyness = ContractSelector(broker, select_by='moneyness', target_moneyness=1.03)
+    for symbol in SYMBOLS:
+        chain = broker.fetch_option_chain(symbol)
+        spot = broker._prices[symbol]
+        for right in ('C', 'P'):
+            step = by_moneyness.index(symbol).strike_step
+            strike = round(spot * 1.03 / step) * step  # moneyness targets snap to the strike grid
+            for selector, target, by in [(by_delta, 0.4, 'delta'), (by_moneyness, strike, 'moneyness')]:
+                picked = selector.select(symbol, right, spot)
+                expected = _brute_force(chain, right, target, by)
+                assert picked is not None and expected is not None
+                assert (picked.expiry, picked.right, picked.strike) == \
+                    (expected['expiry'], expected['right'], expected['strike']), (symbol, right, by, picked)
+        print(f"✅ {symbol}: {by_delta.select(symbol, 'C')} / {by_delta.select(symbol, 'P')} "
+              f"(spot {broker._prices[symbol]:.2f})")
+
+    # Strikes follow the underlying instead of one hardcoded strike for every symbol
+    strikes = {by_delta.select(symbol, 'C').strike for symbol in SYMBOLS}
+    assert len(strikes) == len(SYMBOLS)
+
+    # A drifting spot reuses memo entries: one per grid strike, not one per price
+    index = by_moneyness.index('SPY')
+    spot = broker._prices['SPY']
+    for i in range(2000):
+        by_moneyness.select('SPY', 'C', spot * (1 + 0.01 * np.sin(i / 50)) + i * 1e-6)
+    entries = sum(1 for key in index._best if key[0] == 'C' and key[2] == 'moneyness')
+    assert entries <= 2 * spot * 0.0103 / index.strike_step + 2, entries
+
+
+def test_cached_chain_and_speed():
+    """Test that chains are fetched once per TTL and selection takes microseconds."""
+    print("\n📝 Testing chain cache and selection speed...")
+
+    broker = _CountingBroker()
+    broker.connect()
+    selector = ContractSelector(broker, ttl_sec=60)
+    for symbol in SYMBOLS:
+        selector.select(symbol, 'C')
+    assert broker.chain_fetches == len(SYMBOLS)
+
+    n = 20000
+    start = time.perf_counter()
+    for i in range(n):
+        selector.select(SYMBOLS[i % len(SYMBOLS)], 'CP'[i % 2])
+    per_signal_us = (time.perf_counter() - start) / n * 1e6
+    assert broker.chain_fetches == len(SYMBOLS)
+    assert per_signal_us < 50, f"{per_signal_us:.1f}us per signal"
+
+    selector.ttl_sec = 0
+    selector.select('AAPL', 'C')
+    assert broker.chain_fetches == len(SYMBOLS) + 1
+    print(f"✅ {per_signal_us:.1f}us per signal from cached chains")
+
+
+def test_fallback_and_order_routing():
+    """Test the fallback for brokers without chains and that orders use the selected contract."""
+    print("\n📝 Testing fallback and order routing...")
+
+    broker = _NoChainBroker()
+    broker.connect()
+    selector = ContractSelector(broker)
+    contract = selector.select('TSLA', 'P', spot=251.7)
+    assert (contract.expiry, contract.right, contract.strike) == (get_next_friday(), 'P', 250.0)
+    assert selector.select('TSLA', 'P') is None  # no chain and no spot: nothing to trade
+
+    broker = SimBroker()
+    broker.connect()
+    orders = OrderManager(broker)
+    selector = ContractSelector(broker)
+    order = submit_signal(orders, Signal('NVDA', 'CALL', 0.9), selector)
+    expected = selector.select('NVDA', 'C')
+    placed = broker.orders[-1]
+    assert order is not None and (placed['right'], placed['strike'], placed['expiry']) == \
+        ('C', expected.strike, expected.expiry)
+
+    strict = ContractSelector(broker, min_dte=400, max_dte=500)  # no listed expiry that far out
+    assert submit_signal(orders, Signal('NVDA', 'CALL', 0.9), strict) is None
+    assert len(broker.orders) == 1
+    print("✅ Next-Friday fallback; orders go out on the selected contract or not at all")
+
+
+def main():
+    print("🧪 Running Contract Selector Tests")
+    print("=" * 60)
+
+    try:
+        test_selection_matches_brute_force()
+        test_cached_chain_and_speed()
+        test_fallback_and_order_routing()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# examples/test_event_trigger.py
+
+"""
+Tests for the quote trigger (execution/event_trigger.py): the price and IV
+thresholds, debounce coalescing, dropping a reverted move, and IV carried
+forward between quotes. Every call passes an explicit `now=`, so nothing
+depends on the wall clock.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from execution.event_trigger import QuoteTrigger
+
+
+def _trigger():
+    return QuoteTrigger(price_move_pct=0.01, iv_move=0.02, debounce_sec=0.5)
+
+
+def test_thresholds():
+    """Test that only moves past the price or IV threshold since scoring trigger."""
+    print("\n📝 Testing thresholds...")
+
+    trigger = _trigger()
+    trigger.mark_scored({'SPY': (100.0, 0.20), 'QQQ': (200.0, 0.25)})
+
+    trigger.on_quote('SPY', 100.9, 0.21, now=0.0)   # 0.9% and 1 vol point: below both
+    trigger.on_quote('QQQ', 200.0, 0.249, now=0.0)
+    assert trigger.pop_due(now=10.0) == ({}, 10.0)
+
+    trigger.on_quote('SPY', 98.9, 0.20, now=11.0)   # -1.1%
+    trigger.on_quote('QQQ', 200.5, 0.275, now=11.0)  # +2.5 vol points
+    quotes, earliest = trigger.pop_due(now=11.5)
+    assert quotes == {'SPY': (98.9, 0.20), 'QQQ': (200.5, 0.275)} and earliest == 11.0
+
+    # A symbol never scored triggers on its first quote
+    trigger.on_quote('IWM', 150.0, now=12.0)
+    assert trigger.pop_due(now=12.5)[0] == {'IWM': (150.0, None)}
+    print("✅ Sub-threshold moves are ignored; price, IV and first quotes trigger")
+
+
+def test_debounce_coalesces():
+    """Test that moves within the debounce window are released together."""
+    print("\n📝 Testing debounce...")
+
+    trigger = _trigger()
+    trigger.mark_scored({s: (100.0, 0.20) for s in ('SPY', 'QQQ', 'IWM')})
+
+    trigger.on_quote('SPY', 102.0, 0.20, now=0.0)
+    trigger.on_quote('QQQ', 102.0, 0.20, now=0.2)
+    trigger.on_quote('SPY', 103.0, 0.20, now=0.3)  # already pending: keeps its first trigger time
+    trigger.on_quote('IWM', 102.0, 0.20, now=0.4)
+
+    assert trigger.pop_due(now=0.45) == ({}, 0.45)
+    quotes, earliest = trigger.pop_due(now=0.5)
+    assert quotes == {'SPY': (103.0, 0.20)} and earliest == 0.0  # latest quote, first trigger time
+
+    quotes, earliest = trigger.pop_due(now=0.9)
+    assert set(quotes) == {'QQQ', 'IWM'} and earliest == 0.2
+    assert trigger.pop_due(now=5.0) == ({}, 5.0)
+    print("✅ Three moves within 0.4s released in two batches, each at its latest quote")
+
+
+def test_reverted_move_is_dropped():
+    """Test that a symbol whose move reverted during the debounce window is not released."""
+    print("\n📝 Testing reverted moves...")
+
+    trigger = _trigger()
+    trigger.mark_scored({'SPY': (100.0, 0.20), 'QQQ': (100.0, 0.20)})
+    trigger.on_quote('SPY', 101.5, 0.20, now=0.0)
+    trigger.on_quote('QQQ', 101.5, 0.20, now=0.0)
+    trigger.on_quote('SPY', 100.2, 0.20, now=0.3)  # back within the threshold
+
+    quotes, _ = trigger.pop_due(now=0.5)
+    assert quotes == {'QQQ': (101.5, 0.20)}
+
+    # Dropped, not still pending: the next move starts a new window
+    trigger.on_quote('SPY', 101.2, now=1.0)
+    assert trigger.pop_due(now=1.4)[0] == {}
+    assert trigger.pop_due(now=1.5)[0] == {'SPY': (101.2, 0.20)}
+    print("✅ The reverted symbol was dropped and re-triggered on its next move")
+
+
+def test_iv_carry_forward_and_mark_scored():
+    """Test that a quote without IV keeps the last IV, and that moves are measured from mark_scored()."""
+    print("\n📝 Testing IV carry-forward and mark_scored...")
+
+    trigger = _trigger()
+    trigger.on_quote('SPY', 100.0, 0.20, now=0.0)
+    trigger.on_quote('SPY', 100.1, now=0.1)  # price-only tick
+    assert trigger.latest() == {'SPY': (100.1, 0.20)}
+
+    quotes, _ = trigger.pop_due(now=0.5)
+    assert quotes == {'SPY': (100.1, 0.20)}
+    trigger.mark_scored(quotes)
+
+    trigger.on_quote('SPY', 100.5, now=1.0)         # +0.4% from the scored price
+    assert trigger.pop_due(now=2.0)[0] == {}
+    trigger.on_quote('SPY', 100.5, 0.23, now=2.0)   # +3 vol points from the scored IV
+    trigger.on_quote('SPY', 100.6, now=2.1)         # carries 0.23 forward
+    assert trigger.pop_due(now=2.5)[0] == {'SPY': (100.6, 0.23)}
+
+    # Marking at the new level makes the same quote a non-move
+    trigger.mark_scored({'SPY': (100.6, 0.23)})
+    trigger.on_quote('SPY', 100.6, now=3.0)
+    assert trigger.pop_due(now=4.0)[0] == {}
+    print("✅ Price-only ticks keep the streamed IV; moves are measured from the scored values")
+
+
+def main():
+    print("🧪 Running Event Trigger Tests")
+    print("=" * 60)
+
+    try:
+        test_thresholds()
+        test_debounce_coalesces()
+        test_reverted_move_is_dropped()
+        test_iv_carry_forward_and_mark_scored()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
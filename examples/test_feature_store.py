@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# examples/test_feature_store.py
+
+"""
+Tests for the versioned feature store (utils/feature_store.py).
+Works on temporary copies of data/historical_data.csv.
+"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from utils import feature_engineering
+from utils.feature_engineering import prepare_features, FEATURE_COLUMNS
+from utils.feature_store import FeatureStore
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+
+
+def _write_partitions(tmp, count):
+    data = pd.read_csv(DATA_PATH)
+    paths = []
+    bounds = np.linspace(0, len(data), count + 1).astype(int)
+    for i in range(count):
+        path = os.path.join(tmp, f"part{i}.csv")
+        data.iloc[bounds[i]:bounds[i + 1]].to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def test_matrix_matches_prepare_features():
+    """Test that stored features equal prepare_features and reload as a memmap without recomputing."""
+    print("\n📝 Testing feature matrix contents...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = FeatureStore(os.path.join(tmp, 'store'))
+        features = store.load(DATA_PATH)
+        expected = prepare_features(pd.read_csv(DATA_PATH))
+
+        assert features.columns == FEATURE_COLUMNS
+        assert np.allclose(features.X, expected.to_numpy(dtype=np.float64))
+        assert (features.y == pd.read_csv(DATA_PATH)['direction'].to_numpy()).all()
+
+        again = FeatureStore(store.root)
+        reloaded = again.load(DATA_PATH)
+        assert isinstance(reloaded.X, np.memmap) and reloaded.version == features.version
+        assert again.stats == {'partitions_read': 0, 'columns_computed': 0, 'matrices_built': 0}
+        assert np.shares_memory(reloaded.to_frame().to_numpy(), reloaded.X)
+        print("✅ Matrix equals prepare_features and reloads zero-copy")
+
+
+def test_incremental_partitions_and_features():
+    """Test that only new partitions and changed features are computed."""
+    print("\n📝 Testing incremental computation...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_partitions(tmp, 3)
+        store = FeatureStore(os.path.join(tmp, 'store'))
+        store.load(paths[:2])
+        assert store.stats['partitions_read'] == 2
+
+        store.stats.update(partitions_read=0, columns_computed=0)
+        features = store.load(paths)
+        assert store.stats['partitions_read'] == 1
+        assert store.stats['columns_computed'] == len(FEATURE_COLUMNS) + 1  # plus the target
+        assert features.X.shape == (1000, len(FEATURE_COLUMNS))
+        print("✅ Adding a partition computes only that partition")
+
+        original = feature_engineering.FEATURES['iv']
+
+        def _iv(df):
+            return df['iv'].fillna(df['iv'].median())
+
+        feature_engineering.FEATURES['iv'] = _iv
+        try:
+            store.stats.update(partitions_read=0, columns_computed=0)
+            changed = store.load(paths)
+        finally:
+            feature_engineering.FEATURES['iv'] = original
+
+        assert changed.version != features.version
+        assert store.stats['partitions_read'] == 3 and store.stats['columns_computed'] == 3
+        print("✅ Changing a feature recomputes only that column")
+
+
+def main():
+    print("🧪 Running Feature Store Tests")
+    print("=" * 60)
+
+    try:
+        test_matrix_matches_prepare_features()
+        test_incremental_partitions_and_features()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
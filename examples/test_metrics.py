@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# examples/test_metrics.py
+
+"""
+Tests for the vectorized metrics engine (backtest/metrics.py), checked
+against straightforward per-strategy pandas loops.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from backtest.metrics import compute_metrics, performance_summary, rolling_metrics, ROLLING_COLUMNS
+from backtest.backtest_engine import strategy_returns
+
+WINDOW = 21
+
+
+def _returns(rows=600, strategies=4, seed=7):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2024-01-01', periods=rows, freq='B')
+    returns = pd.DataFrame(rng.normal(0.0004, 0.012, (rows, strategies)), index=index,
+                           columns=[f"s{i}" for i in range(strategies)])
+    positions = pd.DataFrame(rng.choice([-1.0, 0.0, 1.0], (rows, strategies)), index=index,
+                             columns=returns.columns)
+    return returns, positions
+
+
+def _reference(r: np.ndarray, positions: np.ndarray, periods_per_year=252):
+    """Metrics for one strategy, the slow obvious way."""
+    r = r[~np.isnan(r)]
+    equity = np.concatenate([[1.0], np.cumprod(1 + r)])
+    peak = np.maximum.accumulate(equity)
+    drawdown = equity / peak - 1
+    longest = run = 0
+    for under in equity < peak:
+        run = run + 1 if under else 0
+        longest = max(longest, run)
+    cagr = equity[-1] ** (periods_per_year / len(r)) - 1
+    return {
+        'sharpe': r.mean() / r.std() * np.sqrt(periods_per_year),
+        'sortino': r.mean() / np.sqrt(np.mean(np.minimum(r, 0) ** 2)) * np.sqrt(periods_per_year),
+        'max_drawdown': drawdown.min(),
+        'max_drawdown_duration': longest,
+        'calmar': cagr / -drawdown.min(),
+        'turnover': np.abs(np.diff(positions, prepend=0.0)).mean() * periods_per_year,
+        'hit_rate': np.mean(r > 0),
+    }
+
+
+def test_summary_matches_reference():
+    """Test every summary metric per strategy, including one that starts late."""
+    print("\n📝 Testing whole-sample metrics...")
+
+    returns, positions = _returns()
+    returns.iloc[:150, 3] = np.nan  # s3 starts trading later
+    summary = performance_summary(returns, positions)
+    assert list(summary.index) == list(returns.columns)
+    assert summary.loc['s3', 'periods'] == len(returns) - 150
+    for name in returns.columns:
+        expected = _reference(returns[name].to_numpy(), positions[name].to_numpy())
+        for metric, value in expected.items():
+            assert np.isclose(summary.loc[name, metric], value), (name, metric, summary.loc[name, metric], value)
+    print(f"✅ {len(returns.columns)} strategies match the per-strategy reference")
+
+
+def test_rolling_matches_pandas():
+    """Test rolling metrics against pandas rolling windows."""
+    print("\n📝 Testing rolling metrics...")
+
+    returns, positions = _returns(rows=300, strategies=3)
+    rolling = rolling_metrics(returns, WINDOW, positions)
+    assert rolling.index.equals(returns.index)
+    assert set(rolling.columns.get_level_values('metric')) == set(ROLLING_COLUMNS)
+    assert rolling.iloc[:WINDOW - 1].isna().all().all() and rolling.iloc[WINDOW - 1:].notna().all().all()
+
+    for name in returns.columns:
+        windows = returns[name].rolling(WINDOW)
+        sharpe = windows.mean() / windows.std(ddof=0) * np.sqrt(252)
+        assert np.allclose(rolling['sharpe'][name], sharpe, equal_nan=True)
+        assert np.allclose(rolling['hit_rate'][name], (returns[name] > 0).rolling(WINDOW).mean(), equal_nan=True)
+        # Trades inside the window, including the one entering it
+        changes = pd.Series(np.abs(np.diff(positions[name].to_numpy(), prepend=0.0)), index=returns.index)
+        assert np.allclose(rolling['turnover'][name], changes.rolling(WINDOW).mean() * 252, equal_nan=True)
+        for metric in ('max_drawdown', 'max_drawdown_duration', 'sortino', 'calmar'):
+            expected = [np.nan] * (WINDOW - 1) + [
+                _reference(returns[name].to_numpy()[end - WINDOW:end], np.zeros(WINDOW))[metric]
+                for end in range(WINDOW, len(returns) + 1)
+            ]
+            assert np.allclose(rolling[metric][name], expected, equal_nan=True), (name, metric)
+    print(f"✅ Rolling {WINDOW}-row metrics match pandas")
+
+
+def test_empty_and_degenerate_inputs():
+    """Test that empty, flat and too-short inputs give zeros or NaN instead of dividing by zero."""
+    print("\n📝 Testing degenerate inputs...")
+
+    with np.errstate(all='raise'):
+        metrics = compute_metrics([])
+        assert metrics['Sharpe Ratio'] == 0 and metrics['Max Drawdown'] == 0 and metrics['Win Rate'] == 0
+        flat = compute_metrics([0.0] * 10)
+        assert flat['Sharpe Ratio'] == 0 and flat['Calmar Ratio'] == 0
+        short = rolling_metrics(pd.DataFrame({'a': [0.01, -0.02]}), WINDOW)
+        assert short.shape == (2, len(ROLLING_COLUMNS)) and short.isna().all().all()
+        assert performance_summary(pd.DataFrame({'a': [np.nan] * 3})).loc['a', 'periods'] == 0
+
+    metrics = compute_metrics([0.01, -0.02, 0.03])
+    assert metrics['Win Rate'] == 0.667 and metrics['Max Drawdown'] == -0.02
+    print("✅ No division by zero on empty or flat returns")
+
+
+def test_backtest_returns_by_symbol():
+    """Test that predictions turn into per-symbol long/short returns."""
+    print("\n📝 Testing backtest strategy returns...")
+
+    raw = pd.DataFrame({
+        'symbol': ['AAPL', 'MSFT', 'AAPL', 'MSFT', 'AAPL'],
+        'underlying_close': [100.0, 50.0, 110.0, 45.0, 99.0],
+    })
+    returns, positions = strategy_returns(raw, [1, 0, 0, 1, 1])
+    assert list(returns.columns) == ['AAPL', 'MSFT']
+    assert np.allclose(returns['AAPL'], [0.10, 0.10, np.nan], equal_nan=True)
+    assert np.allclose(returns['MSFT'].dropna(), [0.10])
+    assert positions['AAPL'].tolist() == [1.0, -1.0, 1.0]
+    summary = performance_summary(returns, positions)
+    assert summary.loc['AAPL', 'hit_rate'] == 1.0 and summary.loc['MSFT', 'periods'] == 1
+    print("✅ Per-symbol returns and positions line up with the predictions")
+
+
+def main():
+    print("🧪 Running Metrics Tests")
+    print("=" * 60)
+
+    try:
+        test_summary_matches_reference()
+        test_rolling_matches_pandas()
+        test_empty_and_degenerate_inputs()
+        test_backtest_returns_by_symbol()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# examples/test_model_artifact.py
+
+"""
+Tests for compact model artifacts (models/artifact.py): predictions equal
+the sklearn model's, and the file is smaller and faster to load than a pickle.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.ensemble import HistGradientBoostingClassifier
+
+from backtest.backtest_engine import batch_model
+from models.artifact import export_model, load_artifact, read_manifest, CompactModel
+from models.registry import ModelRegistry
+from models.train_model import make_model
+from utils.feature_engineering import prepare_features
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+
+
+def _training_data(with_nan=False):
+    data = pd.read_csv(DATA_PATH)
+    X = prepare_features(data.copy())
+    if with_nan:
+        X.iloc[::7, 0] = np.nan
+        X.iloc[::5, 4] = np.nan
+    return X, data['direction']
+
+
+def test_predictions_match_sklearn():
+    """Test every supported family, with and without missing values."""
+    print("\n📝 Testing artifact predictions...")
+
+    cases = [('rf', {'n_estimators': 50}, False), ('rf', {'n_estimators': 50}, True),
+             ('gb', {'max_iter': 50}, False), ('gb', {'max_iter': 50}, True),
+             ('lr', {'C': 1.0}, False)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.cmodel')
+        for family, params, with_nan in cases:
+            X, y = _training_data(with_nan)
+            clf = make_model(family, params).fit(X, y)
+            export_model(clf, path, {'model_version': 'test'})
+            model = load_artifact(path)
+
+            assert list(model.feature_names_in_) == list(X.columns)
+            assert np.allclose(model.predict_proba(X), clf.predict_proba(X), atol=1e-6)
+            assert (model.predict(X) == clf.predict(X)).all()
+            assert np.allclose(model.predict_proba(X.to_numpy()), clf.predict_proba(X), atol=1e-6)
+            print(f"✅ {family}{' with NaN' if with_nan else ''}: {model.manifest['kind']} matches sklearn")
+
+
+def test_size_and_load_time():
+    """Test that a 200-tree forest is 10x smaller and loads 10x faster than its pickle."""
+    print("\n📝 Testing size and load time...")
+
+    X, y = _training_data()
+    clf = make_model('rf', {'n_estimators': 200}).fit(X, y)
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_path, artifact_path = os.path.join(tmp, 'model.pkl'), os.path.join(tmp, 'model.cmodel')
+        joblib.dump(clf, pickle_path)
+        export_model(clf, artifact_path)
+
+        def best_load(load, path):
+            times = []
+            for _ in range(3):
+                start = time.perf_counter()
+                load(path)
+                times.append(time.perf_counter() - start)
+            return min(times)
+
+        pickle_sec, artifact_sec = best_load(joblib.load, pickle_path), best_load(load_artifact, artifact_path)
+        pickle_size, artifact_size = os.path.getsize(pickle_path), os.path.getsize(artifact_path)
+        print(f"   {pickle_size / 1e6:.2f} MB / {pickle_sec * 1000:.1f} ms -> "
+              f"{artifact_size / 1e6:.2f} MB / {artifact_sec * 1000:.2f} ms")
+        assert pickle_size >= 10 * artifact_size
+        assert pickle_sec >= 10 * artifact_sec
+        assert isinstance(load_artifact(artifact_path)._arrays['value'].base, np.memmap)
+        print("✅ Order of magnitude smaller and faster to load; arrays are memory-mapped")
+
+
+def test_manifest_checks():
+    """Test the manifest contents and the feature check at load."""
+    print("\n📝 Testing manifest checks...")
+
+    X, y = _training_data()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.cmodel')
+        manifest = export_model(make_model('lr', {}).fit(X.assign(mystery=1.0), y), path,
+                                {'model_version': 'v0042', 'data_hash': 'abc123'})
+        assert read_manifest(path)['features'] == manifest['features'] == list(X.columns) + ['mystery']
+        assert read_manifest(path)['model_version'] == 'v0042'
+        assert set(manifest['feature_versions']) == set(X.columns)
+
+        try:
+            load_artifact(path)
+            assert False, "unknown feature should be rejected"
+        except ValueError as e:
+            assert 'mystery' in str(e)
+        assert load_artifact(path, check=False).n_features_in_ == len(X.columns) + 1
+
+        with open(path, 'wb') as f:
+            f.write(b'not an artifact')
+        try:
+            load_artifact(path)
+            assert False, "foreign file should be rejected"
+        except ValueError:
+            pass
+        print("✅ Unknown features and foreign files are rejected")
+
+
+def test_large_batches():
+    """Test large-batch scoring speed against sklearn, and that the backtest unpickles only when asked."""
+    print("\n📝 Testing large batches...")
+
+    X, y = _training_data()
+    big = pd.concat([X] * 20, ignore_index=True) + np.random.default_rng(0).normal(0, 0.01, (len(X) * 20, X.shape[1]))
+    big.iloc[::50, 0] = np.nan
+
+    def best(score):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            score(big)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for family, params in (('rf', {'n_estimators': 100}), ('gb', {'max_iter': 100})):
+            clf = make_model(family, params).fit(X, y)
+            path = os.path.join(tmp, f'{family}.cmodel')
+            export_model(clf, path)
+            model = load_artifact(path)
+            model.predict_proba(big)  # builds the compiled trees
+            timings[family] = best(model.predict_proba), best(clf.predict_proba)
+            assert np.allclose(model.predict_proba(big), clf.predict_proba(big), atol=1e-6)
+            assert (model.predict(big) == clf.predict(big)).all()
+            # Small batches take the NumPy walk and reach the same leaves
+            assert (model._leaves(model._matrix(big.iloc[:500]))
+                    == model._leaves(model._matrix(big))[:500]).all()
+            assert timings[family][0] < 2 * timings[family][1], (family, timings[family])
+
+        registry = ModelRegistry(os.path.join(tmp, 'registry'))
+        version = registry.register(clf, {'family': 'gb'})
+        live_path = os.path.join(tmp, 'model.cmodel')
+        registry.promote(version, live_path)
+        assert isinstance(batch_model(live_path, registry=registry), CompactModel)
+        assert isinstance(batch_model(live_path, use_pickle=True, registry=registry), HistGradientBoostingClassifier)
+        # The same version name in another registry is a different model
+        other = ModelRegistry(os.path.join(tmp, 'other'))
+        other.register(clf, {'family': 'gb'})
+        assert isinstance(batch_model(live_path, use_pickle=True, registry=other), CompactModel)
+    print("✅ " + ", ".join(f"{family}: {len(big)} rows in {a * 1000:.0f}ms (sklearn {s * 1000:.0f}ms)"
+                            for family, (a, s) in timings.items())
+          + "; backtests unpickle only with use_pickle")
+
+
+def main():
+    print("🧪 Running Model Artifact Tests")
+    print("=" * 60)
+
+    try:
+        test_predictions_match_sklearn()
+        test_size_and_load_time()
+        test_manifest_checks()
+        test_large_batches()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# examples/test_order_manager.py
+
+"""
+Tests for order lifecycle tracking (execution/order_manager.py): retries with
+backoff, an order that reached the broker despite a submit error, duplicate
+client order ids, and late or out-of-order broker events.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brokers import SimBroker
+from brokers.base_broker import ORDER_ACKED, ORDER_PARTIALLY_FILLED, ORDER_FILLED, ORDER_CANCELLED
+from execution.order_manager import OrderManager, ORDER_SUBMITTED, ORDER_FAILED
+from utils.perf_ring import PerfRing
+
+
+class _ControlledBroker(SimBroker):
+    """
+    SimBroker whose order events are sent by the test: with `hold_fills` set,
+    orders are recorded without events, and `land_then_fail` makes the next
+    submissions reach the book and then raise.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hold_fills = False
+        self.land_then_fail = 0
+
+    def place_option_trade(self, *args, **kwargs):
+        callback = self._order_callback
+        if self.hold_fills or self.land_then_fail:
+            self._order_callback = None
+        try:
+            order = super().place_option_trade(*args, **kwargs)
+        finally:
+            self._order_callback = callback
+        if self.land_then_fail:
+            self.land_then_fail -= 1
+            raise TimeoutError("Simulated timeout after the order was accepted")
+        return order
+
+    def emit(self, client_order_id, status, filled_qty=0, avg_fill_price=None):
+        self._order_callback(client_order_id, status, filled_qty, avg_fill_price)
+
+
+class _NoEventsBroker(SimBroker):
+    def subscribe_order_updates(self, callback):
+        raise NotImplementedError("NoEventsBroker does not stream order updates")
+
+
+def _manager(**kwargs):
+    broker = _ControlledBroker()
+    broker.connect()
+    orders = OrderManager(broker, **kwargs)
+    seen = []
+    orders.add_listener(lambda order: seen.append((order.client_order_id, order.state)))
+    return broker, orders, seen
+
+
+def test_retry_with_backoff():
+    """Test that transient failures are retried with growing delays, and give up after max_retries."""
+    print("\n📝 Testing retries...")
+
+    broker, orders, seen = _manager(max_retries=3, backoff_base=0.02, backoff_max=1.0)
+    broker.fail_next_orders = 2
+    start = time.perf_counter()
+    order = orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='retry-1')
+    elapsed = time.perf_counter() - start
+    # Two waits with jitter: 0.02 * [0.5, 1] + 0.04 * [0.5, 1]
+    assert 0.03 <= elapsed < 0.5, elapsed
+    assert order.state == ORDER_FILLED and order.attempts == 3 and len(broker.orders) == 1
+    assert 'transient' in order.error
+
+    broker, orders, seen = _manager(max_retries=2, backoff_base=0.001)
+    broker.fail_next_orders = 5
+    order = orders.submit('SPY', 'P', 480.0, '20261120', client_order_id='retry-2')
+    assert order.state == ORDER_FAILED and order.attempts == 3 and not broker.orders
+    assert seen == [('retry-2', ORDER_FAILED)]
+
+    # A backoff budget bounds the total time retries hold the caller's thread
+    broker, orders, seen = _manager(max_retries=5, backoff_base=0.2, backoff_budget=0.05)
+    broker.fail_next_orders = 10
+    start = time.perf_counter()
+    order = orders.submit('SPY', 'P', 480.0, '20261120', client_order_id='budget-1')
+    assert time.perf_counter() - start < 0.15
+    assert order.state == ORDER_FAILED and order.attempts == 2 and not broker.orders
+
+    # A FAILED id may be submitted again; it goes out as a new order
+    broker.fail_next_orders = 0
+    order = orders.submit('SPY', 'P', 480.0, '20261120', client_order_id='budget-1')
+    assert order.state == ORDER_FILLED and order.attempts == 1 and len(broker.orders) == 1
+    print(f"✅ Filled on attempt 3 after {elapsed * 1000:.0f}ms of backoff; gave up after max_retries or the budget")
+
+
+def test_landed_despite_error():
+    """Test that an order found at the broker after a submit error is not sent twice."""
+    print("\n📝 Testing an order that landed despite an error...")
+
+    broker, orders, seen = _manager(backoff_base=0.001)
+    broker.land_then_fail = 1
+    order = orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='landed-1')
+    assert len(broker.orders) == 1 and order.attempts == 1
+    assert order.state == ORDER_SUBMITTED and order.trade is broker.orders[0]
+    assert 'timeout' in order.error
+
+    broker.emit('landed-1', ORDER_FILLED, 1, 10.0)
+    assert order.state == ORDER_FILLED and seen[-1] == ('landed-1', ORDER_FILLED)
+    print("✅ The landed order was adopted, not resubmitted")
+
+
+def test_duplicate_ids():
+    """Test that resubmitting a tracked client order id returns the existing order."""
+    print("\n📝 Testing duplicate client order ids...")
+
+    broker, orders, _ = _manager()
+    broker.hold_fills = True
+    first = orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='dup-1')
+    again = orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='dup-1')
+    assert again is first and len(broker.orders) == 1
+
+    broker.emit('dup-1', ORDER_FILLED, 1, 10.0)
+    assert orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='dup-1') is first
+    assert len(broker.orders) == 1 and orders.open_orders() == []
+    print("✅ Open and filled ids are deduplicated; only one order reached the broker")
+
+
+def test_late_events_never_move_backwards():
+    """Test that late, repeated or out-of-order events leave the order at its furthest state."""
+    print("\n📝 Testing out-of-order events...")
+
+    broker, orders, seen = _manager()
+    fills = []
+    orders.add_listener(lambda order: fills.append(order.filled_qty))
+    broker.hold_fills = True
+    order = orders.submit('SPY', 'C', 500.0, '20261120', quantity=4, client_order_id='ooo-1')
+    assert order.state == ORDER_SUBMITTED
+
+    broker.emit('ooo-1', ORDER_PARTIALLY_FILLED, 2, 10.0)
+    broker.emit('ooo-1', ORDER_ACKED, 0)                      # the ack arrives after a fill
+    broker.emit('ooo-1', ORDER_PARTIALLY_FILLED, 1, 10.0)     # stale fill count
+    broker.emit('ooo-1', ORDER_PARTIALLY_FILLED, 2, 10.0)     # repeated fill count
+    assert order.state == ORDER_PARTIALLY_FILLED and order.filled_qty == 2
+    assert order.ack_ts is not None
+
+    broker.emit('ooo-1', ORDER_PARTIALLY_FILLED, 3, 10.2)     # same state, more filled: listeners hear it
+    assert order.filled_qty == 3 and fills[-1] == 3
+
+    broker.emit('ooo-1', ORDER_FILLED, 4, 10.5)
+    broker.emit('ooo-1', ORDER_CANCELLED, 4)                  # terminal states are final
+    broker.emit('ooo-1', ORDER_PARTIALLY_FILLED, 2, 10.0)
+    broker.emit('unknown-id', ORDER_FILLED, 1, 1.0)           # not ours: ignored
+    assert order.state == ORDER_FILLED and order.filled_qty == 4 and order.avg_fill_price == 10.5
+    assert [state for coid, state in seen if coid == 'ooo-1'] == [
+        ORDER_SUBMITTED, ORDER_PARTIALLY_FILLED, ORDER_PARTIALLY_FILLED, ORDER_FILLED]
+    assert fills == [0, 2, 3, 4]
+    print("✅ Listeners saw every fill increase, SUBMITTED → PARTIALLY_FILLED x2 → FILLED, despite six late events")
+
+
+def test_latency_samples_are_labelled():
+    """Test that the submit call and the broker's ack event are recorded as separate metrics."""
+    print("\n📝 Testing order latency samples...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        perf = PerfRing(os.path.join(tmp, 'perf.bin'), capacity=100)
+        broker, orders, _ = _manager(perf=perf)
+        broker.hold_fills = True
+        orders.submit('SPY', 'C', 500.0, '20261120', client_order_id='lat-1')
+        assert list(perf.read()['metric']) == ['order_submit_ms']
+        time.sleep(0.02)
+        broker.emit('lat-1', ORDER_ACKED)
+        samples = perf.read()
+        assert list(samples['metric']) == ['order_submit_ms', 'order_ack_ms']
+        assert samples['value'].iloc[1] >= 20 > samples['value'].iloc[0]
+
+        # Without order events the submit returning is the only "ack": no order_ack_ms sample
+        perf = PerfRing(os.path.join(tmp, 'perf-no-events.bin'), capacity=100)
+        broker = _NoEventsBroker()
+        broker.connect()
+        orders = OrderManager(broker, perf=perf)
+        order = orders.submit('SPY', 'C', 500.0, '20261120')
+        assert order.state == ORDER_ACKED and not orders.event_driven
+        assert list(perf.read()['metric']) == ['order_submit_ms']
+    print("✅ order_submit_ms for the submit call; order_ack_ms only from a broker ack event")
+
+
+def main():
+    print("🧪 Running Order Manager Tests")
+    print("=" * 60)
+
+    try:
+        test_retry_with_backoff()
+        test_landed_despite_error()
+        test_duplicate_ids()
+        test_late_events_never_move_backwards()
+        test_latency_samples_are_labelled()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
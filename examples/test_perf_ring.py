@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# examples/test_perf_ring.py
+
+"""
+Tests for the on-disk perf ring (utils/perf_ring.py): samples read back in
+write order, across the wrap where the oldest records are overwritten, and
+through a second read-only mapping as the dashboard opens it.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from utils.perf_ring import PerfRing, METRICS
+
+
+def test_wraparound():
+    """Test that the newest `capacity` samples are kept, oldest first, across several wraps."""
+    print("\n📝 Testing wraparound...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ring = PerfRing(os.path.join(tmp, 'ring.bin'), capacity=8)
+        assert ring.count == 0 and ring.read().empty
+
+        for i in range(5):
+            ring.record('cycle_ms', i, ts=1000.0 + i)
+        frame = ring.read()
+        assert frame['value'].tolist() == [0, 1, 2, 3, 4]
+
+        # One batch that crosses the end of the file: 5 + 7 = 12 samples in 8 slots
+        ring.record_many([(METRICS[i % len(METRICS)], 5 + i) for i in range(7)], ts=2000.0)
+        frame = ring.read()
+        assert ring.count == 12 and len(frame) == 8
+        assert frame['value'].tolist() == list(range(4, 12))
+        assert frame['metric'].tolist()[1:] == [METRICS[i % len(METRICS)] for i in range(7)]
+        seconds = (frame['ts'] - pd.Timestamp(0)).dt.total_seconds()
+        assert seconds.tolist() == [1004.0] + [2000.0] * 7
+
+        # Exactly a multiple of the capacity: the read starts at slot 0 again
+        ring.record_many([('symbols', 12 + i) for i in range(4)], ts=3000.0)
+        assert ring.count == 16 and ring.read()['value'].tolist() == list(range(8, 16))
+
+        for i in range(16, 100):
+            ring.record('fetch_ms', i, ts=4000.0 + i)
+        assert ring.read()['value'].tolist() == list(range(92, 100))
+    print("✅ 100 samples through an 8-slot ring read back as the newest 8, in order")
+
+
+def test_reads_across_the_wrap():
+    """Test a read-only reader and window_sec filtering while the writer wraps."""
+    print("\n📝 Testing reads across the wrap...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ring.bin')
+        try:
+            PerfRing(path, readonly=True)
+            assert False, "a missing ring must not be created by a reader"
+        except FileNotFoundError:
+            pass
+
+        writer = PerfRing(path, capacity=10)
+        reader = PerfRing(path, capacity=999, readonly=True)
+        assert reader.capacity == 10  # taken from the file
+
+        now = time.time()
+        for i in range(14):
+            writer.record('predict_ms', i, ts=now - 100 + i)
+        writer.record_many([('predict_ms', 14), ('execute_ms', 15)], ts=now)
+        seen = reader.read()
+        assert seen['value'].tolist() == list(range(6, 16))
+        assert seen['ts'].is_monotonic_increasing
+
+        recent = reader.read(window_sec=50)
+        assert recent['value'].tolist() == [14, 15]
+        assert recent['metric'].tolist() == ['predict_ms', 'execute_ms']
+        writer.flush()
+
+        with open(os.path.join(tmp, 'other.bin'), 'wb') as f:
+            f.write(b'\0' * 64)
+        try:
+            PerfRing(os.path.join(tmp, 'other.bin'))
+            assert False, "a file without the magic must be rejected"
+        except ValueError:
+            pass
+    print("✅ A second read-only mapping sees the writer's latest window across the wrap")
+
+
+def main():
+    print("🧪 Running Perf Ring Tests")
+    print("=" * 60)
+
+    try:
+        test_wraparound()
+        test_reads_across_the_wrap()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
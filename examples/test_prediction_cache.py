@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# examples/test_prediction_cache.py
+
+"""
+Tests for the live prediction cache (models/predict.py): hit and miss
+counting in CACHE_STATS, eviction of the oldest rows past
+PREDICTION_CACHE_SIZE, and invalidation when the model file changes.
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import joblib
+
+import models.predict as predict
+from models.predict import predict_from_live_data, CACHE_STATS
+from models.train_model import make_model
+from utils.feature_engineering import prepare_features
+from utils.generate_fake_data import generate_fake_option_data
+
+
+def _model_file(tmp):
+    data = generate_fake_option_data(500, seed=0)
+    clf = make_model('lr', {'C': 1.0}).fit(prepare_features(data.copy()), data['direction'])
+    path = os.path.join(tmp, 'model.pkl')
+    joblib.dump(clf, path)
+    return path
+
+
+def _rows(n, seed):
+    """Live rows with one row per symbol, so each row's features depend on that row alone."""
+    df = generate_fake_option_data(n, seed=seed)
+    df['symbol'] = [f"S{seed}_{i}" for i in range(n)]
+    return df
+
+
+def _score(df, path):
+    """Signals for df and the cache hits and misses the call counted."""
+    before = dict(CACHE_STATS)
+    signals = predict_from_live_data(df, model_path=path)
+    return signals, (CACHE_STATS['pred_cache_hit'] - before['pred_cache_hit'],
+                     CACHE_STATS['pred_cache_miss'] - before['pred_cache_miss'])
+
+
+def test_hits_and_misses():
+    """Test that unchanged rows are served from the cache with the model's own answer."""
+    print("\n📝 Testing cache hits and misses...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _model_file(tmp)
+        df = _rows(40, seed=1)
+
+        first, counts = _score(df, path)
+        assert counts == (0, 40)
+        again, counts = _score(df, path)
+        assert counts == (40, 0) and again == first
+
+        # Half the rows change: only those go through the model
+        changed = df.copy()
+        changed.loc[::2, 'iv'] += 0.01
+        _, counts = _score(changed, path)
+        assert counts == (20, 20)
+
+        # A rewritten model file invalidates every cached prediction
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        _, counts = _score(df, path)
+        assert counts == (0, 40)
+    print("✅ 40 misses, then 40 hits; a changed row or a new model file misses again")
+
+
+def test_eviction():
+    """Test that the cache keeps the newest PREDICTION_CACHE_SIZE rows and evicts the oldest."""
+    print("\n📝 Testing eviction...")
+
+    size = predict.PREDICTION_CACHE_SIZE
+    predict.PREDICTION_CACHE_SIZE = 30
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = _model_file(tmp)
+            old = _rows(20, seed=2)
+            new = _rows(20, seed=3)
+
+            _score(old, path)
+            _score(new, path)
+            assert len(predict._prediction_cache) == 30
+
+            # The 10 oldest rows were evicted; the rest of `old` and all of `new` remain
+            _, counts = _score(new, path)
+            assert counts == (20, 0)
+            _, counts = _score(old.iloc[10:], path)
+            assert counts == (10, 0)
+            _, counts = _score(old.iloc[:10], path)
+            assert counts == (0, 10) and len(predict._prediction_cache) == 30
+    finally:
+        predict.PREDICTION_CACHE_SIZE = size
+    print("✅ 40 rows through a 30-row cache: the 10 oldest were evicted")
+
+
+def main():
+    print("🧪 Running Prediction Cache Tests")
+    print("=" * 60)
+
+    try:
+        test_hits_and_misses()
+        test_eviction()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
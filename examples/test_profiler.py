@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# examples/test_profiler.py
+
+"""
+Tests for the on-demand profiler (utils/profiler.py): SIGUSR1 or the control
+file starts a profile while the loop keeps running, and the collapsed-stack,
+speedscope and allocation files show where the time and memory went.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from utils.profiler import ProfilerHook, SamplingProfiler
+
+
+def _busy_cycle(keep):
+    """Stands in for a trading cycle: some NumPy work and some allocations."""
+    x = np.random.default_rng(0).random(200_000)
+    np.sort(x)
+    keep.append([str(i) for i in range(2_000)])  # the allocation the .alloc.txt should name
+    del keep[:-5]  # a loop keeps little between cycles
+
+
+def _run_loop(seconds):
+    """Run cycles for `seconds`; returns the longest gap between two cycles in ms."""
+    keep, worst = [], 0.0
+    deadline = time.perf_counter() + seconds
+    last = time.perf_counter()
+    while time.perf_counter() < deadline:
+        _busy_cycle(keep)
+        time.sleep(0.002)
+        now = time.perf_counter()
+        worst = max(worst, (now - last) * 1000)
+        last = now
+    return worst
+
+
+def test_signal_profiles_without_pausing():
+    """Test that SIGUSR1 profiles the running loop and writes all three files."""
+    print("\n📝 Testing a SIGUSR1 profile...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = signal.getsignal(signal.SIGUSR1)
+        hook = ProfilerHook(control_file=os.path.join(tmp, 'profile.request'), seconds=0.6,
+                            profiler=SamplingProfiler(out_dir=tmp, interval_ms=2)).install()
+        try:
+            baseline = _run_loop(0.3)
+            os.kill(os.getpid(), signal.SIGUSR1)
+            profiled = _run_loop(1.0)
+            deadline = time.monotonic() + 10
+            while hook.last_result is None and time.monotonic() < deadline:
+                time.sleep(0.05)
+        finally:
+            hook.stop()
+            signal.signal(signal.SIGUSR1, previous)
+
+        result = hook.last_result
+        assert result is not None and result['samples'] > 50, result
+        assert result['sample_us'] < 2000, result
+        # The loop kept cycling while it was sampled
+        assert profiled < max(50.0, 5 * baseline), (profiled, baseline)
+
+        with open(result['files']['collapsed']) as f:
+            lines = f.read().splitlines()
+        busy = [line for line in lines if line.startswith('MainThread;') and '_busy_cycle' in line]
+        assert busy and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        assert sum(int(line.rsplit(' ', 1)[1]) for line in busy) > 5
+
+        with open(result['files']['speedscope']) as f:
+            doc = json.load(f)
+        frames = doc['shared']['frames']
+        main = next(p for p in doc['profiles'] if p['name'] == 'MainThread')
+        assert len(main['samples']) == len(main['weights']) and main['type'] == 'sampled'
+        assert any(frames[i]['name'] == '_busy_cycle' for stack in main['samples'] for i in stack)
+        assert abs(main['endValue'] - result['seconds'] * 1000) < 0.2 * result['seconds'] * 1000
+
+        with open(result['files']['alloc']) as f:
+            alloc = f.read().splitlines()
+        assert alloc[0].startswith('#') and len(alloc) > 1
+        assert any('test_profiler.py' in line for line in alloc[1:]), alloc
+    print(f"✅ {result['samples']} samples at {result['sample_us']:.0f}µs each; "
+          f"longest cycle gap {profiled:.1f}ms while profiling ({baseline:.1f}ms before)")
+
+
+def test_control_file():
+    """Test that the control file starts a profile of the requested length, one at a time."""
+    print("\n📝 Testing the control file...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        control = os.path.join(tmp, 'profile.request')
+        with open(control, 'w') as f:
+            f.write('30')  # left over from an earlier run: ignored
+        hook = ProfilerHook(control_file=control, seconds=30,
+                            profiler=SamplingProfiler(out_dir=os.path.join(tmp, 'out'), interval_ms=5, alloc_top=0))
+        hook.install()
+        try:
+            assert not os.path.exists(control)
+            with open(control, 'w') as f:
+                f.write('0.4\n')
+            deadline = time.monotonic() + 5
+            while not hook.running and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert hook.running and not os.path.exists(control)
+            hook.request()  # ignored: a profile is already running
+            while hook.last_result is None and time.monotonic() < deadline + 5:
+                time.sleep(0.05)
+        finally:
+            hook.stop()
+
+        result = hook.last_result
+        assert result is not None and 0.4 <= result['seconds'] < 1.0, result
+        assert set(result['files']) == {'collapsed', 'speedscope'}  # alloc_top=0: no tracemalloc
+        assert len(os.listdir(os.path.join(tmp, 'out'))) == 2
+    print(f"✅ Control file requested a {result['seconds']:.1f}s profile; the overlapping request was ignored")
+
+
+def main():
+    print("🧪 Running Profiler Tests")
+    print("=" * 60)
+
+    try:
+        test_signal_profiles_without_pausing()
+        test_control_file()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# examples/test_rate_limiter.py
+
+"""
+Tests for broker request pacing (brokers/rate_limiter.py): the message-rate
+bound under contention, order priority, market data line packing, and the
+IBKR broker's use of both.
+"""
+
+import os
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+
+from brokers import IBKRBroker
+from brokers.rate_limiter import RateLimiter, PRIORITY_ORDER, PRIORITY_DATA
+from utils.perf_ring import METRIC_IDS
+
+
+def _max_in_window(times, window):
+    times = np.sort(np.asarray(times))
+    return int((np.searchsorted(times, times + window - 1e-6, 'right') - np.arange(len(times))).max())
+
+
+def _hammer(limiter, seconds, threads=8, chunk=None):
+    """Data requests from several threads as fast as the limiter allows; returns send times."""
+    sent, lock = [], threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        while time.monotonic() < deadline:
+            if chunk:
+                for batch in limiter.batches(range(chunk)):
+                    now = time.monotonic()
+                    with lock:
+                        sent.extend([now] * len(batch))
+            else:
+                limiter.acquire(1, PRIORITY_DATA)
+                with lock:
+                    sent.append(time.monotonic())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sent
+
+
+def test_rate_bound_and_throughput():
+    """Test that no window carries more than `limit` messages and throughput stays near it."""
+    print("\n📝 Testing message-rate bound under contention...")
+
+    for chunk in (None, 25):
+        limiter = RateLimiter(limit=100, window=0.5, burst=20, order_reserve=2)
+        start = time.monotonic()
+        sent = _hammer(limiter, 1.5, chunk=chunk)
+        elapsed = max(sent) - start
+        peak = _max_in_window(sent, limiter.window)
+        assert peak <= limiter.limit, f"{peak} messages in one window"
+        # Burst (less the order reserve) plus the refill rate over the run
+        expected = limiter.burst - limiter.order_reserve + limiter.rate * elapsed
+        assert len(sent) >= 0.9 * expected, (len(sent), expected)
+        stats = limiter.stats()
+        assert stats['data_msgs'] == len(sent) and stats['throttled'] > 0
+        assert 0.7 < stats['msg_utilization'] <= 1.0
+    print(f"✅ Peak {peak}/{limiter.limit} per window; {len(sent)} messages, "
+          f"{stats['msg_utilization']:.0%} of the limit")
+
+
+def test_orders_jump_the_queue():
+    """Test that orders go out promptly while data requests saturate the bucket."""
+    print("\n📝 Testing order priority...")
+
+    limiter = RateLimiter(limit=60, window=0.5, burst=10, order_reserve=2)
+    waits = []
+
+    def orders():
+        time.sleep(0.2)
+        for _ in range(10):
+            t0 = time.monotonic()
+            limiter.acquire(2, PRIORITY_ORDER)
+            waits.append(time.monotonic() - t0)
+            time.sleep(0.08)
+
+    placer = threading.Thread(target=orders)
+    placer.start()
+    sent = _hammer(limiter, 1.2, threads=16)
+    placer.join()
+
+    stats = limiter.stats()
+    data_wait = stats['data_wait_sec'] / stats['data_msgs']
+    assert max(waits) < 2.5 / limiter.rate, [round(w * 1000, 1) for w in waits]
+    assert np.mean(waits) < data_wait / 5, (np.mean(waits), data_wait)
+    assert stats['order_msgs'] == 20 and _max_in_window(sent, limiter.window) <= limiter.limit
+
+    try:
+        limiter.acquire(limiter.burst - 1, PRIORITY_DATA)  # more than data may take at once
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print(f"✅ Orders waited {np.mean(waits) * 1000:.1f}ms on average "
+          f"(max {max(waits) * 1000:.1f}ms) vs {data_wait * 1000:.0f}ms per data message")
+
+
+def test_market_data_lines():
+    """Test that streams hold lines up to the snapshot reserve and snapshots pack the rest."""
+    print("\n📝 Testing market data line packing...")
+
+    limiter = RateLimiter(max_lines=10, stream_reserve=2)
+    assert limiter.hold_lines(7) == 7
+    assert limiter.hold_lines(5) == 1  # 2 lines stay free for snapshots
+    with limiter.lines(50) as leased:
+        assert leased == 2 and limiter.lines_in_use == 10
+        granted = []
+        waiter = threading.Thread(target=lambda: granted.append(limiter.lines(3).__enter__()))
+        waiter.start()
+        time.sleep(0.05)
+        assert not granted, "a snapshot lease must wait for a free line"
+        limiter.release_lines(3)
+        waiter.join(1)
+        assert granted == [3]
+    assert limiter.stats()['lines_peak'] == 10
+
+    unlimited = RateLimiter(max_lines=None)
+    assert unlimited.hold_lines(10_000) == 10_000
+    with unlimited.lines(500) as leased:
+        assert leased == 500
+    print("✅ Streams stop at the reserve; snapshots lease the free lines and wait when none are left")
+
+
+class _Event:
+    """Minimal eventkit.Event: handlers are added with += and removed with -=."""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+
+class _FakeIB:
+    """Stands in for ib_insync.IB; tracks concurrent market data lines and message times."""
+
+    def __init__(self):
+        self.pendingTickersEvent = _Event()
+        self.messages = []
+        self.placed = []
+        self.lines = 0
+        self.peak_lines = 0
+        self.streams = {}
+
+    def _send(self, n=1):
+        self.messages.extend([time.monotonic()] * n)
+
+    def qualifyContracts(self, *contracts):
+        self._send(len(contracts))
+        for contract in contracts:
+            contract.conId = hash(contract.symbol) & 0xffff or 1
+        return list(contracts)
+
+    def reqTickers(self, *contracts):
+        self._send(len(contracts))
+        self.lines += len(contracts)
+        self.peak_lines = max(self.peak_lines, self.lines)
+        time.sleep(0.01)  # snapshot round-trip
+        self.lines -= len(contracts)
+        return [SimpleNamespace(contract=c, bid=99.0, ask=101.0, last=100.0, close=100.0,
+                                volume=1000, time=None) for c in contracts]
+
+    def reqMktData(self, contract, *args):
+        self._send()
+        self.streams[contract.symbol] = SimpleNamespace(contract=contract)
+        return self.streams[contract.symbol]
+
+    def cancelMktData(self, contract):
+        self._send()
+        self.streams.pop(contract.symbol, None)
+
+    def placeOrder(self, contract, order):
+        self._send()
+        self.placed.append(time.monotonic())
+        return order
+
+    def isConnected(self):
+        return True
+
+
+def test_ibkr_paces_requests():
+    """Test that IBKRBroker paces a large quote fetch within limits while orders still go out."""
+    print("\n📝 Testing IBKR pacing...")
+
+    limiter = RateLimiter(limit=300, window=1.0, burst=20, max_lines=100, stream_reserve=10)
+    broker = IBKRBroker(limiter=limiter)
+    broker.ib = _FakeIB()
+
+    broker.subscribe_quotes([f'S{i:03d}' for i in range(95)], lambda *a: None)
+    assert len(broker.ib.streams) == 90 and limiter.lines_in_use == 90  # 10 lines kept for snapshots
+
+    symbols = [f'Q{i:03d}' for i in range(60)]
+    order_waits = []
+
+    def place_orders():
+        time.sleep(0.3)
+        for i in range(3):
+            t0 = time.monotonic()
+            broker.place_option_trade('AAPL', 'C', 200.0, '20261120', client_order_id=f'o{i}')
+            order_waits.append(time.monotonic() - t0)
+            time.sleep(0.2)
+
+    placer = threading.Thread(target=place_orders)
+    placer.start()
+    batch = broker.fetch_quotes(symbols)
+    placer.join()
+
+    assert sorted(batch.symbols) == symbols
+    assert broker.ib.peak_lines <= 10, broker.ib.peak_lines
+    assert _max_in_window(broker.ib.messages, 1.0) <= limiter.limit
+    assert max(order_waits) < 3 / limiter.rate, order_waits
+
+    broker.unsubscribe_quotes()
+    assert limiter.lines_in_use == 0 and not broker.ib.streams
+
+    samples = dict(limiter.perf_samples())
+    assert set(samples) <= set(METRIC_IDS)
+    assert samples['broker_msgs'] == len(broker.ib.messages) and samples['md_lines'] == 0
+    assert 0 < samples['broker_msg_util'] <= 1.0
+    assert dict(limiter.perf_samples())['broker_msgs'] == 0  # deltas since the previous sample
+    print(f"✅ {len(broker.ib.messages)} messages, peak {_max_in_window(broker.ib.messages, 1.0)}/s, "
+          f"{broker.ib.peak_lines} snapshot lines; orders waited at most {max(order_waits) * 1000:.0f}ms")
+
+
+def main():
+    print("🧪 Running Rate Limiter Tests")
+    print("=" * 60)
+
+    try:
+        test_rate_bound_and_throughput()
+        test_orders_jump_the_queue()
+        test_market_data_lines()
+        test_ibkr_paces_requests()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# examples/test_rolling_features.py
+
+"""
+Tests for per-symbol rolling features (utils/rolling_features.py):
+kernels against pandas rolling, live (incremental) against batch, and
+intraday cycles scored against daily history.
+"""
+
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from utils.rolling_features import (
+    compute_rolling_features, chain_skew, RollingFeatureState, ROLLING_FEATURE_COLUMNS, IV_WINDOW,
+)
+from utils.feature_engineering import prepare_features, EXTENDED_FEATURE_COLUMNS
+
+
+def _history(rows=6000, symbols=23, seed=0):
+    """Interleaved per-symbol history with some missing IVs."""
+    rng = np.random.default_rng(seed)
+    iv = rng.uniform(0.1, 0.6, rows)
+    iv[rng.random(rows) < 0.02] = np.nan
+    return pd.DataFrame({
+        'symbol': rng.choice([f"SYM{i}" for i in range(symbols)], rows),
+        'underlying_close': 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))),
+        'iv': iv,
+    })
+
+
+def test_matches_pandas_rolling():
+    """Test the vectorized kernels against per-symbol pandas rolling windows."""
+    print("\n📝 Testing rolling kernels...")
+
+    df = _history()
+    features = compute_rolling_features(df)
+    by_symbol = df.groupby('symbol')
+
+    log_ret = by_symbol['underlying_close'].transform(lambda s: np.log(s).diff())
+    rv_21 = log_ret.groupby(df['symbol']).transform(lambda s: s.rolling(21, min_periods=2).std()) * np.sqrt(252)
+    mom_5 = log_ret.groupby(df['symbol']).transform(lambda s: s.rolling(5, min_periods=1).sum())
+    assert np.allclose(features['rv_21'], rv_21.fillna(0))
+    assert np.allclose(features['mom_5'], mom_5.fillna(0))
+    assert np.allclose(features['iv_rv_spread'], (df['iv'] - rv_21).fillna(0))
+
+    hi = by_symbol['iv'].transform(lambda s: s.rolling(IV_WINDOW, min_periods=1).max())
+    lo = by_symbol['iv'].transform(lambda s: s.rolling(IV_WINDOW, min_periods=1).min())
+    rank = np.where(hi > lo, (df['iv'] - lo) / (hi - lo), 0.5)
+    assert np.allclose(features['iv_rank'], np.nan_to_num(rank))
+
+    def percentile(window):
+        valid = window[~np.isnan(window)]
+        return (valid < window[-1]).sum() / len(valid)
+
+    pct = by_symbol['iv'].transform(lambda s: s.rolling(IV_WINDOW, min_periods=1).apply(percentile, raw=True))
+    assert np.allclose(features['iv_percentile'], pct.fillna(0))
+    print("✅ Realized vol, momentum, IV rank and percentile match pandas")
+
+
+def test_live_matches_batch():
+    """Test that feeding rows cycle by cycle, one session per row, gives the batch values."""
+    print("\n📝 Testing live vs batch...")
+
+    df = _history().assign(session=lambda d: np.arange(len(d), dtype=float))
+    batch = compute_rolling_features(df)
+
+    state = RollingFeatureState()
+    start = time.perf_counter()
+    # Uneven cycles, so some symbols get several rows in one update
+    bounds = np.cumsum(np.random.default_rng(1).integers(5, 60, len(df)))
+    bounds = np.concatenate(([0], bounds[bounds < len(df)], [len(df)]))
+    live = pd.concat([state.update(df.iloc[a:b]) for a, b in zip(bounds[:-1], bounds[1:])])
+    elapsed = time.perf_counter() - start
+
+    assert list(live.columns) == ROLLING_FEATURE_COLUMNS
+    assert (live.index == df.index).all()
+    assert np.allclose(live.to_numpy(), batch.to_numpy(), rtol=1e-9, atol=1e-9)
+    print(f"✅ {len(bounds) - 1} live cycles match batch ({elapsed * 1000:.0f}ms total)")
+
+
+def test_intraday_cycles_score_against_daily_history():
+    """Test that intraday cycles are scored as the session's close and keep one row per session."""
+    print("\n📝 Testing intraday cycles against daily history...")
+
+    rng = np.random.default_rng(2)
+    days, seeded, cycles = 300, 260, 6
+    daily = pd.concat([_history(rows=days, symbols=1, seed=s).assign(symbol=f"SYM{s}") for s in range(3)],
+                      ignore_index=True)
+    daily['session'] = np.tile(np.arange(days, dtype=float), 3)
+
+    state = RollingFeatureState()
+    assert state.seed(daily[daily['session'] < seeded]) == 3 * IV_WINDOW
+    for day in range(seeded, days):
+        close = daily[daily['session'] == day].reset_index(drop=True)
+        past = daily[daily['session'] < day]
+        for cycle in range(cycles):
+            # Intraday quotes drift towards the close, which the last cycle sees
+            quotes = close.copy()
+            if cycle < cycles - 1:
+                quotes['underlying_close'] *= np.exp(rng.normal(0, 0.01, len(quotes)))
+                quotes['iv'] += rng.normal(0, 0.02, len(quotes))
+            live = state.update(quotes)
+            batch = compute_rolling_features(pd.concat([past, quotes], ignore_index=True))
+            assert np.allclose(live.to_numpy(), batch.iloc[len(past):].to_numpy(), rtol=1e-9, atol=1e-9)
+        assert state.depth('SYM0') == min(IV_WINDOW, day)  # the session in progress is not stored yet
+
+    # Every closed session is the day's last row: batch over the daily series gives the same values
+    state.update(daily[daily['session'] == days - 1].assign(session=float(days)))
+    assert state.depth('SYM0') == IV_WINDOW
+    symbols, counts, values, _ = state.snapshot()
+    closes = daily[daily['symbol'] == 'SYM0'].tail(IV_WINDOW)[['underlying_close', 'iv']].to_numpy()
+    assert symbols[0] == 'SYM0' and np.array_equal(values[:counts[0] - 1, :2], closes, equal_nan=True)
+    print(f"✅ {(days - seeded) * cycles} intraday cycles match compute_rolling_features over daily closes")
+
+
+def test_chain_skew_and_prepare_features():
+    """Test 25-delta skew from a chain and the extended feature set."""
+    print("\n📝 Testing chain skew and extended features...")
+
+    chain = pd.DataFrame({
+        'symbol': ['AAPL'] * 6 + ['MSFT'] * 2,
+        'expiry': ['20260116'] * 4 + ['20260220'] * 2 + ['20260116'] * 2,
+        'right': ['P', 'P', 'C', 'C', 'P', 'C', 'P', 'C'],
+        'delta': [-0.24, -0.40, 0.26, 0.10, -0.25, 0.25, -0.25, 0.25],
+        'iv': [0.35, 0.30, 0.28, 0.33, 0.90, 0.10, 0.25, 0.25],
+    })
+    skew = chain_skew(chain)
+    assert np.isclose(skew['AAPL'], 0.07) and np.isclose(skew['MSFT'], 0.0)
+
+    df = _history(rows=500, symbols=4)
+    df['skew_25d'] = df['symbol'].map({'SYM0': 0.05}).astype(float)
+    X = prepare_features(df.assign(delta=0.5, gamma=0.1, vega=0.2, theta=-0.05, volume=100.0),
+                         EXTENDED_FEATURE_COLUMNS)
+    assert list(X.columns) == EXTENDED_FEATURE_COLUMNS and not X.isna().any().any()
+    assert (X.loc[df['symbol'] == 'SYM0', 'skew_25d'] == 0.05).all()
+    print("✅ Skew per underlying; extended features have no gaps")
+
+
+def main():
+    print("🧪 Running Rolling Feature Tests")
+    print("=" * 60)
+
+    try:
+        test_matches_pandas_rolling()
+        test_live_matches_batch()
+        test_intraday_cycles_score_against_daily_history()
+        test_chain_skew_and_prepare_features()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# examples/test_rules.py
+
+"""
+Tests for the strategy rules engine (strategies/rules.py): compiled masks
+match the equivalent pandas filters, on DataFrames and ContractTables.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from datetime import date
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from brokers.contracts import ContractTable
+from strategies.rules import compile_rules, load_rules
+from strategies.greeks_optimizer import filter_trades_by_greeks
+
+TODAY = date(2026, 10, 19)
+SYMBOLS = np.array(['AAPL', 'MSFT', 'NVDA', 'SPY'])
+EXPIRIES = np.array(['20261023', '20261120', '20261218', '20270115'])
+RULES = {
+    'strategies': {
+        'short_dated_high_iv_calls': {
+            'iv_rank': {'>': 0.6},
+            'dte': {'between': [7, 45]},
+            'spread_pct': {'<': 0.05},
+            'right': 'C',
+        },
+        'wings': {
+            'any': [
+                {'delta': {'between': [0.10, 0.25]}},
+                {'delta': {'between': [-0.25, -0.10]}},
+            ],
+            'not': {'symbol': {'in': ['SPY']}},
+        },
+        'cheap_puts': [{'right': 'P'}, {'ask': {'<=': 2.0}}, {'dte': {'between': [7, 45]}}],
+    }
+}
+
+
+def _chain(n=20000, seed=3):
+    rng = np.random.default_rng(seed)
+    bid = rng.uniform(0.2, 20, n)
+    return pd.DataFrame({
+        'occ_symbol': '',
+        'symbol': SYMBOLS[rng.integers(0, len(SYMBOLS), n)],
+        'expiry': EXPIRIES[rng.integers(0, len(EXPIRIES), n)],
+        'right': np.where(rng.random(n) < 0.5, 'C', 'P'),
+        'strike': rng.uniform(50, 500, n).round(1),
+        'bid': bid, 'ask': bid + rng.uniform(0, 1, n), 'last': bid,
+        'iv': rng.uniform(0.1, 0.9, n), 'delta': rng.uniform(-1, 1, n),
+        'gamma': rng.uniform(0, 0.3, n), 'theta': rng.uniform(-0.2, 0, n),
+        'vega': rng.uniform(0, 0.3, n), 'timestamp': 0.0,
+    })
+
+
+def _symbol_features():
+    return pd.DataFrame({'iv_rank': [0.8, 0.3, 0.95, 0.7]}, index=SYMBOLS)
+
+
+def _pandas_reference(chain: pd.DataFrame) -> dict:
+    df = chain.join(_symbol_features(), on='symbol')
+    dte = (pd.to_datetime(df['expiry']) - pd.Timestamp(TODAY)).dt.days
+    mid = (df['bid'] + df['ask']) / 2
+    return {
+        'short_dated_high_iv_calls': ((df['iv_rank'] > 0.6) & dte.between(7, 45)
+                                      & ((df['ask'] - df['bid']) / mid < 0.05) & (df['right'] == 'C')),
+        'wings': ((df['delta'].between(0.10, 0.25) | df['delta'].between(-0.25, -0.10))
+                  & ~df['symbol'].isin(['SPY'])),
+        'cheap_puts': (df['right'] == 'P') & (df['ask'] <= 2.0) & dte.between(7, 45),
+    }
+
+
+def test_masks_match_pandas():
+    """Test several strategies in one pass against pandas filters, on a frame and a ContractTable."""
+    print("\n📝 Testing compiled masks...")
+
+    chain = _chain()
+    rules = compile_rules(RULES)
+    assert rules.names == list(RULES['strategies'])
+    # dte between [7, 45] is shared by two strategies and evaluated once
+    assert sum(1 for field, _, _ in rules.tests if field == 'dte') == 1
+
+    masks = rules.evaluate(chain, symbol_features=_symbol_features(), today=TODAY)
+    assert masks.shape == (3, len(chain)) and masks.dtype == bool
+    expected = _pandas_reference(chain)
+    for name, mask in zip(rules.names, masks):
+        assert (mask == expected[name].to_numpy()).all(), name
+        assert mask.any(), f"{name} selected nothing; test data too narrow"
+
+    table_masks = rules.evaluate(ContractTable.from_frame(chain), symbol_features=_symbol_features(), today=TODAY)
+    assert (table_masks == masks).all()
+    matches = rules.matches(chain, symbol_features=_symbol_features(), today=TODAY)
+    assert (matches['wings'] == np.flatnonzero(masks[1])).all()
+    print(f"✅ {len(rules.names)} strategies from {len(rules.tests)} shared tests match pandas")
+
+
+def test_greek_filter_unchanged():
+    """Test that filter_trades_by_greeks keeps its old results on the rules engine."""
+    print("\n📝 Testing filter_trades_by_greeks...")
+
+    chain = _chain()
+    expected = chain[
+        chain['delta'].between(0.3, 0.7) & (chain['gamma'] < 0.2)
+        & (chain['vega'] > 0.1) & (chain['theta'] > -0.05)
+    ].reset_index(drop=True)
+    assert filter_trades_by_greeks(chain).equals(expected)
+    narrower = filter_trades_by_greeks(chain, delta_range=(0.4, 0.5), max_gamma=0.1)
+    assert len(narrower) < len(expected) and narrower['delta'].between(0.4, 0.5).all()
+    print(f"✅ {len(expected)} contracts pass the default Greek profile")
+
+
+def test_config_files_and_errors():
+    """Test loading rules from JSON/YAML and rejecting bad configs."""
+    print("\n📝 Testing rule configs...")
+
+    chain = _chain(2000)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'rules.json')
+        with open(json_path, 'w') as f:
+            json.dump(RULES, f)
+        yaml_path = os.path.join(tmp, 'rules.yaml')
+        with open(yaml_path, 'w') as f:
+            f.write("strategies:\n"
+                    "  cheap_puts:\n"
+                    "    - right: P\n"
+                    "    - ask: {'<=': 2.0}\n"
+                    "    - dte: {between: [7, 45]}\n")
+        from_json = load_rules(json_path).evaluate(chain, symbol_features=_symbol_features(), today=TODAY)
+        from_yaml = load_rules(yaml_path).evaluate(chain, today=TODAY)
+        assert (from_json[2] == from_yaml[0]).all()
+
+    for bad in [{}, {'s': {'delta': {'~': 1}}}, {'s': {'dte': {'between': 7}}}, {'s': {'any': []}}]:
+        try:
+            compile_rules(bad)
+            assert False, f"config should be rejected: {bad}"
+        except ValueError:
+            pass
+    try:
+        compile_rules({'s': {'no_such_field': {'>': 1}}}).evaluate(chain)
+        assert False, "unknown field should be rejected"
+    except KeyError as e:
+        assert 'no_such_field' in str(e)
+    print("✅ JSON and YAML rules agree; bad configs are rejected")
+
+
+def main():
+    print("🧪 Running Rules Engine Tests")
+    print("=" * 60)
+
+    try:
+        test_masks_match_pandas()
+        test_greek_filter_unchanged()
+        test_config_files_and_errors()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# examples/test_sharding.py
+
+"""
+End-to-end test of the sharded trading mode against the simulated broker.
+Trains a tiny throwaway model, so no broker connection or models/model.pkl is needed.
+"""
+
+import io
+import os
+import sys
+import time
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from brokers import SimBroker
+from brokers.base_broker import BaseBroker
+from brokers.data_fetcher import fetch_live_option_rows
+from execution.order_manager import OrderManager
+from execution.sharding import ShardCoordinator, partition_symbols, _shard_load
+from models.predict import Signal
+from portfolio.risk_engine import RiskLimits, apply_risk_limits, current_exposure
+from strategies.contract_selector import ContractSelector
+from utils.feature_engineering import prepare_features
+
+
+def _train_tiny_model(path):
+    data = pd.read_csv(os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv'))
+    clf = RandomForestClassifier(n_estimators=5, random_state=0)
+    clf.fit(prepare_features(data), data['direction'])
+    joblib.dump(clf, path)
+
+
+def test_partition_balances_cost():
+    """Test that partitioning spreads observed cost evenly."""
+    print("\n📝 Testing partition_symbols...")
+
+    symbols = [f"S{i}" for i in range(40)]
+    costs = {s: (5.0 if i < 4 else 1.0) for i, s in enumerate(symbols)}
+    shards = partition_symbols(symbols, costs, 4)
+
+    assert sorted(sum(shards, [])) == sorted(symbols)
+    loads = [sum(costs[s] for s in shard) for shard in shards]
+    assert max(loads) - min(loads) <= 1.0, loads
+
+    # Unobserved symbols count at the median observed cost, in both the partition and the load
+    observed = {s: c for s, c in costs.items() if s not in ('S38', 'S39')}
+    shards = partition_symbols(symbols, observed, 4)
+    loads = [sum(observed.get(s, 1.0) for s in shard) for shard in shards]
+    assert _shard_load(shards, observed) == max(loads)
+    assert _shard_load([['S0', 'S38']], {'S0': 5.0}) == 10.0
+    print(f"✅ Shard loads: {loads}")
+
+
+def test_risk_limits_count_exposure():
+    """Test that risk limits are read at call time and count contracts already held or in flight."""
+    print("\n📝 Testing risk limits against current exposure...")
+
+    os.environ['RISK_MAX_CONTRACTS_PER_SYMBOL'] = '2'
+    try:
+        limits = RiskLimits.from_env(min_confidence=0.0)
+    finally:
+        del os.environ['RISK_MAX_CONTRACTS_PER_SYMBOL']
+    assert limits.max_contracts_per_symbol == 2 and limits.min_confidence == 0.0
+    assert RiskLimits.from_env().max_contracts_per_symbol == 1
+
+    broker = SimBroker()
+    broker.connect()
+    orders = OrderManager(broker)
+    orders.submit('AAPL', 'C', 100.0, '20240119', 'BUY', 1)
+    assert broker.get_option_positions() == {('AAPL', 'C'): 1}
+    open_order = type('Open', (), {'symbol': 'MSFT', 'quantity': 2, 'filled_qty': 1})()
+    exposure = current_exposure(broker.get_option_positions(), [open_order])
+    assert exposure == {'AAPL': 1, 'MSFT': 1}
+
+    signals = [Signal('AAPL', 'PUT', 0.9), Signal('MSFT', 'CALL', 0.8), Signal('SPY', 'CALL', 0.7)]
+    approved = apply_risk_limits(signals, limits, quantity=1, exposure=exposure)
+    assert [s.symbol for s in approved] == ['AAPL', 'MSFT', 'SPY']
+
+    out = io.StringIO()
+    with redirect_stdout(out):
+        approved = apply_risk_limits(signals, RiskLimits(min_confidence=0.0), quantity=1, exposure=exposure)
+        assert [s.symbol for s in approved] == ['SPY']
+        assert apply_risk_limits(signals, limits, quantity=3) == []
+    log = out.getvalue()
+    assert 'AAPL already has 1' in log and 'MSFT already has 1' in log
+    assert 'order size 3 exceeds max_contracts_per_symbol 2' in log
+    print("✅ Held and in-flight contracts count against the per-symbol cap; rejections are logged")
+
+
+def test_sharded_cycle_end_to_end():
+    """Test a full sharded cycle: workers fetch + predict, coordinator applies risk and routes orders."""
+    print("\n📝 Testing sharded cycle against SimBroker...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.pkl')
+        _train_tiny_model(model_path)
+
+        symbols = [f"SYM{i}" for i in range(24)]
+        limits = RiskLimits(max_orders_per_cycle=3, max_contracts_per_symbol=1, min_confidence=0.0)
+        coordinator = ShardCoordinator(symbols, num_workers=3, broker_type='sim',
+                                       base_client_id=10, model_path=model_path,
+                                       limits=limits, cycle_timeout=60)
+        execution_broker = SimBroker(client_id=10)
+        execution_broker.connect()
+        orders = OrderManager(execution_broker)
+        # Selecting by moneyness needs each signal's spot, which the workers report
+        selector = ContractSelector(execution_broker, select_by='moneyness')
+
+        coordinator.start()
+        try:
+            for _ in range(2):
+                result = coordinator.run_cycle(orders, selector=selector)
+                assert result['missing'] == [] and result['errors'] == {}, result
+                assert sorted(s.symbol for s in result['signals']) == sorted(symbols)
+                assert sorted(result['spots']) == sorted(symbols)
+                assert len(result['approved']) == 3 and len(result['orders']) == 3
+        finally:
+            coordinator.stop()
+
+        assert sorted(result['client_ids'].values()) == [11, 12, 13]
+        assert len(execution_broker.orders) == 6
+        assert set(coordinator.costs) == set(symbols)
+        print("✅ Sharded cycle merged all signals and routed orders through one connection")
+
+
+class _PerSymbolBroker(SimBroker):
+    """SimBroker without a batched quote API: one request per symbol, some slower than others."""
+
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def fetch_market_data(self, symbol):
+        time.sleep(self.latency.get(symbol, 0.0))
+        return super().fetch_market_data(symbol)
+
+    fetch_quotes = BaseBroker.fetch_quotes
+
+
+def test_fetch_costs_are_per_symbol():
+    """Test that per-symbol requests are timed per symbol, and a batched request is shared evenly."""
+    print("\n📝 Testing per-symbol fetch costs...")
+
+    symbols = [f"S{i}" for i in range(8)]
+    broker = _PerSymbolBroker({'S0': 0.08, 'S1': 0.04})
+    broker.connect()
+    costs = {}
+    fetch_live_option_rows(broker, symbols, costs)
+    assert set(costs) == set(symbols)
+    assert costs['S0'] >= 0.08 and 0.04 <= costs['S1'] < costs['S0']
+    assert max(costs[s] for s in symbols[2:]) < 0.02
+    # The slow symbol gets a shard of its own; the rest are balanced around it
+    shards = partition_symbols(symbols, costs, 2)
+    assert ['S0'] in shards and sorted(max(shards, key=len)) == symbols[1:]
+
+    batched = SimBroker(fetch_latency=0.04)
+    batched.connect()
+    costs = {}
+    fetch_live_option_rows(batched, symbols, costs)
+    assert len(set(costs.values())) == 1 and 0.005 <= costs['S0'] < 0.02
+    print(f"✅ Timed {len(symbols)} requests per symbol; one batched request was split evenly")
+
+
+def test_dead_worker_is_restarted():
+    """Test that a worker that dies is replaced and its shard still reports."""
+    print("\n📝 Testing worker restart...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.pkl')
+        _train_tiny_model(model_path)
+        symbols = [f"SYM{i}" for i in range(8)]
+        coordinator = ShardCoordinator(symbols, num_workers=2, broker_type='sim', base_client_id=20,
+                                       model_path=model_path, cycle_timeout=60)
+        coordinator.start()
+        try:
+            assert coordinator.collect_signals()['missing'] == []
+            dead, _, _ = coordinator._workers[1]
+            dead.kill()
+            dead.join()
+            for _ in range(2):
+                result = coordinator.collect_signals()
+                assert result['missing'] == [] and result['errors'] == {}, result
+                assert sorted(s.symbol for s in result['signals']) == sorted(symbols)
+        finally:
+            coordinator.stop()
+        assert coordinator.restarts == 1 and result['client_ids'] == {0: 21, 1: 22}
+    print("✅ Dead worker restarted on its client id; every shard kept reporting")
+
+
+def test_worker_dying_mid_cycle():
+    """Test that a worker killed mid-cycle is reported at once and does not block the other shard."""
+    print("\n📝 Testing a worker dying mid-cycle...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.pkl')
+        _train_tiny_model(model_path)
+        symbols = [f"SYM{i}" for i in range(8)]
+        coordinator = ShardCoordinator(symbols, num_workers=2, broker_type='sim', base_client_id=30,
+                                       broker_kwargs={'fetch_latency': 1.0}, model_path=model_path,
+                                       cycle_timeout=60)
+        coordinator.start()
+        try:
+            assert coordinator.collect_signals()['missing'] == []
+            victim, _, _ = coordinator._workers[1]
+            survivors = sorted(coordinator.shards[0])
+            threading.Timer(0.3, victim.kill).start()  # while it sleeps in fetch_quotes
+            start = time.monotonic()
+            result = coordinator.collect_signals()
+            elapsed = time.monotonic() - start
+            assert result['missing'] == [1] and elapsed < 30, (result, elapsed)
+            assert sorted(s.symbol for s in result['signals']) == survivors
+
+            result = coordinator.collect_signals()
+            assert result['missing'] == [] and coordinator.restarts == 1
+        finally:
+            coordinator.stop()
+    print(f"✅ The dead shard was reported after {elapsed:.1f}s, not the 60s timeout; it reported again after a restart")
+
+
+def main():
+    print("🧪 Running Sharding Tests")
+    print("=" * 60)
+
+    try:
+        test_partition_balances_cost()
+        test_fetch_costs_are_per_symbol()
+        test_risk_limits_count_exposure()
+        test_sharded_cycle_end_to_end()
+        test_dead_worker_is_restarted()
+        test_worker_dying_mid_cycle()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# examples/test_signal_store.py
+
+"""
+Tests for repeated-signal suppression (execution/signal_store.py): held
+exposure, the position limit, cooldown and TTL expiry, direction flips, and
+in-flight orders released by order updates. Times are passed as `now=`.
+"""
+
+import os
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brokers import SimBroker
+from brokers.base_broker import ORDER_ACKED, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED
+from execution.order_manager import ManagedOrder, OrderManager, ORDER_SUBMITTED
+from execution.scheduler import create_signal_store
+from execution.signal_store import SignalStore
+from models.predict import Signal
+
+
+def _store(**kwargs):
+    options = dict(cooldown_sec=60, ttl_sec=600, confidence_step=0.05, max_position=2)
+    options.update(kwargs)
+    return SignalStore(**options)
+
+
+def _order(coid, state=ORDER_SUBMITTED, action='BUY', quantity=1, filled_qty=0):
+    return ManagedOrder(coid, 'SPY', 'C', 500.0, '20261120', action, quantity, state=state, filled_qty=filled_qty)
+
+
+def _reasons(store, predictions, now, quantity=1):
+    allowed, suppressed = store.filter(predictions, quantity=quantity, now=now)
+    return [p.prediction for p in allowed], {(p.symbol, p.prediction): reason for p, reason in suppressed}
+
+
+def test_already_held_and_direction_flip():
+    """Test that held exposure suppresses an unchanged signal but not a stronger one or a flip."""
+    print("\n📝 Testing held exposure...")
+
+    store = _store(max_position=5)
+    store.sync_positions({('SPY', 'C'): 1, ('SPY', 'STK'): 100})
+    assert store.exposure('SPY', 'CALL') == 1 and store.exposure('SPY', 'PUT') == 0
+
+    # Held before this process saw a signal: any CALL is a repeat
+    allowed, suppressed = _reasons(store, [Signal('SPY', 'CALL', 0.99), Signal('SPY', 'PUT', 0.81)], now=0)
+    assert allowed == ['PUT'] and suppressed == {('SPY', 'CALL'): 'already held'}
+
+    # Opened by this process at 0.81: only confidence_step more adds to it
+    store.record_submit(Signal('SPY', 'PUT', 0.81), _order('put-1', action='BUY'), now=0)
+    assert store.exposure('SPY', 'PUT') == 1
+    allowed, suppressed = _reasons(store, [Signal('SPY', 'PUT', 0.85)], now=100)
+    assert suppressed == {('SPY', 'PUT'): 'already held'}
+    allowed, suppressed = _reasons(store, [Signal('SPY', 'PUT', 0.87)], now=100)
+    assert allowed == ['PUT'] and not suppressed
+    print("✅ Unchanged signals on held exposure are suppressed; a flip and a stronger signal go out")
+
+
+def test_position_limit():
+    """Test that filled plus in-flight contracts never exceed max_position."""
+    print("\n📝 Testing the position limit...")
+
+    store = _store(confidence_step=0.0)
+    store.sync_positions({('QQQ', 'C'): 1})
+    store.record_submit(Signal('QQQ', 'CALL', 0.9), _order('call-1'), now=0)
+    assert store.exposure('QQQ', 'CALL') == 2
+    _, suppressed = _reasons(store, [Signal('QQQ', 'CALL', 0.99)], now=100)
+    assert suppressed == {('QQQ', 'CALL'): 'position limit'}
+
+    # One contract held: a 2-lot exceeds the limit; a 1-lot fits but repeats held exposure
+    fresh = _store()
+    fresh.sync_positions({('IWM', 'P'): 1})
+    fresh.record_submit(Signal('IWM', 'PUT', 0.8), _order('put-9', state=ORDER_REJECTED), now=0)
+    _, suppressed = _reasons(fresh, [Signal('IWM', 'PUT', 0.9)], now=0, quantity=2)
+    assert suppressed == {('IWM', 'PUT'): 'position limit'}
+    assert _reasons(fresh, [Signal('IWM', 'PUT', 0.9)], now=0)[1] == {('IWM', 'PUT'): 'already held'}
+    print("✅ Filled and in-flight contracts both count against max_position")
+
+
+def test_cooldown_and_ttl_expiry():
+    """Test that a signal stays in cooldown while seen, and is forgotten after ttl_sec unseen."""
+    print("\n📝 Testing cooldown and TTL expiry...")
+
+    store = _store(cooldown_sec=1000, ttl_sec=100)
+    store.record_submit(Signal('SPY', 'CALL', 0.9), _order('call-1'), now=0)
+    store.on_order_update(_order('call-1', state=ORDER_FILLED, filled_qty=1))
+    store.sync_positions({})  # closed at the broker since
+
+    assert _reasons(store, [Signal('SPY', 'CALL', 0.9)], now=50)[1] == {('SPY', 'CALL'): 'cooldown'}
+    assert _reasons(store, [Signal('SPY', 'CALL', 0.9)], now=140)[1] == {('SPY', 'CALL'): 'cooldown'}
+    # Unseen for more than ttl_sec: it comes back as a new signal, cooldown and all forgotten
+    allowed, suppressed = _reasons(store, [Signal('SPY', 'CALL', 0.9)], now=241)
+    assert allowed == ['CALL'] and not suppressed
+
+    # A failed submit starts no cooldown
+    store.record_submit(Signal('QQQ', 'PUT', 0.9), _order('put-1', state=ORDER_REJECTED), now=300)
+    assert _reasons(store, [Signal('QQQ', 'PUT', 0.9)], now=301)[0] == ['PUT']
+    print("✅ Cooldown holds while the signal repeats; after the TTL it is new again")
+
+
+def test_order_updates_release_in_flight():
+    """Test that terminal order updates move in-flight exposure to positions exactly once."""
+    print("\n📝 Testing order updates...")
+
+    store = _store(max_position=10)
+    store.record_submit(Signal('SPY', 'CALL', 0.9), _order('buy-1', quantity=2), now=0)
+    store.record_submit(Signal('SPY', 'CALL', 0.9), _order('buy-2', quantity=3), now=0)
+    assert store.exposure('SPY', 'CALL') == 5
+
+    store.on_order_update(_order('buy-1', state=ORDER_ACKED, quantity=2))  # not terminal
+    assert store.exposure('SPY', 'CALL') == 5
+    store.on_order_update(_order('buy-1', state=ORDER_FILLED, quantity=2, filled_qty=2))
+    store.on_order_update(_order('buy-1', state=ORDER_FILLED, quantity=2, filled_qty=2))  # repeated event
+    assert store.exposure('SPY', 'CALL') == 5
+    store.on_order_update(_order('buy-2', state=ORDER_CANCELLED, quantity=3, filled_qty=1))
+    assert store.exposure('SPY', 'CALL') == 3  # 2 + the 1 filled before the cancel
+    assert store.snapshot()['in_flight'] == []
+
+    store.record_submit(Signal('SPY', 'CALL', 0.9), _order('sell-1', action='SELL'), now=0)
+    store.on_order_update(_order('sell-1', state=ORDER_FILLED, action='SELL', filled_qty=1))
+    assert store.exposure('SPY', 'CALL') == 2
+
+    # Through an OrderManager on SimBroker, whose fills arrive before record_submit returns
+    broker = SimBroker()
+    broker.connect()
+    orders = OrderManager(broker)
+    live = create_signal_store(broker, orders)
+    order = orders.submit('SPY', 'C', 500.0, '20261120', quantity=1)
+    live.record_submit(Signal('SPY', 'CALL', 0.9), order)
+    assert order.state == ORDER_FILLED and live.exposure('SPY', 'CALL') == 1
+    assert live.snapshot()['in_flight'] == []
+    print("✅ In-flight orders become filled positions once, cancels release what did not fill")
+
+
+def main():
+    print("🧪 Running Signal Store Tests")
+    print("=" * 60)
+
+    try:
+        test_already_held_and_direction_flip()
+        test_position_limit()
+        test_cooldown_and_ttl_expiry()
+        test_order_updates_release_in_flight()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
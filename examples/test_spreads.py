@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# examples/test_spreads.py
+
+"""
+Tests for vectorized spread construction (strategies/spreads.py) against
+brute-force enumeration and payoff grids, and for combo order routing.
+"""
+
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from brokers import SimBroker, IBKRBroker
+from utils.pricing import black_scholes
+from brokers.base_broker import OPTION_CHAIN_COLUMNS
+from brokers.contracts import OptionContract, OrderLeg
+from execution.order_manager import OrderManager
+from execution.scheduler import submit_spread, submit_signal, submit_signal_spread, DIRECTIONAL_SPREADS
+from models.predict import Signal
+from strategies.contract_selector import ContractSelector
+from portfolio.risk_engine import RiskLimits, within_loss_limit
+from strategies.rules import compile_rules
+from strategies.spreads import build_spreads, CONTRACT_MULTIPLIER, SPREAD_KINDS
+
+TODAY = date(2026, 10, 19)
+
+
+def _chain(expiries=10, strikes=100, spot=200.0, step=1.0):
+    """Black-Scholes chain of expiries x strikes x 2 contracts, with a volatility smile."""
+    rows = []
+    for e in range(expiries):
+        expiry = TODAY + timedelta(days=4 + 7 * e)
+        for i in range(strikes):
+            strike = spot - step * (strikes // 2) + step * i
+            iv = 0.3 + (strike / spot - 1) ** 2
+            for side in ('C', 'P'):
+                bs = black_scholes(spot, strike, (expiry - TODAY).days / 365, iv, side)
+                mid = round(bs['price'], 2)
+                half_spread = max(0.01, round(mid * 0.01, 2))
+                rows.append(('', 'XYZ', expiry.strftime('%Y%m%d'), side, strike, max(0.01, mid - half_spread),
+                             mid + half_spread, mid, iv, bs['delta'], bs['gamma'], bs['theta'], bs['vega'], 0.0))
+    return pd.DataFrame(rows, columns=OPTION_CHAIN_COLUMNS)
+
+
+def _brute_force_candidates(chain, max_width, wing_width):
+    """Every (kind, leg rows) the slow way, over legs passing the default leg rules."""
+    ok = (chain['bid'] > 0) & ((chain['ask'] - chain['bid']) / ((chain['ask'] + chain['bid']) / 2) < 0.25)
+    grid = {k: i for i, k in enumerate(sorted(chain['strike'].unique()))}
+    at = {(r.expiry, r.right, grid[r.strike]): i for i, r in enumerate(chain.itertuples()) if ok.iat[i]}
+    expected = set()
+    for (expiry, right, g), row in at.items():
+        for w in range(1, max_width + 1):
+            upper = at.get((expiry, right, g + w))
+            if upper is not None:
+                bull, bear = ('bull_call', 'bear_call') if right == 'C' else ('bull_put', 'bear_put')
+                expected |= {(bull, (row, upper)), (bear, (row, upper))}
+            call = at.get((expiry, 'C', g + w))
+            if right == 'P' and call is not None:
+                expected.add(('strangle', (row, call)))
+                for wing in range(1, wing_width + 1):
+                    long_put, long_call = at.get((expiry, 'P', g - wing)), at.get((expiry, 'C', g + w + wing))
+                    if long_put is not None and long_call is not None:
+                        expected.add(('iron_condor', (long_put, row, call, long_call)))
+        if right == 'P' and (expiry, 'C', g) in at:
+            expected.add(('straddle', (row, at[(expiry, 'C', g)])))
+    return expected
+
+
+def _payoff_grid(chain, spreads, i, prices):
+    """Expiry payoff per share of candidate i at each price, from its order legs."""
+    value = np.full(len(prices), -spreads['debit'][i])
+    for leg in spreads.order_legs(i):
+        c = leg.contract
+        intrinsic = np.maximum(prices - c.strike, 0) if c.right == 'C' else np.maximum(c.strike - prices, 0)
+        value += (1 if leg.action == 'BUY' else -1) * leg.ratio * intrinsic
+    return value
+
+
+def test_enumeration_matches_brute_force():
+    """Test that every structure is enumerated exactly once, on a SimBroker chain."""
+    print("\n📝 Testing spread enumeration...")
+
+    broker = SimBroker()
+    broker.connect()
+    chain = broker.fetch_option_chain('AAPL')
+    spreads = build_spreads(chain, max_width=4, wing_width=2)
+    got = {(kind, tuple(int(r) for r, q in zip(legs, ratios) if q))
+           for kind, legs, ratios in zip(spreads['kind'], spreads.legs, spreads.ratios)}
+    expected = _brute_force_candidates(chain, max_width=4, wing_width=2)
+    assert len(got) == len(spreads), "duplicate candidates"
+    assert got == expected, (len(got - expected), len(expected - got))
+    assert set(spreads['kind']) == set(SPREAD_KINDS)
+
+    only_condors = build_spreads(chain, kinds=['iron_condor'], max_width=4, wing_width=2)
+    assert len(only_condors) == sum(1 for kind, _ in expected if kind == 'iron_condor')
+    print(f"✅ {len(spreads)} candidates on {len(chain)} contracts match a brute-force enumeration")
+
+
+def test_payoffs_match_grid():
+    """Test max loss/profit, breakevens and net greeks against dense payoff grids."""
+    print("\n📝 Testing spread payoffs...")
+
+    chain = _chain(expiries=3, strikes=40)
+    spreads = build_spreads(chain, today=TODAY)
+    rng = np.random.default_rng(5)
+    for i in rng.choice(len(spreads), 400, replace=False):
+        legs = spreads.order_legs(i)
+        strikes = sorted(leg.contract.strike for leg in legs)
+        prices = np.union1d(np.linspace(0, strikes[-1] * 3, 30001), strikes)
+        value = _payoff_grid(chain, spreads, i, prices)
+        kind = spreads['kind'][i]
+
+        assert np.isclose(spreads['max_loss'][i], -value.min() * CONTRACT_MULTIPLIER), kind
+        if kind in ('straddle', 'strangle'):
+            assert spreads['max_profit'][i] == np.inf and np.isnan(spreads['reward_risk'][i])
+        else:
+            assert np.isclose(spreads['max_profit'][i], value.max() * CONTRACT_MULTIPLIER), kind
+
+        sign_changes = prices[1:][np.diff(np.signbit(value)) != 0]
+        if len(sign_changes):
+            assert abs(spreads['breakeven_low'][i] - sign_changes[0]) < 0.05, kind
+            assert abs(spreads['breakeven_high'][i] - sign_changes[-1]) < 0.05, kind
+        else:
+            assert np.isnan(spreads['breakeven_low'][i])
+
+        rows = [r for r, q in zip(spreads.legs[i], spreads.ratios[i]) if q]
+        ratios = [q for q in spreads.ratios[i] if q]
+        assert np.isclose(spreads['delta'][i], sum(q * chain['delta'].iat[r] for r, q in zip(rows, ratios)))
+        assert spreads['width'][i] == strikes[-1] - strikes[0]
+
+    condor = spreads.best(spreads['kind'] == 'iron_condor')
+    assert spreads['debit'][condor] < 0, "iron condors are opened for a credit"
+    print(f"✅ 400 sampled candidates match payoff grids; best condor: {spreads.describe(condor)}")
+
+
+def test_prune_and_speed():
+    """Test pruning by rules and risk limits, and enumeration time on a 2k-contract chain."""
+    print("\n📝 Testing pruning and speed...")
+
+    chain = _chain()
+    assert len(chain) == 2000
+    build_spreads(chain, today=TODAY)
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        spreads = build_spreads(chain, today=TODAY)
+        timings.append(time.perf_counter() - start)
+    ms = min(timings) * 1000
+    assert ms < 150, f"{ms:.1f}ms for {len(spreads)} candidates"
+
+    rules = compile_rules({'defined_risk': {
+        'kind': {'in': ['iron_condor', 'bull_put']},
+        'dte': {'between': [7, 30]},
+        'reward_risk': {'>=': 0.25},
+    }})
+    limits = RiskLimits(max_loss_per_trade=300, max_contracts_per_symbol=2)
+    mask = spreads.prune(rules, limits)
+    c = spreads.columns
+    expected = (np.isin(c['kind'], ['iron_condor', 'bull_put']) & (c['dte'] >= 7) & (c['dte'] <= 30)
+                & (c['reward_risk'] >= 0.25) & (c['max_loss'] > 0) & (c['max_loss'] <= 300))
+    assert mask.any() and (mask == expected).all()
+    assert (spreads.prune(rules, limits, quantity=2) == (expected & (c['max_loss'] <= 150))).all()
+    assert not spreads.prune(rules, limits, quantity=3).any()  # over the per-symbol contract cap
+
+    best = spreads.best(mask)
+    assert c['reward_risk'][best] == c['reward_risk'][mask].max()
+    assert spreads.best(np.zeros(len(spreads), dtype=bool)) is None
+
+    # Unbounded payoffs never rank on reward_risk; they rank on their own by another column
+    unbounded = np.isin(c['kind'], ['straddle', 'strangle'])
+    assert unbounded.any() and not unbounded[spreads.best()]
+    assert spreads.best(unbounded) is None
+    straddle = spreads.best(c['kind'] == 'straddle', by='vega')
+    assert c['vega'][straddle] == c['vega'][c['kind'] == 'straddle'].max()
+
+    # A max loss <= 0 (crossed quotes) is invalid, not an infinitely good trade
+    assert (within_loss_limit(np.array([-5.0, 0.0, 100.0, 400.0, np.inf]), limits)
+            == [False, False, True, False, False]).all()
+    assert np.isnan(c['reward_risk'][c['max_loss'] <= 0]).all()
+    print(f"✅ {len(spreads)} candidates from {len(chain)} contracts in {ms:.1f}ms; "
+          f"{mask.sum()} pass rules and limits")
+
+
+class _FakeIB:
+    """Records what IBKRBroker sends, qualifying every option with a made-up conId."""
+
+    def __init__(self):
+        self.placed = []
+
+    def qualifyContracts(self, *contracts):
+        for contract in contracts:
+            contract.conId = int(contract.strike * 10) + (1 if contract.right == 'C' else 0)
+        return list(contracts)
+
+    def placeOrder(self, contract, order):
+        self.placed.append((contract, order))
+        return order
+
+
+def test_combo_order_routing():
+    """Test that a chosen spread goes out as one combo on SimBroker and as a BAG on IBKR."""
+    print("\n📝 Testing combo orders...")
+
+    broker = SimBroker()
+    broker.connect()
+    orders = OrderManager(broker, backoff_base=0.001)
+    spreads = build_spreads(broker.fetch_option_chain('SPY'), kinds=['iron_condor'])
+    i = spreads.best()
+    broker.fail_next_orders = 1
+    order = submit_spread(orders, spreads, i, quantity=2)
+    assert order.state == 'FILLED' and order.attempts == 2 and order.right == 'BAG'
+    assert len(broker.orders) == 1 and broker.orders[0]['legs'] == spreads.order_legs(i)
+    assert order.limit_price == round(float(spreads['mid_debit'][i]), 2) < 0
+    positions = broker.get_option_positions()
+    assert positions[('SPY', 'C')] == 0 and positions[('SPY', 'P')] == 0  # long and short legs net out
+    assert sorted(q for q in broker.positions.values()) == [-2, -2, 2, 2]
+
+    ibkr = IBKRBroker()
+    ibkr.ib = _FakeIB()
+    legs = [OrderLeg(OptionContract('SPY', '20261120', 'P', 560), 'BUY'),
+            OrderLeg(OptionContract('SPY', '20261120', 'P', 570), 'SELL')]
+    ibkr.place_combo_order('SPY', legs, quantity=3, limit_price=-1.234, client_order_id='combo-1')
+    contract, ib_order = ibkr.ib.placed[0]
+    assert contract.secType == 'BAG' and contract.symbol == 'SPY'
+    assert [(leg.conId, leg.ratio, leg.action) for leg in contract.comboLegs] == [(5600, 1, 'BUY'), (5700, 1, 'SELL')]
+    assert (ib_order.orderType, ib_order.action, ib_order.totalQuantity, ib_order.lmtPrice,
+            ib_order.orderRef) == ('LMT', 'BUY', 3, -1.23, 'combo-1')
+    print("✅ Combo filled as one order with per-leg positions; IBKR gets a BAG with qualified legs")
+
+
+def test_signals_trade_as_spreads():
+    """Test that with spreads on, a signal goes out as the best vertical in its direction."""
+    print("\n📝 Testing signals traded as spreads...")
+
+    broker = SimBroker()
+    broker.connect()
+    orders = OrderManager(broker)
+    selector = ContractSelector(broker)
+    for prediction in ('CALL', 'PUT'):
+        order = submit_signal(orders, Signal('SPY', prediction, 0.9), selector, spreads=True)
+        assert order is not None and order.right == 'BAG' and order.state == 'FILLED'
+        legs = broker.orders[-1]['legs']
+        assert len(legs) == 2 and {leg.contract.right for leg in legs} <= {'C', 'P'}
+
+        spreads = build_spreads(selector.index('SPY').chain, kinds=DIRECTIONAL_SPREADS[prediction])
+        ok = spreads.prune() & (spreads['dte'] >= selector.min_dte) & (spreads['dte'] <= selector.max_dte)
+        assert legs == spreads.order_legs(spreads.best(ok))
+
+    # Nothing passes a max loss of $0, so nothing is sent
+    tight = RiskLimits(max_loss_per_trade=0)
+    assert submit_signal_spread(orders, Signal('SPY', 'CALL', 0.9), selector, tight) is None
+    assert len(broker.orders) == 2
+    single = submit_signal(orders, Signal('SPY', 'CALL', 0.9), selector, spreads=False)
+    assert single.right == 'C'
+    print("✅ CALL and PUT signals routed as their best bull and bear verticals")
+
+
+def main():
+    print("🧪 Running Spread Construction Tests")
+    print("=" * 60)
+
+    try:
+        test_enumeration_matches_brute_force()
+        test_payoffs_match_grid()
+        test_prune_and_speed()
+        test_combo_order_routing()
+        test_signals_trade_as_spreads()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
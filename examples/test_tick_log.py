@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# examples/test_tick_log.py
+
+"""
+Tests for tick capture and replay (utils/tick_log.py, brokers/replay_broker.py):
+append throughput, time-range reads, and exact replay through a broker and
+the backtester.
+"""
+
+import os
+import sys
+import time
+import tempfile
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from brokers import SimBroker, ReplayBroker, BrokerFactory
+from brokers.data_fetcher import fetch_live_option_rows
+from backtest.backtest_engine import replay_signals
+from models.artifact import export_model
+import models.predict as predict
+from models.predict import predict_from_live_data, CACHE_STATS
+from models.train_model import make_model
+from strategies.contract_selector import ContractSelector
+from utils.feature_engineering import prepare_features, FEATURE_COLUMNS
+from utils.rolling_features import RollingFeatureState
+from utils.tick_log import (TickRecorder, TickLog, list_tick_files, read_ticks, SOURCE_QUOTE,
+                            SOURCE_MODEL_INPUT, SOURCE_CHAIN)
+
+SYMBOLS = ['AAPL', 'TSLA', 'SPY', 'NVDA']
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+
+
+def _midday(days_ago=0):
+    return (datetime.now().replace(hour=12, minute=0, second=0, microsecond=0)
+            - timedelta(days=days_ago)).timestamp()
+
+
+def test_append_and_time_ranges():
+    """Test single-tick throughput, range reads against a brute-force filter, reopen and day roll."""
+    print("\n📝 Testing tick appends and range reads...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TickRecorder(tmp)
+        base = _midday(1)
+        n = 200_000
+        start = time.perf_counter()
+        for i in range(n):
+            recorder.append(SYMBOLS[i & 3], last=100 + i * 1e-4, iv=0.3, ts=base + i * 1e-3)
+        rate = n / (time.perf_counter() - start)
+        assert rate > 100_000, f"{rate:,.0f} ticks/s"
+
+        recorder.append('AAPL', last=1.0, ts=base)  # late tick: stored at the previous timestamp
+        recorder.close()
+        recorder = TickRecorder(tmp)  # reopening continues the same day's file
+        recorder.record_frame(pd.DataFrame({'symbol': SYMBOLS, 'underlying_close': [1.5, 2.5, 3.5, 4.5]}),
+                              ts=base + 300)
+        recorder.append('QQQ', last=9.0, ts=_midday(0))  # next day: new file
+        recorder.close()
+
+        files = list_tick_files(tmp)
+        assert len(files) == 2
+        log = TickLog(list(files.values())[0])
+        assert len(log) == n + 5 and log.symbols == SYMBOLS
+        ts = log.records['ts']
+        assert (np.diff(ts) >= 0).all() and ts[n] == ts[n - 1]
+
+        for lo, hi in [(base + 12.3456, base + 77.7), (base - 5, base + 0.5), (base + 199.9995, base + 1e4)]:
+            view = log.between(lo, hi)
+            expected = np.flatnonzero((ts >= lo) & (ts < hi))
+            assert len(view) == len(expected) and (view['ts'] == ts[expected]).all()
+            assert np.shares_memory(view, log.records)  # a slice of the mapping, not a copy
+
+        rows = log.frame(base + 300, base + 301, source=SOURCE_MODEL_INPUT)
+        assert rows['symbol'].tolist() == SYMBOLS and rows['last'].tolist() == [1.5, 2.5, 3.5, 4.5]
+        assert read_ticks(base + 299, _midday(0) + 1, tmp)['symbol'].tolist() == SYMBOLS + ['QQQ']
+    print(f"✅ {rate:,.0f} ticks/s; range reads match a full scan without copying")
+
+
+def test_replay_broker_matches_capture():
+    """Test that streamed quotes, quotes and chains replay exactly as captured."""
+    print("\n📝 Testing replay through ReplayBroker...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recorder = TickRecorder(tmp)
+        broker = SimBroker()
+        broker.connect()
+        streamed = []
+
+        def on_quote(symbol, price, iv=None):
+            recorder.on_quote(symbol, price, iv)
+            streamed.append((symbol, price, iv))
+
+        broker.subscribe_quotes(SYMBOLS, on_quote)
+        selector = ContractSelector(broker, recorder=recorder, ttl_sec=0)
+        for cycle in range(5):
+            broker.poll_events(0)
+            recorder.record_frame(fetch_live_option_rows(broker, SYMBOLS))
+            selector.select('AAPL', 'C')
+            time.sleep(0.01)
+        chain = broker.fetch_option_chain('AAPL')
+        recorder.record_frame(chain, source=SOURCE_CHAIN)
+        path = recorder.path
+        recorder.close()
+
+        replay = BrokerFactory.create_broker('replay', path=path)
+        assert isinstance(replay, ReplayBroker)
+        replay.connect()
+        replayed = []
+        replay.subscribe_quotes(SYMBOLS, lambda s, p, iv: replayed.append((s, p, iv)))
+        while not replay.exhausted:
+            replay.poll_events(0.005)
+        assert replayed == streamed[1:]  # the first tick was applied on construction, before subscribing
+
+        replayed_chain = replay.fetch_option_chain('AAPL')
+        assert replayed_chain.drop(columns='timestamp').equals(chain.drop(columns='timestamp'))
+        quotes = replay.fetch_quotes(SYMBOLS + ['MSFT'])
+        assert list(quotes.symbols) == SYMBOLS  # never quoted: left out
+        log = TickLog(path)
+        last_rows = log.frame(source=SOURCE_MODEL_INPUT).groupby('symbol')['last'].last()
+        assert (quotes.last == last_rows[SYMBOLS].to_numpy()).all()
+        assert len(log.frame(source=SOURCE_QUOTE)) == len(streamed)
+    print(f"✅ {len(streamed)} streamed quotes, chains and quotes replay exactly")
+
+
+def test_backtest_replays_model_inputs():
+    """Test that the backtester re-scores recorded model inputs to the live signals."""
+    print("\n📝 Testing backtest replay of model inputs...")
+
+    data = pd.read_csv(DATA_PATH)
+    model = make_model('lr', {'C': 1.0}).fit(prepare_features(data.copy()), data['direction'])
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.cmodel')
+        export_model(model, model_path)
+        recorder = TickRecorder(tmp)
+        live = []
+        base = _midday(2)
+        rows = data.drop(columns=['direction']).reset_index(drop=True)
+        for cycle in range(3):
+            df = rows.iloc[cycle * 8:(cycle + 1) * 8].reset_index(drop=True)
+            recorder.record_frame(df, ts=base + cycle * 60)
+            live.extend((base + cycle * 60, s.symbol, s.prediction, s.confidence)
+                        for s in predict_from_live_data(df.copy(), model_path))
+        recorder.close()
+
+        cache = dict(predict._prediction_cache)
+        stats = (CACHE_STATS['pred_cache_hit'], CACHE_STATS['pred_cache_miss'])
+        replayed = replay_signals(base - 1, base + 600, model_path, tmp)
+        expected = pd.DataFrame(live, columns=['ts', 'symbol', 'prediction', 'confidence'])
+        assert replayed.equals(expected)
+        # The live prediction cache and its counters are left as they were
+        assert predict._prediction_cache == cache
+        assert (CACHE_STATS['pred_cache_hit'], CACHE_STATS['pred_cache_miss']) == stats
+        assert replay_signals(base + 1000, base + 2000, model_path, tmp).empty
+
+        # A rolling-feature model replays from its own history, not the live one
+        columns = FEATURE_COLUMNS + ['rv_21', 'mom_5']
+        rolling_path = os.path.join(tmp, 'rolling.cmodel')
+        export_model(make_model('lr', {'C': 1.0}).fit(prepare_features(data.copy(), columns), data['direction']),
+                     rolling_path)
+        state, fresh = predict.rolling_state().snapshot(), RollingFeatureState()
+        expected = [s.prediction for cycle in range(3)
+                    for s in predict_from_live_data(rows.iloc[cycle * 8:(cycle + 1) * 8].reset_index(drop=True)
+                                                    .assign(underlying_return_1d=0), rolling_path,
+                                                    rolling_state=fresh, use_cache=False)]
+        assert replay_signals(base - 1, base + 600, rolling_path, tmp)['prediction'].tolist() == expected
+        after = predict.rolling_state().snapshot()
+        assert after[0] == state[0] and (after[1] == state[1]).all() and (after[2] == state[2]).all()
+        assert np.array_equal(after[3], state[3], equal_nan=True)
+    print(f"✅ {len(replayed)} replayed signals equal the live ones")
+
+
+def main():
+    print("🧪 Running Tick Log Tests")
+    print("=" * 60)
+
+    try:
+        test_append_and_time_ranges()
+        test_replay_broker_matches_capture()
+        test_backtest_replays_model_inputs()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# examples/test_train_model.py
+
+"""
+Tests for the training search (models/train_model.py) and model registry
+(models/registry.py), with a small grid and temporary store/registry dirs.
+"""
+
+import os
+import sys
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+
+from models.train_model import train, time_series_folds, candidates
+from models.registry import ModelRegistry
+from models.predict import predict_from_live_data, load_model, legacy_model_path
+from utils.feature_store import FeatureStore
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+SMALL_GRIDS = {
+    'rf': {'n_estimators': [20], 'max_depth': [4, None]},
+    'gb': {'max_iter': [20]},
+    'lr': {'C': [0.1, 1.0]},
+}
+
+
+def test_folds_never_look_ahead():
+    """Test that every validation fold lies after its training rows."""
+    print("\n📝 Testing time-series folds...")
+
+    folds = time_series_folds(1000, 5)
+    assert len(folds) == 5
+    previous_end = None
+    for train_end, test_end in folds:
+        assert 0 < train_end < test_end <= 1000
+        assert previous_end is None or train_end == previous_end  # expanding window
+        previous_end = test_end
+    assert folds[-1][1] == 1000
+    assert len(candidates(['rf', 'lr'], SMALL_GRIDS)) == 4
+    print("✅ Expanding-window folds, no look-ahead")
+
+
+def test_search_registers_and_promotes():
+    """Test a parallel search across families and the registry round trip."""
+    print("\n📝 Testing search and registry...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(os.path.join(tmp, 'registry'))
+        store = FeatureStore(os.path.join(tmp, 'features'))
+
+        version, result = train([DATA_PATH], families=['rf', 'gb', 'lr'], splits=3, jobs=2,
+                                registry=registry, store=store, promote=False, grids=SMALL_GRIDS)
+        leaderboard = result['leaderboard']
+        assert version == 'v0001' and registry.versions() == ['v0001']
+        assert {entry['family'] for entry in leaderboard} == {'rf', 'gb', 'lr'}
+        assert all(len(entry['scores']) == 3 for entry in leaderboard)
+        assert leaderboard[0]['mean'] == max(entry['mean'] for entry in leaderboard)
+
+        metadata = registry.metadata()
+        assert metadata['family'] == leaderboard[0]['family']
+        assert metadata['cv']['folds'] == leaderboard[0]['scores']
+        assert metadata['features'] == store.columns and metadata['rows'] == 1000
+        # The trailing 20% is held out: no fold fits or scores it, the holdout report covers only it
+        assert result['folds'][-1][1] == 800
+        assert metadata['holdout']['start'] == 800 and metadata['holdout']['rows'] == 200
+        assert 0.0 <= metadata['holdout']['score'] <= 1.0
+        assert metadata['holdout']['report']['weighted avg']['support'] == 200
+        print(f"✅ {metadata['search']['fits']} fits in {result['wall_sec']:.1f}s, "
+              f"winner {metadata['family']} ({metadata['cv']['mean']:.3f})")
+
+        second, result = train([DATA_PATH], families=['lr'], splits=3, jobs=1,
+                               registry=registry, store=store, promote=False, grids=SMALL_GRIDS, holdout=0.0)
+        assert second == 'v0002' and registry.latest() == 'v0002'
+        assert result['folds'][-1][1] == 1000 and registry.metadata(second)['holdout'] is None
+
+        assert os.path.exists(registry.artifact_path('v0001')) and metadata['artifact'] == 'model.cmodel'
+        model_path = os.path.join(tmp, 'model.cmodel')
+        assert registry.promote('v0001', path=model_path) == 'v0001'
+        live = pd.read_csv(DATA_PATH).head(5).drop(columns=['direction'])
+        signals = predict_from_live_data(live, model_path)
+        assert len(signals) == 5 and all(s.prediction in ('CALL', 'PUT') for s in signals)
+        expected = registry.load('v0001').predict_proba(store.load(DATA_PATH).to_frame().head(5)).max(axis=1)
+        assert np.allclose([s.confidence for s in signals], expected)
+        print("✅ Versions increment; promoted artifact scores live rows")
+
+        # A model type with no compact format: its pickle replaces the live artifact
+        model = DummyClassifier(strategy='prior').fit(store.load(DATA_PATH).to_frame(), store.load(DATA_PATH).y)
+        third = registry.register(model, {'family': 'dummy'})
+        assert 'artifact' not in registry.metadata(third)
+        assert registry.promote(third, path=model_path) == third
+        assert not os.path.exists(model_path) and os.path.exists(legacy_model_path(model_path))
+        assert isinstance(load_model(model_path), DummyClassifier)
+        signals = predict_from_live_data(live, model_path)
+        assert len(signals) == 5 and len({(s.prediction, s.confidence) for s in signals}) == 1
+        print("✅ A version without an artifact is promoted as its pickle; the stale artifact is gone")
+
+
+def main():
+    print("🧪 Running Model Training Tests")
+    print("=" * 60)
+
+    try:
+        test_folds_never_look_ahead()
+        test_search_registers_and_promotes()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
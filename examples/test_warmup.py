@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# examples/test_warmup.py
+
+"""
+Tests for the pre-market warm-up (execution/warmup.py): every stage runs
+before the first cycle, that cycle then hits warm caches and full feature
+windows that later intraday cycles do not evict, and readiness is reported
+even when a stage fails.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from brokers import SimBroker, IBKRBroker
+from brokers.data_fetcher import fetch_live_option_rows
+from execution.warmup import warm_up, seconds_until_start, STAGES
+from models import predict
+from models.artifact import export_model
+from models.train_model import make_model
+from strategies.contract_selector import ContractSelector
+from utils.bar_cache import BarCache
+from utils.feature_engineering import prepare_features, FEATURE_COLUMNS
+from utils.helpers import session_timestamp
+from utils.rolling_features import compute_rolling_features, RollingFeatureState, LIVE_HISTORY
+
+# Symbols no other test scores, since the live rolling state is process-wide
+SYMBOLS = ['AMD', 'META', 'IWM', 'XLF']
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'historical_data.csv')
+
+
+class _CountingBroker(SimBroker):
+    """SimBroker that counts chain and bar requests."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.chain_requests = 0
+        self.bar_requests = 0
+
+    def fetch_option_chain(self, symbol, *args, **kwargs):
+        self.chain_requests += 1
+        return super().fetch_option_chain(symbol, *args, **kwargs)
+
+    def fetch_historical_bars(self, symbol, start, end=None):
+        self.bar_requests += 1
+        return super().fetch_historical_bars(symbol, start, end)
+
+
+def _rolling_model(path):
+    """Export a model that uses rolling features, so scoring goes through the live state."""
+    columns = FEATURE_COLUMNS + ['rv_21', 'mom_5']
+    data = pd.read_csv(DATA_PATH)
+    model = make_model('lr', {'C': 1.0}).fit(prepare_features(data.copy(), columns), data['direction'])
+    export_model(model, path)
+
+
+def _check_against_seed(bars, df, X, today):
+    """Assert each row's rolling features equal a batch over the seeded closes plus that row."""
+    for i, symbol in enumerate(df['symbol']):
+        b = bars.bars(symbol, refresh=False)
+        closes = list(b['close'][b['timestamp'] < today][-LIVE_HISTORY:]) + [df['underlying_close'][i]]
+        history = pd.DataFrame({'symbol': symbol, 'underlying_close': closes, 'iv': np.nan})
+        expected = compute_rolling_features(history, ['rv_21', 'mom_5']).iloc[-1]
+        assert np.allclose(X.iloc[i][['rv_21', 'mom_5']].astype(float), expected), symbol
+
+
+def test_first_cycle_is_warm():
+    """Test that after warm-up the first cycle fetches no chains or bars and loads no model."""
+    print("\n📝 Testing warm-up stages...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.cmodel')
+        ready_file = os.path.join(tmp, 'ready.json')
+        _rolling_model(model_path)
+        with open(ready_file, 'w') as f:
+            json.dump({'ready': True}, f)  # left over from yesterday
+
+        broker = _CountingBroker()
+        broker.connect()
+        bars = BarCache(broker, os.path.join(tmp, 'bars'))
+        selector = ContractSelector(broker)
+        streamed = []
+
+        report = warm_up(broker, SYMBOLS, selector, bars, on_quote=lambda *q: streamed.append(q),
+                         model_path=model_path, ready_file=ready_file)
+        assert report['ready'] and report['streaming'], report
+        assert [s['status'] for s in report['stages'].values()] == ['ok'] * len(STAGES)
+        with open(ready_file) as f:
+            assert json.load(f) == report
+        assert not any(key[0] == model_path for key in predict._prediction_cache)  # warm-up scores are not cached
+        today = session_timestamp(datetime.now())
+        past = (bars.bars('AMD', refresh=False)['timestamp'] < today).sum()
+        assert predict._rolling_state.depth('AMD') == min(LIVE_HISTORY, past)
+
+        # The first live cycle
+        chains, downloads = broker.chain_requests, broker.bar_requests
+        misses = predict.CACHE_STATS['model_cache_miss']
+        broker.poll_events(0)
+        df = fetch_live_option_rows(broker, SYMBOLS, bars=bars)
+        signals, X = predict.predict_from_live_data(df, model_path, return_features=True)
+        for signal, spot in zip(signals, df['underlying_close']):
+            assert selector.select(signal.symbol, signal.prediction[0], spot) is not None
+        assert (broker.chain_requests, broker.bar_requests) == (chains, downloads)
+        assert predict.CACHE_STATS['model_cache_miss'] == misses
+        assert [q[0] for q in streamed] == SYMBOLS
+
+        # Rolling features see the full window of past closes, as in a batch over the history
+        _check_against_seed(bars, df, X, today)
+        assert (X['rv_21'] != 0).all()
+
+        # Later intraday cycles are scored against the same closes and never evict them
+        for cycle in range(1, 4):
+            moved = df.assign(underlying_close=df['underlying_close'] * (1 + 0.01 * cycle))
+            _, X = predict.predict_from_live_data(moved, model_path, return_features=True)
+            _check_against_seed(bars, moved, X, today)
+        assert predict._rolling_state.depth('AMD') == min(LIVE_HISTORY, past)
+
+        # Warming up again (e.g. after a reconnect) does not re-seed history behind live rows
+        again = warm_up(broker, SYMBOLS, selector, bars, model_path=model_path, ready_file=None)
+        assert again['stages']['features']['detail'].startswith('0 rows')
+        assert again['stages']['streams']['status'] == 'skipped' and not again['streaming']
+    print(f"✅ Warm-up took {report['total_ms']:.0f}ms; the first cycle fetched no chains or bars")
+
+
+def test_seed_replaces_covered_open_rows():
+    """Test that seeded closes replace a restored open row from the same session, and only that."""
+    print("\n📝 Testing the seed over restored rows...")
+
+    day = [session_timestamp(f"2026-10-{d:02d}") for d in (14, 15, 16)]
+    state = RollingFeatureState()
+    # As restored from a checkpoint: AAPL's session 15 and SPY's session 16 are still open
+    state.update(pd.DataFrame({'symbol': ['AAPL', 'SPY'], 'underlying_close': [199.0, 501.0],
+                               'session': [day[1], day[2]]}))
+    seed = pd.DataFrame({'symbol': ['AAPL', 'AAPL', 'SPY', 'SPY'], 'underlying_close': [198.0, 200.0, 499.0, 500.0],
+                         'session': [day[0], day[1], day[0], day[1]]})
+    assert state.seed(seed) == 4
+
+    symbols, counts, values, sessions = state.snapshot()
+    assert symbols == ['AAPL', 'SPY'] and counts.tolist() == [2, 3]
+    assert values[:, 0].tolist() == [198.0, 200.0, 499.0, 500.0, 501.0]
+    assert np.isnan(sessions[0]) and sessions[1] == day[2]
+
+    # The next AAPL row opens a session on top of the seeded close, without a stale duplicate
+    state.update(pd.DataFrame({'symbol': ['AAPL'], 'underlying_close': [202.0], 'session': [day[2]]}))
+    state.update(pd.DataFrame({'symbol': ['AAPL'], 'underlying_close': [203.0], 'session': [day[2] + 86400]}))
+    assert state.depth('AAPL') == 3 and state.snapshot()[2][:3, 0].tolist() == [198.0, 200.0, 202.0]
+    print("✅ The seeded close replaced the open row of its session; a later open session was kept")
+
+
+class _FakeIB:
+    """Stands in for ib_insync.IB; counts qualification round-trips, cannot qualify 'BAD'."""
+
+    def __init__(self):
+        self.qualify_calls = 0
+
+    def qualifyContracts(self, *contracts):
+        self.qualify_calls += 1
+        for contract in contracts:
+            contract.conId = 0 if contract.symbol == 'BAD' else hash(contract.symbol) & 0xffff or 1
+        return list(contracts)
+
+    def reqTickers(self, *contracts):
+        return [SimpleNamespace(contract=c, bid=99.0, ask=101.0, last=100.0, close=100.0,
+                                volume=1000, time=None) for c in contracts]
+
+
+def test_ibkr_qualifies_once_and_failures_are_reported():
+    """Test that qualified contracts are reused, and a failed stage marks the process not ready."""
+    print("\n📝 Testing contract qualification and failed stages...")
+
+    broker = IBKRBroker()
+    broker.ib = _FakeIB()
+    assert broker.qualify_contracts(['AAPL', 'SPY', 'BAD']) == ['AAPL', 'SPY']
+    calls = broker.ib.qualify_calls
+    batch = broker.fetch_quotes(['SPY', 'AAPL'])
+    assert sorted(batch.symbols) == ['AAPL', 'SPY'] and broker.ib.qualify_calls == calls
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ready_file = os.path.join(tmp, 'logs', 'ready.json')
+        report = warm_up(broker, ['AAPL', 'BAD'], model_path=os.path.join(tmp, 'missing.cmodel'),
+                         ready_file=ready_file)
+        statuses = {name: s['status'] for name, s in report['stages'].items()}
+        assert statuses == {'bars': 'skipped', 'contracts': 'failed', 'chains': 'skipped',
+                            'features': 'skipped', 'model': 'failed', 'streams': 'skipped'}
+        assert 'BAD' in report['stages']['contracts']['detail']
+        with open(ready_file) as f:
+            assert json.load(f)['ready'] is False
+    print("✅ Contracts qualified once per connection; failed stages leave ready=false")
+
+
+def test_start_time():
+    """Test the wait before the configured start time."""
+    print("\n📝 Testing start time...")
+
+    early = datetime(2026, 10, 19, 8, 45, 30)
+    assert seconds_until_start('09:30', early) == 44.5 * 60
+    assert seconds_until_start('09:30', early.replace(hour=10)) == 0
+    assert seconds_until_start('', early) == 0
+    print("✅ Waits until the start time, not at all once it has passed")
+
+
+def main():
+    print("🧪 Running Warm-up Tests")
+    print("=" * 60)
+
+    try:
+        test_first_cycle_is_warm()
+        test_seed_replaces_covered_open_rows()
+        test_ibkr_qualifies_once_and_failures_are_reported()
+        test_start_time()
+
+        print("\n" + "=" * 60)
+        print("✅ All tests passed!")
+        print("=" * 60)
+        return 0
+
+    except AssertionError as e:
+        print(f"\n❌ Test failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
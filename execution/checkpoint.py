@@ -0,0 +1,271 @@
+# execution/checkpoint.py
+
+"""
+Crash recovery for the trading process: periodic snapshots plus a write-ahead log.
+
+The state a restart needs lives in three places: the SignalStore (positions,
+in-flight orders, cooldowns), the OrderManager (orders not yet terminal) and
+the live RollingFeatureState (feature windows). A Checkpointer keeps it in
+STATE_DIR:
+
+- snapshot.npz: every component's state at one point, written to a temp
+  file, fsynced and renamed, so it is always either the old or the new one.
+  Feature windows are stored as a float64 array; the rest as a small JSON
+  blob inside the same file.
+- wal.log: one line per change since that snapshot (order updates, signal
+  submits, position syncs, feature rows), each carrying a sequence number and
+  a CRC32. A process killed mid-write leaves at most one torn last line,
+  which replay detects and drops.
+
+    checkpoint = Checkpointer.from_env()
+    signals = create_signal_store(broker, orders, checkpoint)  # restores, then journals
+    ...
+    checkpoint.maybe_snapshot()  # at the end of each cycle
+
+restore() loads the snapshot, replays the log through the same component
+methods that produced it, writes a fresh snapshot and then starts journaling.
+Replaying an event the snapshot already reflects is harmless for orders,
+submits and positions; feature rows are only appended by the trading thread,
+which is also the thread that takes snapshots, so none are applied twice.
+A signal's last-seen time is not logged (it only drives TTL expiry), so it
+comes back as of the last snapshot.
+
+WAL lines reach the OS with every write, which survives the process being
+killed; set STATE_WAL_FSYNC=1 to also survive a machine crash, at the cost of
+an fsync per event.
+"""
+
+import os
+import json
+import time
+import zlib
+import threading
+from typing import Any, Dict, Optional
+import numpy as np
+from models.predict import Signal, rolling_state
+from execution.order_manager import order_to_state, order_from_state
+
+STATE_CHECKPOINTS = os.getenv('STATE_CHECKPOINTS', '1') == '1'
+STATE_DIR = os.getenv('STATE_DIR', 'data/state')
+STATE_SNAPSHOT_SEC = float(os.getenv('STATE_SNAPSHOT_SEC', '60'))
+STATE_WAL_FSYNC = os.getenv('STATE_WAL_FSYNC', '0') == '1'
+
+SNAPSHOT_FILE = 'snapshot.npz'
+WAL_FILE = 'wal.log'
+_FORMAT_VERSION = 1
+
+
+def _encode(seq: int, kind: str, data: Dict[str, Any]) -> bytes:
+    payload = json.dumps([kind, data], separators=(',', ':')).encode()
+    return b'%d %08x %s\n' % (seq, zlib.crc32(payload), payload)
+
+
+def read_wal(path: str):
+    """
+    Records of a write-ahead log up to its first torn or corrupt line.
+
+    Returns:
+        Tuple of ([(seq, kind, data), ...], byte length of the valid prefix, whether a bad line was found)
+    """
+    if not os.path.exists(path):
+        return [], 0, False
+    with open(path, 'rb') as f:
+        raw = f.read()
+    records, valid = [], 0
+    for line in raw.splitlines(keepends=True):
+        try:
+            if not line.endswith(b'\n'):
+                raise ValueError("torn line")
+            seq, crc, payload = line[:-1].split(b' ', 2)
+            if int(crc, 16) != zlib.crc32(payload):
+                raise ValueError("bad checksum")
+            kind, data = json.loads(payload)
+        except ValueError:
+            return records, valid, True
+        records.append((int(seq), kind, data))
+        valid += len(line)
+    return records, valid, False
+
+
+class Checkpointer:
+    """
+    Snapshots and write-ahead log for the trading process state. Thread-safe:
+    order updates are journaled from broker threads.
+    """
+
+    def __init__(self, directory: str = STATE_DIR, snapshot_sec: float = STATE_SNAPSHOT_SEC,
+                 fsync: bool = STATE_WAL_FSYNC, rolling=None):
+        """
+        Args:
+            directory: Holds snapshot.npz and wal.log
+            snapshot_sec: Min seconds between maybe_snapshot() snapshots
+            fsync: fsync the log after every record
+            rolling: RollingFeatureState to persist (default the live one in models/predict.py)
+        """
+        self.directory = directory
+        self.snapshot_sec = snapshot_sec
+        self.fsync = fsync
+        self.rolling = rolling if rolling is not None else rolling_state()
+        self.signals = None
+        self.orders = None
+        self.stats = {'snapshots': 0, 'logged': 0, 'replayed': 0, 'torn': 0, 'restore_ms': 0.0,
+                      'snapshot_ms': 0.0}
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._fd: Optional[int] = None
+        self._snapshot_at = float('-inf')
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional['Checkpointer']:
+        """A checkpointer in STATE_DIR, or None when STATE_CHECKPOINTS=0."""
+        return cls(**kwargs) if STATE_CHECKPOINTS else None
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def wal_path(self) -> str:
+        return os.path.join(self.directory, WAL_FILE)
+
+    # -- restore --------------------------------------------------------------
+
+    def restore(self, signals=None, orders=None) -> Dict[str, Any]:
+        """
+        Load the last snapshot and replay the log into the components, then
+        snapshot and journal their changes from here on.
+
+        Args:
+            signals: SignalStore to restore and journal
+            orders: OrderManager to restore and journal; its listeners must
+                already include signals.on_order_update
+
+        Returns:
+            Dict with the snapshot's sequence number, records replayed, whether
+            a torn record was dropped, and the time taken in ms
+        """
+        start = time.perf_counter()
+        self.signals, self.orders = signals, orders
+        snapshot_seq = self._load_snapshot()
+        records, valid, torn = read_wal(self.wal_path)
+        replayed = 0
+        for seq, kind, data in records:
+            if seq <= snapshot_seq:
+                continue  # written before the snapshot that already holds it
+            self._apply(kind, data)
+            self._seq = seq
+            replayed += 1
+        self._seq = max(self._seq, snapshot_seq)
+
+        self._fd = os.open(self.wal_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.snapshot()  # also drops the replayed (and any torn) records
+        if signals is not None:
+            signals.journal = self.log
+        if orders is not None:
+            orders.add_listener(self._on_order_update)
+        self.rolling.journal = self.log
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats.update(replayed=replayed, torn=int(torn), restore_ms=elapsed)
+        if snapshot_seq or replayed:
+            open_orders = len(orders.open_orders()) if orders is not None else 0
+            print(f"♻️ Restored state (snapshot #{snapshot_seq} + {replayed} logged events"
+                  f"{', dropped a torn record' if torn else ''}) in {elapsed:.1f}ms: "
+                  f"{open_orders} open orders")
+        return {'snapshot_seq': snapshot_seq, 'replayed': replayed, 'torn': torn, 'ms': elapsed}
+
+    def _load_snapshot(self) -> int:
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with np.load(self.snapshot_path, allow_pickle=False) as snap:
+            meta = json.loads(snap['meta'].tobytes())
+            if meta['version'] != _FORMAT_VERSION:
+                raise ValueError(f"Unsupported state snapshot version {meta['version']}")
+            self.rolling.restore(snap['rolling_symbols'].tolist(), snap['rolling_counts'], snap['rolling_values'],
+                                 snap['rolling_sessions'] if 'rolling_sessions' in snap else None)
+        if self.signals is not None and meta['signals'] is not None:
+            self.signals.restore(meta['signals'])
+        if self.orders is not None:
+            self.orders.restore(meta['orders'])
+        return meta['seq']
+
+    def _apply(self, kind: str, data: Dict[str, Any]) -> None:
+        if kind == 'rows':
+            self.rolling.extend(data['rows'], data.get('sessions'))
+        elif kind == 'order':
+            if self.orders is not None:
+                for order in self.orders.restore([data]):
+                    if self.signals is not None:
+                        self.signals.on_order_update(order)
+        elif kind == 'submit':
+            if self.signals is not None:
+                order = self.orders.restore([data['order']])[0] if self.orders is not None \
+                    else order_from_state(data['order'])
+                pred = Signal(data['symbol'], data['prediction'], data['confidence'])
+                self.signals.record_submit(pred, order, now=time.monotonic() - (time.time() - data['ts']))
+        elif kind == 'positions':
+            if self.signals is not None:
+                self.signals.sync_positions({(s, r): q for s, r, q in data['positions']})
+
+    # -- journal and snapshots -------------------------------------------------
+
+    def log(self, kind: str, data: Dict[str, Any]) -> None:
+        """Append one change to the write-ahead log (a component's journal callback)."""
+        with self._lock:
+            if self._fd is None:
+                return
+            self._seq += 1
+            os.write(self._fd, _encode(self._seq, kind, data))
+            if self.fsync:
+                os.fsync(self._fd)
+            self.stats['logged'] += 1
+
+    def _on_order_update(self, order) -> None:
+        self.log('order', order_to_state(order))
+
+    def snapshot(self) -> float:
+        """
+        Write a snapshot of every component and truncate the log.
+
+        Call from the trading thread, between cycles. Returns the time taken in ms.
+        """
+        start = time.perf_counter()
+        with self._lock:
+            symbols, counts, values, sessions = self.rolling.snapshot()
+            meta = {
+                'version': _FORMAT_VERSION,
+                'seq': self._seq,
+                'saved_at': time.time(),
+                'signals': self.signals.snapshot() if self.signals is not None else None,
+                'orders': [order_to_state(o) for o in self.orders.open_orders()] if self.orders is not None else [],
+            }
+            tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.savez(f, meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+                         rolling_symbols=np.array(symbols, dtype=str), rolling_counts=counts,
+                         rolling_values=values, rolling_sessions=sessions)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            # Records up to seq are in the snapshot; a crash before this truncate
+            # leaves them in the log, and restore() skips them by sequence number
+            if self._fd is not None:
+                os.ftruncate(self._fd, 0)
+            self._snapshot_at = time.monotonic()
+            self.stats['snapshots'] += 1
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stats['snapshot_ms'] = elapsed
+        return elapsed
+
+    def maybe_snapshot(self) -> Optional[float]:
+        """Snapshot if snapshot_sec has passed since the last one; returns its time in ms, else None."""
+        if time.monotonic() - self._snapshot_at < self.snapshot_sec:
+            return None
+        return self.snapshot()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,239 @@
+# execution/event_trigger.py
+
+import os
+import time
+import threading
+import pandas as pd
+from typing import Dict, Optional, Tuple
+from models.predict import predict_from_live_data, CACHE_STATS
+from brokers.broker_factory import BrokerFactory
+from brokers.data_fetcher import build_live_option_rows, fetch_live_option_data
+from execution.scheduler import trade_on_predictions, create_signal_store, DEFAULT_SYMBOLS
+from utils.perf_ring import PerfRing
+from utils.profiler import ProfilerHook
+from utils.tick_log import TickRecorder
+from utils.bar_cache import BarCache
+from execution.order_manager import OrderManager
+from strategies.contract_selector import ContractSelector
+from execution.warmup import warm_up, wait_for_start
+from execution.checkpoint import Checkpointer
+
+PRICE_MOVE_PCT = float(os.getenv('TRIGGER_PRICE_MOVE_PCT', '0.005'))  # 0.5% move
+IV_MOVE_ABS = float(os.getenv('TRIGGER_IV_MOVE', '0.02'))             # 2 vol points
+DEBOUNCE_SEC = float(os.getenv('TRIGGER_DEBOUNCE_SEC', '0.5'))
+# Total retry backoff per order; a FAILED order gets no cooldown, so the next cycle still signalling it resends it
+ORDER_BACKOFF_BUDGET_SEC = float(os.getenv('EVENT_ORDER_BACKOFF_SEC', '0.1'))
+
+
+class QuoteTrigger:
+    """
+    Decides which symbols need re-scoring from a stream of quote updates.
+
+    A symbol is triggered when its price or IV moves past the threshold relative
+    to the values it was last scored at. Triggered symbols are held for
+    `debounce_sec` after their first trigger so that moves across many symbols
+    coalesce into one scoring batch; when released, a symbol whose move has
+    reverted in the meantime is dropped. Safe to feed from a broker's
+    streaming thread.
+    """
+
+    def __init__(self, price_move_pct: float = PRICE_MOVE_PCT, iv_move: float = IV_MOVE_ABS,
+                 debounce_sec: float = DEBOUNCE_SEC):
+        self.price_move_pct = price_move_pct
+        self.iv_move = iv_move
+        self.debounce_sec = debounce_sec
+
+        self._lock = threading.Lock()
+        self._latest: Dict[str, Tuple[float, Optional[float]]] = {}
+        self._scored: Dict[str, Tuple[float, Optional[float]]] = {}
+        # symbol -> first trigger time
+        self._pending: Dict[str, float] = {}
+
+    def on_quote(self, symbol: str, price: float, iv: Optional[float] = None,
+                 now: Optional[float] = None) -> None:
+        """Feed one quote update (matches the broker QuoteCallback signature)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            prev = self._latest.get(symbol)
+            if iv is None and prev is not None:
+                iv = prev[1]
+            self._latest[symbol] = (price, iv)
+
+            if symbol not in self._pending and self._moved(symbol, price, iv):
+                self._pending[symbol] = now
+
+    def _moved(self, symbol: str, price: float, iv: Optional[float]) -> bool:
+        ref = self._scored.get(symbol)
+        if ref is None:
+            return True
+        ref_price, ref_iv = ref
+        if ref_price and abs(price / ref_price - 1) >= self.price_move_pct:
+            return True
+        return iv is not None and ref_iv is not None and abs(iv - ref_iv) >= self.iv_move
+
+    def pop_due(self, now: Optional[float] = None) -> Tuple[Dict[str, Tuple[float, Optional[float]]], float]:
+        """
+        Remove and return the triggered symbols whose debounce window has elapsed
+        and whose move still holds.
+
+        Returns:
+            Tuple of (mapping of symbol -> latest (price, iv), earliest trigger time
+            among them on the time.monotonic() clock)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [s for s, first in self._pending.items() if now - first >= self.debounce_sec]
+            quotes, earliest = {}, now
+            for symbol in due:
+                first = self._pending.pop(symbol)
+                if self._moved(symbol, *self._latest[symbol]):
+                    quotes[symbol] = self._latest[symbol]
+                    earliest = min(earliest, first)
+            return quotes, earliest
+
+    def latest(self) -> Dict[str, Tuple[float, Optional[float]]]:
+        with self._lock:
+            return dict(self._latest)
+
+    def mark_scored(self, quotes: Dict[str, Tuple[float, Optional[float]]]) -> None:
+        """Record the values symbols were scored at; future moves are measured from here."""
+        with self._lock:
+            self._scored.update(quotes)
+
+
+def run_event_driven_trading(heartbeat_sec=300, broker_type='ibkr', symbols=None,
+                             poll_sec=0.25, trigger=None):
+    """
+    Run the trading loop driven by streaming quotes, with polling as a heartbeat.
+
+    Only symbols whose price/IV moved past the trigger thresholds are re-scored,
+    using the streamed quotes directly. Every `heartbeat_sec` a full polling cycle
+    over all symbols runs as before, which also covers brokers without streaming.
+
+    Args:
+        heartbeat_sec: Interval between full polling cycles in seconds
+        broker_type: Registered broker name ('ibkr', 'alpaca', 'sim', 'replay' or a plugin)
+        symbols: Symbols to trade (defaults to DEFAULT_SYMBOLS)
+        poll_sec: How long each event-wait slice lasts
+        trigger: QuoteTrigger instance (defaults to env-configured thresholds)
+    """
+    symbols = symbols or DEFAULT_SYMBOLS
+    trigger = trigger or QuoteTrigger()
+
+    broker = BrokerFactory.create_broker(broker_type)
+    broker.connect()
+    print(f"✅ Connected to {broker_type.upper()}. Starting event-driven auto-trading loop...")
+
+    recorder = TickRecorder.from_env()
+    on_quote = trigger.on_quote
+    if recorder is not None:
+        def on_quote(symbol, price, iv=None):
+            recorder.on_quote(symbol, price, iv)
+            trigger.on_quote(symbol, price, iv)
+
+    perf = PerfRing()
+    orders = OrderManager(broker, perf=perf, backoff_budget=ORDER_BACKOFF_BUDGET_SEC)
+    checkpoint = Checkpointer.from_env()
+    profiler = ProfilerHook.from_env()
+    if profiler is not None:
+        profiler.install()
+    signals = create_signal_store(broker, orders, checkpoint)
+    selector = ContractSelector.from_env(broker, recorder=recorder)
+    bars = BarCache.from_env(broker)
+    last_heartbeat = float('-inf')
+
+    try:
+        # Opens the quote streams before the start, along with the other warm-up stages
+        streaming = warm_up(broker, symbols, selector, bars, on_quote=on_quote, perf=perf)['streaming']
+        if not streaming:
+            print("⚠️ No quote streams; using polling heartbeat only")
+        wait_for_start(broker)
+
+        while True:
+            broker.poll_events(poll_sec if streaming else heartbeat_sec)
+            now = time.monotonic()
+
+            if now - last_heartbeat >= heartbeat_sec:
+                last_heartbeat = now
+                _run_heartbeat(broker, orders, signals, selector, symbols, trigger, perf, recorder, bars)
+            else:
+                quotes, triggered_at = trigger.pop_due(now)
+                if quotes:
+                    _run_triggered(orders, signals, selector, quotes, triggered_at, trigger, perf, recorder, bars)
+
+            if checkpoint is not None:
+                snapshot_ms = checkpoint.maybe_snapshot()
+                if snapshot_ms is not None:
+                    perf.record_many([('state_snapshot_ms', snapshot_ms)])
+    finally:
+        broker.unsubscribe_quotes()
+
+
+def _run_triggered(orders, signals, selector, quotes, triggered_at, trigger, perf, recorder=None, bars=None):
+    cycle_start = time.perf_counter()
+    cache_before = dict(CACHE_STATS)
+    samples = []
+
+    try:
+        print(f"\n⚡ Re-scoring {len(quotes)} moved symbol(s): {', '.join(quotes)}")
+        t0 = time.perf_counter()
+        df = build_live_option_rows(quotes, bars)  # previous closes from memory; the heartbeat refreshes them
+        if recorder is not None:
+            recorder.record_frame(df)
+        predictions = predict_from_live_data(df)
+        samples.append(('predict_ms', (time.perf_counter() - t0) * 1000))
+        samples.append(('symbols', len(df)))
+
+        t0 = time.perf_counter()
+        suppressed = trade_on_predictions(orders, predictions, signals, selector,
+                                          dict(zip(df['symbol'], df['underlying_close'])))
+        samples.append(('signals_suppressed', suppressed))
+        samples.append(('execute_ms', (time.perf_counter() - t0) * 1000))
+        samples.append(('reaction_ms', (time.monotonic() - triggered_at) * 1000))
+        trigger.mark_scored(quotes)
+    except Exception as e:
+        print(f"❌ Error in triggered cycle: {e}")
+
+    samples.append(('cycle_ms', (time.perf_counter() - cycle_start) * 1000))
+    samples.extend((name, CACHE_STATS[name] - cache_before[name]) for name in CACHE_STATS)
+    if orders.broker.limiter is not None:
+        samples.extend(orders.broker.limiter.perf_samples())
+    perf.record_many(samples)
+
+
+def _run_heartbeat(broker, orders, signals, selector, symbols, trigger, perf, recorder=None, bars=None):
+    cycle_start = time.perf_counter()
+    cache_before = dict(CACHE_STATS)
+    samples = []
+
+    try:
+        print("\n💓 Heartbeat: full polling cycle")
+        t0 = time.perf_counter()
+        fetch_live_option_data(broker, symbols, recorder, bars)
+        samples.append(('fetch_ms', (time.perf_counter() - t0) * 1000))
+
+        t0 = time.perf_counter()
+        df = pd.read_csv("data/live_input.csv")
+        predictions = predict_from_live_data(df)
+        samples.append(('predict_ms', (time.perf_counter() - t0) * 1000))
+        samples.append(('symbols', len(df)))
+
+        t0 = time.perf_counter()
+        suppressed = trade_on_predictions(orders, predictions, signals, selector,
+                                          dict(zip(df['symbol'], df['underlying_close'])))
+        samples.append(('signals_suppressed', suppressed))
+        samples.append(('execute_ms', (time.perf_counter() - t0) * 1000))
+
+        # Scored at the polled prices: streamed moves are measured from here on.
+        # The polled rows carry mocked IV, so keep the last streamed IV as reference.
+        streamed = trigger.latest()
+        trigger.mark_scored({row.symbol: (row.underlying_close, streamed.get(row.symbol, (None, None))[1])
+                             for row in df.itertuples(index=False)})
+    except Exception as e:
+        print(f"❌ Error in loop: {e}")
+
+    samples.append(('cycle_ms', (time.perf_counter() - cycle_start) * 1000))
+    samples.extend((name, CACHE_STATS[name] - cache_before[name]) for name in CACHE_STATS)
+    if orders.broker.limiter is not None:
+        samples.extend(orders.broker.limiter.perf_samples())
+    perf.record_many(samples)
@@ -0,0 +1,333 @@
+# execution/order_manager.py
+
+import os
+import time
+import random
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Any, Callable
+from brokers.base_broker import (
+    BaseBroker, ORDER_ACKED, ORDER_PARTIALLY_FILLED, ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED,
+)
+from brokers.contracts import OrderLeg, OptionContract
+from utils.perf_ring import PerfRing
+
+# Lifecycle states; ACKED/PARTIALLY_FILLED/FILLED/CANCELLED/REJECTED come from broker events
+ORDER_PENDING = 'PENDING'
+ORDER_SUBMITTED = 'SUBMITTED'
+ORDER_FAILED = 'FAILED'
+TERMINAL_STATES = {ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED, ORDER_FAILED}
+_ACKED_STATES = {ORDER_ACKED, ORDER_PARTIALLY_FILLED, ORDER_FILLED}
+MAX_TRACKED_ORDERS = 10_000
+
+# Allowed forward transitions; late or out-of-order events never move an order backwards
+_STATE_RANK = {
+    ORDER_PENDING: 0,
+    ORDER_SUBMITTED: 1,
+    ORDER_ACKED: 2,
+    ORDER_PARTIALLY_FILLED: 3,
+    ORDER_FILLED: 4,
+    ORDER_CANCELLED: 4,
+    ORDER_REJECTED: 4,
+    ORDER_FAILED: 4,
+}
+
+CLIENT_ORDER_PREFIX = os.getenv('CLIENT_ORDER_PREFIX', 'aiot')
+_id_counter = itertools.count(1)
+
+
+def new_client_order_id() -> str:
+    """Unique client order id (fits IBKR orderRef and Alpaca's 48-char limit)."""
+    return f"{CLIENT_ORDER_PREFIX}-{os.getpid():x}-{int(time.time() * 1000):x}-{next(_id_counter)}"
+
+
+@dataclass
+class ManagedOrder:
+    """
+    One order intent tracked through its lifecycle.
+
+    Combo orders have right 'BAG', strike 0 and their legs in `legs`.
+    Timestamps are time.perf_counter() values; latencies are derived from them.
+    """
+    client_order_id: str
+    symbol: str
+    right: str
+    strike: float
+    expiry: str
+    action: str
+    quantity: int
+    state: str = ORDER_PENDING
+    attempts: int = 0
+    filled_qty: float = 0
+    avg_fill_price: Optional[float] = None
+    error: Optional[str] = None
+    submit_ts: Optional[float] = None
+    ack_ts: Optional[float] = None
+    fill_ts: Optional[float] = None
+    trade: Any = None
+    legs: Optional[List[OrderLeg]] = None
+    limit_price: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.state not in TERMINAL_STATES
+
+    @property
+    def ack_latency_ms(self) -> Optional[float]:
+        if self.submit_ts is None or self.ack_ts is None:
+            return None
+        return (self.ack_ts - self.submit_ts) * 1000
+
+    @property
+    def fill_latency_ms(self) -> Optional[float]:
+        if self.submit_ts is None or self.fill_ts is None:
+            return None
+        return (self.fill_ts - self.submit_ts) * 1000
+
+
+# ManagedOrder fields kept in state snapshots; timestamps and the broker's trade object are process-local
+_STATE_FIELDS = ('client_order_id', 'symbol', 'right', 'strike', 'expiry', 'action', 'quantity', 'state',
+                 'attempts', 'filled_qty', 'avg_fill_price', 'error', 'limit_price')
+
+
+def order_to_state(order: ManagedOrder) -> Dict[str, Any]:
+    """JSON-serializable copy of an order's persistent fields (legs as [occ_symbol, action, ratio])."""
+    state = {name: getattr(order, name) for name in _STATE_FIELDS}
+    if order.legs:
+        state['legs'] = [[leg.contract.occ_symbol, leg.action, leg.ratio] for leg in order.legs]
+    return state
+
+
+def order_from_state(state: Dict[str, Any]) -> ManagedOrder:
+    """Rebuild an order saved with order_to_state()."""
+    order = ManagedOrder(**{name: state[name] for name in _STATE_FIELDS if name in state})
+    if state.get('legs'):
+        order.legs = [OrderLeg(OptionContract.from_occ(occ), action, ratio) for occ, action, ratio in state['legs']]
+    return order
+
+
+class OrderManager:
+    """
+    Tracks every order from submission to a terminal state.
+
+    State changes arrive through the broker's order update callback rather than
+    by polling. Each order carries a client order id; when a submit raises, the
+    broker is asked whether the order landed anyway before retrying with
+    exponential backoff, so a transient error neither drops nor duplicates it.
+    """
+
+    def __init__(self, broker: BaseBroker, max_retries: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, perf: Optional[PerfRing] = None,
+                 backoff_budget: Optional[float] = None):
+        """
+        Args:
+            broker: Connected broker used for order routing
+            max_retries: Resubmissions after the first failed attempt
+            backoff_base: First retry delay in seconds (doubled each retry, with jitter)
+            backoff_max: Upper bound on a single retry delay
+            backoff_budget: Upper bound on the total retry delay of one submit (None = no bound).
+                Retries sleep on the caller's thread; once the budget is spent the order
+                is FAILED, so an event loop is never stalled for longer than this
+            perf: Perf ring receiving 'order_submit_ms' (the submit call), 'order_ack_ms'
+                (submit to the broker's ack event; not recorded without order events)
+                and 'order_fill_ms' samples
+        """
+        self.broker = broker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.backoff_budget = backoff_budget
+        self.perf = perf
+        self.orders: Dict[str, ManagedOrder] = {}
+        self._listeners: List[Callable[[ManagedOrder], None]] = []
+        self._lock = threading.Lock()
+
+        try:
+            broker.subscribe_order_updates(self._on_order_update)
+            self.event_driven = True
+        except NotImplementedError:
+            # Without events, a successful submit is the best ack we get
+            self.event_driven = False
+
+    def add_listener(self, callback: Callable[[ManagedOrder], None]) -> None:
+        """Call `callback(order)` after every state or filled_qty change (possibly from a broker thread)."""
+        self._listeners.append(callback)
+
+    def submit(self, symbol: str, right: str, strike: float, expiry: str,
+               action: str = 'BUY', quantity: int = 1,
+               client_order_id: Optional[str] = None) -> ManagedOrder:
+        """
+        Submit an order, retrying transient failures.
+
+        Submitting an id that is already tracked and not FAILED returns the
+        existing order instead of sending a duplicate.
+
+        Returns:
+            The ManagedOrder (state SUBMITTED or later, or FAILED)
+        """
+        order, new = self._track(ManagedOrder(client_order_id or new_client_order_id(), symbol, right,
+                                              strike, expiry, action, quantity))
+        if not new:
+            return order
+        return self._send(order, lambda: self.broker.place_option_trade(
+            symbol=symbol, right=right, strike=strike, expiry=expiry,
+            action=action, quantity=quantity, client_order_id=order.client_order_id
+        ))
+
+    def submit_combo(self, symbol: str, legs: List[OrderLeg], action: str = 'BUY',
+                     quantity: int = 1, limit_price: Optional[float] = None,
+                     client_order_id: Optional[str] = None) -> ManagedOrder:
+        """
+        Submit a multi-leg order as one combo, with the same retry and
+        duplicate handling as submit().
+
+        Args:
+            symbol: Underlying symbol
+            legs: One OrderLeg per leg, all on the same underlying
+            action: 'BUY' or 'SELL' the combo
+            quantity: Number of combos
+            limit_price: Net price per combo (negative for a credit); None for market
+
+        Returns:
+            The ManagedOrder (state SUBMITTED or later, or FAILED)
+        """
+        order, new = self._track(ManagedOrder(client_order_id or new_client_order_id(), symbol, 'BAG', 0.0,
+                                              legs[0].contract.expiry if legs else '', action, quantity,
+                                              legs=list(legs), limit_price=limit_price))
+        if not new:
+            return order
+        return self._send(order, lambda: self.broker.place_combo_order(
+            symbol=symbol, legs=order.legs, action=action, quantity=quantity,
+            limit_price=limit_price, client_order_id=order.client_order_id
+        ))
+
+    def _track(self, order: ManagedOrder) -> tuple:
+        # (order to report, whether to send it): an id already tracked and not FAILED keeps its order
+        with self._lock:
+            existing = self.orders.get(order.client_order_id)
+            if existing is not None and existing.state != ORDER_FAILED:
+                return existing, False
+            self.orders.pop(order.client_order_id, None)
+            self.orders[order.client_order_id] = order
+            self._prune()
+        return order, True
+
+    def _send(self, order: ManagedOrder, place: Callable[[], Any]) -> ManagedOrder:
+        client_order_id = order.client_order_id
+        order.submit_ts = time.perf_counter()
+        budget = float('inf') if self.backoff_budget is None else self.backoff_budget
+        for attempt in range(self.max_retries + 1):
+            order.attempts = attempt + 1
+            try:
+                trade = place()
+            except Exception as e:
+                order.error = str(e)
+                # The submit may have reached the broker before the error surfaced
+                trade = self.broker.find_order(client_order_id)
+                if trade is None:
+                    if attempt == self.max_retries or budget <= 0:
+                        break
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                    delay = min(delay * random.uniform(0.5, 1.0), budget)
+                    budget -= delay
+                    print(f"⚠️ Order {client_order_id} failed ({e}); retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                print(f"ℹ️ Order {client_order_id} reached the broker despite error; not resubmitting")
+
+            order.trade = trade
+            self._record_submit(order)
+            self._transition(order, ORDER_SUBMITTED)
+            if not self.event_driven:
+                self._transition(order, ORDER_ACKED)
+            return order
+
+        print(f"❌ Order {client_order_id} failed after {order.attempts} attempts: {order.error}")
+        self._record_submit(order)
+        self._transition(order, ORDER_FAILED)
+        return order
+
+    def _record_submit(self, order: ManagedOrder) -> None:
+        if self.perf is not None:
+            self.perf.record_many([('order_submit_ms', (time.perf_counter() - order.submit_ts) * 1000)])
+
+    def _on_order_update(self, client_order_id: str, status: str, filled_qty: float,
+                         avg_fill_price: Optional[float]) -> None:
+        order = self.orders.get(client_order_id)
+        if order is None:
+            return  # not ours (placed by another process, or before a restart without checkpoints)
+        if order.state in TERMINAL_STATES or _STATE_RANK[status] < _STATE_RANK[order.state]:
+            return  # late: the order is already past this event, so its fills are stale too
+        filled = filled_qty > order.filled_qty
+        order.filled_qty = max(order.filled_qty, filled_qty)
+        if avg_fill_price is not None:
+            order.avg_fill_price = avg_fill_price
+        self._transition(order, status, filled)
+
+    def _transition(self, order: ManagedOrder, state: str, filled: bool = False) -> None:
+        # `filled`: filled_qty grew, which listeners hear about even without a state change
+        samples = []
+        with self._lock:
+            if _STATE_RANK[state] < _STATE_RANK[order.state] or order.state in TERMINAL_STATES:
+                return
+            if state == order.state and not filled:
+                return
+            now = time.perf_counter()
+            order.state = state
+            if order.ack_ts is None and state in _ACKED_STATES:
+                order.ack_ts = now
+                if self.event_driven:
+                    # Without order events the ack is just the submit call returning,
+                    # which order_submit_ms already measures
+                    samples.append(('order_ack_ms', order.ack_latency_ms))
+            if state == ORDER_FILLED:
+                order.fill_ts = now
+                samples.append(('order_fill_ms', order.fill_latency_ms))
+
+        if samples and self.perf is not None:
+            self.perf.record_many(samples)
+        for listener in self._listeners:
+            listener(order)
+        if state in TERMINAL_STATES:
+            contract = f"{len(order.legs)}-leg combo" if order.legs else f"{order.right}{order.strike}"
+            print(f"📬 Order {order.client_order_id} {order.action} {order.quantity} {order.symbol} "
+                  f"{contract} → {state}")
+
+    def _prune(self) -> None:
+        # Forget the oldest finished orders once the table grows past the cap
+        excess = len(self.orders) - MAX_TRACKED_ORDERS
+        if excess <= 0:
+            return
+        for coid in [c for c, o in self.orders.items() if not o.is_open][:excess]:
+            del self.orders[coid]
+
+    def restore(self, states: Iterable[Dict[str, Any]]) -> List[ManagedOrder]:
+        """
+        Track orders saved with order_to_state(), e.g. after a restart.
+
+        An order already tracked is updated in place, never moved backwards.
+        Nothing is sent to the broker and listeners are not called; broker
+        events for the restored orders are applied as usual from here on.
+
+        Returns:
+            The restored orders
+        """
+        restored = []
+        with self._lock:
+            for state in states:
+                saved = order_from_state(state)
+                order = self.orders.get(saved.client_order_id)
+                if order is None:
+                    order = self.orders[saved.client_order_id] = saved
+                elif _STATE_RANK[saved.state] >= _STATE_RANK[order.state]:
+                    for name in _STATE_FIELDS + ('legs',):
+                        setattr(order, name, getattr(saved, name))
+                restored.append(order)
+            self._prune()
+        return restored
+
+    def open_orders(self) -> List[ManagedOrder]:
+        """Orders that have not reached a terminal state."""
+        with self._lock:
+            return [o for o in self.orders.values() if o.is_open]
@@ -1,53 +1,241 @@
+import os
 import time
 import pandas as pd
-from models.predict import predict_from_live_data
+from models.predict import predict_from_live_data, CACHE_STATS
+from models.shadow import ShadowScorer
 from brokers.broker_factory import BrokerFactory
 from brokers.data_fetcher import fetch_live_option_data
-from utils.helpers import get_next_friday
-from strategies.greeks_optimizer import filter_trades_by_greeks
+from utils.perf_ring import PerfRing
+from utils.profiler import ProfilerHook
+from utils.tick_log import TickRecorder
+from utils.bar_cache import BarCache
+from execution.order_manager import OrderManager
+from execution.signal_store import SignalStore
+from strategies.contract_selector import ContractSelector
+from strategies.spreads import build_spreads
+from execution.warmup import warm_up, wait_for_start
+from execution.checkpoint import Checkpointer
 
 CONFIDENCE_THRESHOLD = 0.8
 TRADE_QUANTITY = 1
-EXPIRY = get_next_friday() # Static for now
-STRIKE = 180         # Static for now
+DEFAULT_SYMBOLS = ['AAPL', 'TSLA', 'MSFT', 'NVDA', 'SPY', 'QQQ']  # Add more symbols as needed
+# Trade each signal as a vertical spread in its direction instead of a single option
+TRADE_SPREADS = os.getenv('TRADE_SPREADS', '0') == '1'
+DIRECTIONAL_SPREADS = {'CALL': ('bull_call', 'bull_put'), 'PUT': ('bear_put', 'bear_call')}
+
+def submit_signal(orders, pred, selector=None, spot=None, spreads=None):
+    """
+    Place the option order for a Signal through the order manager, on the
+    contract the selector picks from the symbol's chain.
+
+    Args:
+        orders: OrderManager used for order routing
+        pred: Signal to trade
+        selector: ContractSelector (default a fresh one on the order manager's broker)
+        spot: Underlying price, for moneyness selection and brokers without chains
+        spreads: Trade a vertical spread instead (see submit_signal_spread); default TRADE_SPREADS
+
+    Returns:
+        The ManagedOrder tracking it, or None if no contract qualified
+    """
+    selector = selector or ContractSelector.from_env(orders.broker)
+    if TRADE_SPREADS if spreads is None else spreads:
+        return submit_signal_spread(orders, pred, selector)
+    contract = selector.select(pred.symbol, 'C' if pred.prediction == 'CALL' else 'P', spot)
+    if contract is None:
+        print(f"⏭️ Skipped {pred.symbol} — no {pred.prediction} contract passes the selection rules")
+        return None
+    return orders.submit(
+        symbol=pred.symbol,
+        right=contract.right,
+        strike=contract.strike,
+        expiry=contract.expiry,
+        action='BUY',
+        quantity=TRADE_QUANTITY
+    )
+
+def submit_spread(orders, spreads, i, quantity=TRADE_QUANTITY):
+    """
+    Place spread candidate `i` of a SpreadSet as one combo order, limited at
+    its mid net debit (a negative limit is a credit).
+
+    Args:
+        orders: OrderManager used for order routing
+        spreads: SpreadSet from strategies.spreads.build_spreads
+        i: Candidate index, e.g. from SpreadSet.best()
+        quantity: Number of combos
+
+    Returns:
+        The ManagedOrder tracking the combo
+    """
+    legs = spreads.order_legs(i)
+    return orders.submit_combo(
+        symbol=legs[0].contract.symbol,
+        legs=legs,
+        action='BUY',
+        quantity=quantity,
+        limit_price=round(float(spreads['mid_debit'][i]), 2)
+    )
+
+def submit_signal_spread(orders, pred, selector=None, limits=None):
+    """
+    Place a Signal as the vertical in its direction with the best reward/risk:
+    bull call or bull put spreads for CALL, bear put or bear call spreads for PUT.
+
+    Spreads are built from the selector's cached chain, kept to its DTE window
+    and pruned by the risk limits' max loss per trade.
+
+    Args:
+        orders: OrderManager used for order routing
+        pred: Signal to trade
+        selector: ContractSelector whose chain is used (default a fresh one)
+        limits: RiskLimits for prune() (default RiskLimits.from_env())
+
+    Returns:
+        The ManagedOrder tracking the combo, or None if no spread qualified
+    """
+    selector = selector or ContractSelector.from_env(orders.broker)
+    index = selector.index(pred.symbol)
+    if index is None:
+        print(f"⏭️ Skipped {pred.symbol} — no option chain to build a spread from")
+        return None
+    spreads = build_spreads(index.chain, kinds=DIRECTIONAL_SPREADS[pred.prediction])
+    ok = spreads.prune(limits=limits, quantity=TRADE_QUANTITY)
+    ok &= (spreads['dte'] >= selector.min_dte) & (spreads['dte'] <= selector.max_dte)
+    i = spreads.best(ok)
+    if i is None:
+        print(f"⏭️ Skipped {pred.symbol} — no {pred.prediction} spread passes the rules and risk limits")
+        return None
+    print(f"🧩 {pred.symbol} {pred.prediction} as {spreads.describe(i)}")
+    return submit_spread(orders, spreads, i)
+
+def create_signal_store(broker, orders, checkpoint=None):
+    """
+    Build a SignalStore seeded with the broker's option positions and fed by order updates.
+
+    With a Checkpointer, the store, the order manager's open orders and the
+    live feature windows are first restored from the last run, and changes are
+    journaled from then on. Positions are still taken from the broker.
+    """
+    signals = SignalStore()
+    orders.add_listener(signals.on_order_update)
+    if checkpoint is not None:
+        restored = checkpoint.restore(signals, orders)
+        if orders.perf is not None:
+            orders.perf.record_many([('state_restore_ms', restored['ms'])])
+    try:
+        signals.sync_positions(broker.get_option_positions())
+    except NotImplementedError as e:
+        print(f"⚠️ {e}; position-aware throttling starts from an empty book")
+    return signals
+
+def trade_on_predictions(orders, predictions, signals=None, selector=None, spots=None):
+    """
+    Submit orders for predictions above CONFIDENCE_THRESHOLD.
+
+    Args:
+        orders: OrderManager used for order routing
+        predictions: Signals from predict_from_live_data
+        signals: Optional SignalStore that suppresses repeated signals for held exposure
+        selector: ContractSelector picking each signal's contract
+        spots: Optional symbol -> underlying price
+
+    Returns:
+        Number of signals suppressed by the SignalStore
+    """
+    confident = []
+    for pred in predictions:
+        if pred.confidence >= CONFIDENCE_THRESHOLD:
+            confident.append(pred)
+        else:
+            print(f"⏭️ Skipped {pred.symbol} — confidence too low: {pred.confidence:.2f}")
+
+    suppressed = []
+    if signals is not None:
+        confident, suppressed = signals.filter(confident, quantity=TRADE_QUANTITY)
+        for pred, reason in suppressed:
+            print(f"🔁 Suppressed {pred.symbol} {pred.prediction} — {reason}")
+
+    selector = selector or ContractSelector.from_env(orders.broker)
+    spots = spots or {}
+    for pred in confident:
+        print(f"✅ Placing trade for {pred.symbol} — {pred.prediction} (conf: {pred.confidence:.2f})")
+        order = submit_signal(orders, pred, selector, spots.get(pred.symbol))
+        if signals is not None and order is not None:
+            signals.record_submit(pred, order)
+
+    return len(suppressed)
 
 def run_scheduled_trading(interval_sec=300, broker_type='ibkr'):
     """
     Run the scheduled trading loop.
-    
+
     Args:
         interval_sec: Interval between trading cycles in seconds
-        broker_type: Type of broker to use ('ibkr' or 'alpaca')
+        broker_type: Registered broker name ('ibkr', 'alpaca', 'sim', 'replay' or a plugin)
     """
     broker = BrokerFactory.create_broker(broker_type)
     broker.connect()
     print(f"✅ Connected to {broker_type.upper()}. Starting live auto-trading loop...")
 
+    perf = PerfRing()
+    orders = OrderManager(broker, perf=perf)
+    checkpoint = Checkpointer.from_env()
+    profiler = ProfilerHook.from_env()
+    if profiler is not None:
+        profiler.install()
+    signals = create_signal_store(broker, orders, checkpoint)
+    recorder = TickRecorder.from_env()
+    bars = BarCache.from_env(broker)
+    selector = ContractSelector.from_env(broker, recorder=recorder)
+    shadow = ShadowScorer.from_env(perf=perf)
+    if shadow is not None:
+        print(f"👥 Shadow models: {', '.join(shadow.models)}")
+
+    warm_up(broker, DEFAULT_SYMBOLS, selector, bars, perf=perf)
+    wait_for_start(broker)
+
     while True:
+        cycle_start = time.perf_counter()
+        cache_before = dict(CACHE_STATS)
+        samples = []
+
         try:
             print("\n⏳ Fetching live data...")
-            fetch_live_option_data(broker, ['AAPL', 'TSLA', 'MSFT', 'NVDA', 'SPY', 'QQQ'])  # Add more symbols as needed
+            t0 = time.perf_counter()
+            fetch_live_option_data(broker, DEFAULT_SYMBOLS, recorder, bars)
+            samples.append(('fetch_ms', (time.perf_counter() - t0) * 1000))
 
             print("🔍 Reading data & generating predictions...")
+            t0 = time.perf_counter()
             df = pd.read_csv("data/live_input.csv")
-            predictions = predict_from_live_data(df)
-
-            for pred in predictions:
-                if pred['confidence'] >= CONFIDENCE_THRESHOLD:
-                    print(f"✅ Placing trade for {pred['symbol']} — {pred['prediction']} (conf: {pred['confidence']:.2f})")
-                    broker.place_option_trade(
-                        symbol=pred['symbol'],
-                        right='C' if pred['prediction'] == 'CALL' else 'P',
-                        strike=STRIKE,
-                        expiry=EXPIRY,
-                        action='BUY',
-                        quantity=TRADE_QUANTITY
-                    )
-                else:
-                    print(f"⏭️ Skipped {pred['symbol']} — confidence too low: {pred['confidence']:.2f}")
+            predictions, features = predict_from_live_data(df, return_features=True)
+            samples.append(('predict_ms', (time.perf_counter() - t0) * 1000))
+            samples.append(('symbols', len(df)))
+
+            t0 = time.perf_counter()
+            spots = dict(zip(df['symbol'], df['underlying_close']))
+            suppressed = trade_on_predictions(orders, predictions, signals, selector, spots)
+            samples.append(('signals_suppressed', suppressed))
+            samples.append(('execute_ms', (time.perf_counter() - t0) * 1000))
+
+            # Shadow models score the same batch in the background, after orders are out
+            if shadow is not None:
+                shadow.submit(df, features, predictions)
 
         except Exception as e:
             print(f"❌ Error in loop: {e}")
 
+        samples.append(('cycle_ms', (time.perf_counter() - cycle_start) * 1000))
+        samples.extend((name, CACHE_STATS[name] - cache_before[name]) for name in CACHE_STATS)
+        if broker.limiter is not None:
+            samples.extend(broker.limiter.perf_samples())
+        if checkpoint is not None:
+            snapshot_ms = checkpoint.maybe_snapshot()
+            if snapshot_ms is not None:
+                samples.append(('state_snapshot_ms', snapshot_ms))
+        perf.record_many(samples)
+
         print(f"⏳ Sleeping {interval_sec} seconds...\n")
-        time.sleep(interval_sec)
+        # Keeps the broker's event loop running so order updates arrive while idle
+        broker.poll_events(interval_sec)
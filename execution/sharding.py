@@ -0,0 +1,356 @@
+# execution/sharding.py
+
+import os
+import time
+import heapq
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from typing import List, Dict, Any, Optional
+from models.predict import predict_from_live_data, warm_model, MODEL_PATH
+from brokers.broker_factory import BrokerFactory
+from brokers.data_fetcher import fetch_live_option_rows
+from portfolio.risk_engine import RiskLimits, apply_risk_limits, current_exposure
+from utils.perf_ring import PerfRing
+from utils.profiler import ProfilerHook
+from utils.bar_cache import BarCache
+from execution.scheduler import submit_signal, create_signal_store, TRADE_QUANTITY
+from execution.order_manager import OrderManager
+from execution.signal_store import SignalStore
+from strategies.contract_selector import ContractSelector
+from execution.warmup import warm_up, wait_for_start
+from execution.checkpoint import Checkpointer
+
+COST_EWMA_ALPHA = 0.3
+DEFAULT_SYMBOL_COST = 1.0  # seconds, used until a symbol has been observed
+
+
+def _default_cost(symbols: List[str], costs: Dict[str, float]) -> float:
+    """Cost assumed for a symbol not yet observed: the median observed cost among symbols."""
+    known = sorted(costs[s] for s in symbols if s in costs)
+    return known[len(known) // 2] if known else DEFAULT_SYMBOL_COST
+
+
+def partition_symbols(symbols: List[str], costs: Dict[str, float],
+                      num_shards: int) -> List[List[str]]:
+    """
+    Split symbols into shards with roughly equal total fetch cost.
+
+    Uses longest-processing-time-first greedy assignment: symbols are taken in
+    descending cost order and each goes to the currently lightest shard.
+
+    Args:
+        symbols: Symbols to partition
+        costs: Observed fetch time per symbol (see fetch_live_option_rows); missing
+            symbols use the median cost
+        num_shards: Number of shards
+
+    Returns:
+        List of `num_shards` symbol lists
+    """
+    default = _default_cost(symbols, costs)
+    shards = [[] for _ in range(num_shards)]
+    heap = [(0.0, i) for i in range(num_shards)]
+    for symbol in sorted(symbols, key=lambda s: costs.get(s, default), reverse=True):
+        load, i = heapq.heappop(heap)
+        shards[i].append(symbol)
+        heapq.heappush(heap, (load + costs.get(symbol, default), i))
+    return shards
+
+
+def _shard_load(shards: List[List[str]], costs: Dict[str, float]) -> float:
+    # Same default as partition_symbols, so a rebalance compares like with like
+    default = _default_cost([s for shard in shards for s in shard], costs)
+    return max(sum(costs.get(s, default) for s in shard) for shard in shards)
+
+
+def _worker_main(worker_id: int, broker_type: str, broker_kwargs: Dict[str, Any],
+                 model_path: str, tasks, results) -> None:
+    """
+    Shard worker: owns one broker data connection and its own model/feature caches.
+
+    Results go back on the worker's own pipe rather than a queue shared by all
+    workers: a worker killed while sending can then only break its own pipe,
+    never leave a shared lock held that blocks every other shard.
+    """
+    broker = BrokerFactory.create_broker(broker_type, **broker_kwargs)
+    broker.connect()
+    bars = BarCache.from_env(broker)  # shard workers share the disk cache
+    try:
+        warm_model(model_path)  # before the first task, so no shard's first cycle loads it
+    except Exception as e:
+        print(f"⚠️ Worker {worker_id} could not warm the model: {e}")
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            cycle, symbols = task
+            costs, spots = {}, {}
+            try:
+                df = fetch_live_option_rows(broker, symbols, costs, bars)
+                signals = predict_from_live_data(df, model_path) if not df.empty else []
+                spots = dict(zip(df['symbol'], df['underlying_close'].astype(float)))
+                error = None
+            except Exception as e:
+                signals, error = [], str(e)
+            results.send({
+                'cycle': cycle,
+                'worker_id': worker_id,
+                'client_id': broker_kwargs.get('client_id'),
+                'signals': signals,
+                'spots': spots,
+                'costs': costs,
+                'error': error,
+            })
+    finally:
+        broker.disconnect()
+
+
+class ShardCoordinator:
+    """
+    Fans a symbol universe out to N worker processes and merges their signals.
+
+    Each worker holds its own broker data connection (client ids
+    base_client_id + 1 .. base_client_id + N), while orders are routed by the
+    caller through a single execution connection.
+    """
+
+    def __init__(self, symbols: List[str], num_workers: int, broker_type: str = 'ibkr',
+                 broker_kwargs: Optional[Dict[str, Any]] = None,
+                 base_client_id: Optional[int] = None, model_path: str = MODEL_PATH,
+                 limits: Optional[RiskLimits] = None, cycle_timeout: float = 120.0,
+                 rebalance_tolerance: float = 0.2):
+        """
+        Args:
+            symbols: Full symbol universe
+            num_workers: Number of worker processes
+            broker_type: Broker type for the worker data connections
+            broker_kwargs: Extra broker parameters shared by all workers
+            base_client_id: Client id of the execution connection; workers use the next N ids
+            model_path: Model used by the workers
+            limits: Global risk limits applied to the merged signals
+            cycle_timeout: Seconds to wait for all shards before proceeding with partial results
+            rebalance_tolerance: Re-partition when the slowest shard exceeds the
+                best known partition by this fraction
+        """
+        if base_client_id is None:
+            base_client_id = int(os.getenv('IBKR_CLIENT_ID', '1'))
+
+        self.symbols = list(dict.fromkeys(symbols))
+        self.num_workers = max(1, min(num_workers, len(self.symbols)))
+        self.broker_type = broker_type
+        self.broker_kwargs = dict(broker_kwargs or {})
+        self.base_client_id = base_client_id
+        self.model_path = model_path
+        self.limits = limits or RiskLimits.from_env()
+        self.cycle_timeout = cycle_timeout
+        self.rebalance_tolerance = rebalance_tolerance
+
+        self.costs: Dict[str, float] = {}
+        self.shards = partition_symbols(self.symbols, self.costs, self.num_workers)
+        self._cycle = 0
+        self._ctx = mp.get_context('spawn')
+        self._workers = []
+        self.restarts = 0
+
+    def start(self) -> None:
+        """Spawn the worker processes."""
+        self._workers = [self._spawn(i) for i in range(self.num_workers)]
+        print(f"✅ Started {self.num_workers} shard workers for {len(self.symbols)} symbols")
+
+    def _spawn(self, i: int):
+        # (process, task queue, result pipe) for worker i
+        kwargs = dict(self.broker_kwargs, client_id=self.base_client_id + 1 + i)
+        tasks = self._ctx.Queue()
+        results, sender = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(i, self.broker_type, kwargs, self.model_path, tasks, sender),
+            name=f"shard-{i}",
+            daemon=True,
+        )
+        proc.start()
+        sender.close()  # the worker holds the only write end, so its exit reads as EOF
+        return proc, tasks, results
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask the workers to disconnect and exit."""
+        for proc, tasks, _ in self._workers:
+            if proc.is_alive():
+                tasks.put(None)
+        for proc, _, results in self._workers:
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+            results.close()
+        self._workers = []
+
+    def _update_costs(self, costs: Dict[str, float]) -> None:
+        for symbol, cost in costs.items():
+            prev = self.costs.get(symbol)
+            self.costs[symbol] = cost if prev is None else (
+                COST_EWMA_ALPHA * cost + (1 - COST_EWMA_ALPHA) * prev)
+
+    def _maybe_rebalance(self) -> None:
+        candidate = partition_symbols(self.symbols, self.costs, self.num_workers)
+        current_load = _shard_load(self.shards, self.costs)
+        best_load = _shard_load(candidate, self.costs)
+        if current_load > best_load * (1 + self.rebalance_tolerance):
+            print(f"⚖️ Rebalancing shards: slowest shard {current_load:.2f}s → {best_load:.2f}s")
+            self.shards = candidate
+
+    def collect_signals(self) -> Dict[str, Any]:
+        """
+        Run one fetch-and-predict cycle across all shards.
+
+        Returns:
+            Dict with merged 'signals', each symbol's underlying price as 'spots',
+            per-worker 'client_ids', 'errors' and the list of 'missing' worker
+            ids that did not report in time
+        """
+        if not self._workers:
+            raise RuntimeError("ShardCoordinator not started. Call start() first.")
+
+        self._cycle += 1
+        for i, shard in enumerate(self.shards):
+            proc, tasks, results = self._workers[i]
+            if not proc.is_alive():
+                # A fresh worker on the same client id takes over the shard this cycle
+                print(f"⚠️ Shard worker {proc.name} exited (code {proc.exitcode}); restarting it")
+                results.close()
+                proc, tasks, _ = self._workers[i] = self._spawn(i)
+                self.restarts += 1
+            tasks.put((self._cycle, shard))
+
+        pending = set(range(self.num_workers))
+        waiting = [results for _, _, results in self._workers]
+        signals, spots, errors, client_ids = [], {}, {}, {}
+        deadline = time.monotonic() + self.cycle_timeout
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            ready = wait(waiting, timeout=remaining)
+            if not ready:
+                break
+            for conn in ready:
+                try:
+                    result = conn.recv()
+                except EOFError:
+                    waiting.remove(conn)  # died mid-cycle: reported missing, restarted next cycle
+                    continue
+                if result['cycle'] != self._cycle:
+                    continue  # late result from a timed-out cycle
+                waiting.remove(conn)
+                pending.discard(result['worker_id'])
+                client_ids[result['worker_id']] = result['client_id']
+                signals.extend(result['signals'])
+                spots.update(result['spots'])
+                self._update_costs(result['costs'])
+                if result['error']:
+                    errors[result['worker_id']] = result['error']
+
+        if pending:
+            print(f"⚠️ Shards {sorted(pending)} did not report within {self.cycle_timeout}s")
+        self._maybe_rebalance()
+
+        return {
+            'signals': signals,
+            'spots': spots,
+            'client_ids': client_ids,
+            'errors': errors,
+            'missing': sorted(pending),
+        }
+
+    def run_cycle(self, orders: OrderManager, signals: Optional[SignalStore] = None,
+                  selector: Optional[ContractSelector] = None) -> Dict[str, Any]:
+        """
+        Collect signals from all shards, apply global risk and route the approved orders.
+
+        Args:
+            orders: OrderManager on the single execution connection
+            signals: Optional SignalStore that suppresses repeated signals for held exposure
+            selector: ContractSelector picking each signal's contract
+
+        Returns:
+            The collect_signals() result plus 'approved' signals and their ManagedOrders as 'orders'
+        """
+        result = self.collect_signals()
+        try:
+            positions = orders.broker.get_option_positions()
+        except NotImplementedError:
+            positions = {}
+        exposure = current_exposure(positions, orders.open_orders())
+        approved = apply_risk_limits(result['signals'], self.limits, TRADE_QUANTITY, exposure)
+        suppressed = []
+        if signals is not None:
+            approved, suppressed = signals.filter(approved, quantity=TRADE_QUANTITY)
+
+        submitted = []
+        selector = selector or ContractSelector.from_env(orders.broker)
+        for pred in approved:
+            print(f"✅ Placing trade for {pred.symbol} — {pred.prediction} (conf: {pred.confidence:.2f})")
+            order = submit_signal(orders, pred, selector, result['spots'].get(pred.symbol))
+            if order is None:
+                continue
+            if signals is not None:
+                signals.record_submit(pred, order)
+            submitted.append(order)
+
+        result['approved'] = approved
+        result['suppressed'] = suppressed
+        result['orders'] = submitted
+        return result
+
+
+def run_sharded_trading(symbols: List[str], num_workers: int, interval_sec: int = 300,
+                        broker_type: str = 'ibkr') -> None:
+    """
+    Run the trading loop with the symbol universe sharded across worker processes.
+
+    Args:
+        symbols: Symbol universe
+        num_workers: Number of data/prediction worker processes
+        interval_sec: Interval between trading cycles in seconds
+        broker_type: Registered broker name ('ibkr', 'alpaca', 'sim', 'replay' or a plugin)
+    """
+    coordinator = ShardCoordinator(symbols, num_workers, broker_type=broker_type)
+    broker = BrokerFactory.create_broker(broker_type, client_id=coordinator.base_client_id)
+    broker.connect()
+    print(f"✅ Connected to {broker_type.upper()} for execution. Starting sharded auto-trading loop...")
+
+    perf = PerfRing()
+    orders = OrderManager(broker, perf=perf)
+    checkpoint = Checkpointer.from_env()  # orders and signal state; feature windows live in the workers
+    profiler = ProfilerHook.from_env()
+    if profiler is not None:
+        profiler.install()
+    signals = create_signal_store(broker, orders, checkpoint)
+    selector = ContractSelector.from_env(broker)
+    coordinator.start()
+    try:
+        # Contracts and chains for the execution connection; workers warm their own models
+        warm_up(broker, coordinator.symbols, selector, model_path=coordinator.model_path, perf=perf)
+        wait_for_start(broker)
+
+        while True:
+            cycle_start = time.perf_counter()
+            try:
+                result = coordinator.run_cycle(orders, signals, selector)
+                samples = [
+                    ('symbols', len(result['signals'])),
+                    ('signals_suppressed', len(result['suppressed'])),
+                    ('cycle_ms', (time.perf_counter() - cycle_start) * 1000),
+                ]
+                snapshot_ms = checkpoint.maybe_snapshot() if checkpoint is not None else None
+                if snapshot_ms is not None:
+                    samples.append(('state_snapshot_ms', snapshot_ms))
+                perf.record_many(samples)
+            except Exception as e:
+                print(f"❌ Error in loop: {e}")
+
+            print(f"⏳ Sleeping {interval_sec} seconds...\n")
+            broker.poll_events(interval_sec)
+    finally:
+        coordinator.stop()
+        broker.disconnect()
@@ -0,0 +1,182 @@
+# execution/signal_store.py
+
+import os
+import time
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from models.predict import Signal
+from execution.order_manager import ManagedOrder, TERMINAL_STATES, order_to_state
+
+SIGNAL_COOLDOWN_SEC = float(os.getenv('SIGNAL_COOLDOWN_SEC', '900'))
+SIGNAL_TTL_SEC = float(os.getenv('SIGNAL_TTL_SEC', '3600'))
+SIGNAL_CONFIDENCE_STEP = float(os.getenv('SIGNAL_CONFIDENCE_STEP', '0.05'))
+MAX_POSITION_PER_SIGNAL = int(os.getenv('MAX_POSITION_PER_SIGNAL', '2'))
+
+_RIGHT_TO_DIRECTION = {'C': 'CALL', 'P': 'PUT'}
+
+
+# Times are time.monotonic() values, which mean nothing in another process;
+# snapshots store them as wall-clock seconds.
+def _to_wall(t: Optional[float]) -> Optional[float]:
+    return None if t is None else time.time() - (time.monotonic() - t)
+
+
+def _from_wall(t: Optional[float]) -> Optional[float]:
+    return None if t is None else time.monotonic() - (time.time() - t)
+
+
+@dataclass
+class SignalState:
+    last_seen: float
+    submitted_confidence: Optional[float] = None
+    last_submit: Optional[float] = None
+
+
+class SignalStore:
+    """
+    Remembers recent signals per (symbol, direction) and the exposure behind them.
+
+    A signal is suppressed before it reaches the broker when:
+      - an order for the same (symbol, direction) went out less than `cooldown_sec` ago
+      - exposure (filled positions plus in-flight orders) is already held and the
+        signal is unchanged, i.e. its confidence is not at least `confidence_step`
+        above the confidence that opened the exposure
+      - adding the order would exceed `max_position` contracts
+
+    A signal not seen for `ttl_sec` is forgotten, so if it comes back it counts as new.
+    A flip in direction is a different key and is never suppressed by the old one.
+
+    Set `journal` to a callable(kind, data) to receive every submit and
+    position sync, e.g. Checkpointer.log; snapshot() and restore() carry the
+    rest of the state across a restart.
+    """
+
+    def __init__(self, cooldown_sec: float = SIGNAL_COOLDOWN_SEC, ttl_sec: float = SIGNAL_TTL_SEC,
+                 confidence_step: float = SIGNAL_CONFIDENCE_STEP,
+                 max_position: int = MAX_POSITION_PER_SIGNAL):
+        self.cooldown_sec = cooldown_sec
+        self.ttl_sec = ttl_sec
+        self.confidence_step = confidence_step
+        self.max_position = max_position
+
+        self._lock = threading.Lock()
+        self._signals: Dict[Tuple[str, str], SignalState] = {}
+        self._positions: Dict[Tuple[str, str], float] = {}
+        # client_order_id -> ((symbol, direction), quantity) for orders not yet terminal
+        self._in_flight: Dict[str, Tuple[Tuple[str, str], float]] = {}
+        self.journal: Optional[Callable[[str, Dict[str, Any]], None]] = None
+
+    def sync_positions(self, positions: Dict[tuple, float]) -> None:
+        """
+        Replace filled exposure with the broker's view.
+
+        Args:
+            positions: Mapping of (symbol, right) -> contracts, as returned by
+                BaseBroker.get_option_positions()
+        """
+        with self._lock:
+            self._positions = {
+                (symbol, _RIGHT_TO_DIRECTION[right]): qty
+                for (symbol, right), qty in positions.items() if right in _RIGHT_TO_DIRECTION
+            }
+        if self.journal is not None:
+            self.journal('positions', {'positions': [[s, r, q] for (s, r), q in positions.items()]})
+
+    def exposure(self, symbol: str, direction: str) -> float:
+        key = (symbol, direction)
+        with self._lock:
+            return self._exposure(key)
+
+    def _exposure(self, key: Tuple[str, str]) -> float:
+        in_flight = sum(qty for k, qty in self._in_flight.values() if k == key)
+        return self._positions.get(key, 0) + in_flight
+
+    def filter(self, predictions: List[Signal], quantity: int = 1,
+               now: Optional[float] = None) -> Tuple[List[Signal], List[Tuple[Signal, str]]]:
+        """
+        Split predictions into those that may be sent and those suppressed.
+
+        Returns:
+            Tuple of (allowed predictions, [(prediction, reason), ...] suppressed)
+        """
+        now = time.monotonic() if now is None else now
+        allowed, suppressed = [], []
+
+        with self._lock:
+            self._expire(now)
+            for pred in predictions:
+                key = (pred.symbol, pred.prediction)
+                state = self._signals.get(key)
+                if state is None:
+                    state = self._signals[key] = SignalState(last_seen=now)
+                state.last_seen = now
+
+                exposure = self._exposure(key)
+                if state.last_submit is not None and now - state.last_submit < self.cooldown_sec:
+                    suppressed.append((pred, 'cooldown'))
+                elif exposure + quantity > self.max_position:
+                    suppressed.append((pred, 'position limit'))
+                elif exposure > 0 and (state.submitted_confidence is None or
+                                       pred.confidence < state.submitted_confidence + self.confidence_step):
+                    suppressed.append((pred, 'already held'))
+                else:
+                    allowed.append(pred)
+
+        return allowed, suppressed
+
+    def _expire(self, now: float) -> None:
+        stale = [k for k, s in self._signals.items() if now - s.last_seen > self.ttl_sec]
+        for key in stale:
+            del self._signals[key]
+
+    def record_submit(self, pred: Signal, order: ManagedOrder, now: Optional[float] = None) -> None:
+        """Mark a prediction as sent; its order counts as exposure until it terminates."""
+        now = time.monotonic() if now is None else now
+        key = (pred.symbol, pred.prediction)
+        if not order.is_open and not order.filled_qty:
+            return  # failed/rejected: nothing went out, so no cooldown either
+        with self._lock:
+            state = self._signals.setdefault(key, SignalState(last_seen=now))
+            state.last_submit = now
+            state.submitted_confidence = pred.confidence
+            self._in_flight[order.client_order_id] = (key, order.quantity)
+        if self.journal is not None:
+            self.journal('submit', {'symbol': pred.symbol, 'prediction': pred.prediction,
+                                    'confidence': pred.confidence, 'ts': _to_wall(now),
+                                    'order': order_to_state(order)})
+        # The order may have finished (synchronous fills, or a broker thread) before it
+        # was registered, in which case the listener already skipped it
+        if not order.is_open:
+            self.on_order_update(order)
+
+    def on_order_update(self, order: ManagedOrder) -> None:
+        """OrderManager listener: move finished orders from in-flight to filled exposure."""
+        if order.state not in TERMINAL_STATES:
+            return
+        with self._lock:
+            entry = self._in_flight.pop(order.client_order_id, None)
+            if entry is None:
+                return
+            key, _ = entry
+            if order.filled_qty:
+                signed = order.filled_qty if order.action == 'BUY' else -order.filled_qty
+                self._positions[key] = self._positions.get(key, 0) + signed
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the store, with times as wall-clock seconds."""
+        with self._lock:
+            return {
+                'signals': [[s, d, _to_wall(st.last_seen), st.submitted_confidence, _to_wall(st.last_submit)]
+                            for (s, d), st in self._signals.items()],
+                'positions': [[s, d, qty] for (s, d), qty in self._positions.items()],
+                'in_flight': [[coid, s, d, qty] for coid, ((s, d), qty) in self._in_flight.items()],
+            }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Replace the store's contents with a snapshot(); cooldowns keep running across the gap."""
+        with self._lock:
+            self._signals = {(s, d): SignalState(_from_wall(seen), confidence, _from_wall(submit))
+                             for s, d, seen, confidence, submit in state['signals']}
+            self._positions = {(s, d): qty for s, d, qty in state['positions']}
+            self._in_flight = {coid: ((s, d), qty) for coid, s, d, qty in state['in_flight']}
@@ -0,0 +1,186 @@
+# execution/warmup.py
+
+"""
+Pre-market warm-up.
+
+Runs once after the broker connects and before the first trading cycle, so
+that cycle runs at steady-state latency instead of paying every cold-start
+cost at once:
+
+  1. bars       daily bars brought up to date (utils/bar_cache.py)
+  2. contracts  underlyings qualified with the broker and cached
+  3. chains     each symbol's option chain fetched and indexed by the selector
+  4. features   the live rolling-feature state seeded with past closes
+  5. model      the model loaded and scored once
+  6. streams    streaming quote subscriptions opened (event-driven mode)
+
+Each stage is timed. A stage the broker does not support is skipped; one that
+fails is reported, not raised, and the first cycle does that work as it did
+before. The result is printed, recorded as `warmup_ms` in the perf ring and
+written to WARMUP_READY_FILE, which a supervisor can poll for readiness.
+
+With TRADING_START_TIME set (HH:MM, local time), the process can be started
+early: it warms up, then waits for the start time before the first cycle.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+from models.predict import MODEL_PATH, warm_model, seed_rolling_state
+from brokers.data_fetcher import build_live_option_rows
+from utils.helpers import session_timestamp
+from utils.rolling_features import LIVE_HISTORY
+
+WARMUP_READY_FILE = os.getenv('WARMUP_READY_FILE', 'logs/ready.json')
+TRADING_START_TIME = os.getenv('TRADING_START_TIME', '')
+
+STAGES = ('bars', 'contracts', 'chains', 'features', 'model', 'streams')
+
+
+def _run_stage(report: Dict[str, Any], name: str, fn: Callable[[], str]) -> None:
+    t0 = time.perf_counter()
+    try:
+        detail = fn()
+        status = 'ok'
+    except NotImplementedError as e:
+        detail, status = str(e), 'skipped'
+    except Exception as e:
+        detail, status = str(e), 'failed'
+    elapsed = (time.perf_counter() - t0) * 1000
+    report['stages'][name] = {'status': status, 'ms': round(elapsed, 1), 'detail': detail}
+    icon = {'ok': '✅', 'skipped': '⏭️', 'failed': '❌'}[status]
+    print(f"  {icon} {name:<10} {elapsed:8.1f}ms  {detail}")
+
+
+def _history_frame(bars, symbols: List[str]) -> pd.DataFrame:
+    """Closes of each symbol's last LIVE_HISTORY sessions before today, as RollingFeatureState seed rows."""
+    today = session_timestamp(datetime.now())
+    frames = []
+    for symbol in symbols:
+        b = bars.bars(symbol, refresh=False)
+        b = b[b['timestamp'] < today][-LIVE_HISTORY:]
+        frames.append(pd.DataFrame({'symbol': symbol, 'underlying_close': b['close'], 'session': b['timestamp']}))
+    if not frames:
+        return pd.DataFrame(columns=['symbol', 'underlying_close', 'session'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_ready_file(path: str, report: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)  # a poller never reads a partial file
+
+
+def warm_up(broker, symbols: List[str], selector=None, bars=None, on_quote=None,
+            model_path: str = MODEL_PATH, perf=None, ready_file: Optional[str] = WARMUP_READY_FILE) -> Dict[str, Any]:
+    """
+    Run every warm-up stage for the day's symbols and report readiness.
+
+    Args:
+        broker: Connected broker
+        symbols: Symbols the trading loop will score
+        selector: ContractSelector whose chains to prefetch (None skips the chains stage)
+        bars: BarCache to bring up to date and seed features from (None skips both)
+        on_quote: Quote callback to subscribe with (None skips the streams stage)
+        model_path: Model the loop will score with
+        perf: Optional PerfRing that receives warmup_ms
+        ready_file: Where the report is written as JSON (None = not written)
+
+    Returns:
+        Dict with 'ready' (no stage failed), 'streaming' (quote streams are open),
+        'total_ms', 'finished_at' and per-stage 'stages' {status, ms, detail}
+    """
+    if ready_file and os.path.exists(ready_file):
+        os.remove(ready_file)  # a stale file from an earlier run must not signal readiness
+    report: Dict[str, Any] = {'symbols': len(symbols), 'stages': {}}
+    state = {'tradable': list(symbols), 'streaming': False}
+    print(f"🔥 Warming up for {len(symbols)} symbol(s)...")
+    start = time.perf_counter()
+
+    def load_bars():
+        if bars is None:
+            raise NotImplementedError("no bar cache")
+        bars.prefetch(symbols)
+        return f"{sum(len(bars.bars(s, refresh=False)) for s in symbols)} bars cached"
+
+    def qualify():
+        state['tradable'] = broker.qualify_contracts(symbols)
+        missing = sorted(set(symbols) - set(state['tradable']))
+        if missing:
+            raise ValueError(f"could not qualify {', '.join(missing)}")
+        return f"{len(state['tradable'])} contracts"
+
+    def index_chains():
+        if selector is None:
+            raise NotImplementedError("no contract selector")
+        indexed = [s for s in state['tradable'] if selector.index(s) is not None]
+        if not selector.chains_supported:
+            raise NotImplementedError(f"{type(broker).__name__} does not provide option chains")
+        return f"{len(indexed)} chains indexed"
+
+    def seed_features():
+        if bars is None:
+            raise NotImplementedError("no bar cache")
+        return f"{seed_rolling_state(_history_frame(bars, symbols))} rows of history"
+
+    def load_model():
+        rows = None
+        if bars is not None:
+            closes = {s: bars.bars(s, refresh=False)['close'] for s in symbols}
+            quotes = {s: (float(c[-1]), None) for s, c in closes.items() if len(c)}
+            rows = build_live_option_rows(quotes, bars) if quotes else None
+        model = warm_model(model_path, rows)
+        return f"{type(model).__name__} scored {1 if rows is None else len(rows)} row(s)"
+
+    def subscribe():
+        if on_quote is None:
+            raise NotImplementedError("no quote callback")
+        broker.subscribe_quotes(state['tradable'], on_quote)
+        state['streaming'] = True
+        return f"{len(state['tradable'])} streams"
+
+    for name, fn in zip(STAGES, (load_bars, qualify, index_chains, seed_features, load_model, subscribe)):
+        _run_stage(report, name, fn)
+
+    total = (time.perf_counter() - start) * 1000
+    report.update({
+        'ready': all(s['status'] != 'failed' for s in report['stages'].values()),
+        'streaming': state['streaming'],
+        'total_ms': round(total, 1),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+    })
+    if perf is not None:
+        perf.record_many([('warmup_ms', total)])
+    if ready_file:
+        _write_ready_file(ready_file, report)
+    status = "✅ Ready" if report['ready'] else "⚠️ Ready with failed stages"
+    print(f"{status} after {total:.0f}ms warm-up")
+    return report
+
+
+def seconds_until_start(start_time: str = TRADING_START_TIME, now: Optional[datetime] = None) -> float:
+    """
+    Seconds from now until today's start_time ('HH:MM', local); 0 if unset or already past.
+    """
+    if not start_time:
+        return 0.0
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in start_time.split(':'))
+    start = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return max(0.0, (start - now).total_seconds())
+
+
+def wait_for_start(broker, start_time: str = TRADING_START_TIME) -> None:
+    """
+    Wait until TRADING_START_TIME, letting the broker deliver events (order
+    updates, streamed quotes) meanwhile.
+    """
+    wait = seconds_until_start(start_time)
+    if wait > 0:
+        print(f"⏰ Waiting {wait / 60:.0f} min for the {start_time} start")
+        broker.poll_events(wait)
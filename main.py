@@ -2,20 +2,43 @@
 
 import os
 import sys
-from execution.scheduler import run_scheduled_trading
+from brokers.broker_factory import available_brokers
+from execution.scheduler import run_scheduled_trading, DEFAULT_SYMBOLS
 
 if __name__ == "__main__":
     # Get broker type from environment variable or command line argument
     broker_type = os.getenv('BROKER_TYPE', 'ibkr').lower()
-    
+
     # Allow command line override: python main.py alpaca
     if len(sys.argv) > 1:
         broker_type = sys.argv[1].lower()
-    
-    if broker_type not in ['ibkr', 'alpaca']:
+
+    # Built-ins, register_broker() plugins and entry points, e.g. 'replay'
+    brokers = available_brokers()
+    if broker_type not in brokers:
         print(f"❌ Unsupported broker: {broker_type}")
-        print("Supported brokers: ibkr, alpaca")
+        print(f"Supported brokers: {', '.join(brokers)}")
         sys.exit(1)
-    
+
+    # Sharded mode: TRADING_WORKERS=8 TRADING_SYMBOLS_FILE=universe.txt python main.py
+    num_workers = int(os.getenv('TRADING_WORKERS', '1'))
+    # Event-driven mode: TRADING_MODE=event python main.py (polling stays as a heartbeat)
+    trading_mode = os.getenv('TRADING_MODE', 'poll').lower()
+
     print(f"🚀 Starting AI Option Trader with {broker_type.upper()} broker...")
-    run_scheduled_trading(interval_sec=300, broker_type=broker_type)  # Every 5 minutes
+    if num_workers > 1:
+        from execution.sharding import run_sharded_trading
+
+        symbols_file = os.getenv('TRADING_SYMBOLS_FILE')
+        if symbols_file:
+            with open(symbols_file) as f:
+                symbols = [line.strip().upper() for line in f if line.strip()]
+        else:
+            symbols = DEFAULT_SYMBOLS
+        run_sharded_trading(symbols, num_workers, interval_sec=300, broker_type=broker_type)
+    elif trading_mode == 'event':
+        from execution.event_trigger import run_event_driven_trading
+
+        run_event_driven_trading(heartbeat_sec=300, broker_type=broker_type)
+    else:
+        run_scheduled_trading(interval_sec=300, broker_type=broker_type)  # Every 5 minutes
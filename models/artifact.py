@@ -0,0 +1,470 @@
+# models/artifact.py
+
+"""
+Compact model artifacts.
+
+A single file holds a JSON manifest and the model's arrays, each 64-byte
+aligned so the file can be memory-mapped and used without copying:
+
+    b'CMODEL01' | uint64 manifest length | manifest JSON | arrays
+
+The manifest records the model kind, feature list (with feature code
+versions), classes, model version and training data hash, and where each array lives.
+
+Trees (random forest / extra trees, and binary HistGradientBoosting) are
+stored as concatenated per-node arrays in the narrowest dtype that fits:
+
+    feature   int8/int16   split feature, -1 for a leaf
+    right     uint16/32    right child, local to its tree
+    left      uint16/32    only stored when not the next node (forests use depth-first order)
+    value     float32/64   split threshold, or the leaf output for a leaf
+    nan_left  packed bits  where missing values go
+
+That is about 7 bytes per forest node against ~80 in a pickle. Forest
+thresholds are rounded down to float32, which is exact because sklearn
+compares float32 inputs. Logistic regression (optionally behind a
+StandardScaler) is stored as its coefficients. Loading never unpickles.
+
+Usage:
+    python -m models.artifact models/model.pkl            # convert, compare size and load time
+    python -m models.artifact --inspect models/model.cmodel
+"""
+
+import os
+import sys
+import json
+import time
+import struct
+import argparse
+from datetime import datetime, timezone
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+ARTIFACT_SUFFIX = '.cmodel'
+FORMAT_VERSION = 1
+_MAGIC = b'CMODEL01'
+_ALIGN = 64
+# Tree traversal block size (rows) and steps between dropping finished (row, tree) pairs
+_ROW_BLOCK = 4096
+_LEAF_CHECK_STEPS = 6
+# Batches at least this large walk the trees with sklearn's compiled traversal (see _compiled)
+_COMPILED_ROWS = 2048
+
+
+def _smallest_int(max_value: int, signed: bool):
+    for dtype in ((np.int8, np.int16, np.int32) if signed else (np.uint16, np.uint32)):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _floor_float32(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each value, so `x32 <= t` and `x32 <= floor32(t)` always agree."""
+    rounded = values.astype(np.float32)
+    over = rounded.astype(np.float64) > values
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def _pack_trees(trees, value_dtype):
+    """
+    trees: list of (feature, left, right, value, nan_left) arrays per tree, local indices, feature -1 at leaves.
+    """
+    sizes = np.array([len(t[0]) for t in trees], dtype=np.int64)
+    feature = np.concatenate([t[0] for t in trees])
+    left = np.concatenate([t[1] for t in trees])
+    right = np.concatenate([t[2] for t in trees])
+    value = np.concatenate([t[3] for t in trees])
+    nan_left = np.concatenate([t[4] for t in trees]).astype(bool)
+
+    internal = feature >= 0
+    local = np.concatenate([np.arange(n) for n in sizes])
+    index_dtype = _smallest_int(int(sizes.max()), signed=False)
+    arrays = {
+        'tree_offsets': np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+        'feature': feature.astype(_smallest_int(int(feature.max(initial=0)), signed=True)),
+        'right': np.where(internal, right, 0).astype(index_dtype),
+        'value': value.astype(value_dtype) if value.dtype != value_dtype else value,
+        'nan_left': np.packbits(nan_left & internal),
+    }
+    implicit_left = bool((left[internal] == local[internal] + 1).all())
+    if not implicit_left:
+        arrays['left'] = np.where(internal, left, 0).astype(index_dtype)
+    return arrays, implicit_left
+
+
+def _export_forest(model):
+    if len(model.classes_) != 2 or model.n_outputs_ != 1:
+        raise TypeError("Compact forests support single-output binary classifiers only")
+    trees = []
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        internal = tree.children_left >= 0
+        proba = tree.value[:, 0, :] / tree.value[:, 0, :].sum(axis=1, keepdims=True)
+        value = np.where(internal, 0.0, proba[:, 1]).astype(np.float32)
+        value[internal] = _floor_float32(tree.threshold[internal])
+        missing = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+        trees.append((np.where(internal, tree.feature, -1), tree.children_left,
+                      tree.children_right, value, missing))
+    arrays, implicit_left = _pack_trees(trees, np.float32)
+    return 'forest', arrays, {'implicit_left': implicit_left, 'input_dtype': 'float32'}
+
+
+def _export_hist_gb(model):
+    if len(model.classes_) != 2:
+        raise TypeError("Compact gradient boosting supports binary classifiers only")
+    trees = []
+    for (predictor,) in model._predictors:
+        nodes = predictor.nodes
+        if nodes['is_categorical'].any():
+            raise TypeError("Categorical splits are not supported")
+        leaf = nodes['is_leaf'].astype(bool)
+        trees.append((np.where(leaf, -1, nodes['feature_idx'].astype(np.int64)), nodes['left'],
+                      nodes['right'], np.where(leaf, nodes['value'], nodes['num_threshold']),
+                      nodes['missing_go_to_left']))
+    arrays, implicit_left = _pack_trees(trees, np.float64)
+    baseline = float(np.asarray(model._baseline_prediction).ravel()[0])
+    return 'hist_gb', arrays, {'implicit_left': implicit_left, 'input_dtype': 'float64', 'baseline': baseline}
+
+
+def _export_linear(model):
+    from sklearn.pipeline import Pipeline
+    scaler = None
+    if isinstance(model, Pipeline):
+        *steps, (_, model) = model.steps
+        if len(steps) > 1 or (steps and type(steps[0][1]).__name__ != 'StandardScaler'):
+            raise TypeError("Only StandardScaler -> LogisticRegression pipelines are supported")
+        scaler = steps[0][1] if steps else None
+    n = model.coef_.shape[1]
+    arrays = {
+        'mean': np.asarray(scaler.mean_ if scaler is not None and scaler.mean_ is not None else np.zeros(n)),
+        'scale': np.asarray(scaler.scale_ if scaler is not None and scaler.scale_ is not None else np.ones(n)),
+        'coef': model.coef_.astype(np.float64),
+        'intercept': model.intercept_.astype(np.float64),
+    }
+    return 'linear', arrays, {}
+
+
+def _exporter(model):
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+        return _export_forest
+    if isinstance(model, HistGradientBoostingClassifier):
+        return _export_hist_gb
+    if isinstance(model, LogisticRegression) or (
+            isinstance(model, Pipeline) and isinstance(model.steps[-1][1], LogisticRegression)):
+        return _export_linear
+    raise TypeError(f"No compact format for {type(model).__name__}")
+
+
+def export_model(model, path: str, metadata: Optional[dict] = None) -> dict:
+    """
+    Write a fitted sklearn model as a compact artifact.
+
+    Args:
+        model: RandomForest/ExtraTrees, binary HistGradientBoosting, or
+            (StandardScaler ->) LogisticRegression, fitted on a DataFrame
+        path: Output file (conventionally ending in .cmodel)
+        metadata: Extra manifest fields, e.g. model_version, data_hash
+
+    Returns:
+        The manifest
+
+    Raises:
+        TypeError: If the model type has no compact format
+    """
+    from utils.feature_store import feature_version
+    from utils.feature_engineering import FEATURES
+
+    kind, arrays, params = _exporter(model)(model)
+    features = [str(f) for f in getattr(model, 'feature_names_in_', [])]
+    if not features:
+        raise TypeError("Model was not fitted with named features")
+
+    manifest = {
+        'format': 'compact-model',
+        'format_version': FORMAT_VERSION,
+        'kind': kind,
+        'features': features,
+        'feature_versions': {f: feature_version(f) for f in features if f in FEATURES},
+        'classes': np.asarray(model.classes_).tolist(),
+        'params': params,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        **(metadata or {}),
+        'arrays': {},
+    }
+
+    # Array offsets are relative to the aligned end of the manifest
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    offset = 0
+    for name, a in arrays.items():
+        manifest['arrays'][name] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset}
+        offset += -(-a.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps(manifest, separators=(',', ':')).encode()
+    data_start = _data_start(len(header))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_MAGIC + struct.pack('<Q', len(header)) + header)
+        f.write(b'\0' * (data_start - f.tell()))
+        for name, a in arrays.items():
+            f.seek(data_start + manifest['arrays'][name]['offset'])
+            f.write(a.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+    return manifest
+
+
+def _data_start(header_length: int) -> int:
+    return -(-(len(_MAGIC) + 8 + header_length) // _ALIGN) * _ALIGN
+
+
+def _read_header(path: str):
+    with open(path, 'rb') as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a compact model artifact")
+        (length,) = struct.unpack('<Q', f.read(8))
+        return json.loads(f.read(length)), _data_start(length)
+
+
+def read_manifest(path: str) -> dict:
+    """Read only the manifest of an artifact."""
+    return _read_header(path)[0]
+
+
+def check_features(manifest: dict) -> None:
+    """
+    Check the manifest's features against the current feature code.
+
+    Raises:
+        ValueError: If prepare_features cannot produce one of the features
+    """
+    from utils.feature_store import feature_version
+    from utils.feature_engineering import FEATURES
+
+    unknown = [f for f in manifest['features'] if f not in FEATURES]
+    if unknown:
+        raise ValueError(f"Model expects features that prepare_features does not provide: {', '.join(unknown)}")
+    changed = [f for f, v in manifest.get('feature_versions', {}).items() if feature_version(f) != v]
+    if changed:
+        print(f"⚠️  Features changed since the model was trained: {', '.join(changed)}")
+
+
+class CompactModel:
+    """
+    Predict-only model backed by a memory-mapped artifact. Exposes the
+    sklearn attributes the prediction code uses: classes_,
+    feature_names_in_, predict and predict_proba.
+    """
+
+    def __init__(self, path: str, manifest: dict, buffer: np.ndarray, data_start: int):
+        self.path = path
+        self.manifest = manifest
+        self.kind = manifest['kind']
+        self.classes_ = np.asarray(manifest['classes'])
+        self.feature_names_in_ = np.asarray(manifest['features'], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self._params = manifest['params']
+        self._tables = None
+        self._trees = None
+
+        # Zero-copy views into the mapped file
+        self._arrays = {}
+        for name, spec in manifest['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            count = int(np.prod(spec['shape'], dtype=np.int64))
+            start = data_start + spec['offset']
+            self._arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        dtype = np.float32 if self._params.get('input_dtype') == 'float32' else np.float64
+        return np.asarray(X, dtype=dtype)
+
+    def _traversal(self):
+        """
+        Node tables for _leaves, built once per model: global child indices
+        (child[2 * node + go_left]), split features and thresholds, with every
+        leaf its own child behind a +inf threshold so rows stop there.
+        """
+        if self._tables is None:
+            a = self._arrays
+            offsets = a['tree_offsets'].astype(np.intp)
+            feature = a['feature'].astype(np.intp)
+            n = len(feature)
+            leaf = feature < 0
+            base = np.repeat(offsets[:-1], np.diff(offsets))
+            nodes = np.arange(n, dtype=np.intp)
+            left = nodes + 1 if a.get('left') is None else base + a['left']
+            child = np.empty(2 * n, dtype=np.intp)
+            child[0::2] = np.where(leaf, nodes, base + a['right'])
+            child[1::2] = np.where(leaf, nodes, left)
+            threshold = a['value'].astype(np.float32 if self._params.get('input_dtype') == 'float32'
+                                          else np.float64)
+            threshold[leaf] = np.inf
+            nan_left = np.unpackbits(a['nan_left'], count=n).astype(bool)
+            self._tables = (offsets, np.where(leaf, 0, feature), child, threshold, leaf, nan_left)
+        return self._tables
+
+    def _compiled(self):
+        """
+        The trees as sklearn Tree objects, built once per model from the node
+        arrays (nothing is unpickled), or None if this sklearn cannot route
+        missing values. Each threshold is replaced by its rank among its
+        feature's split thresholds, and inputs by the number of those below
+        them, so `x <= t` keeps its answer in the float32 that sklearn's
+        traversal compares in, for either input dtype.
+
+        Returns:
+            (per-feature sorted thresholds, [(first node, Tree), ...]) or None
+        """
+        if self._trees is None:
+            from sklearn.tree._tree import Tree, NODE_DTYPE
+            if 'missing_go_to_left' not in NODE_DTYPE.names:
+                self._trees = False
+                return None
+            a = self._arrays
+            offsets = a['tree_offsets'].astype(np.intp)
+            feature = a['feature'].astype(np.intp)
+            internal = feature >= 0
+            n = len(feature)
+            cuts, rank = [], np.full(n, -2.0)
+            for f in range(self.n_features_in_):
+                on = internal & (feature == f)
+                cuts.append(np.unique(a['value'][on]))
+                rank[on] = np.searchsorted(cuts[f], a['value'][on])
+
+            local = np.arange(n) - np.repeat(offsets[:-1], np.diff(offsets))
+            nodes = np.zeros(n, dtype=NODE_DTYPE)
+            nodes['left_child'] = np.where(internal, local + 1 if a.get('left') is None else a['left'], -1)
+            nodes['right_child'] = np.where(internal, a['right'], -1)
+            nodes['feature'] = np.where(internal, feature, -2)
+            nodes['threshold'] = rank
+            nodes['missing_go_to_left'] = np.unpackbits(a['nan_left'], count=n)
+            trees = []
+            for lo, hi in zip(offsets[:-1], offsets[1:]):
+                tree = Tree(self.n_features_in_, np.array([1], dtype=np.intp), 1)
+                tree.__setstate__({'max_depth': 0, 'node_count': int(hi - lo), 'nodes': nodes[lo:hi],
+                                   'values': np.zeros((hi - lo, 1, 1))})
+                trees.append((lo, tree))
+            self._trees = (cuts, trees)
+        return self._trees or None
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node (global index) reached by every row in every tree: shape (rows, trees)."""
+        compiled = self._compiled() if len(X) >= _COMPILED_ROWS else None
+        if compiled is not None:
+            cuts, trees = compiled
+            ranks = np.empty(X.shape, dtype=np.float32)
+            for f, c in enumerate(cuts):
+                ranks[:, f] = np.where(np.isnan(X[:, f]), np.nan, np.searchsorted(c, X[:, f]))
+            out = np.empty((len(X), len(trees)), dtype=np.intp)
+            for j, (lo, tree) in enumerate(trees):
+                out[:, j] = tree.apply(ranks) + lo
+            return out
+
+        offsets, feature, child, threshold, leaf, nan_left = self._traversal()
+        trees = len(offsets) - 1
+        rows, columns = X.shape
+        check_nan = bool(np.isnan(X).any())
+        out = np.empty((rows, trees), dtype=np.intp)
+
+        # Every (row, tree) pair descends one level per step, as flat 1-D arrays.
+        # Blocks of rows keep the temporaries in cache; pairs that reached a
+        # leaf stay put (leaves are their own children), so finished pairs are
+        # only dropped every _LEAF_CHECK_STEPS steps.
+        for start in range(0, rows, _ROW_BLOCK):
+            flat = X[start:start + _ROW_BLOCK].ravel()
+            k = len(flat) // columns
+            node = np.tile(offsets[:-1], k)
+            pairs = np.arange(k * trees)
+            at = node.copy()
+            row_base = np.repeat(np.arange(k, dtype=np.intp) * columns, trees)
+            while len(pairs):
+                for _ in range(_LEAF_CHECK_STEPS):
+                    x = flat[row_base + feature[at]]
+                    go_left = x <= threshold[at]
+                    if check_nan:
+                        go_left |= np.isnan(x) & nan_left[at]
+                    at = child[2 * at + go_left]
+                node[pairs] = at
+                active = ~leaf[at]
+                pairs, at, row_base = pairs[active], at[active], row_base[active]
+            out[start:start + k] = node.reshape(k, trees)
+        return out
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = self._matrix(X)
+        if self.kind == 'forest':
+            p = self._arrays['value'][self._leaves(X)].astype(np.float64).mean(axis=1)
+        elif self.kind == 'hist_gb':
+            raw = self._params['baseline'] + self._arrays['value'][self._leaves(X)].sum(axis=1)
+            p = 1.0 / (1.0 + np.exp(-raw))
+        else:
+            a = self._arrays
+            z = ((X - a['mean']) / a['scale']) @ a['coef'].T + a['intercept']
+            if z.shape[1] == 1:
+                p = 1.0 / (1.0 + np.exp(-z[:, 0]))
+            else:
+                e = np.exp(z - z.max(axis=1, keepdims=True))
+                return e / e.sum(axis=1, keepdims=True)
+        return np.column_stack((1.0 - p, p))
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def load_artifact(path: str, check: bool = True) -> CompactModel:
+    """
+    Map an artifact and return a CompactModel.
+
+    Args:
+        check: Verify the feature list against prepare_features (check_features)
+    """
+    manifest, data_start = _read_header(path)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+    if check:
+        check_features(manifest)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    return CompactModel(path, manifest, buffer, data_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a pickled model to a compact artifact")
+    parser.add_argument('path', help="model pickle to convert, or artifact with --inspect")
+    parser.add_argument('-o', '--output', help="artifact path (default: same name with .cmodel)")
+    parser.add_argument('--inspect', action='store_true', help="print an artifact's manifest")
+    args = parser.parse_args()
+
+    if args.inspect:
+        manifest = read_manifest(args.path)
+        manifest['arrays'] = {k: f"{v['dtype']}{v['shape']}" for k, v in manifest['arrays'].items()}
+        print(json.dumps(manifest, indent=2))
+        return 0
+
+    import joblib
+    output = args.output or os.path.splitext(args.path)[0] + ARTIFACT_SUFFIX
+    start = time.perf_counter()
+    model = joblib.load(args.path)
+    pickle_load = time.perf_counter() - start
+    export_model(model, output)
+
+    start = time.perf_counter()
+    load_artifact(output)
+    artifact_load = time.perf_counter() - start
+    pickle_size, artifact_size = os.path.getsize(args.path), os.path.getsize(output)
+    print(f"✅ Wrote {output}")
+    print(f"   size: {pickle_size / 1e6:.2f} MB -> {artifact_size / 1e6:.2f} MB "
+          f"({pickle_size / artifact_size:.1f}x smaller)")
+    print(f"   load: {pickle_load * 1000:.1f} ms -> {artifact_load * 1000:.2f} ms "
+          f"({pickle_load / artifact_load:.0f}x faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
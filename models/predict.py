@@ -1,26 +1,193 @@
 # models/predict.py
 
+import os
+import sys
+import numpy as np
 import pandas as pd
 import joblib
-from utils.feature_engineering import prepare_features
+from collections import OrderedDict
+from utils.feature_engineering import prepare_features, FEATURE_COLUMNS
+from models.artifact import ARTIFACT_SUFFIX, load_artifact
+from utils.rolling_features import RollingFeatureState, ROLLING_FEATURE_COLUMNS
 
-MODEL_PATH = 'models/model.pkl'
+MODEL_PATH = 'models/model' + ARTIFACT_SUFFIX
+# Used when no compact artifact has been promoted yet (see legacy_model_path)
+LEGACY_MODEL_PATH = 'models/model.pkl'
+PREDICTION_CACHE_SIZE = 10_000
 
-def load_model():
-    return joblib.load(MODEL_PATH)
+# Running hit/miss counters, read by the scheduler's perf recorder
+CACHE_STATS = {
+    'model_cache_hit': 0,
+    'model_cache_miss': 0,
+    'pred_cache_hit': 0,
+    'pred_cache_miss': 0,
+}
 
-def predict_from_live_data(live_df):
-    model = load_model()
-    X = prepare_features(live_df)
-    probs = model.predict_proba(X)
-    predictions = model.predict(X)
+_model_cache = {}
+_prediction_cache = OrderedDict()
+# Per-symbol daily history for models trained with rolling features; each
+# session's last live row is kept as its close.
+_rolling_state = RollingFeatureState()
 
-    results = []
-    for i, row in live_df.iterrows():
-        results.append({
-            'symbol': row['symbol'],
-            'prediction': 'CALL' if predictions[i] == 1 else 'PUT',
-            'confidence': max(probs[i])
-        })
 
-    return results
+class Signal:
+    """
+    One model prediction for a symbol: prediction is 'CALL' or 'PUT'.
+
+    Slotted with an interned symbol, since one is created per symbol per cycle
+    and they are queued between processes in sharded mode.
+    """
+    __slots__ = ('symbol', 'prediction', 'confidence')
+
+    def __init__(self, symbol: str, prediction: str, confidence: float):
+        self.symbol = sys.intern(symbol)
+        self.prediction = prediction
+        self.confidence = float(confidence)
+
+    def __reduce__(self):
+        return Signal, (self.symbol, self.prediction, self.confidence)
+
+    def __eq__(self, other):
+        return isinstance(other, Signal) and (
+            (self.symbol, self.prediction, self.confidence) ==
+            (other.symbol, other.prediction, other.confidence))
+
+    def __repr__(self):
+        return f"Signal({self.symbol} {self.prediction} {self.confidence:.2f})"
+
+    def to_dict(self) -> dict:
+        return {'symbol': self.symbol, 'prediction': self.prediction, 'confidence': self.confidence}
+
+
+def read_model(path):
+    """Load a model file without caching: a compact artifact (.cmodel) or a joblib pickle."""
+    return load_artifact(path) if path.endswith(ARTIFACT_SUFFIX) else joblib.load(path)
+
+
+def model_columns(model):
+    """Feature columns the model was fitted on."""
+    return list(getattr(model, 'feature_names_in_', FEATURE_COLUMNS))
+
+
+def legacy_model_path(path=MODEL_PATH):
+    """The pickle that stands in for a .cmodel path whose model type has no compact artifact."""
+    return path[:-len(ARTIFACT_SUFFIX)] + '.pkl' if path.endswith(ARTIFACT_SUFFIX) else path
+
+
+def load_model(path=MODEL_PATH):
+    """
+    Load the model, reusing the in-memory copy until the file on disk changes.
+
+    Compact artifacts (.cmodel) are memory-mapped and checked against the
+    current feature code; anything else is loaded with joblib.
+    """
+    if not os.path.exists(path) and os.path.exists(legacy_model_path(path)):
+        path = legacy_model_path(path)
+    mtime = os.path.getmtime(path)
+    cached = _model_cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        CACHE_STATS['model_cache_hit'] += 1
+        return cached[1]
+
+    CACHE_STATS['model_cache_miss'] += 1
+    model = read_model(path)
+    _model_cache[path] = (mtime, model)
+    # A new model invalidates every cached prediction
+    _prediction_cache.clear()
+    return model
+
+
+def warm_model(model_path=MODEL_PATH, live_df=None):
+    """
+    Load the model and score once so the first live cycle pays no first-call costs
+    (reading or mapping the file, faulting in its pages, lazy imports and allocations).
+
+    Scores live_df (rows shaped like the live input) through the same feature
+    path as predict_from_live_data, or a row of zeros when None. The prediction
+    cache and the live rolling-feature state are left untouched.
+
+    Returns:
+        The loaded model
+    """
+    model = load_model(model_path)
+    columns = model_columns(model)
+    if live_df is None:
+        X = pd.DataFrame([[0.0] * len(columns)], columns=columns)
+    elif any(name in ROLLING_FEATURE_COLUMNS for name in columns):
+        X = prepare_features(live_df.copy(), columns, rolling_state=_rolling_state.copy())
+    else:
+        X = prepare_features(live_df.copy())
+    model.predict_proba(X)
+    return model
+
+
+def rolling_state():
+    """The live RollingFeatureState that predict_from_live_data appends to."""
+    return _rolling_state
+
+
+def seed_rolling_state(history):
+    """
+    Seed the live rolling-feature state with past rows per symbol (see RollingFeatureState.seed).
+
+    Returns:
+        Number of rows stored
+    """
+    return _rolling_state.seed(history)
+
+
+def predict_from_live_data(live_df, model_path=MODEL_PATH, return_features=False,
+                           rolling_state=None, use_cache=True):
+    """
+    Score live option rows.
+
+    Args:
+        return_features: Also return the feature frame, e.g. for shadow models to score
+        rolling_state: RollingFeatureState for rolling features (default the live
+            state, see rolling_state()); replays pass their own so live history is untouched
+        use_cache: Look up and store predictions in the live prediction cache and
+            count them in CACHE_STATS; replays turn this off
+
+    Returns:
+        List of Signal, one per row of live_df, in row order
+        (and the feature DataFrame if return_features)
+    """
+    model = load_model(model_path)
+    columns = model_columns(model)
+    if any(name in ROLLING_FEATURE_COLUMNS for name in columns):
+        state = _rolling_state if rolling_state is None else rolling_state
+        X = prepare_features(live_df, columns, rolling_state=state)
+    else:
+        X = prepare_features(live_df)
+
+    # Rows whose features are unchanged since a previous cycle reuse the cached
+    # (prediction, confidence) pair; only the rest go through the model.
+    if use_cache:
+        keys = [(model_path,) + r for r in X.itertuples(index=False, name=None)]
+        cached = [_prediction_cache.get(k) for k in keys]
+        missing = [i for i, c in enumerate(cached) if c is None]
+        CACHE_STATS['pred_cache_hit'] += len(keys) - len(missing)
+        CACHE_STATS['pred_cache_miss'] += len(missing)
+    else:
+        cached = [None] * len(X)
+        missing = list(range(len(X)))
+
+    if missing:
+        X_missing = X.iloc[missing]
+        # One pass through the model: the predicted class is the most probable one
+        probs = model.predict_proba(X_missing)
+        best = probs.argmax(axis=1)
+        predictions, confidences = model.classes_[best], probs[np.arange(len(best)), best]
+        for j, i in enumerate(missing):
+            cached[i] = (predictions[j], confidences[j])
+        if use_cache:
+            for i in missing:
+                _prediction_cache[keys[i]] = cached[i]
+            while len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+                _prediction_cache.popitem(last=False)
+
+    signals = [
+        Signal(symbol, 'CALL' if prediction == 1 else 'PUT', confidence)
+        for symbol, (prediction, confidence) in zip(live_df['symbol'].tolist(), cached)
+    ]
+    return (signals, X) if return_features else signals
@@ -0,0 +1,123 @@
+# models/registry.py
+
+"""
+Versioned model registry.
+
+Each trained model gets a numbered version directory:
+
+    <root>/v0001/model.pkl
+    <root>/v0001/model.cmodel     compact artifact (models/artifact.py), if the model type has one
+    <root>/v0001/metadata.json    family, params, CV scores, features, data version
+
+metadata.json is written last, so a version without it is incomplete and
+ignored. Promoting a version copies its artifact to the path the live system
+loads (models/model.cmodel). A model type without a compact artifact is
+promoted as its pickle (models/model.pkl) instead, and any older artifact at
+the live path is removed so it cannot shadow the new model.
+"""
+
+import os
+import json
+import shutil
+from typing import List, Optional
+import joblib
+from models.artifact import ARTIFACT_SUFFIX, export_model
+from models.predict import MODEL_PATH, legacy_model_path
+
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'models/registry')
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    def __init__(self, root: str = MODEL_REGISTRY_DIR):
+        self.root = root
+
+    def versions(self) -> List[str]:
+        """Complete versions, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith('v') and os.path.exists(os.path.join(self.root, name, 'metadata.json'))
+        )
+
+    def latest(self) -> Optional[str]:
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def metadata(self, version: Optional[str] = None) -> dict:
+        version = version or self.latest()
+        with open(os.path.join(self.root, version, 'metadata.json')) as f:
+            return json.load(f)
+
+    def model_path(self, version: Optional[str] = None) -> str:
+        return os.path.join(self.root, version or self.latest(), 'model.pkl')
+
+    def artifact_path(self, version: Optional[str] = None) -> str:
+        return os.path.join(self.root, version or self.latest(), 'model' + ARTIFACT_SUFFIX)
+
+    def load(self, version: Optional[str] = None):
+        return joblib.load(self.model_path(version))
+
+    def register(self, model, metadata: dict) -> str:
+        """
+        Store a model and its metadata under the next free version.
+
+        Returns:
+            The new version, e.g. 'v0003'
+        """
+        os.makedirs(self.root, exist_ok=True)
+        n = len(os.listdir(self.root)) + 1
+        while True:
+            version = f"v{n:04d}"
+            try:
+                os.mkdir(os.path.join(self.root, version))  # claims the version atomically
+                break
+            except FileExistsError:
+                n += 1
+
+        path = self.model_path(version)
+        joblib.dump(model, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        try:
+            export_model(model, self.artifact_path(version), {
+                'model_version': version,
+                'data_hash': metadata.get('feature_version'),
+                'partitions': metadata.get('partitions', []),
+            })
+            metadata = {**metadata, 'artifact': 'model' + ARTIFACT_SUFFIX}
+        except TypeError as e:
+            print(f"⚠️  No compact artifact for {version}: {e}")
+        _write_json(os.path.join(self.root, version, 'metadata.json'), {'version': version, **metadata})
+        return version
+
+    def promote(self, version: Optional[str] = None, path: str = MODEL_PATH) -> str:
+        """
+        Make `version` (default latest) the model the live system loads.
+
+        The artifact is copied to a .cmodel path, the pickle to any other path.
+        A version without an artifact is promoted to a .cmodel path as its
+        pickle, at legacy_model_path(path), where load_model finds it once the
+        stale artifact at `path` is removed.
+        """
+        version = version or self.latest()
+        source = self.artifact_path(version) if path.endswith(ARTIFACT_SUFFIX) else self.model_path(version)
+        if path.endswith(ARTIFACT_SUFFIX) and not os.path.exists(source):
+            print(f"⚠️  {version} has no compact artifact; promoting its pickle")
+            source, stale, path = self.model_path(version), path, legacy_model_path(path)
+        else:
+            stale = None
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Model {version} has no {os.path.basename(source)}")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+        if stale is not None and os.path.exists(stale):
+            os.remove(stale)
+        return version
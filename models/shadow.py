@@ -0,0 +1,206 @@
+# models/shadow.py
+
+"""
+Shadow-model scoring.
+
+Candidate models score the same live feature batch as the production model,
+in a thread pool, after the cycle's orders have gone out. Their predictions
+are logged next to production's as JSON lines for later comparison, and they
+never touch the production model's caches or order path.
+
+Configure with SHADOW_MODELS: a comma-separated list of registry versions
+(v0003) or model file paths.
+
+Usage:
+    python -m models.shadow                  # agreement with production per shadow model
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import argparse
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from models.predict import Signal, read_model, model_columns
+from models.registry import ModelRegistry
+from utils.feature_engineering import compute_features
+from utils.rolling_features import RollingFeatureState
+
+SHADOW_MODELS = os.getenv('SHADOW_MODELS', '')
+SHADOW_LOG_PATH = os.getenv('SHADOW_LOG_PATH', 'logs/shadow_predictions.jsonl')
+
+
+def resolve_model(ref: str, registry: Optional[ModelRegistry] = None) -> str:
+    """Path for a model file or registry version (its artifact if it has one)."""
+    if os.path.exists(ref):
+        return ref
+    registry = registry or ModelRegistry()
+    if ref in registry.versions():
+        artifact = registry.artifact_path(ref)
+        return artifact if os.path.exists(artifact) else registry.model_path(ref)
+    raise FileNotFoundError(f"No model file or registry version named {ref!r}")
+
+
+class ShadowScorer:
+    """
+    Scores shadow models concurrently, one thread-pool task per model per batch.
+    A model still busy with its previous batch skips the new one, so a slow
+    candidate can fall behind but never queue up work.
+    """
+
+    def __init__(self, models: Dict[str, str], log_path: str = SHADOW_LOG_PATH,
+                 max_workers: Optional[int] = None, perf=None):
+        """
+        Args:
+            models: Name -> model path
+            log_path: JSON-lines file the predictions are appended to
+            max_workers: Thread pool size (default one per model)
+            perf: Optional PerfRing for shadow_ms / shadow_skipped samples
+        """
+        self.models = dict(models)
+        self.log_path = log_path
+        self.perf = perf
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.models)),
+                                        thread_name_prefix='shadow')
+        self._pending: Dict[str, Future] = {}
+        self._loaded: Dict[str, tuple] = {}
+        self._rolling = {name: RollingFeatureState() for name in self.models}
+        self._log_lock = threading.Lock()
+        self._cycle = 0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional['ShadowScorer']:
+        """Build from SHADOW_MODELS, or return None when no shadow models are configured."""
+        refs = [ref.strip() for ref in SHADOW_MODELS.split(',') if ref.strip()]
+        if not refs:
+            return None
+        registry = ModelRegistry()
+        return cls({ref: resolve_model(ref, registry) for ref in refs}, **kwargs)
+
+    def _model(self, name: str):
+        # Own cache (reloaded when the file changes), separate from the production model's
+        path = self.models[name]
+        mtime = os.path.getmtime(path)
+        loaded = self._loaded.get(name)
+        if loaded is None or loaded[0] != mtime:
+            loaded = self._loaded[name] = (mtime, read_model(path))
+        return loaded[1]
+
+    def submit(self, live_df: pd.DataFrame, features: pd.DataFrame,
+               production: List[Signal]) -> List[Future]:
+        """
+        Queue every shadow model on this batch and return immediately.
+
+        Args:
+            live_df: Raw live rows the production model scored
+            features: Production feature frame for those rows (reused where columns match)
+            production: Production signals, logged alongside for comparison
+
+        Returns:
+            Futures resolving to each scheduled model's list of Signal
+        """
+        self._cycle += 1
+        batch = {
+            'cycle': self._cycle,
+            'ts': time.time(),
+            'raw': live_df.copy(),
+            'features': features,
+            'production': production,
+        }
+        futures = []
+        skipped = 0
+        for name in self.models:
+            pending = self._pending.get(name)
+            if pending is not None and not pending.done():
+                skipped += 1
+                print(f"⚠️ Shadow model {name} is still scoring cycle {self._cycle - 1}; skipping this one")
+                continue
+            self._pending[name] = self._pool.submit(self._score, name, batch)
+            futures.append(self._pending[name])
+        if self.perf is not None and skipped:
+            self.perf.record('shadow_skipped', skipped)
+        return futures
+
+    def _score(self, name: str, batch: dict) -> List[Signal]:
+        start = time.perf_counter()
+        model = self._model(name)
+        columns = model_columns(model)
+        features = batch['features']
+        if set(columns) <= set(features.columns):
+            X = features[columns]
+        else:
+            X = compute_features(batch['raw'], columns, rolling_state=self._rolling[name])
+
+        probs = model.predict_proba(X)
+        predictions = model.classes_[np.argmax(probs, axis=1)]
+        symbols = batch['raw']['symbol'].tolist()
+        signals = [Signal(symbol, 'CALL' if prediction == 1 else 'PUT', max(p))
+                   for symbol, prediction, p in zip(symbols, predictions, probs)]
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        lines = []
+        for shadow, prod in zip(signals, batch['production']):
+            lines.append(json.dumps({
+                'ts': batch['ts'], 'cycle': batch['cycle'], 'model': name, 'symbol': shadow.symbol,
+                'prediction': shadow.prediction, 'confidence': round(shadow.confidence, 6),
+                'production_prediction': prod.prediction, 'production_confidence': round(prod.confidence, 6),
+                'latency_ms': round(latency_ms, 3),
+            }))
+        with self._log_lock:
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            with open(self.log_path, 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+        if self.perf is not None:
+            self.perf.record('shadow_ms', latency_ms)
+        return signals
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+def summarize(log_path: str = SHADOW_LOG_PATH, confidence_threshold: Optional[float] = None) -> pd.DataFrame:
+    """
+    Per shadow model: rows and cycles scored, agreement with production,
+    mean confidences and scoring latency.
+
+    Args:
+        confidence_threshold: Also report how often each side would have traded
+    """
+    log = pd.read_json(log_path, lines=True)
+    if log.empty:
+        return pd.DataFrame()
+    log['agree'] = log['prediction'] == log['production_prediction']
+    summary = log.groupby('model').agg(
+        rows=('symbol', 'size'),
+        cycles=('cycle', 'nunique'),
+        agreement=('agree', 'mean'),
+        confidence=('confidence', 'mean'),
+        production_confidence=('production_confidence', 'mean'),
+        latency_ms_p50=('latency_ms', 'median'),
+    )
+    if confidence_threshold is not None:
+        summary['trade_rate'] = (log['confidence'] >= confidence_threshold).groupby(log['model']).mean()
+        summary['production_trade_rate'] = (
+            (log['production_confidence'] >= confidence_threshold).groupby(log['model']).mean())
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare shadow models with production")
+    parser.add_argument('--log', default=SHADOW_LOG_PATH)
+    parser.add_argument('--threshold', type=float, default=None, help="confidence needed to trade")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.log):
+        print(f"❌ No shadow log at {args.log}")
+        return 1
+    print(summarize(args.log, args.threshold).round(4).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
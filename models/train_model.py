@@ -1,30 +1,228 @@
 # models/train_model.py
 
+"""
+Model selection with time-series cross-validation.
+
+Every (model family, hyperparameters, fold) combination is an independent
+single-threaded fit, and all of them run in parallel across cores with joblib.
+Folds are expanding windows in row order (TimeSeriesSplit), so a model is
+only ever scored on rows after the ones it was trained on. The feature matrix
+comes memory-mapped from the feature store; each fold is a slice of it, and
+worker processes map the same file instead of receiving copies.
+
+The trailing `holdout` fraction of rows is kept out of the search entirely.
+The candidate with the best mean fold score is fitted on the searched rows and
+scored on the holdout, then refit on all rows, stored in the model registry
+with its metrics, and promoted to models/model.cmodel.
+
+Usage:
+    python -m models.train_model
+    python -m models.train_model --families rf,lr --splits 5 --jobs 4 --features extended --holdout 0.2
+"""
+
+import sys
+import time
+import argparse
+import platform
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
+import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report
-import joblib
-from utils.feature_engineering import prepare_features
+import sklearn
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import classification_report, get_scorer
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from models.predict import MODEL_PATH
+from models.registry import ModelRegistry
+from utils.feature_engineering import FEATURE_COLUMNS, EXTENDED_FEATURE_COLUMNS
+from utils.feature_store import FeatureStore, FeatureMatrix
+
+DATA_PATH = 'data/historical_data.csv'
+
+# Family -> hyperparameter grid searched by default
+PARAM_GRIDS = {
+    'rf': {'n_estimators': [100, 200, 400], 'max_depth': [None, 8, 16], 'min_samples_leaf': [1, 5]},
+    'gb': {'learning_rate': [0.05, 0.1], 'max_iter': [100, 300], 'max_leaf_nodes': [15, 31]},
+    'lr': {'C': [0.01, 0.1, 1.0, 10.0]},
+}
+
+FEATURE_SETS = {'base': FEATURE_COLUMNS, 'extended': EXTENDED_FEATURE_COLUMNS}
+
+
+def make_model(family: str, params: dict):
+    """Unfitted estimator for a family; each fit is single-threaded, parallelism is across fits."""
+    if family == 'rf':
+        return RandomForestClassifier(random_state=42, n_jobs=1, **params)
+    if family == 'gb':
+        return HistGradientBoostingClassifier(random_state=42, **params)
+    if family == 'lr':
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000, **params))
+    raise ValueError(f"Unknown model family: {family}. Supported: {', '.join(PARAM_GRIDS)}")
+
+
+def candidates(families: Sequence[str], grids: Dict[str, dict] = PARAM_GRIDS) -> List[tuple]:
+    """(family, params) for every grid point of the given families."""
+    return [(family, params) for family in families for params in ParameterGrid(grids[family])]
+
+
+def time_series_folds(rows: int, splits: int) -> List[tuple]:
+    """(train_end, test_end) row bounds: train on [0, train_end), score on [train_end, test_end)."""
+    return [(int(train[-1]) + 1, int(test[-1]) + 1)
+            for train, test in TimeSeriesSplit(n_splits=splits).split(np.empty((rows, 1)))]
+
+
+def _fit_fold(X, y, columns, family, params, train_end, test_end, scoring):
+    # X and y are the store's memmaps (joblib passes them by file name);
+    # these frames are views of the mapped slices
+    start = time.perf_counter()
+    model = make_model(family, params)
+    model.fit(pd.DataFrame(X[:train_end], columns=columns, copy=False), y[:train_end])
+    X_test = pd.DataFrame(X[train_end:test_end], columns=columns, copy=False)
+    score = get_scorer(scoring)(model, X_test, y[train_end:test_end])
+    return score, time.perf_counter() - start
+
+
+def search(features: FeatureMatrix, candidate_list: List[tuple], splits: int = 5,
+           jobs: int = -1, scoring: str = 'accuracy', rows: int = None) -> dict:
+    """
+    Score every candidate on every fold, in parallel.
+
+    Args:
+        rows: Search only the first `rows` rows (default all); later rows are never fitted or scored
+
+    Returns:
+        {'leaderboard': [{family, params, scores, mean, std, fit_sec}] best first,
+         'folds', 'wall_sec', 'fit_sec', 'jobs'}
+    """
+    folds = time_series_folds(len(features.y) if rows is None else rows, splits)
+    tasks = [(c, fold) for c in range(len(candidate_list)) for fold in folds]
+
+    start = time.perf_counter()
+    results = Parallel(n_jobs=jobs)(
+        delayed(_fit_fold)(features.X, features.y, features.columns, *candidate_list[c], *fold, scoring)
+        for c, fold in tasks
+    )
+    wall = time.perf_counter() - start
+
+    leaderboard = []
+    for c, (family, params) in enumerate(candidate_list):
+        scores = [score for (i, _), (score, _) in zip(tasks, results) if i == c]
+        fit_sec = sum(sec for (i, _), (_, sec) in zip(tasks, results) if i == c)
+        leaderboard.append({
+            'family': family, 'params': params, 'scores': scores,
+            'mean': float(np.mean(scores)), 'std': float(np.std(scores)), 'fit_sec': fit_sec,
+        })
+    leaderboard.sort(key=lambda entry: entry['mean'], reverse=True)
+    return {
+        'leaderboard': leaderboard, 'folds': folds, 'wall_sec': wall,
+        'fit_sec': sum(sec for _, sec in results), 'jobs': effective_n_jobs(jobs),
+    }
+
+
+def train(paths: Sequence[str] = (DATA_PATH,), families: Sequence[str] = tuple(PARAM_GRIDS),
+          feature_set: str = 'base', splits: int = 5, jobs: int = -1, scoring: str = 'accuracy',
+          registry: ModelRegistry = None, store: FeatureStore = None, promote: bool = True,
+          grids: Dict[str, dict] = PARAM_GRIDS, holdout: float = 0.2) -> tuple:
+    """
+    Run the search, score the winner on the holdout, refit it on all rows and register it.
+
+    Args:
+        holdout: Trailing fraction of rows kept out of the search and used only for the holdout report
+
+    Returns:
+        (registered version, search result)
+    """
+    registry = registry or ModelRegistry()
+    store = store or FeatureStore(columns=FEATURE_SETS[feature_set])
+    features = store.load(list(paths), target='direction')
+    rows = len(features.y)
+    search_end = rows - int(rows * holdout)
+    if not 0 <= holdout < 1 or search_end <= splits:
+        raise ValueError(f"holdout {holdout} leaves {search_end} of {rows} rows for {splits}-fold search")
+
+    result = search(features, candidates(families, grids), splits, jobs, scoring, rows=search_end)
+    best = result['leaderboard'][0]
+
+    # Holdout report: the winner fitted on the searched rows, scored on rows the search never saw
+    X = features.to_frame()
+    report = None
+    if search_end < rows:
+        fitted = make_model(best['family'], best['params']).fit(X.iloc[:search_end], features.y[:search_end])
+        X_holdout, y_holdout = X.iloc[search_end:], features.y[search_end:]
+        report = {
+            'start': search_end, 'rows': rows - search_end,
+            'score': float(get_scorer(scoring)(fitted, X_holdout, y_holdout)),
+            'report': classification_report(y_holdout, fitted.predict(X_holdout),
+                                            output_dict=True, zero_division=0),
+        }
+
+    model = make_model(best['family'], best['params']).fit(X, features.y)
+    version = registry.register(model, {
+        'family': best['family'],
+        'params': best['params'],
+        'scoring': scoring,
+        'cv': {'mean': best['mean'], 'std': best['std'], 'folds': best['scores'], 'splits': splits},
+        'holdout': report,
+        'features': features.columns,
+        'feature_version': features.version,
+        'partitions': features.partitions,
+        'rows': int(len(features.y)),
+        'search': {
+            'candidates': len(result['leaderboard']), 'fits': len(result['leaderboard']) * splits,
+            'jobs': result['jobs'], 'wall_sec': result['wall_sec'], 'fit_sec': result['fit_sec'],
+            'leaderboard': [{k: e[k] for k in ('family', 'params', 'mean', 'std')}
+                            for e in result['leaderboard'][:10]],
+        },
+        'trained_at': datetime.now(timezone.utc).isoformat(),
+        'sklearn': sklearn.__version__,
+        'python': platform.python_version(),
+    })
+    if promote:
+        registry.promote(version)
+    return version, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-series CV model search")
+    parser.add_argument('paths', nargs='*', default=[DATA_PATH], help="raw CSV partitions, oldest first")
+    parser.add_argument('--families', default=','.join(PARAM_GRIDS), help="comma-separated: rf,gb,lr")
+    parser.add_argument('--features', choices=sorted(FEATURE_SETS), default='base')
+    parser.add_argument('--splits', type=int, default=5)
+    parser.add_argument('--jobs', type=int, default=-1, help="parallel fits (-1 = all cores)")
+    parser.add_argument('--scoring', default='accuracy', help="any sklearn scorer name")
+    parser.add_argument('--holdout', type=float, default=0.2, help="trailing fraction of rows kept out of the search")
+    parser.add_argument('--no-promote', action='store_true', help="register without replacing the live model")
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(',') if f.strip()]
+    for family in families:
+        if family not in PARAM_GRIDS:
+            parser.error(f"unknown family {family!r}")
 
-# Load dataset
-data = pd.read_csv('data/historical_data.csv')
+    registry = ModelRegistry()
+    version, result = train(args.paths, families, args.features, args.splits, args.jobs,
+                            args.scoring, registry, promote=not args.no_promote, holdout=args.holdout)
 
-# Compute ML features
-X = prepare_features(data)
-y = data['direction']
+    print(f"{'family':<7} {'mean':>7} {'std':>7}  params")
+    for entry in result['leaderboard'][:10]:
+        print(f"{entry['family']:<7} {entry['mean']:>7.4f} {entry['std']:>7.4f}  {entry['params']}")
 
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    holdout = registry.metadata(version)['holdout']
+    if holdout:
+        print(f"\n🎯 Holdout {args.scoring}: {holdout['score']:.4f} on the last {holdout['rows']} rows")
 
-# Train model
-clf = RandomForestClassifier(n_estimators=200, random_state=42)
-clf.fit(X_train, y_train)
+    fits = len(result['leaderboard']) * args.splits
+    efficiency = result['fit_sec'] / (result['wall_sec'] * result['jobs'])
+    print(f"\n⏱️  {fits} fits in {result['wall_sec']:.1f}s on {result['jobs']} workers "
+          f"({result['fit_sec']:.1f}s of fitting, {efficiency:.0%} parallel efficiency)")
+    print(f"✅ Registered {version} in {registry.root}"
+          + ("" if args.no_promote else f" and promoted it to {MODEL_PATH}"))
+    return 0
 
-# Evaluate
-y_pred = clf.predict(X_test)
-print(classification_report(y_test, y_pred))
 
-# Save model
-joblib.dump(clf, 'models/model.pkl')
-print("✅ Model saved to models/model.pkl")
+if __name__ == "__main__":
+    sys.exit(main())
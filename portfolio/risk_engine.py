@@ -0,0 +1,119 @@
+# portfolio/risk_engine.py
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from models.predict import Signal
+
+
+@dataclass
+class RiskLimits:
+    """
+    Portfolio-wide limits applied to the merged signal set before routing orders.
+    """
+    max_orders_per_cycle: int = 10
+    max_contracts_per_symbol: int = 1
+    min_confidence: float = 0.8
+    max_loss_per_trade: float = 500.0
+
+    @classmethod
+    def from_env(cls, **kwargs) -> 'RiskLimits':
+        """Build from the RISK_* env vars as they are now; kwargs override them."""
+        env = {
+            'max_orders_per_cycle': int(os.getenv('RISK_MAX_ORDERS_PER_CYCLE', '10')),
+            'max_contracts_per_symbol': int(os.getenv('RISK_MAX_CONTRACTS_PER_SYMBOL', '1')),
+            'min_confidence': float(os.getenv('RISK_MIN_CONFIDENCE', '0.8')),
+            'max_loss_per_trade': float(os.getenv('RISK_MAX_LOSS_PER_TRADE', '500')),
+        }
+        env.update(kwargs)
+        return cls(**env)
+
+
+def current_exposure(positions: Optional[Dict[tuple, float]] = None,
+                     open_orders: Iterable = ()) -> Dict[str, float]:
+    """
+    Contracts per symbol already at risk: held positions of either right and
+    side, plus what open orders may still fill.
+
+    Args:
+        positions: (symbol, right) -> signed contracts, as from BaseBroker.get_option_positions()
+        open_orders: ManagedOrders not yet terminal (OrderManager.open_orders())
+
+    Returns:
+        Mapping of symbol -> contracts
+    """
+    exposure: Dict[str, float] = {}
+    for (symbol, _), qty in (positions or {}).items():
+        exposure[symbol] = exposure.get(symbol, 0) + abs(qty)
+    for order in open_orders:
+        exposure[order.symbol] = exposure.get(order.symbol, 0) + max(order.quantity - order.filled_qty, 0)
+    return exposure
+
+
+def apply_risk_limits(signals: List[Signal], limits: RiskLimits, quantity: int = 1,
+                      exposure: Optional[Dict[str, float]] = None) -> List[Signal]:
+    """
+    Select the signals that may be traded this cycle.
+
+    Signals below `min_confidence` are dropped, at most one signal per symbol is
+    kept (the most confident), symbols whose current exposure plus this order
+    would pass `max_contracts_per_symbol` are dropped, and the remainder is
+    capped at `max_orders_per_cycle`, most confident first. Every signal
+    dropped by a limit other than min_confidence is logged.
+
+    Args:
+        signals: Signals from predict_from_live_data
+        limits: Risk limits to enforce
+        quantity: Contracts per order
+        exposure: Contracts already held or in flight per symbol (see current_exposure)
+
+    Returns:
+        Approved signals sorted by descending confidence
+    """
+    if quantity > limits.max_contracts_per_symbol:
+        print(f"⚠️ Risk: order size {quantity} exceeds max_contracts_per_symbol "
+              f"{limits.max_contracts_per_symbol}; no signals approved")
+        return []
+
+    best = {}
+    for sig in signals:
+        if sig.confidence < limits.min_confidence:
+            continue
+        current = best.get(sig.symbol)
+        if current is None or sig.confidence > current.confidence:
+            best[sig.symbol] = sig
+
+    approved = []
+    for sig in sorted(best.values(), key=lambda s: s.confidence, reverse=True):
+        held = (exposure or {}).get(sig.symbol, 0)
+        if held + quantity > limits.max_contracts_per_symbol:
+            print(f"⚠️ Risk: {sig.symbol} already has {held:g} contract(s) at risk; "
+                  f"{quantity} more would pass max_contracts_per_symbol {limits.max_contracts_per_symbol}")
+            continue
+        approved.append(sig)
+    if len(approved) > limits.max_orders_per_cycle:
+        print(f"⚠️ Risk: {len(approved) - limits.max_orders_per_cycle} signal(s) over "
+              f"max_orders_per_cycle {limits.max_orders_per_cycle} dropped")
+    return approved[:limits.max_orders_per_cycle]
+
+
+def within_loss_limit(max_loss: np.ndarray, limits: RiskLimits, quantity: int = 1) -> np.ndarray:
+    """
+    Mask of multi-leg candidates whose worst case fits the risk limits.
+
+    Args:
+        max_loss: Worst-case loss in dollars per combo (inf when unbounded)
+        limits: Risk limits to enforce
+        quantity: Combos per order; like a single-leg order's contracts, it must not
+            exceed max_contracts_per_symbol (a combo counts once, whatever its legs)
+
+    Returns:
+        Boolean array, True where 0 < max_loss * quantity <= max_loss_per_trade. A
+        max_loss <= 0 means the quotes promise a riskless profit, which is a stale or
+        crossed quote rather than a trade, so it is rejected too
+    """
+    max_loss = np.asarray(max_loss, dtype=np.float64)
+    if quantity > limits.max_contracts_per_symbol:
+        return np.zeros(max_loss.shape, dtype=bool)
+    return np.isfinite(max_loss) & (max_loss > 0) & (max_loss * quantity <= limits.max_loss_per_trade)
@@ -1,16 +1,12 @@
 # strategies/basic_ml_strategy.py
 
 import pandas as pd
-import joblib
+from models.predict import load_model, MODEL_PATH
 
-MODEL_PATH = 'models/model.pkl'
 FEATURES = ['delta', 'gamma', 'vega', 'theta', 'iv', 'underlying_return_1d', 'volume']
 
-def load_model():
-    return joblib.load(MODEL_PATH)
-
 def generate_trade_signal(latest_data: pd.DataFrame):
-    model = load_model()
+    model = load_model(MODEL_PATH)
     X = latest_data[FEATURES]
     pred = model.predict(X)
 
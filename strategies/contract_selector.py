@@ -0,0 +1,236 @@
+# strategies/contract_selector.py
+
+"""
+Per-signal option contract selection.
+
+For each signal the selector picks a contract from that underlying's chain
+instead of a fixed strike and expiry. Each chain is fetched once per
+CHAIN_TTL_SEC, filtered with the selection rules (strategies/rules.py:
+Greek band, spread, bid), and indexed per (right, expiry) as lists sorted
+by |delta| and by strike. Selecting is then a binary search per expiry in
+the DTE window, with a few neighbours on each side scored by distance to
+the target plus relative spread:
+
+    SELECT_BY=delta       target |delta| TARGET_DELTA (default 0.5)
+    SELECT_BY=moneyness   target strike / spot TARGET_MONEYNESS (default 1.0)
+
+Brokers without option chains fall back to the strike nearest spot on the
+next Friday, computed at selection time.
+"""
+
+import os
+import time
+from bisect import bisect_left
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+from brokers.contracts import OptionContract
+from utils.helpers import get_next_friday
+from utils.tick_log import SOURCE_CHAIN
+from strategies.rules import ChainColumns, RuleSet, compile_rules, load_rules
+
+SELECT_BY = os.getenv('SELECT_BY', 'delta')
+TARGET_DELTA = float(os.getenv('TARGET_DELTA', '0.5'))
+TARGET_MONEYNESS = float(os.getenv('TARGET_MONEYNESS', '1.0'))
+MIN_DTE = int(os.getenv('MIN_DTE', '1'))
+MAX_DTE = int(os.getenv('MAX_DTE', '45'))
+MAX_SPREAD_PCT = float(os.getenv('MAX_SPREAD_PCT', '0.10'))
+CHAIN_TTL_SEC = float(os.getenv('CHAIN_TTL_SEC', '300'))
+SELECTION_RULES_PATH = os.getenv('SELECTION_RULES_PATH', '')
+CANDIDATES_PER_SIDE = 2
+SPREAD_WEIGHT = 1.0
+
+# Same delta band as filter_trades_by_greeks, on |delta| so puts qualify too
+DEFAULT_SELECTION_RULES = {
+    'eligible': {
+        'abs_delta': {'between': [0.3, 0.7]},
+        'spread_pct': {'<': MAX_SPREAD_PCT},
+        'bid': {'>': 0},
+    }
+}
+
+
+class _Expiry:
+    """Eligible contracts of one (right, expiry), as plain lists for bisect."""
+    __slots__ = ('dte', 'by_delta', 'delta_rows', 'by_strike', 'strike_rows')
+
+    def __init__(self, dte, abs_delta, strike, rows):
+        self.dte = dte
+        order = np.argsort(abs_delta, kind='stable')
+        self.by_delta, self.delta_rows = abs_delta[order].tolist(), rows[order].tolist()
+        order = np.argsort(strike, kind='stable')
+        self.by_strike, self.strike_rows = strike[order].tolist(), rows[order].tolist()
+
+
+class ChainIndex:
+    """One underlying's eligible contracts, grouped by right and sorted by DTE."""
+
+    def __init__(self, chain, rules: RuleSet, today: Optional[date] = None):
+        """
+        Args:
+            chain: DataFrame with OPTION_CHAIN_COLUMNS for a single underlying
+            rules: Eligibility rules; a contract must pass every strategy in the set
+            today: As-of date for DTE
+        """
+        columns = ChainColumns(chain, today=today)
+        eligible = rules.evaluate(columns).all(axis=0) if len(chain) else np.zeros(0, dtype=bool)
+        rows = np.flatnonzero(eligible)
+        self.chain = chain  # kept for spread construction (execution.scheduler.submit_signal_spread)
+        self.symbol = chain['symbol'].iloc[0] if len(chain) else None
+        self.contracts = len(chain)
+        self.expiry = chain['expiry'].to_numpy()[rows].astype(str)
+        self.strike = chain['strike'].to_numpy(dtype=np.float64)[rows]
+        steps = np.diff(np.unique(self.strike))
+        self.strike_step = float(steps.min()) if len(steps) else 0.0
+        self.spread_pct = columns['spread_pct'][rows].tolist()
+        self.right = columns['right'][rows]
+        right = self.right
+        dte = columns['dte'][rows]
+        abs_delta = columns['abs_delta'][rows].astype(np.float64)
+
+        self.groups: Dict[str, List[_Expiry]] = {'C': [], 'P': []}
+        self._dtes: Dict[str, List[float]] = {'C': [], 'P': []}
+        for side in ('C', 'P'):
+            on_side = right == side
+            for days in np.unique(dte[on_side]):
+                members = np.flatnonzero(on_side & (dte == days))
+                self.groups[side].append(_Expiry(float(days), abs_delta[members], self.strike[members], members))
+            self._dtes[side] = [group.dte for group in self.groups[side]]
+        self._best: Dict[tuple, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.strike)
+
+    def best(self, right: str, target: float, by: str = 'delta', min_dte: int = MIN_DTE,
+             max_dte: int = MAX_DTE) -> Optional[int]:
+        """
+        Row (into this index) of the best eligible contract, or None.
+
+        Args:
+            right: 'C' or 'P'
+            target: |delta| for by='delta', strike for by='moneyness' (rounded to
+                the chain's finest strike step, so the memo holds one entry per grid strike
+                rather than one per spot price)
+        """
+        if by == 'moneyness' and self.strike_step:
+            target = round(target / self.strike_step) * self.strike_step
+        key = (right, target, by, min_dte, max_dte)
+        if key in self._best:
+            return self._best[key]
+
+        groups, dtes = self.groups[right], self._dtes[right]
+        best_row, best_score = None, float('inf')
+        for group in groups[bisect_left(dtes, min_dte):]:
+            if group.dte > max_dte:
+                break
+            keys, rows = ((group.by_delta, group.delta_rows) if by == 'delta'
+                          else (group.by_strike, group.strike_rows))
+            i = bisect_left(keys, target)
+            for j in range(max(0, i - CANDIDATES_PER_SIDE), min(len(keys), i + CANDIDATES_PER_SIDE)):
+                distance = abs(keys[j] - target)
+                if by == 'moneyness':
+                    distance /= target  # relative to the target strike, comparable to spread_pct
+                score = distance + SPREAD_WEIGHT * self.spread_pct[rows[j]]
+                if score < best_score:
+                    best_row, best_score = rows[j], score
+        self._best[key] = best_row
+        return best_row
+
+    def contract(self, row: int) -> OptionContract:
+        return OptionContract(self.symbol, self.expiry[row].replace('-', ''), self.right[row], float(self.strike[row]))
+
+
+class ContractSelector:
+    """
+    Picks the contract to trade for each signal, caching one ChainIndex per
+    underlying for `ttl_sec`.
+    """
+
+    def __init__(self, broker, rules: Optional[RuleSet] = None, select_by: str = SELECT_BY,
+                 target_delta: float = TARGET_DELTA, target_moneyness: float = TARGET_MONEYNESS,
+                 min_dte: int = MIN_DTE, max_dte: int = MAX_DTE, ttl_sec: float = CHAIN_TTL_SEC,
+                 recorder=None):
+        """
+        Args:
+            broker: Broker providing fetch_option_chain()
+            rules: Eligibility rules (default DEFAULT_SELECTION_RULES)
+            select_by: 'delta' or 'moneyness'
+            target_delta: Target |delta| when selecting by delta
+            target_moneyness: Target strike / spot when selecting by moneyness
+            min_dte, max_dte: Inclusive days-to-expiry window
+            ttl_sec: Seconds before a cached chain is fetched again
+            recorder: Optional TickRecorder that keeps every fetched chain for replay
+        """
+        if select_by not in ('delta', 'moneyness'):
+            raise ValueError(f"select_by must be 'delta' or 'moneyness', got {select_by!r}")
+        self.broker = broker
+        self.rules = rules or compile_rules(DEFAULT_SELECTION_RULES)
+        self.select_by = select_by
+        self.target_delta = target_delta
+        self.target_moneyness = target_moneyness
+        self.min_dte, self.max_dte = min_dte, max_dte
+        self.ttl_sec = ttl_sec
+        self.recorder = recorder
+        self.chains_supported = True
+        self._indexes: Dict[str, tuple] = {}  # symbol -> (fetched_at, ChainIndex)
+
+    @classmethod
+    def from_env(cls, broker, **kwargs) -> 'ContractSelector':
+        """Build with SELECTION_RULES_PATH rules (if set) and the env-var targets."""
+        if SELECTION_RULES_PATH and 'rules' not in kwargs:
+            kwargs['rules'] = load_rules(SELECTION_RULES_PATH)
+        return cls(broker, **kwargs)
+
+    def index(self, symbol: str) -> Optional[ChainIndex]:
+        """The cached ChainIndex for symbol, refreshed after ttl_sec; None if no chain is available."""
+        cached = self._indexes.get(symbol)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.ttl_sec:
+            return cached[1]
+        if not self.chains_supported:
+            return None
+        try:
+            chain = self.broker.fetch_option_chain(symbol)
+        except NotImplementedError as e:
+            print(f"⚠️ {e}; selecting the strike nearest spot on the next Friday")
+            self.chains_supported = False
+            return None
+        except Exception as e:
+            print(f"❌ Error fetching {symbol} option chain: {e}")
+            return cached[1] if cached is not None else None  # a stale chain beats none
+        if self.recorder is not None:
+            self.recorder.record_frame(chain, source=SOURCE_CHAIN)
+        index = ChainIndex(chain, self.rules)
+        self._indexes[symbol] = (now, index)
+        return index
+
+    def select(self, symbol: str, right: str, spot: Optional[float] = None) -> Optional[OptionContract]:
+        """
+        Best contract for a signal, or None when nothing in the chain qualifies.
+
+        Args:
+            symbol: Underlying symbol
+            right: 'C' or 'P'
+            spot: Underlying price; needed for moneyness selection and the fallback
+        """
+        right = right.upper()[0]
+        index = self.index(symbol)
+        if index is None:
+            return self.fallback(symbol, right, spot) if not self.chains_supported else None
+
+        if self.select_by == 'moneyness':
+            if not spot:
+                print(f"⚠️ No spot price for {symbol}; cannot select by moneyness")
+                return None
+            row = index.best(right, spot * self.target_moneyness, 'moneyness', self.min_dte, self.max_dte)
+        else:
+            row = index.best(right, self.target_delta, 'delta', self.min_dte, self.max_dte)
+        return index.contract(row) if row is not None else None
+
+    def fallback(self, symbol: str, right: str, spot: Optional[float]) -> Optional[OptionContract]:
+        """Strike nearest spot (1-point steps under $100, else 5) on the next Friday."""
+        if not spot:
+            print(f"⚠️ No option chain or spot price for {symbol}; cannot pick a contract")
+            return None
+        step = 1.0 if spot < 100 else 5.0
+        return OptionContract(symbol, get_next_friday(), right, round(spot / step) * step)
@@ -1,6 +1,19 @@
 # strategies/greeks_optimizer.py
 
+from functools import lru_cache
 import pandas as pd
+from strategies.rules import compile_rules
+
+
+@lru_cache(maxsize=32)
+def _greek_rules(delta_range, max_gamma, min_vega, max_theta_decay):
+    return compile_rules({'greeks': {
+        'delta': {'between': list(delta_range)},
+        'gamma': {'<': max_gamma},
+        'vega': {'>': min_vega},
+        'theta': {'>': max_theta_decay},
+    }})
+
 
 def filter_trades_by_greeks(df: pd.DataFrame,
                             delta_range=(0.3, 0.7),
@@ -13,13 +26,9 @@ def filter_trades_by_greeks(df: pd.DataFrame,
     - gamma < max_gamma (to avoid explosive price sensitivity)
     - vega > min_vega (some volatility exposure)
     - theta > max_theta_decay (don't trade if time decay too steep)
-    """
-
-    filtered = df[
-        df['delta'].between(delta_range[0], delta_range[1]) &
-        (df['gamma'] < max_gamma) &
-        (df['vega'] > min_vega) &
-        (df['theta'] > max_theta_decay)
-    ]
 
-    return filtered.reset_index(drop=True)
+    The thresholds are compiled once into a rule (strategies/rules.py); for
+    several filters over the same chain, declare them together in one RuleSet.
+    """
+    mask = _greek_rules(tuple(delta_range), max_gamma, min_vega, max_theta_decay).evaluate(df)[0]
+    return df[mask].reset_index(drop=True)
@@ -0,0 +1,282 @@
+# strategies/rules.py
+
+"""
+Declarative strategy rules compiled to NumPy boolean masks.
+
+Strategies are declared as conditions over option-chain columns, derived
+fields and per-symbol features:
+
+    strategies:
+      short_dated_high_iv_calls:
+        iv_rank: {'>': 0.6}
+        dte: {between: [7, 45]}
+        spread_pct: {'<': 0.05}
+        right: C
+      wings:
+        any:
+          - delta: {between: [0.10, 0.25]}
+          - delta: {between: [-0.25, -0.10]}
+
+Entries of a mapping are ANDed; `all` / `any` take a list of conditions and
+`not` a single one. A field given a bare value means `==`. Operators: >, >=,
+<, <=, ==, !=, between (inclusive), in, not_in.
+
+compile_rules() turns the config into a RuleSet once. Every distinct
+(field, operator, value) test across all strategies becomes one row of a
+(tests x contracts) boolean matrix, written in place with NumPy ufuncs, and
+each strategy's mask is reduced from those rows. Each column is read once
+per chain however many strategies use it, and no intermediate frames are built.
+"""
+
+import json
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from brokers.contracts import symbol_name
+
+OPERATORS = ('>', '>=', '<', '<=', '==', '!=', 'between', 'in', 'not_in')
+_UFUNCS = {
+    '>': np.greater, '>=': np.greater_equal, '<': np.less, '<=': np.less_equal,
+    '==': np.equal, '!=': np.not_equal,
+}
+
+
+def _expiry_days(expiry: np.ndarray, today: date) -> np.ndarray:
+    # Expiries repeat across a chain, so each distinct one is parsed once
+    codes, values = pd.factorize(expiry)
+    dates = pd.to_datetime(pd.Series(values).astype(str).str.replace('-', '', regex=False), format='%Y%m%d')
+    days = (dates - pd.Timestamp(today)).dt.days.to_numpy(dtype=np.float64)
+    return days[codes]
+
+
+class ChainColumns:
+    """
+    Column access over an option chain -- a DataFrame with OPTION_CHAIN_COLUMNS,
+    a ContractTable, or a dict of equal-length arrays -- plus derived fields and
+    per-symbol features, each materialized at most once.
+
+    Derived fields: mid, spread (ask - bid), spread_pct (spread / mid), dte
+    (calendar days to expiry), abs_delta, and right ('C'/'P') / is_call for
+    either input.
+    """
+
+    def __init__(self, chain, symbol_features: Optional[pd.DataFrame] = None,
+                 today: Optional[date] = None):
+        """
+        Args:
+            chain: Option chain DataFrame, ContractTable or dict of column arrays
+            symbol_features: Optional frame indexed by symbol (e.g. iv_rank per
+                underlying), broadcast to that symbol's contracts
+            today: As-of date for dte (default today)
+        """
+        self.chain = chain
+        self.symbol_features = symbol_features
+        self.today = today or date.today()
+        self._is_frame = isinstance(chain, pd.DataFrame)
+        self._is_mapping = isinstance(chain, dict)
+        self._is_table = not (self._is_frame or self._is_mapping)
+        self._cache: Dict[str, np.ndarray] = {}
+        self._symbol_index = None
+
+    def __len__(self) -> int:
+        if self._is_mapping:
+            return len(next(iter(self.chain.values()), ()))
+        return len(self.chain)
+
+    def _raw(self, name: str) -> Optional[np.ndarray]:
+        if self._is_mapping:
+            return self.chain.get(name)
+        if self._is_frame:
+            return self.chain[name].to_numpy() if name in self.chain.columns else None
+        if name == 'symbol':
+            return self.chain.symbols
+        return getattr(self.chain, name, None) if name in self.chain.__slots__ else None
+
+    def _derived(self, name: str) -> Optional[np.ndarray]:
+        if name == 'mid':
+            return (self['bid'] + self['ask']) / 2
+        if name == 'spread':
+            return self['ask'] - self['bid']
+        if name == 'spread_pct':
+            mid = self['mid']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(mid > 0, self['spread'] / mid, np.nan)
+        if name == 'dte':
+            return _expiry_days(self['expiry'], self.today)
+        if name == 'abs_delta':
+            return np.abs(self['delta'])
+        if name == 'right':
+            return np.where(self['is_call'], 'C', 'P').astype(object)
+        if name == 'is_call':
+            return self['right'] == 'C'
+        return None
+
+    def _symbol_feature(self, name: str) -> Optional[np.ndarray]:
+        if self.symbol_features is None or name not in self.symbol_features.columns:
+            return None
+        if self._symbol_index is None:
+            # Symbol codes for a ContractTable, hashed symbol names otherwise
+            self._symbol_index = pd.factorize(self.chain.symbol_code if self._is_table else self['symbol'])
+        codes, uniques = self._symbol_index
+        if self._is_table:
+            uniques = [symbol_name(int(code)) for code in uniques]
+        per_symbol = self.symbol_features[name].reindex(uniques).to_numpy(dtype=np.float64)
+        return per_symbol[codes]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        values = self._cache.get(name)
+        if values is None:
+            for source in (self._raw, self._derived, self._symbol_feature):
+                values = source(name)
+                if values is not None:
+                    break
+            else:
+                raise KeyError(f"Unknown rule field {name!r}: not a chain column, derived field or symbol feature")
+            self._cache[name] = values
+        return values
+
+
+Test = Tuple[str, str, object]  # (field, operator, value)
+
+
+def _freeze(value):
+    return tuple(value) if isinstance(value, (list, tuple)) else value
+
+
+def _parse(condition, tests: List[Test], index: Dict[Test, int]):
+    """Condition -> node: ('test', i) | ('all', [nodes]) | ('any', [nodes]) | ('not', node)."""
+    def test(field, op, value):
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator {op!r} for {field!r}; expected one of {OPERATORS}")
+        if op == 'between' and (not isinstance(value, (list, tuple)) or len(value) != 2):
+            raise ValueError(f"'between' for {field!r} needs [low, high], got {value!r}")
+        if op in ('in', 'not_in') and not isinstance(value, (list, tuple)):
+            raise ValueError(f"{op!r} for {field!r} needs a list, got {value!r}")
+        key = (field, op, _freeze(value))
+        if key not in index:
+            index[key] = len(tests)
+            tests.append(key)
+        return ('test', index[key])
+
+    if isinstance(condition, (list, tuple)):
+        return ('all', [_parse(c, tests, index) for c in condition])
+    if not isinstance(condition, dict) or not condition:
+        raise ValueError(f"Condition must be a non-empty mapping or list, got {condition!r}")
+
+    nodes = []
+    for key, value in condition.items():
+        if key == 'not':
+            nodes.append(('not', _parse(value, tests, index)))
+        elif key in ('all', 'any'):
+            if not isinstance(value, (list, tuple)) or not value:
+                raise ValueError(f"{key!r} needs a non-empty list of conditions")
+            nodes.append((key, [_parse(c, tests, index) for c in value]))
+        elif isinstance(value, dict):
+            nodes.extend(test(key, op, operand) for op, operand in value.items())
+        else:
+            nodes.append(test(key, '==', value))
+    return nodes[0] if len(nodes) == 1 else ('all', nodes)
+
+
+def _flat_tests(node) -> Optional[List[int]]:
+    """Test indices if the node is a plain AND of tests, else None."""
+    if node[0] == 'test':
+        return [node[1]]
+    if node[0] == 'all' and all(child[0] == 'test' for child in node[1]):
+        return [child[1] for child in node[1]]
+    return None
+
+
+class RuleSet:
+    """Compiled strategies. Use compile_rules() or load_rules() to build one."""
+
+    def __init__(self, strategies: Dict[str, object]):
+        self.tests: List[Test] = []
+        index: Dict[Test, int] = {}
+        self.names = list(strategies)
+        self._programs = [_parse(strategies[name], self.tests, index) for name in self.names]
+        self._flat = [_flat_tests(program) for program in self._programs]
+        self.fields = sorted({field for field, _, _ in self.tests})
+
+    def _evaluate_tests(self, columns: ChainColumns) -> np.ndarray:
+        n = len(columns)
+        results = np.empty((len(self.tests), n), dtype=bool)
+        scratch = np.empty(n, dtype=bool)
+        for i, (field, op, value) in enumerate(self.tests):
+            values, out = columns[field], results[i]
+            numeric = values.dtype.kind in 'biuf'
+            if op == 'between':
+                low, high = value
+                np.greater_equal(values, low, out=out)
+                np.less_equal(values, high, out=scratch)
+                out &= scratch
+            elif op in ('in', 'not_in'):
+                out[:] = np.isin(values, value, invert=(op == 'not_in'))
+            elif numeric:
+                _UFUNCS[op](values, value, out=out)
+            else:
+                out[:] = _UFUNCS[op](values, value)  # object columns such as right / symbol
+        return results
+
+    def _reduce(self, node, tests: np.ndarray) -> np.ndarray:
+        kind = node[0]
+        if kind == 'test':
+            return tests[node[1]]
+        if kind == 'not':
+            return ~self._reduce(node[1], tests)
+        children = [self._reduce(child, tests) for child in node[1]]
+        combine = np.logical_and if kind == 'all' else np.logical_or
+        return combine.reduce(children, axis=0)
+
+    def evaluate(self, chain, symbol_features: Optional[pd.DataFrame] = None,
+                 today: Optional[date] = None) -> np.ndarray:
+        """
+        Evaluate every strategy over the chain in one pass.
+
+        Args:
+            chain: Option chain DataFrame, ContractTable, dict of column arrays or ChainColumns
+            symbol_features: Optional per-symbol features (index = symbol)
+            today: As-of date for dte
+
+        Returns:
+            Boolean array (strategies x contracts), rows in `names` order
+        """
+        columns = chain if isinstance(chain, ChainColumns) else ChainColumns(chain, symbol_features, today)
+        tests = self._evaluate_tests(columns)
+        masks = np.empty((len(self.names), len(columns)), dtype=bool)
+        for k, (program, flat) in enumerate(zip(self._programs, self._flat)):
+            if flat is not None:
+                np.logical_and.reduce(tests[flat], axis=0, out=masks[k])
+            else:
+                masks[k] = self._reduce(program, tests)
+        return masks
+
+    def matches(self, chain, **kwargs) -> Dict[str, np.ndarray]:
+        """Strategy name -> row positions of the contracts it selects."""
+        masks = self.evaluate(chain, **kwargs)
+        return {name: np.flatnonzero(mask) for name, mask in zip(self.names, masks)}
+
+
+def compile_rules(config: Union[dict, Sequence]) -> RuleSet:
+    """
+    Compile a rules config: {'strategies': {name: condition}} or just {name: condition}.
+    """
+    strategies = config.get('strategies', config) if isinstance(config, dict) else None
+    if not isinstance(strategies, dict) or not strategies:
+        raise ValueError("Rules config needs a non-empty mapping of strategy name -> condition")
+    return RuleSet(strategies)
+
+
+def load_rules(path: str) -> RuleSet:
+    """Compile rules from a YAML (.yaml/.yml, needs PyYAML) or JSON file."""
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError as e:
+                raise ImportError("YAML rules need PyYAML (pip install pyyaml); JSON works without it") from e
+            config = yaml.safe_load(f)
+        else:
+            config = json.load(f)
+    return compile_rules(config)
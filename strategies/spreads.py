@@ -0,0 +1,294 @@
+# strategies/spreads.py
+
+"""
+Vectorized multi-leg spread construction.
+
+build_spreads() enumerates every vertical, long straddle, long strangle and
+iron condor on one underlying's chain without a Python loop per candidate.
+Eligible contracts (those passing the leg rules) are placed in a dense
+(expiry, right, strike) table of chain rows, with -1 where nothing is
+listed. Each structure is then one broadcast over strike offsets:
+
+    bull_call / bear_call   calls at strike steps g and g + w, w in 1..max_width
+    bull_put / bear_put     puts at strike steps g and g + w
+    straddle                put and call at step g
+    strangle                put at g, call at g + w
+    iron_condor             short put g, short call g + k, long wings w steps further out
+
+Widths count strike steps on the chain's strike grid. A candidate exists where
+all of its table cells hold a row.
+
+Every candidate is priced at once from fancy-indexed leg arrays: natural and
+mid net debit, net greeks, and the expiry payoff at each leg strike and at
+S=0. Payoffs are piecewise linear between strikes, so those points give max
+loss and max profit (infinite if the slope past the last strike keeps going).
+Sign changes between them give the breakevens. All per-share figures follow
+the chain's quotes; max_loss and max_profit are dollars per combo
+(x CONTRACT_MULTIPLIER) to compare with risk limits.
+
+Spread-level pruning uses the same rules engine as contracts
+(strategies/rules.py), over the SpreadSet's columns (kind, dte, debit, delta,
+max_loss, reward_risk, ...), plus RiskLimits.max_loss_per_trade.
+"""
+
+import os
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from brokers.contracts import OptionContract, OrderLeg
+from portfolio.risk_engine import RiskLimits, within_loss_limit
+from strategies.rules import ChainColumns, RuleSet, compile_rules
+
+SPREAD_KINDS = ('bull_call', 'bear_call', 'bull_put', 'bear_put', 'straddle', 'strangle', 'iron_condor')
+SPREAD_MAX_WIDTH = int(os.getenv('SPREAD_MAX_WIDTH', '10'))
+SPREAD_WING_WIDTH = int(os.getenv('SPREAD_WING_WIDTH', '5'))
+SPREAD_MAX_LEG_SPREAD_PCT = float(os.getenv('SPREAD_MAX_LEG_SPREAD_PCT', '0.25'))
+CONTRACT_MULTIPLIER = 100
+MAX_LEGS = 4
+GREEKS = ('delta', 'gamma', 'theta', 'vega')
+
+# Legs must be quoted on both sides and not absurdly wide
+DEFAULT_LEG_RULES = {
+    'quoted': {
+        'bid': {'>': 0},
+        'spread_pct': {'<': SPREAD_MAX_LEG_SPREAD_PCT},
+    }
+}
+
+
+def _strike_table(columns: ChainColumns, eligible: np.ndarray, pad: int):
+    """Dense (expiry, side, strike step) table of chain rows, -1 where empty, padded by `pad` steps each side."""
+    expiry_codes, expiries = pd.factorize(columns['expiry'], sort=True)
+    strike_codes, strikes = pd.factorize(columns['strike'], sort=True)
+    table = np.full((len(expiries), 2, len(strikes) + 2 * pad), -1, dtype=np.int64)
+    rows = np.flatnonzero(eligible)
+    side = columns['is_call'][rows].astype(np.int64)  # 0 put, 1 call
+    table[expiry_codes[rows], side, strike_codes[rows] + pad] = rows
+    return table, len(strikes)
+
+
+class _Block:
+    """
+    Candidates of one kind. Legs are listed in ascending strike order and
+    share a side and ratio pattern, so ratios and sides are per-block scalars.
+    """
+    __slots__ = ('kind', 'legs', 'ratios', 'calls')
+
+    def __init__(self, kind: str, legs: List[np.ndarray], ratios: Sequence[int], calls: Sequence[bool]):
+        legs = np.broadcast_arrays(*legs)
+        ok = np.logical_and.reduce([leg >= 0 for leg in legs])
+        self.kind = kind
+        self.legs = np.stack([leg[ok] for leg in legs])  # (legs, n) chain rows
+        self.ratios = tuple(ratios)
+        self.calls = tuple(calls)
+
+
+def _enumerate(table: np.ndarray, grid: int, pad: int, kinds: Sequence[str],
+               max_width: int, wing_width: int) -> List[_Block]:
+    g = np.arange(grid) + pad
+    width = np.arange(1, max_width + 1)
+    wing = np.arange(1, wing_width + 1)
+    puts, calls = table[:, 0, :], table[:, 1, :]
+
+    blocks = []
+    # (E, G, W): lower strike at g, upper at g + w
+    low_put, high_put = puts[:, g, None], puts[:, g[:, None] + width]
+    low_call, high_call = calls[:, g, None], calls[:, g[:, None] + width]
+    if 'bull_call' in kinds:
+        blocks.append(_Block('bull_call', [low_call, high_call], (1, -1), (True, True)))
+    if 'bear_call' in kinds:
+        blocks.append(_Block('bear_call', [low_call, high_call], (-1, 1), (True, True)))
+    if 'bull_put' in kinds:
+        blocks.append(_Block('bull_put', [low_put, high_put], (1, -1), (False, False)))
+    if 'bear_put' in kinds:
+        blocks.append(_Block('bear_put', [low_put, high_put], (-1, 1), (False, False)))
+    if 'straddle' in kinds:
+        blocks.append(_Block('straddle', [puts[:, g], calls[:, g]], (1, 1), (False, True)))
+    if 'strangle' in kinds:
+        blocks.append(_Block('strangle', [low_put, high_call], (1, 1), (False, True)))
+    if 'iron_condor' in kinds:
+        # (E, G, K, W): short put g, short call g + k, wings w further out
+        body = g[:, None, None] + width[None, :, None]
+        blocks.append(_Block('iron_condor', [
+            puts[:, g[:, None, None] - wing[None, None, :]],
+            puts[:, g, None, None],
+            calls[:, body],
+            calls[:, body + wing[None, None, :]],
+        ], (1, -1, -1, 1), (False, False, True, True)))
+    return blocks
+
+
+def _price(block: _Block, quotes: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Net prices, greeks, max loss/profit and breakevens of one block, per share."""
+    legs, ratios, calls = block.legs, block.ratios, block.calls
+    n = legs.shape[1]
+    bid, ask = quotes['bid'], quotes['ask']
+    strikes = [quotes['strike'][rows] for rows in legs]
+
+    debit, mid_debit = np.zeros(n), np.zeros(n)
+    for rows, ratio in zip(legs, ratios):
+        debit += ratio * (ask if ratio > 0 else bid)[rows]
+        mid_debit += ratio * (bid[rows] + ask[rows]) / 2
+    out = {'debit': debit, 'mid_debit': mid_debit, 'width': strikes[-1] - strikes[0]}
+    for greek in GREEKS:
+        values = quotes[greek]
+        out[greek] = sum(ratio * values[rows] for rows, ratio in zip(legs, ratios))
+
+    # The payoff is linear between S=0 and the (ascending) leg strikes, and past the last strike
+    nodes = [np.zeros(n)] + strikes
+    values = []
+    for x in nodes:
+        value = -debit
+        for strike, ratio, call in zip(strikes, ratios, calls):
+            value = value + ratio * np.maximum(x - strike if call else strike - x, 0)
+        values.append(value)
+    slope = sum(ratio for ratio, call in zip(ratios, calls) if call)
+
+    low, high = np.full(n, np.nan), np.full(n, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for x0, x1, v0, v1 in zip(nodes, nodes[1:], values, values[1:]):
+            crossing = np.where((v0 < 0) != (v1 < 0), x0 - v0 * (x1 - x0) / (v1 - v0), np.nan)
+            low, high = np.fmin(low, crossing), np.fmax(high, crossing)
+        if slope:
+            last = values[-1]
+            tail = np.where((last < 0) == (slope > 0), nodes[-1] - last / slope, np.nan)
+            low, high = np.fmin(low, tail), np.fmax(high, tail)
+
+    out['max_loss'] = np.full(n, np.inf) if slope < 0 else -np.minimum.reduce(values)
+    out['max_profit'] = np.full(n, np.inf) if slope > 0 else np.maximum.reduce(values)
+    out['breakeven_low'], out['breakeven_high'] = low, high
+    return out
+
+
+class SpreadSet:
+    """
+    Every enumerated spread of one underlying as struct-of-arrays.
+
+    `legs` (n x MAX_LEGS) holds chain rows and `ratios` signed leg ratios
+    (+1 buy, -1 sell, 0 unused); `columns` maps each metric to an n-array.
+    """
+
+    def __init__(self, chain: pd.DataFrame, legs: np.ndarray, ratios: np.ndarray,
+                 columns: Dict[str, np.ndarray]):
+        self.chain = chain
+        self.legs = legs
+        self.ratios = ratios
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.legs)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def prune(self, rules: Optional[RuleSet] = None, limits: Optional[RiskLimits] = None,
+              quantity: int = 1) -> np.ndarray:
+        """
+        Mask of candidates passing every strategy in `rules` and the risk limits.
+
+        Args:
+            rules: Rules over the spread columns, e.g. {'kind': {'in': [...]}, 'dte': {...}}
+            limits: Risk limits (default RiskLimits.from_env())
+            quantity: Combos per order
+        """
+        mask = within_loss_limit(self.columns['max_loss'], limits or RiskLimits.from_env(), quantity)
+        if rules is not None and len(self):
+            mask &= rules.evaluate(ChainColumns(self.columns)).all(axis=0)
+        return mask
+
+    def best(self, mask: Optional[np.ndarray] = None, by: str = 'reward_risk') -> Optional[int]:
+        """
+        Index of the candidate with the highest `by` among `mask`, or None.
+
+        Candidates whose score is NaN or infinite are never picked. reward_risk is
+        NaN for unbounded max_profit, so straddles and strangles are ranked on
+        their own by another column, e.g. best(spreads['kind'] == 'straddle', by='vega').
+        """
+        score = np.asarray(self.columns[by], dtype=np.float64)
+        valid = np.isfinite(score) if mask is None else mask & np.isfinite(score)
+        score = np.where(valid, score, -np.inf)
+        if not len(score):
+            return None
+        i = int(np.argmax(score))
+        return i if score[i] > -np.inf else None
+
+    def order_legs(self, i: int) -> List[OrderLeg]:
+        """OrderLegs of candidate i, for place_combo_order()."""
+        chain, legs = self.chain, []
+        for row, ratio in zip(self.legs[i], self.ratios[i]):
+            if ratio == 0:
+                continue
+            contract = OptionContract(chain['symbol'].iat[row], str(chain['expiry'].iat[row]),
+                                      chain['right'].iat[row], float(chain['strike'].iat[row]))
+            legs.append(OrderLeg(contract, 'BUY' if ratio > 0 else 'SELL', abs(int(ratio))))
+        return legs
+
+    def describe(self, i: int) -> str:
+        c = self.columns
+        legs = ' / '.join(f"{'+' if leg.action == 'BUY' else '-'}{leg.contract.right}{leg.contract.strike:g}"
+                          for leg in self.order_legs(i))
+        return (f"{c['kind'][i]} {c['expiry'][i]} [{legs}] debit {c['debit'][i]:.2f} "
+                f"max loss ${c['max_loss'][i]:,.0f} max profit ${c['max_profit'][i]:,.0f} "
+                f"breakeven {c['breakeven_low'][i]:.2f}-{c['breakeven_high'][i]:.2f}")
+
+
+def build_spreads(chain: pd.DataFrame, kinds: Sequence[str] = SPREAD_KINDS,
+                  max_width: int = SPREAD_MAX_WIDTH, wing_width: int = SPREAD_WING_WIDTH,
+                  leg_rules: Optional[RuleSet] = None, today: Optional[date] = None) -> SpreadSet:
+    """
+    Enumerate and price every spread of the requested kinds on one underlying.
+
+    Args:
+        chain: DataFrame with OPTION_CHAIN_COLUMNS for a single underlying
+        kinds: Subset of SPREAD_KINDS
+        max_width: Max strike steps between verticals' legs, strangles' legs and condor short strikes
+        wing_width: Max strike steps from a condor's short strikes to its wings
+        leg_rules: Contracts usable as legs must pass every strategy (default DEFAULT_LEG_RULES)
+        today: As-of date for dte
+
+    Returns:
+        SpreadSet with columns kind, expiry, dte, width, debit (natural; negative is a
+        credit), mid_debit, net greeks, max_loss, max_profit, breakeven_low/high, reward_risk
+    """
+    unknown = set(kinds) - set(SPREAD_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown spread kinds {sorted(unknown)}; expected some of {SPREAD_KINDS}")
+    columns = ChainColumns(chain, today=today)
+    rules = leg_rules or compile_rules(DEFAULT_LEG_RULES)
+    eligible = rules.evaluate(columns).all(axis=0) if len(chain) else np.zeros(0, dtype=bool)
+    pad = max_width + wing_width
+    table, grid = _strike_table(columns, eligible, pad)
+    blocks = _enumerate(table, grid, pad, kinds, max_width, wing_width)
+
+    quotes = {name: np.asarray(columns[name], dtype=np.float64) for name in ('strike', 'bid', 'ask') + GREEKS}
+    priced = [_price(block, quotes) for block in blocks]
+    n = sum(block.legs.shape[1] for block in blocks)
+    legs = np.zeros((n, MAX_LEGS), dtype=np.int64)
+    ratios = np.zeros((n, MAX_LEGS), dtype=np.int8)
+    start = 0
+    for block in blocks:
+        end = start + block.legs.shape[1]
+        count = len(block.ratios)
+        legs[start:end, :count] = block.legs.T
+        legs[start:end, count:] = block.legs[0, :, None]  # unused legs repeat leg 0 with ratio 0
+        ratios[start:end, :count] = block.ratios
+        start = end
+
+    out = {
+        'kind': np.repeat(np.array([block.kind for block in blocks], dtype=object),
+                          [block.legs.shape[1] for block in blocks]),
+        'expiry': columns['expiry'][legs[:, 0]],
+        'dte': columns['dte'][legs[:, 0]],
+    }
+    for name in ('width', 'debit', 'mid_debit') + GREEKS + ('max_loss', 'max_profit',
+                                                            'breakeven_low', 'breakeven_high'):
+        out[name] = np.concatenate([p[name] for p in priced]) if priced else np.zeros(0)
+    out['max_loss'] *= CONTRACT_MULTIPLIER
+    out['max_profit'] *= CONTRACT_MULTIPLIER
+    # Only a bounded profit over a positive, bounded loss ranks: unbounded payoffs
+    # (straddles, strangles) and quotes implying a riskless profit get NaN
+    rankable = (out['max_loss'] > 0) & np.isfinite(out['max_loss']) & np.isfinite(out['max_profit'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['reward_risk'] = np.where(rankable, out['max_profit'] / out['max_loss'], np.nan)
+    return SpreadSet(chain, legs, ratios, out)
@@ -0,0 +1,187 @@
+# utils/bar_cache.py
+
+"""
+Daily bar cache for feature inputs.
+
+Each symbol's daily bars are kept in memory and in one .npy file per symbol
+under BAR_CACHE_DIR. A request for a symbol downloads only the tail: bars from
+the last cached session (which may have been partial) to today. It does so at
+most once per BAR_REFRESH_SEC. Concurrent requests for the same symbol share
+one download. Other requests are answered from memory, so the live loop does
+not re-download history every cycle.
+
+    bars = BarCache.from_env(broker)
+    prev = bars.prev_close(['AAPL', 'SPY'])   # previous session's close per symbol
+
+Without a broker (or with one that has no historical bars, like ReplayBroker)
+the cache serves what is on disk, so a replay or backtest sees the bars the
+live run saw.
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+from utils.helpers import session_timestamp
+
+BAR_CACHE_DIR = os.getenv('BAR_CACHE_DIR', 'data/bars')
+BAR_HISTORY_DAYS = int(os.getenv('BAR_HISTORY_DAYS', '400'))
+BAR_REFRESH_SEC = float(os.getenv('BAR_REFRESH_SEC', '900'))
+
+BAR_DTYPE = np.dtype([('timestamp', '<f8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                      ('close', '<f8'), ('volume', '<f8')])
+_EMPTY = np.zeros(0, dtype=BAR_DTYPE)
+
+
+def _save_bars(path: str, bars: np.ndarray) -> None:
+    # Write-then-rename, so a reader (or another shard worker) never sees a partial file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, bars)
+    os.replace(tmp, path)
+
+
+def _frame_to_bars(frame) -> np.ndarray:
+    bars = np.zeros(len(frame), dtype=BAR_DTYPE)
+    for name in BAR_DTYPE.names:
+        bars[name] = frame[name].to_numpy(dtype=np.float64)
+    return bars
+
+
+class BarCache:
+    """
+    In-memory and on-disk daily bars per symbol, refreshed incrementally from a broker.
+
+    Thread-safe.
+    """
+
+    def __init__(self, broker=None, directory: str = BAR_CACHE_DIR, history_days: int = BAR_HISTORY_DAYS,
+                 refresh_sec: float = BAR_REFRESH_SEC):
+        """
+        Args:
+            broker: Broker implementing fetch_historical_bars(); None serves the disk cache only
+            directory: Cache directory (one <SYMBOL>.npy per symbol)
+            history_days: Calendar days of history fetched for a symbol not yet cached
+            refresh_sec: Min seconds between tail downloads for a symbol
+        """
+        self.broker = broker
+        self.directory = directory
+        self.history_days = history_days
+        self.refresh_sec = refresh_sec
+        self.stats = {'downloads': 0, 'bars_downloaded': 0, 'coalesced': 0, 'disk_loads': 0}
+        self._bars: Dict[str, np.ndarray] = {}
+        self._refreshed: Dict[str, float] = {}  # symbol -> monotonic time of its last download
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._supported = broker is not None
+
+    @classmethod
+    def from_env(cls, broker=None) -> 'BarCache':
+        """A cache in BAR_CACHE_DIR with BAR_HISTORY_DAYS and BAR_REFRESH_SEC."""
+        return cls(broker, BAR_CACHE_DIR, BAR_HISTORY_DAYS, BAR_REFRESH_SEC)
+
+    def path(self, symbol: str) -> str:
+        return os.path.join(self.directory, f"{symbol}.npy")
+
+    def _cached(self, symbol: str) -> np.ndarray:
+        bars = self._bars.get(symbol)
+        if bars is None:
+            path = self.path(symbol)
+            bars = np.load(path) if os.path.exists(path) else _EMPTY
+            with self._lock:
+                self.stats['disk_loads'] += 1
+                bars = self._bars.setdefault(symbol, bars)
+        return bars
+
+    def bars(self, symbol: str, refresh: bool = True) -> np.ndarray:
+        """
+        A symbol's cached bars (BAR_DTYPE, session order), first downloading
+        the missing tail if the refresh interval has passed.
+        """
+        if refresh and self._supported and \
+                time.monotonic() - self._refreshed.get(symbol, float('-inf')) >= self.refresh_sec:
+            return self._refresh(symbol)
+        return self._cached(symbol)
+
+    def prefetch(self, symbols: List[str]) -> None:
+        """Bring every symbol's bars up to date."""
+        for symbol in symbols:
+            self.bars(symbol)
+
+    def _refresh(self, symbol: str) -> np.ndarray:
+        with self._lock:
+            future = self._inflight.get(symbol)
+            owner = future is None
+            if owner:
+                future = self._inflight[symbol] = Future()
+            else:
+                self.stats['coalesced'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            bars = self._download_tail(symbol)
+            future.set_result(bars)
+            return bars
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[symbol]
+
+    def _download_tail(self, symbol: str) -> np.ndarray:
+        cached = self._cached(symbol)
+        now = time.time()
+        if len(cached):
+            start = cached['timestamp'][-1]  # the last cached session may have been partial
+        else:
+            start = session_timestamp(datetime.fromtimestamp(now - self.history_days * 86400))
+
+        try:
+            new = _frame_to_bars(self.broker.fetch_historical_bars(symbol, start))
+        except NotImplementedError as e:
+            print(f"⚠️ {e}; serving cached bars only")
+            self._supported = False
+            return cached
+        except Exception as e:
+            print(f"❌ Error fetching bars for {symbol}: {e}")
+            new = None
+        finally:
+            self._refreshed[symbol] = time.monotonic()
+        if new is None or not len(new):
+            return cached
+
+        bars = np.concatenate([cached[cached['timestamp'] < new['timestamp'][0]], new])
+        with self._lock:
+            self._bars[symbol] = bars
+            self.stats['downloads'] += 1
+            self.stats['bars_downloaded'] += len(new)
+        if len(bars) != len(cached) or not np.array_equal(bars, cached):
+            os.makedirs(self.directory, exist_ok=True)
+            _save_bars(self.path(symbol), bars)
+        return bars
+
+    def prev_close(self, symbols: List[str], as_of: Optional[float] = None, refresh: bool = True) -> np.ndarray:
+        """
+        Close of each symbol's last session before the (local) date of `as_of`.
+
+        Args:
+            symbols: Stock symbols
+            as_of: Unix seconds (default now)
+            refresh: Download missing tails first when due; False answers from memory
+
+        Returns:
+            float64 array, NaN where no earlier session is cached
+        """
+        cutoff = session_timestamp(datetime.fromtimestamp(time.time() if as_of is None else as_of))
+        closes = np.full(len(symbols), np.nan)
+        for i, symbol in enumerate(symbols):
+            bars = self.bars(symbol, refresh)
+            last = int(np.searchsorted(bars['timestamp'], cutoff, 'left')) - 1
+            if last >= 0:
+                closes[i] = bars['close'][last]
+        return closes
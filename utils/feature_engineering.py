@@ -1,16 +1,104 @@
 # utils/feature_engineering.py
 
 import pandas as pd
+from utils.rolling_features import (
+    ROLLING_FEATURE_COLUMNS, FEATURE_CODE_VERSION as _ROLLING_VERSION, compute_rolling_features,
+)
 
-def prepare_features(df: pd.DataFrame):
-    df['underlying_return_1d'] = df['underlying_close'].pct_change(fill_method=None).fillna(0)
+# Feature name -> function(raw df) -> Series. Each feature is a separate function
+# so the feature store can version and cache it independently.
+FEATURES = {}
 
-    # Example normalization or clipping if needed
-    df['delta'] = df['delta'].clip(-1, 1)
-    df['gamma'] = df['gamma'].clip(0, 1)
-    df['vega'] = df['vega'].clip(0, 2)
-    df['theta'] = df['theta'].clip(-1, 0)
-    df['iv'] = df['iv'].fillna(df['iv'].mean())
+def feature(name):
+    def register(fn):
+        FEATURES[name] = fn
+        return fn
+    return register
 
-    feature_cols = ['delta', 'gamma', 'vega', 'theta', 'iv', 'underlying_return_1d', 'volume']
-    return df[feature_cols]
+
+@feature('delta')
+def _delta(df):
+    return df['delta'].clip(-1, 1)
+
+
+@feature('gamma')
+def _gamma(df):
+    return df['gamma'].clip(0, 1)
+
+
+@feature('vega')
+def _vega(df):
+    return df['vega'].clip(0, 2)
+
+
+@feature('theta')
+def _theta(df):
+    return df['theta'].clip(-1, 0)
+
+
+@feature('iv')
+def _iv(df):
+    return df['iv'].fillna(df['iv'].mean())
+
+
+@feature('underlying_return_1d')
+def _underlying_return_1d(df):
+    # Live rows carry the previous session's close (utils/bar_cache.py); history
+    # rows are per-symbol series in time order, like the rolling features
+    close = df['underlying_close']
+    returns = (close.groupby(df['symbol'], sort=False).pct_change(fill_method=None) if 'symbol' in df
+               else close.pct_change(fill_method=None))
+    if 'prev_close' in df:
+        returns = (close / df['prev_close'] - 1).fillna(returns)
+    return returns.fillna(0)
+
+
+@feature('volume')
+def _volume(df):
+    return df['volume']
+
+
+def _rolling_feature(name):
+    def compute(df):
+        return compute_rolling_features(df, [name])[name]
+    # Rolling features share kernels, so they are versioned by their whole module
+    compute.code_version = _ROLLING_VERSION
+    return compute
+
+
+# Per-symbol rolling features (utils/rolling_features.py). They need each
+# symbol's history in row order, so in the feature store a partition's windows
+# start at its own first row.
+for _name in ROLLING_FEATURE_COLUMNS:
+    FEATURES[_name] = _rolling_feature(_name)
+
+
+FEATURE_COLUMNS = ['delta', 'gamma', 'vega', 'theta', 'iv', 'underlying_return_1d', 'volume']
+EXTENDED_FEATURE_COLUMNS = FEATURE_COLUMNS + ROLLING_FEATURE_COLUMNS
+
+
+def compute_features(df: pd.DataFrame, columns=None, rolling_state=None) -> pd.DataFrame:
+    """
+    Compute the named features from raw rows without modifying df.
+
+    Rolling features are computed together in one pass; with a
+    RollingFeatureState they come from its per-symbol live history instead.
+    """
+    columns = FEATURE_COLUMNS if columns is None else columns
+    rolling = [name for name in columns if name in ROLLING_FEATURE_COLUMNS]
+    if rolling:
+        rolling = (rolling_state.update(df, rolling) if rolling_state is not None
+                   else compute_rolling_features(df, rolling))
+    return pd.DataFrame(
+        {name: rolling[name] if name in ROLLING_FEATURE_COLUMNS else FEATURES[name](df) for name in columns},
+        index=df.index,
+    )
+
+
+def prepare_features(df: pd.DataFrame, columns=None, rolling_state=None):
+    # Features are written back into df, as callers read e.g. underlying_return_1d from it
+    columns = FEATURE_COLUMNS if columns is None else list(columns)
+    features = compute_features(df, columns, rolling_state)
+    for name in columns:
+        df[name] = features[name]
+    return df[columns]
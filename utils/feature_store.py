@@ -0,0 +1,214 @@
+# utils/feature_store.py
+
+"""
+Versioned, memory-mapped feature matrices.
+
+Raw data files are partitions, identified by a hash of their contents. Each
+feature column is computed once per (partition, feature-code version) and
+kept as a .npy file; a feature's version is a hash of its function's source,
+so editing one feature recomputes only that column, and appending a partition
+computes features only for the new file. Full matrices are materialized per
+(dataset version, feature set version) and loaded with mmap, so training and
+backtest sweeps read them without recomputing or copying.
+
+Usage:
+    python -m utils.feature_store data/historical_data.csv
+"""
+
+import os
+import sys
+import json
+import inspect
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from utils.feature_engineering import FEATURES, FEATURE_COLUMNS
+
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'data/features')
+_HASH_CHUNK = 1 << 20
+
+
+def feature_version(name: str) -> str:
+    """Hash of the feature function's source code, unless it declares a code_version."""
+    fn = FEATURES[name]
+    if getattr(fn, 'code_version', None):
+        return fn.code_version
+    source = inspect.getsource(fn)
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1('\0'.join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def _save_npy(path: str, array: np.ndarray) -> None:
+    # Write-then-rename, so concurrent sweeps never see a partial file
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'wb') as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+@dataclass
+class FeatureMatrix:
+    """
+    Features for a dataset: X is a read-only (rows x columns) memmap, y the
+    memmapped target column if one was requested.
+    """
+    X: np.ndarray
+    columns: List[str]
+    y: Optional[np.ndarray] = None
+    version: str = ''
+    partitions: List[str] = field(default_factory=list)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wrap X as a DataFrame (no copy), for models fitted on named features."""
+        return pd.DataFrame(self.X, columns=self.columns, copy=False)
+
+
+class FeatureStore:
+    """
+    Caches feature columns per raw-data partition and feature version under `root`:
+
+        partitions/<partition id>/<column>@<version>.npy
+        matrices/<matrix id>.X.npy, .y.npy, .json
+    """
+
+    def __init__(self, root: str = FEATURE_STORE_DIR, columns: Sequence[str] = FEATURE_COLUMNS):
+        self.root = root
+        self.columns = list(columns)
+        self.stats = {'partitions_read': 0, 'columns_computed': 0, 'matrices_built': 0}
+        self._index_path = os.path.join(root, 'index.json')
+        self._index = None
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self._index_path) as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._index = {}
+        return self._index
+
+    def partition_id(self, path: str, dropna: bool = False) -> str:
+        """
+        Content hash of a raw data file (re-hashed only when its size or mtime changes).
+        """
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        index = self._load_index()
+        entry = index.get(key)
+        if entry is None or entry['size'] != st.st_size or entry['mtime_ns'] != st.st_mtime_ns:
+            sha = hashlib.sha1()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                    sha.update(chunk)
+            entry = index[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha1': sha.hexdigest()}
+            os.makedirs(self.root, exist_ok=True)
+            tmp = f"{self._index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp, self._index_path)
+        return entry['sha1'][:16] + ('-dropna' if dropna else '')
+
+    def _column_path(self, partition: str, name: str, version: str) -> str:
+        return os.path.join(self.root, 'partitions', partition, f"{name}@{version}.npy")
+
+    def _ensure_partition(self, path: str, partition: str, dropna: bool,
+                          versions: dict, target: Optional[str]) -> int:
+        """Compute and store whatever columns of one partition are missing; return its row count."""
+        wanted = dict(versions)
+        if target is not None:
+            wanted[target] = 'raw'
+        missing = [n for n, v in wanted.items() if not os.path.exists(self._column_path(partition, n, v))]
+        if missing:
+            data = pd.read_csv(path)
+            if dropna:
+                data = data.dropna()
+            self.stats['partitions_read'] += 1
+            os.makedirs(os.path.dirname(self._column_path(partition, 'x', 'x')), exist_ok=True)
+            for name in missing:
+                values = data[name] if name == target else FEATURES[name](data)
+                _save_npy(self._column_path(partition, name, wanted[name]), values.to_numpy())
+                self.stats['columns_computed'] += 1
+        first = next(iter(wanted.items()))
+        return np.load(self._column_path(partition, *first), mmap_mode='r').shape[0]
+
+    def load(self, paths: Union[str, Sequence[str]], target: Optional[str] = 'direction',
+             dropna: bool = False) -> FeatureMatrix:
+        """
+        Return the feature matrix for the concatenation of `paths`, building only what is not cached.
+
+        Args:
+            paths: Raw CSV file(s); each file is one partition
+            target: Raw column to return as y (None for features only)
+            dropna: Drop rows with any missing raw value before computing features
+        """
+        paths = [paths] if isinstance(paths, str) else list(paths)
+        versions = {name: feature_version(name) for name in self.columns}
+        partitions = [self.partition_id(p, dropna) for p in paths]
+        matrix_id = _digest(*partitions, *(f"{n}@{v}" for n, v in versions.items()), target)
+        base = os.path.join(self.root, 'matrices', matrix_id)
+
+        if not os.path.exists(base + '.json'):
+            self._build_matrix(base, paths, partitions, versions, target, dropna)
+
+        X = np.load(base + '.X.npy', mmap_mode='r')
+        y = np.load(base + '.y.npy', mmap_mode='r') if target is not None else None
+        return FeatureMatrix(X=X, columns=list(self.columns), y=y, version=matrix_id, partitions=partitions)
+
+    def _build_matrix(self, base: str, paths: List[str], partitions: List[str],
+                      versions: dict, target: Optional[str], dropna: bool) -> None:
+        rows = [self._ensure_partition(path, pid, dropna, versions, target)
+                for path, pid in zip(paths, partitions)]
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+
+        # Fill the matrix on disk, so it never has to fit in memory
+        tmp = f"{base}.X.npy.{os.getpid()}.tmp"
+        X = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float64, shape=(sum(rows), len(self.columns)))
+        ys = []
+        offset = 0
+        for pid, n in zip(partitions, rows):
+            for j, (name, version) in enumerate(versions.items()):
+                X[offset:offset + n, j] = np.load(self._column_path(pid, name, version), mmap_mode='r')
+            if target is not None:
+                ys.append(np.load(self._column_path(pid, target, 'raw')))
+            offset += n
+        X.flush()
+        del X
+        os.replace(tmp, base + '.X.npy')
+        if target is not None:
+            _save_npy(base + '.y.npy', np.concatenate(ys) if ys else np.empty(0))
+        manifest = {
+            'columns': [f"{n}@{v}" for n, v in versions.items()],
+            'target': target,
+            'dropna': dropna,
+            'partitions': [{'id': pid, 'path': path, 'rows': n} for pid, path, n in zip(partitions, paths, rows)],
+        }
+        tmp = f"{base}.json.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, base + '.json')  # the manifest is written last and marks the matrix complete
+        self.stats['matrices_built'] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize feature matrices for raw data files")
+    parser.add_argument('paths', nargs='+', help="raw CSV partitions")
+    parser.add_argument('--root', default=FEATURE_STORE_DIR)
+    parser.add_argument('--dropna', action='store_true')
+    args = parser.parse_args()
+
+    store = FeatureStore(args.root)
+    features = store.load(args.paths, dropna=args.dropna)
+    print(f"✅ Feature matrix {features.version}: {features.X.shape[0]} rows x {features.X.shape[1]} features")
+    print(f"   read {store.stats['partitions_read']} partitions, computed {store.stats['columns_computed']} columns")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,32 +2,29 @@
 
 import pandas as pd
 import numpy as np
-import random
 
-def generate_fake_option_data(num_rows=1000):
-    symbols = ['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMZN']
-    data = []
+def generate_fake_option_data(num_rows=1000, seed=None):
+    """
+    Random option rows in the historical_data.csv layout.
 
-    for _ in range(num_rows):
-        symbol = random.choice(symbols)
-        delta = round(np.clip(np.random.normal(0.5, 0.2), -1, 1), 2)
-        gamma = round(np.random.uniform(0.01, 0.15), 3)
-        vega = round(np.random.uniform(0.05, 0.3), 3)
-        theta = round(np.random.uniform(-0.1, -0.01), 3)
-        iv = round(np.random.uniform(0.15, 0.5), 3)
-        close = round(np.random.uniform(100, 1000), 2)
-        volume = int(np.random.uniform(500, 5000))
-        direction = np.random.choice([0, 1], p=[0.45, 0.55])
+    Args:
+        num_rows: Number of rows
+        seed: Seed for a reproducible dataset (None = different every call)
+    """
+    rng = np.random.default_rng(seed)
+    symbols = np.array(['AAPL', 'MSFT', 'TSLA', 'NVDA', 'AMZN'])
 
-        data.append([
-            symbol, delta, gamma, vega, theta, iv, close, volume, direction
-        ])
-
-    df = pd.DataFrame(data, columns=[
-        'symbol', 'delta', 'gamma', 'vega', 'theta',
-        'iv', 'underlying_close', 'volume', 'direction'
-    ])
-    return df
+    return pd.DataFrame({
+        'symbol': symbols[rng.integers(0, len(symbols), num_rows)],
+        'delta': np.round(np.clip(rng.normal(0.5, 0.2, num_rows), -1, 1), 2),
+        'gamma': np.round(rng.uniform(0.01, 0.15, num_rows), 3),
+        'vega': np.round(rng.uniform(0.05, 0.3, num_rows), 3),
+        'theta': np.round(rng.uniform(-0.1, -0.01, num_rows), 3),
+        'iv': np.round(rng.uniform(0.15, 0.5, num_rows), 3),
+        'underlying_close': np.round(rng.uniform(100, 1000, num_rows), 2),
+        'volume': rng.uniform(500, 5000, num_rows).astype(int),
+        'direction': rng.choice([0, 1], size=num_rows, p=[0.45, 0.55]),
+    })
 
 if __name__ == "__main__":
     df = generate_fake_option_data(1000)
@@ -1,6 +1,10 @@
 # utils/helpers.py
 
-from datetime import datetime, timedelta
+import re
+import calendar
+from datetime import datetime, timedelta, timezone
+
+_OCC_RE = re.compile(r'^([A-Z][A-Z0-9.]{0,5})(\d{6})([CP])(\d{8})$')
 
 def get_next_friday():
     today = datetime.today()
@@ -9,3 +13,49 @@ def get_next_friday():
         days_ahead += 7
     next_friday = today + timedelta(days=days_ahead)
     return next_friday.strftime('%Y%m%d')
+
+
+def parse_occ_symbol(occ_symbol):
+    """
+    Split an OCC option symbol (e.g. AAPL240119C00150000) into
+    (underlying, expiry 'YYYYMMDD', right 'C'/'P', strike), or return None.
+    """
+    match = _OCC_RE.match(occ_symbol.replace(' ', ''))
+    if match is None:
+        return None
+    root, yymmdd, right, strike = match.groups()
+    return root, '20' + yymmdd, right, int(strike) / 1000
+
+
+def build_occ_symbol(underlying, expiry, right, strike):
+    """
+    Build an OCC option symbol, e.g. ('AAPL', '20240119', 'C', 150) -> AAPL240119C00150000.
+
+    expiry may be 'YYYYMMDD' or 'YYYY-MM-DD'; right may be 'C'/'P' or 'CALL'/'PUT'.
+    """
+    expiry = expiry.replace('-', '')
+    right = right.upper()[0]
+    if len(expiry) != 8 or not expiry.isdigit() or right not in ('C', 'P'):
+        raise ValueError(f"Invalid option contract: {underlying} {expiry} {right} {strike}")
+    strike_thousandths = int(round(float(strike) * 1000))
+    if not 0 < strike_thousandths < 10 ** 8:
+        raise ValueError(f"Strike out of OCC range: {strike}")
+    return f"{underlying.upper()}{expiry[2:]}{right}{strike_thousandths:08d}"
+
+
+def session_timestamp(day):
+    """
+    Timestamp of a daily bar: its session date at 00:00 UTC, in Unix seconds.
+
+    day may be a date, a datetime (its date is used) or 'YYYYMMDD' / 'YYYY-MM-DD'.
+    """
+    if isinstance(day, str):
+        day = datetime.strptime(day.replace('-', ''), '%Y%m%d')
+    if isinstance(day, datetime):
+        day = day.date()
+    return float(calendar.timegm(day.timetuple()))
+
+
+def session_date(ts):
+    """Session date of a daily bar timestamp (see session_timestamp)."""
+    return datetime.fromtimestamp(ts, timezone.utc).date()
@@ -0,0 +1,148 @@
+# utils/perf_ring.py
+
+import os
+import time
+import threading
+import numpy as np
+import pandas as pd
+from typing import Optional, Iterable
+
+PERF_RING_PATH = 'logs/perf_ring.bin'
+DEFAULT_CAPACITY = 200_000
+
+# Metric ids are stored as uint16 on disk; only append to this tuple so that
+# existing ring files stay readable.
+METRICS = (
+    'fetch_ms',          # data fetch stage latency
+    'predict_ms',        # feature + inference stage latency
+    'execute_ms',        # signal filtering + order submission stage latency
+    'cycle_ms',          # full cycle latency
+    'symbols',           # symbols processed in the cycle
+    'order_ack_ms',      # order submit -> broker ack event (one sample per order, event-driven brokers only)
+    'model_cache_hit',   # model cache hits during the cycle
+    'model_cache_miss',  # model cache misses during the cycle
+    'pred_cache_hit',    # prediction cache hits during the cycle
+    'pred_cache_miss',   # prediction cache misses during the cycle
+    'reaction_ms',       # triggering quote -> orders decided (event-driven mode)
+    'order_fill_ms',     # order submit -> fully filled (one sample per order)
+    'signals_suppressed',  # signals dropped by cooldown/position throttling in the cycle
+    'shadow_ms',         # one shadow model scoring a cycle's batch, off the critical path
+    'shadow_skipped',    # shadow models skipped because their previous batch was still running
+    'broker_msgs',       # messages sent to the broker since the previous sample
+    'broker_msg_util',   # those messages as a fraction of the broker's message-rate limit
+    'broker_order_wait_ms',  # time orders waited for rate-limit tokens since the previous sample
+    'broker_data_wait_ms',   # time data requests waited for rate-limit tokens
+    'md_lines',          # market data lines in use at the sample
+    'warmup_ms',         # pre-market warm-up, one sample per process start
+    'state_snapshot_ms',  # writing a crash-recovery snapshot (one sample per snapshot)
+    'state_restore_ms',   # restoring the snapshot and replaying the log at startup
+    'order_submit_ms',   # placing one order: the broker submit call(s), retries included
+)
+METRIC_IDS = {name: i for i, name in enumerate(METRICS)}
+
+_MAGIC = b'PRF1'
+_HEADER = np.dtype([('magic', 'S4'), ('capacity', '<u4'), ('count', '<u8')])
+_RECORD = np.dtype([('ts', '<f8'), ('metric', '<u2'), ('value', '<f4')])
+
+
+class PerfRing:
+    """
+    Fixed-size on-disk ring of (timestamp, metric, value) samples.
+
+    The file is a small header followed by `capacity` packed 14-byte records and
+    is memory-mapped, so the trading process appends without rewriting the file
+    and the dashboard reads the latest window without scanning log files.
+    """
+
+    def __init__(self, path: str = PERF_RING_PATH, capacity: int = DEFAULT_CAPACITY,
+                 readonly: bool = False):
+        """
+        Open (or create) a ring file.
+
+        Args:
+            path: Ring file location
+            capacity: Number of samples kept before the oldest are overwritten
+                (ignored when opening an existing file)
+            readonly: Open for reading only; the file must already exist
+        """
+        self.path = path
+        if not os.path.exists(path):
+            if readonly:
+                raise FileNotFoundError(path)
+            self._create(path, capacity)
+
+        mode = 'r' if readonly else 'r+'
+        self._header = np.memmap(path, dtype=_HEADER, mode=mode, shape=(1,))
+        if self._header['magic'][0] != _MAGIC:
+            raise ValueError(f"Not a perf ring file: {path}")
+        self.capacity = int(self._header['capacity'][0])
+        self._records = np.memmap(path, dtype=_RECORD, mode=mode,
+                                  offset=_HEADER.itemsize, shape=(self.capacity,))
+        # Order events are recorded from broker callback threads
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _create(path: str, capacity: int) -> None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        header = np.zeros(1, dtype=_HEADER)
+        header['magic'] = _MAGIC
+        header['capacity'] = capacity
+        with open(path, 'wb') as f:
+            f.write(header.tobytes())
+            f.truncate(_HEADER.itemsize + capacity * _RECORD.itemsize)
+
+    @property
+    def count(self) -> int:
+        """Total number of samples ever written."""
+        return int(self._header['count'][0])
+
+    def record(self, metric: str, value: float, ts: Optional[float] = None) -> None:
+        """Append a single sample."""
+        self.record_many([(metric, value)], ts=ts)
+
+    def record_many(self, samples: Iterable, ts: Optional[float] = None) -> None:
+        """
+        Append several samples sharing one timestamp.
+
+        Args:
+            samples: Iterable of (metric_name, value) pairs
+            ts: Unix timestamp (defaults to now)
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            count = self.count
+            for metric, value in samples:
+                self._records[count % self.capacity] = (ts, METRIC_IDS[metric], value)
+                count += 1
+            # Publish the new count only after the records are in place
+            self._header['count'] = count
+
+    def flush(self) -> None:
+        self._records.flush()
+        self._header.flush()
+
+    def read(self, window_sec: Optional[float] = None) -> pd.DataFrame:
+        """
+        Return the retained samples in write order as a DataFrame.
+
+        Args:
+            window_sec: Only return samples newer than this many seconds
+
+        Returns:
+            DataFrame with columns ts (datetime), metric (name) and value
+        """
+        count = self.count
+        n = min(count, self.capacity)
+        start = count % self.capacity if count > self.capacity else 0
+        idx = (start + np.arange(n)) % self.capacity
+        recs = np.array(self._records[idx])
+
+        if window_sec is not None:
+            recs = recs[recs['ts'] >= time.time() - window_sec]
+
+        metric_names = np.array(METRICS, dtype=object)
+        return pd.DataFrame({
+            'ts': pd.to_datetime(recs['ts'], unit='s'),
+            'metric': metric_names[recs['metric']],
+            'value': recs['value'].astype(float),
+        })
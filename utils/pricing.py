@@ -0,0 +1,47 @@
+# utils/pricing.py
+
+"""
+Black-Scholes pricing for the simulated option markets.
+
+The Alpaca stub (brokers/alpaca_stub.py) and SimBroker both list chains the
+same way, CHAIN_EXPIRIES weekly expiries of CHAIN_STRIKES strikes centred on
+spot, and price every contract with black_scholes().
+"""
+
+import math
+from typing import Dict
+
+CHAIN_EXPIRIES = 4
+CHAIN_STRIKES = 21
+RISK_FREE_RATE = 0.04
+
+
+def norm_cdf(x: float) -> float:
+    return 0.5 * (1 + math.erf(x / math.sqrt(2)))
+
+
+def black_scholes(spot: float, strike: float, years: float, iv: float, right: str) -> Dict[str, float]:
+    """Price and greeks (theta per day, vega per vol point) of a European option."""
+    sqrt_t = math.sqrt(years)
+    d1 = (math.log(spot / strike) + (RISK_FREE_RATE + iv * iv / 2) * years) / (iv * sqrt_t)
+    d2 = d1 - iv * sqrt_t
+    pdf = math.exp(-d1 * d1 / 2) / math.sqrt(2 * math.pi)
+    discount = math.exp(-RISK_FREE_RATE * years)
+    if right == 'C':
+        price = spot * norm_cdf(d1) - strike * discount * norm_cdf(d2)
+        delta = norm_cdf(d1)
+        rho = strike * years * discount * norm_cdf(d2) / 100
+        theta = -spot * pdf * iv / (2 * sqrt_t) - RISK_FREE_RATE * strike * discount * norm_cdf(d2)
+    else:
+        price = strike * discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+        delta = norm_cdf(d1) - 1
+        rho = -strike * years * discount * norm_cdf(-d2) / 100
+        theta = -spot * pdf * iv / (2 * sqrt_t) + RISK_FREE_RATE * strike * discount * norm_cdf(-d2)
+    return {
+        'price': max(price, 0.01),
+        'delta': delta,
+        'gamma': pdf / (spot * iv * sqrt_t),
+        'theta': theta / 365,
+        'vega': spot * pdf * sqrt_t / 100,
+        'rho': rho,
+    }
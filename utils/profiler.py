@@ -0,0 +1,293 @@
+# utils/profiler.py
+
+"""
+On-demand sampling profiler for the live trading process.
+
+A debugger cannot be attached to the trading loop without pausing it, so the
+loop installs a ProfilerHook instead. Sending the process SIGUSR1, or creating
+PROFILE_CONTROL_FILE, starts a profile that runs in a background thread while
+trading carries on:
+
+    kill -USR1 <pid>                       # PROFILE_SECONDS of sampling
+    echo 60 > logs/profile.request         # 60 seconds of sampling
+
+For that window, every thread's stack is read from sys._current_frames()
+every PROFILE_INTERVAL_MS. Nothing is instrumented, so the profiled threads
+only lose the GIL for the few microseconds a stack walk takes. tracemalloc is
+also running during the window; the one pause it adds is the allocation
+snapshot at the end, which holds the GIL for about 0.5µs per allocation made
+in the window and still alive. The results are written to PROFILE_DIR as:
+
+  profile-YYYYMMDD-HHMMSS.collapsed        one 'thread;frame;frame count' line
+                                           per stack (flamegraph.pl, speedscope)
+  profile-YYYYMMDD-HHMMSS.speedscope.json  one sampled profile per thread
+                                           (https://www.speedscope.app)
+  profile-YYYYMMDD-HHMMSS.alloc.txt        the PROFILE_ALLOC_TOP lines that
+                                           allocated the most memory in the window
+
+Only one profile runs at a time; a request while one is running is ignored.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', '1') == '1'
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs')
+PROFILE_CONTROL_FILE = os.getenv('PROFILE_CONTROL_FILE', 'logs/profile.request')
+PROFILE_SECONDS = float(os.getenv('PROFILE_SECONDS', '30'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_ALLOC_TOP = int(os.getenv('PROFILE_ALLOC_TOP', '25'))
+
+# How often the control file is checked
+_POLL_SEC = 1.0
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+def _stack(frame) -> Tuple[Frame, ...]:
+    """A frame's call stack, outermost first."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.relpath(filename) if os.path.isabs(filename) else filename}:{line})"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every other thread for a fixed time and writes the
+    collapsed-stack, speedscope and allocation files.
+    """
+
+    def __init__(self, out_dir: str = PROFILE_DIR, interval_ms: float = PROFILE_INTERVAL_MS,
+                 alloc_top: int = PROFILE_ALLOC_TOP):
+        """
+        Args:
+            out_dir: Directory the profile files are written to
+            interval_ms: Time between stack samples
+            alloc_top: Number of allocation sites in the .alloc.txt file (0 = no tracemalloc)
+        """
+        self.out_dir = out_dir
+        self.interval = interval_ms / 1000
+        self.alloc_top = alloc_top
+
+    def run(self, seconds: float) -> Dict[str, Any]:
+        """
+        Sample for `seconds` in the calling thread, then write the files.
+
+        Returns:
+            Dict with the number of samples, the sampled seconds, the mean cost of
+            one sample in microseconds, and the written 'files' by kind
+        """
+        own = threading.get_ident()
+        names = {}
+        counts: Counter = Counter()
+        started_tracing = False
+        if self.alloc_top and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+
+        samples, sampling = 0, 0.0
+        start = time.perf_counter()
+        deadline = start + seconds
+        try:
+            while True:
+                t0 = time.perf_counter()
+                if t0 >= deadline:
+                    break
+                frames = sys._current_frames()
+                if not names.keys() >= frames.keys():
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident != own:
+                        counts[(names.get(ident, str(ident)), _stack(frame))] += 1
+                del frames
+                samples += 1
+                sampling += time.perf_counter() - t0
+                time.sleep(max(0.0, self.interval - (time.perf_counter() - t0)))
+            elapsed = time.perf_counter() - start
+            allocations = tracemalloc.take_snapshot() if self.alloc_top else None
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+        stem = os.path.join(self.out_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}")
+        os.makedirs(self.out_dir, exist_ok=True)
+        files = {
+            'collapsed': self._write_collapsed(f"{stem}.collapsed", counts),
+            'speedscope': self._write_speedscope(f"{stem}.speedscope.json", counts, elapsed * 1000 / max(samples, 1)),
+        }
+        if allocations is not None:
+            files['alloc'] = self._write_allocations(f"{stem}.alloc.txt", allocations, elapsed)
+        return {
+            'samples': samples,
+            'seconds': elapsed,
+            'sample_us': sampling / max(samples, 1) * 1e6,
+            'files': files,
+        }
+
+    def _write_collapsed(self, path: str, counts: Counter) -> str:
+        with open(path, 'w') as f:
+            for (thread, stack), count in counts.most_common():
+                frames = ';'.join(_frame_label(frame).replace(';', ':') for frame in stack)
+                f.write(f"{thread.replace(';', ':').replace(' ', '_')};{frames} {count}\n")
+        return path
+
+    def _write_speedscope(self, path: str, counts: Counter, weight: float) -> str:
+        # Each sample weighs the measured time between samples, in ms
+        frame_ids: Dict[Frame, int] = {}
+        by_thread: Dict[str, Dict[str, list]] = {}
+        for (thread, stack), count in counts.items():
+            profile = by_thread.setdefault(thread, {'samples': [], 'weights': []})
+            profile['samples'].append([frame_ids.setdefault(frame, len(frame_ids)) for frame in stack])
+            profile['weights'].append(count * weight)
+        doc = {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': os.path.basename(path),
+            'exporter': 'utils/profiler.py',
+            'shared': {'frames': [{'name': name, 'file': filename, 'line': line}
+                                  for name, filename, line in frame_ids]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': thread,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(profile['weights']),
+                'samples': profile['samples'],
+                'weights': profile['weights'],
+            } for thread, profile in sorted(by_thread.items())],
+        }
+        with open(path, 'w') as f:
+            json.dump(doc, f)
+        return path
+
+    def _write_allocations(self, path: str, snapshot, elapsed: float) -> str:
+        snapshot = snapshot.filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                           tracemalloc.Filter(False, __file__)))
+        stats = snapshot.statistics('lineno')
+        with open(path, 'w') as f:
+            f.write(f"# Live allocations made during the {elapsed:.1f}s profile, "
+                    f"top {self.alloc_top} of {len(stats)} lines\n")
+            for stat in stats[:self.alloc_top]:
+                frame = stat.traceback[0]
+                f.write(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+        return path
+
+
+class ProfilerHook:
+    """
+    Starts a SamplingProfiler in a background thread on SIGUSR1 or when the
+    control file appears.
+
+        profiler = ProfilerHook.from_env()
+        if profiler is not None:
+            profiler.install()  # from the main thread, before the trading loop
+    """
+
+    def __init__(self, control_file: Optional[str] = PROFILE_CONTROL_FILE, seconds: float = PROFILE_SECONDS,
+                 profiler: Optional[SamplingProfiler] = None):
+        """
+        Args:
+            control_file: Path whose creation requests a profile; its content, if a
+                number, overrides the duration (None = signal only)
+            seconds: Default profile duration
+            profiler: SamplingProfiler to run (default env-configured)
+        """
+        self.control_file = control_file
+        self.seconds = seconds
+        self.profiler = profiler or SamplingProfiler()
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._requested = threading.Event()
+        self._request_seconds: Optional[float] = None
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, **kwargs) -> Optional['ProfilerHook']:
+        """A hook configured from the environment, or None when PROFILER_ENABLED=0."""
+        return cls(**kwargs) if PROFILER_ENABLED else None
+
+    def install(self) -> 'ProfilerHook':
+        """
+        Register the SIGUSR1 handler (main thread, POSIX only) and start watching
+        the control file.
+        """
+        if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, self._on_signal)
+        if self.control_file and os.path.exists(self.control_file):
+            os.remove(self.control_file)  # left over from an earlier run
+        self._watcher = threading.Thread(target=self._watch, name='profiler-hook', daemon=True)
+        self._watcher.start()
+        print(f"🔬 Profiler hook ready: kill -USR1 {os.getpid()} or create {self.control_file}")
+        return self
+
+    def _on_signal(self, signum, frame) -> None:
+        # Runs in the main thread between bytecodes: only wake the watcher
+        self._requested.set()
+
+    def request(self, seconds: Optional[float] = None) -> None:
+        """Ask for a profile (of `seconds`, default the hook's duration)."""
+        self._request_seconds = seconds
+        self._requested.set()
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            if self._requested.wait(_POLL_SEC):
+                self._requested.clear()
+                seconds, self._request_seconds = self._request_seconds, None
+                self._start(seconds or self.seconds)
+            elif self.control_file and os.path.exists(self.control_file):
+                self._start(self._read_control_file() or self.seconds)
+
+    def _read_control_file(self) -> Optional[float]:
+        try:
+            with open(self.control_file) as f:
+                content = f.read().strip()
+            os.remove(self.control_file)
+            return float(content) if content else None
+        except (OSError, ValueError):
+            return None
+
+    def _start(self, seconds: float) -> None:
+        if not self._running.acquire(blocking=False):
+            print("🔬 Profile already running; request ignored")
+            return
+        threading.Thread(target=self._profile, args=(seconds,), name='profiler', daemon=True).start()
+
+    def _profile(self, seconds: float) -> None:
+        try:
+            print(f"🔬 Profiling for {seconds:.0f}s...")
+            result = self.profiler.run(seconds)
+            self.last_result = result
+            print(f"🔬 Profile written: {result['files']['speedscope']} "
+                  f"({result['samples']} samples, {result['sample_us']:.0f}µs each)")
+        except Exception as e:
+            print(f"❌ Profile failed: {e}")
+        finally:
+            self._running.release()
+
+    def stop(self) -> None:
+        """Stop watching for requests; a running profile still finishes."""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
@@ -0,0 +1,405 @@
+# utils/rolling_features.py
+
+"""
+Per-symbol rolling-window features.
+
+Rows are grouped by symbol and taken in row order as time. Every kernel works
+on the rows sorted into contiguous symbol groups and is vectorized over all
+groups at once:
+
+  - sums, means and standard deviations from cumulative sums (O(n))
+  - rolling min/max with the van Herk/Gil-Werman block algorithm (O(n))
+  - rolling percentile by comparing each value with its window (O(n * window),
+    in bounded chunks)
+
+Windows at the start of a symbol's history use the rows available. Live
+scoring uses RollingFeatureState, which keeps the last LIVE_HISTORY daily
+closes per symbol and runs the same kernels, so live values agree with batch
+values over daily rows.
+"""
+
+import sys
+import math
+import inspect
+import hashlib
+from datetime import datetime
+from collections import deque
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from utils.helpers import session_timestamp
+
+RV_WINDOWS = (5, 21, 63)
+MOMENTUM_WINDOWS = (5, 21)
+IV_WINDOW = 252  # ~1 trading year, for IV rank / percentile
+SPREAD_RV_WINDOW = 21
+TRADING_DAYS = 252
+SKEW_DELTA = 0.25
+_PERCENTILE_CHUNK = 1 << 12
+
+ROLLING_FEATURE_COLUMNS = (
+    [f"rv_{w}" for w in RV_WINDOWS]
+    + [f"mom_{w}" for w in MOMENTUM_WINDOWS]
+    + ['iv_rank', 'iv_percentile', 'iv_rv_spread', 'skew_25d']
+)
+
+# Rows of history a symbol needs for its newest row to see full windows
+LIVE_HISTORY = max(max(RV_WINDOWS) + 1, max(MOMENTUM_WINDOWS) + 1, IV_WINDOW)
+
+
+class _Groups:
+    """Sort order that makes each symbol's rows contiguous, keeping row order within a symbol."""
+
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(keys)
+        # Stable sort on small unsigned ints is a radix sort in numpy
+        sort_codes = codes.astype(np.uint16) if len(uniques) < (1 << 16) - 1 else codes
+        self.order = np.argsort(sort_codes, kind='stable')
+        sorted_codes = codes[self.order]
+        n = len(codes)
+        is_start = np.ones(n, dtype=bool)
+        is_start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+        idx = np.arange(n)
+        self.pos = idx - np.maximum.accumulate(np.where(is_start, idx, 0)) if n else idx
+        self.group = np.cumsum(is_start) - 1
+        self.num_groups = int(self.group[-1]) + 1 if n else 0
+
+    def sort(self, values) -> np.ndarray:
+        return np.asarray(values, dtype=np.float64)[self.order]
+
+    def window_start(self, window: int) -> np.ndarray:
+        """Index of each row's first window row, clipped at the start of its group."""
+        return np.arange(len(self.pos)) - np.minimum(self.pos, window - 1)
+
+
+def _prefix_sums(x: np.ndarray):
+    """Prefix sums of x's non-NaN values and of their count, each with a leading 0."""
+    valid = ~np.isnan(x)
+    cs = np.zeros(len(x) + 1)
+    np.cumsum(np.where(valid, x, 0.0), out=cs[1:])
+    cn = np.zeros(len(x) + 1, dtype=np.int64)
+    np.cumsum(valid, out=cn[1:])
+    return cs, cn
+
+
+def _rolling_sum(prefix, start: np.ndarray):
+    """Sum and count of non-NaN values from `start` to each row, from _prefix_sums output."""
+    cs, cn = prefix
+    return cs[1:] - cs[start], cn[1:] - cn[start]
+
+
+def _rolling_std(prefix, prefix_sq, start: np.ndarray) -> np.ndarray:
+    s1, n = _rolling_sum(prefix, start)
+    s2, _ = _rolling_sum(prefix_sq, start)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (s2 - s1 * s1 / n) / (n - 1)
+    var = np.where(n >= 2, np.maximum(var, 0.0), np.nan)
+    return np.sqrt(var)
+
+
+def _padded(x: np.ndarray, groups: _Groups, window: int, fill: float):
+    """Copy x with window-1 `fill` values before each group, so windows never cross groups."""
+    offset = (window - 1) * (groups.group + 1)
+    padded = np.full(len(x) + (window - 1) * groups.num_groups, fill)
+    padded[np.arange(len(x)) + offset] = x
+    return padded, np.arange(len(x)) + offset
+
+
+def _rolling_max(x: np.ndarray, groups: _Groups, window: int) -> np.ndarray:
+    """Van Herk/Gil-Werman running max; NaN is ignored, an all-NaN window gives NaN."""
+    padded, at = _padded(np.where(np.isnan(x), -np.inf, x), groups, window, -np.inf)
+    blocks = -(-len(padded) // window)
+    padded = np.concatenate((padded, np.full(blocks * window - len(padded), -np.inf))).reshape(blocks, window)
+    prefix = np.maximum.accumulate(padded, axis=1).ravel()
+    suffix = np.maximum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    result = np.maximum(suffix[at - window + 1], prefix[at])
+    return np.where(np.isneginf(result), np.nan, result)
+
+
+def _rolling_min(x: np.ndarray, groups: _Groups, window: int) -> np.ndarray:
+    return -_rolling_max(-x, groups, window)
+
+
+def _rolling_percentile(x: np.ndarray, groups: _Groups, window: int) -> np.ndarray:
+    """Share of the window's non-NaN values (current row included) strictly below the current value."""
+    _, count = _rolling_sum(_prefix_sums(x), groups.window_start(window))
+    padded, at = _padded(x, groups, window, np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window)
+    below = np.empty(len(x))
+    # Chunks small enough that each gathered block of windows stays in cache
+    for lo in range(0, len(x), _PERCENTILE_CHUNK):
+        hi = lo + _PERCENTILE_CHUNK
+        below[lo:hi] = (windows[at[lo:hi] - window + 1] < x[lo:hi, None]).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(np.isnan(x), np.nan, below / count)
+
+
+def _log_returns(close: np.ndarray, groups: _Groups) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        log_close = np.where(close > 0, np.log(close), np.nan)
+    ret = np.full(len(close), np.nan)
+    ret[1:] = log_close[1:] - log_close[:-1]
+    ret[groups.pos == 0] = np.nan
+    return ret
+
+
+def chain_skew(chain: pd.DataFrame, target_delta: float = SKEW_DELTA) -> pd.Series:
+    """
+    25-delta skew per underlying from an option chain: IV of the put nearest
+    -25 delta minus IV of the call nearest +25 delta, in the nearest expiry.
+
+    Args:
+        chain: DataFrame with OPTION_CHAIN_COLUMNS (as from fetch_option_chain)
+
+    Returns:
+        Series indexed by symbol
+    """
+    chain = chain.dropna(subset=['iv', 'delta'])
+    if chain.empty:
+        return pd.Series(dtype=np.float64)
+    chain = chain[chain['expiry'] == chain.groupby('symbol')['expiry'].transform('min')]
+    distance = (chain['delta'].abs() - target_delta).abs()
+    nearest = chain.assign(distance=distance).sort_values('distance').drop_duplicates(['symbol', 'right'])
+    by_right = nearest.pivot(index='symbol', columns='right', values='iv')
+    if 'P' not in by_right or 'C' not in by_right:
+        return pd.Series(dtype=np.float64)
+    return (by_right['P'] - by_right['C']).dropna()
+
+
+def compute_rolling_features(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Compute rolling features for every row of df.
+
+    Uses 'symbol', 'underlying_close' and 'iv', plus 'skew_25d' if present
+    (see chain_skew). Missing values come out as 0, as in prepare_features.
+
+    Returns:
+        DataFrame with the requested ROLLING_FEATURE_COLUMNS, aligned with df
+    """
+    columns = list(ROLLING_FEATURE_COLUMNS if columns is None else columns)
+    groups = _Groups(df['symbol'].to_numpy())
+    out = {}
+
+    if any(c.startswith(('rv_', 'mom_')) or c == 'iv_rv_spread' for c in columns):
+        # One pair of prefix sums serves every window length
+        ret = _log_returns(groups.sort(df['underlying_close']), groups)
+        prefix, prefix_sq = _prefix_sums(ret), _prefix_sums(ret * ret)
+        rv = {}
+        for w in sorted(set(RV_WINDOWS) | {SPREAD_RV_WINDOW}):
+            if f"rv_{w}" in columns or (w == SPREAD_RV_WINDOW and 'iv_rv_spread' in columns):
+                rv[w] = _rolling_std(prefix, prefix_sq, groups.window_start(w)) * math.sqrt(TRADING_DAYS)
+                if f"rv_{w}" in columns:
+                    out[f"rv_{w}"] = rv[w]
+        for w in MOMENTUM_WINDOWS:
+            if f"mom_{w}" in columns:
+                out[f"mom_{w}"] = _rolling_sum(prefix, groups.window_start(w))[0]
+
+    if {'iv_rank', 'iv_percentile', 'iv_rv_spread'} & set(columns):
+        iv = groups.sort(df['iv'])
+        if 'iv_rank' in columns:
+            lo = _rolling_min(iv, groups, IV_WINDOW)
+            hi = _rolling_max(iv, groups, IV_WINDOW)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                out['iv_rank'] = np.where(hi > lo, (iv - lo) / (hi - lo), 0.5)
+        if 'iv_percentile' in columns:
+            out['iv_percentile'] = _rolling_percentile(iv, groups, IV_WINDOW)
+        if 'iv_rv_spread' in columns:
+            out['iv_rv_spread'] = iv - rv[SPREAD_RV_WINDOW]
+
+    if 'skew_25d' in columns:
+        out['skew_25d'] = groups.sort(df['skew_25d']) if 'skew_25d' in df else np.zeros(len(df))
+
+    # Scatter back to df's row order into one (columns x rows) block, the
+    # layout pandas keeps internally, so building the frame copies nothing
+    values = np.empty((len(columns), len(df)))
+    for j, name in enumerate(columns):
+        values[j, groups.order] = out[name]
+    values[np.isnan(values)] = 0.0
+    return pd.DataFrame(values.T, columns=columns, index=df.index, copy=False)
+
+
+# Version shared by all rolling features: changes whenever this module does
+FEATURE_CODE_VERSION = hashlib.sha1(inspect.getsource(sys.modules[__name__]).encode()).hexdigest()[:12]
+
+
+class RollingFeatureState:
+    """
+    Live counterpart of compute_rolling_features, where each row is one trading
+    session (a daily close). Keeps the last `history` closed sessions per
+    symbol plus the latest row of the session in progress, which becomes that
+    session's close once a row from a later session arrives. Every row is
+    scored as its session's close after the closed sessions before it, so
+    intraday cycles see the windows the batch path sees over daily rows and
+    never push out history.
+
+    A row's session is its 'session' column (ordered numbers such as
+    session_timestamp values), or today's session when there is none.
+
+    Set `journal` to a callable(kind, data) to receive the rows each update()
+    takes in, e.g. Checkpointer.log; snapshot() and restore() carry the history
+    across a restart.
+    """
+
+    _INPUTS = ('underlying_close', 'iv', 'skew_25d')
+
+    def __init__(self, history: int = LIVE_HISTORY):
+        self.history = history
+        self._rows: Dict[str, deque] = {}
+        self._open: Dict[str, tuple] = {}  # symbol -> (session, row) of the session in progress
+        self.journal = None
+
+    def copy(self) -> 'RollingFeatureState':
+        """Independent copy of the history, without the journal."""
+        clone = RollingFeatureState(self.history)
+        clone._rows = {symbol: deque(rows, maxlen=self.history) for symbol, rows in self._rows.items()}
+        clone._open = dict(self._open)
+        return clone
+
+    def _advance(self, symbol: str, session: float, row: tuple) -> None:
+        """Take in one row: a later session closes the open one, the same session replaces it."""
+        current = self._open.get(symbol)
+        if current is not None and session < current[0]:
+            return  # late row from a session already closed
+        if current is not None and session > current[0]:
+            self._rows.setdefault(symbol, deque(maxlen=self.history)).append(current[1])
+        self._open[symbol] = (session, row)
+
+    def extend(self, rows: Dict[str, Sequence[Sequence[float]]],
+               sessions: Optional[Dict[str, Sequence[float]]] = None) -> None:
+        """
+        Take in raw input rows (symbol -> [(underlying_close, iv, skew_25d), ...])
+        without computing features, as update() does given their sessions
+        (symbol -> [session, ...]). Without sessions they are appended as closed.
+        """
+        for symbol, values in rows.items():
+            if sessions is None:
+                self._rows.setdefault(symbol, deque(maxlen=self.history)).extend(tuple(v) for v in values)
+                continue
+            for session, row in zip(sessions[symbol], values):
+                self._advance(symbol, float(session), tuple(row))
+
+    def snapshot(self):
+        """
+        The history as arrays: (symbols, rows per symbol, values of shape (rows, 3),
+        open sessions) with values in _INPUTS order and each symbol's rows
+        contiguous. A symbol with a session in progress has that session in open
+        sessions and its row last; the others have NaN.
+        """
+        symbols = list(self._rows) + [s for s in self._open if s not in self._rows]
+        rows = [list(self._rows.get(s, ())) + ([self._open[s][1]] if s in self._open else []) for s in symbols]
+        counts = np.array([len(r) for r in rows], dtype=np.int64)
+        values = np.array([row for r in rows for row in r], dtype=np.float64)
+        sessions = np.array([self._open[s][0] if s in self._open else np.nan for s in symbols], dtype=np.float64)
+        return symbols, counts, values.reshape(-1, len(self._INPUTS)), sessions
+
+    def restore(self, symbols: Sequence[str], counts: Sequence[int], values: np.ndarray,
+                sessions: Optional[Sequence[float]] = None) -> None:
+        """Replace the history with a snapshot()."""
+        bounds = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._rows, self._open = {}, {}
+        for i, symbol in enumerate(map(str, symbols)):
+            rows = list(map(tuple, values[bounds[i]:bounds[i + 1]].tolist()))
+            if sessions is not None and not np.isnan(sessions[i]) and rows:
+                self._open[symbol] = (float(sessions[i]), rows.pop())
+            self._rows[symbol] = deque(rows, maxlen=self.history)
+
+    def seed(self, df: pd.DataFrame) -> int:
+        """
+        Load past daily rows (one or more per symbol, in time order) as closed
+        sessions without computing features, e.g. daily closes before the first
+        live cycle.
+
+        Symbols that already have closed sessions are left alone, so seeding
+        again after live rows arrived does not insert old rows behind them.
+        With a 'session' column, an open row from a session the seed already
+        covers (e.g. restored from yesterday's checkpoint) is dropped, as the
+        seeded close replaces it.
+
+        Returns:
+            Number of rows stored
+        """
+        stored = 0
+        for symbol, rows in df.groupby('symbol', sort=False):
+            if self._rows.get(symbol):
+                continue
+            current = self._open.get(symbol)
+            if current is not None and 'session' in rows and len(rows) and current[0] <= rows['session'].iloc[-1]:
+                del self._open[symbol]
+            values = zip(*[rows[c].to_numpy(dtype=np.float64) if c in rows else np.full(len(rows), np.nan)
+                           for c in self._INPUTS])
+            self._rows[symbol] = deque(values, maxlen=self.history)
+            stored += len(self._rows[symbol])
+        return stored
+
+    def depth(self, symbol: str) -> int:
+        """Closed sessions held for symbol."""
+        return len(self._rows.get(symbol, ()))
+
+    def update(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Take in df's rows (one or more per symbol, in time order) and return their features.
+        """
+        columns = list(ROLLING_FEATURE_COLUMNS if columns is None else columns)
+        symbols = df['symbol'].to_numpy()
+        inputs = [df[c].to_numpy(dtype=np.float64) if c in df else np.full(len(df), np.nan)
+                  for c in self._INPUTS]
+        sessions = (df['session'].to_numpy(dtype=np.float64) if 'session' in df
+                    else np.full(len(df), session_timestamp(datetime.now())))
+
+        new_rows: Dict[str, List[tuple]] = {}
+        new_sessions: Dict[str, List[float]] = {}
+        at: Dict[str, List[int]] = {}
+        for i, symbol in enumerate(symbols):
+            new_rows.setdefault(symbol, []).append(tuple(col[i] for col in inputs))
+            new_sessions.setdefault(symbol, []).append(float(sessions[i]))
+            at.setdefault(symbol, []).append(i)
+
+        # Per symbol, one sequence of its closed sessions, the sessions this
+        # batch closes and the last row taken in: a row that is (so far) its
+        # session's close is scored in place there. A row replaced within the
+        # batch, or late for its session, is scored in a group of its own: the
+        # closes before it, then the row.
+        keys: List[int] = []  # group per sequence, in place of the symbol
+        values: List[tuple] = []
+        picks = np.empty(len(df), dtype=np.int64)
+        for symbol, rows in new_rows.items():
+            main = list(self._rows.get(symbol, ()))
+            current = self._open.get(symbol)
+            latest = None  # batch row that `current` holds
+            closes_before, alone = [], []
+            for j, (session, row) in enumerate(zip(new_sessions[symbol], rows)):
+                if current is not None and session < current[0]:
+                    closes_before.append(len(main))
+                    alone.append(j)
+                    continue
+                if current is not None and session > current[0]:
+                    main.append(current[1])
+                elif latest is not None:
+                    alone.append(latest)
+                closes_before.append(len(main))
+                current, latest = (session, row), j
+            main.append(current[1])
+
+            start, group = len(values), (keys[-1] + 1 if keys else 0)
+            keys.extend([group] * len(main))
+            values.extend(main)
+            for j in range(len(rows)):
+                picks[at[symbol][j]] = start + closes_before[j]
+            for j in alone:
+                start, group = len(values), group + 1
+                keys.extend([group] * (closes_before[j] + 1))
+                values.extend(main[:closes_before[j]])
+                values.append(rows[j])
+                picks[at[symbol][j]] = start + closes_before[j]
+
+            for session, row in zip(new_sessions[symbol], rows):
+                self._advance(symbol, session, row)
+        if self.journal is not None:
+            self.journal('rows', {'rows': new_rows, 'sessions': new_sessions})
+
+        history = pd.DataFrame(values, columns=list(self._INPUTS))
+        history.insert(0, 'symbol', keys)
+        result = compute_rolling_features(history, columns).iloc[picks]
+        result.index = df.index
+        return result
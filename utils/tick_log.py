@@ -0,0 +1,371 @@
+# utils/tick_log.py
+
+"""
+Append-only, memory-mapped tick capture.
+
+Every quote, chain snapshot and model input row the trader sees is appended to
+one binary file per trading day, data/ticks/ticks-YYYYMMDD.tick, so any time
+range can be replayed exactly later (TickLog, brokers/replay_broker.py).
+
+Layout: a fixed header, then packed 96-byte records.
+
+    header   magic | record size | block size | count | symbol count
+             symbol table   MAX_SYMBOLS x 16-byte names (record symbol = index)
+             time index     first timestamp of every BLOCK_RECORDS records
+    record   ts f8 | expiry u4 (YYYYMMDD, 0 = underlying) | symbol u2 | right u1
+             (0 none, 1 call, 2 put) | source u1 | strike, bid, ask, last, iv,
+             delta, gamma, theta, vega, volume f8 (NaN = not quoted)
+
+Values stay float64 so replayed rows equal the captured ones bit for bit.
+
+Timestamps never go backwards within a file (a tick stamped earlier than the
+previous one is stored at the previous timestamp), so the index plus a binary
+search inside one block finds any time range. The writer packs each tick
+straight into the mapping with a precompiled struct and publishes the new
+count afterwards. Files grow by doubling, so appends neither allocate arrays
+nor issue write calls. Readers map the same file read-only and slice records
+without copying.
+"""
+
+import os
+import mmap
+import time
+import struct
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+TICK_LOG_DIR = os.getenv('TICK_LOG_DIR', 'data/ticks')
+TICK_RECORDING = os.getenv('TICK_RECORDING', '1') == '1'
+TICK_SUFFIX = '.tick'
+BLOCK_RECORDS = 4096
+MAX_SYMBOLS = 4096
+MAX_BLOCKS = 65536  # 268M ticks per day
+INITIAL_RECORDS = 1 << 16
+
+# What produced a tick
+SOURCE_QUOTE = 0        # streamed or polled underlying quote
+SOURCE_MODEL_INPUT = 1  # a row the model scored
+SOURCE_CHAIN = 2        # one contract of a fetched option chain
+SOURCES = ('quote', 'model_input', 'chain')
+
+_MAGIC = b'TICKLOG1'
+_HEADER = struct.Struct('<8sIIQI')  # magic, record size, block size, count, symbol count
+_COUNT_OFFSET = 16
+_SYMBOLS_OFFSET = 64
+_SYMBOL_BYTES = 16
+_INDEX_OFFSET = _SYMBOLS_OFFSET + MAX_SYMBOLS * _SYMBOL_BYTES
+_DATA_OFFSET = -(-(_INDEX_OFFSET + MAX_BLOCKS * 8) // mmap.PAGESIZE) * mmap.PAGESIZE
+
+_PACK = struct.Struct('<dIHBB10d')
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'), ('expiry', '<u4'), ('symbol', '<u2'), ('right', 'u1'), ('source', 'u1'),
+    ('strike', '<f8'), ('bid', '<f8'), ('ask', '<f8'), ('last', '<f8'), ('iv', '<f8'),
+    ('delta', '<f8'), ('gamma', '<f8'), ('theta', '<f8'), ('vega', '<f8'), ('volume', '<f8'),
+])
+assert RECORD_DTYPE.itemsize == _PACK.size
+_VALUE_FIELDS = ('bid', 'ask', 'last', 'iv', 'delta', 'gamma', 'theta', 'vega', 'volume')
+_RIGHTS = {'C': 1, 'P': 2}
+_NAN = float('nan')
+
+
+def tick_path(directory: str, day: str) -> str:
+    """Path of the tick file for a trading day (YYYYMMDD)."""
+    return os.path.join(directory, f"ticks-{day}{TICK_SUFFIX}")
+
+
+def _day_bounds(ts: float):
+    day = datetime.fromtimestamp(ts).date()
+    end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+    return day.strftime('%Y%m%d'), end
+
+
+class _TickFile:
+    """One day's file opened for appending."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, _PACK.size, BLOCK_RECORDS, 0, 0))
+                f.truncate(_DATA_OFFSET + INITIAL_RECORDS * _PACK.size)
+        self._file = open(path, 'r+b')
+        self._map()
+        magic, size, block, self.count, n_symbols = _HEADER.unpack_from(self.mm, 0)
+        if magic != _MAGIC or size != _PACK.size or block != BLOCK_RECORDS:
+            raise ValueError(f"Not a tick log (or an incompatible version): {path}")
+        self.symbols = [self._symbol_at(i) for i in range(n_symbols)]
+        self.codes = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.last_ts = _PACK.unpack_from(self.mm, self._offset(self.count - 1))[0] if self.count else 0.0
+
+    def _map(self) -> None:
+        self.mm = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = (len(self.mm) - _DATA_OFFSET) // _PACK.size
+
+    def _symbol_at(self, i: int) -> str:
+        start = _SYMBOLS_OFFSET + i * _SYMBOL_BYTES
+        return self.mm[start:start + _SYMBOL_BYTES].rstrip(b'\0').decode()
+
+    @staticmethod
+    def _offset(i: int) -> int:
+        return _DATA_OFFSET + i * _PACK.size
+
+    def code(self, symbol: str) -> int:
+        code = self.codes.get(symbol)
+        if code is None:
+            code = len(self.symbols)
+            encoded = symbol.encode()
+            if code >= MAX_SYMBOLS or len(encoded) > _SYMBOL_BYTES:
+                raise ValueError(f"Cannot add symbol {symbol!r} to {self.path}: table full or name too long")
+            start = _SYMBOLS_OFFSET + code * _SYMBOL_BYTES
+            self.mm[start:start + len(encoded)] = encoded
+            struct.pack_into('<I', self.mm, _COUNT_OFFSET + 8, code + 1)
+            self.symbols.append(symbol)
+            self.codes[symbol] = code
+        return code
+
+    def reserve(self, n: int) -> None:
+        """Make room for n more records, doubling the file as needed."""
+        if self.count + n <= self.capacity:
+            return
+        if (self.count + n + BLOCK_RECORDS - 1) // BLOCK_RECORDS > MAX_BLOCKS:
+            raise ValueError(f"Tick log {self.path} is full ({self.count} ticks)")
+        capacity = self.capacity
+        while capacity < self.count + n:
+            capacity *= 2
+        self.mm.flush()
+        self.mm.close()
+        self._file.truncate(_DATA_OFFSET + capacity * _PACK.size)
+        self._map()
+
+    def index(self, first: int, n: int, ts: float) -> None:
+        """Record `ts` as the first timestamp of blocks starting within [first, first + n)."""
+        block = -(-first // BLOCK_RECORDS)
+        while block * BLOCK_RECORDS < first + n:
+            struct.pack_into('<d', self.mm, _INDEX_OFFSET + block * 8, ts)
+            block += 1
+
+    def publish(self, count: int) -> None:
+        # Readers only see records below the published count
+        self.count = count
+        struct.pack_into('<Q', self.mm, _COUNT_OFFSET, count)
+
+    def close(self) -> None:
+        self.mm.flush()
+        self.mm.close()
+        self._file.close()
+
+
+class TickRecorder:
+    """
+    Appends ticks to the current day's log, rolling to a new file at midnight.
+
+    Thread-safe; broker callback threads and the trading loop can share one
+    recorder. One recorder process per directory.
+    """
+
+    def __init__(self, directory: str = TICK_LOG_DIR):
+        """
+        Args:
+            directory: Where the per-day tick files live
+        """
+        self.directory = directory
+        self._file: Optional[_TickFile] = None
+        self._day_end = float('-inf')
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional['TickRecorder']:
+        """A recorder in TICK_LOG_DIR, or None when TICK_RECORDING=0."""
+        return cls(TICK_LOG_DIR) if TICK_RECORDING else None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._file.path if self._file is not None else None
+
+    def _roll(self, ts: float) -> _TickFile:
+        day, self._day_end = _day_bounds(ts)
+        if self._file is not None:
+            self._file.close()
+        self._file = _TickFile(tick_path(self.directory, day))
+        return self._file
+
+    def append(self, symbol: str, last: float = _NAN, bid: float = _NAN, ask: float = _NAN,
+               iv: float = _NAN, delta: float = _NAN, gamma: float = _NAN, theta: float = _NAN,
+               vega: float = _NAN, volume: float = _NAN, expiry: int = 0, right: str = '',
+               strike: float = 0.0, source: int = SOURCE_QUOTE, ts: Optional[float] = None) -> None:
+        """
+        Append one tick. Missing values are NaN; None is accepted for iv.
+
+        Args:
+            symbol: Underlying symbol
+            expiry, right, strike: Contract fields for option ticks (expiry as int YYYYMMDD)
+            source: SOURCE_QUOTE, SOURCE_MODEL_INPUT or SOURCE_CHAIN
+            ts: Unix timestamp (defaults to now)
+        """
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            f = self._file if ts < self._day_end else self._roll(ts)
+            if ts < f.last_ts:
+                ts = f.last_ts
+            count = f.count
+            if count >= f.capacity:
+                f.reserve(1)
+            if count % BLOCK_RECORDS == 0:
+                f.index(count, 1, ts)
+            _PACK.pack_into(f.mm, _DATA_OFFSET + count * _PACK.size, ts, expiry, f.code(symbol),
+                            _RIGHTS.get(right, 0), source, strike, bid, ask, last,
+                            _NAN if iv is None else iv, delta, gamma, theta, vega, volume)
+            f.last_ts = ts
+            f.publish(count + 1)
+
+    def on_quote(self, symbol: str, price: float, iv: Optional[float] = None) -> None:
+        """Record a streamed quote (matches the broker QuoteCallback signature)."""
+        self.append(symbol, last=price, iv=iv)
+
+    def record_frame(self, df: pd.DataFrame, source: int = SOURCE_MODEL_INPUT,
+                     ts: Optional[float] = None) -> int:
+        """
+        Append every row of a frame with one timestamp, in a single copy.
+
+        Takes model input rows (underlying_close is stored as last) or option
+        chains with OPTION_CHAIN_COLUMNS; absent columns are stored as NaN.
+
+        Returns:
+            Number of ticks written
+        """
+        n = len(df)
+        if not n:
+            return 0
+        ts = time.time() if ts is None else ts
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        records['source'] = source
+        for field in _VALUE_FIELDS + ('strike',):
+            column = 'underlying_close' if field == 'last' and 'last' not in df.columns else field
+            if column in df.columns:
+                records[field] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            elif field != 'strike':
+                records[field] = np.nan
+        if 'expiry' in df.columns:
+            records['expiry'] = df['expiry'].astype(str).str.replace('-', '', regex=False).astype(np.uint32)
+        if 'right' in df.columns:
+            records['right'] = np.select([df['right'].to_numpy() == 'C', df['right'].to_numpy() == 'P'], [1, 2], 0)
+        symbol_codes, symbols = pd.factorize(df['symbol'])
+
+        with self._lock:
+            f = self._file if ts < self._day_end else self._roll(ts)
+            records['ts'] = max(ts, f.last_ts)
+            records['symbol'] = np.array([f.code(s) for s in symbols], dtype=np.uint16)[symbol_codes]
+            count = f.count
+            f.reserve(n)
+            f.index(count, n, records['ts'][0])
+            start = _DATA_OFFSET + count * _PACK.size
+            f.mm[start:start + n * _PACK.size] = records.data
+            f.last_ts = float(records['ts'][0])
+            f.publish(count + n)
+        return n
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.mm.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._day_end = float('-inf')
+
+
+class TickLog:
+    """
+    Read-only, zero-copy view of one day's tick file.
+
+    `records` is a structured memmap (RECORD_DTYPE) over the published ticks;
+    between() slices it by time without copying. Call refresh() to see ticks
+    appended since opening.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(_DATA_OFFSET)
+        magic, size, block, _, _ = _HEADER.unpack_from(header, 0)
+        if magic != _MAGIC or size != _PACK.size or block != BLOCK_RECORDS:
+            raise ValueError(f"Not a tick log (or an incompatible version): {path}")
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Re-read the header and map every published tick."""
+        with open(self.path, 'rb') as f:
+            header = f.read(_DATA_OFFSET)
+        _, _, _, self.count, n_symbols = _HEADER.unpack_from(header, 0)
+        self.symbols: List[str] = [
+            header[_SYMBOLS_OFFSET + i * _SYMBOL_BYTES:_SYMBOLS_OFFSET + (i + 1) * _SYMBOL_BYTES].rstrip(b'\0').decode()
+            for i in range(n_symbols)
+        ]
+        blocks = -(-self.count // BLOCK_RECORDS)
+        self.block_ts = np.frombuffer(header, dtype='<f8', count=blocks, offset=_INDEX_OFFSET)
+        self.records = (np.memmap(self.path, dtype=RECORD_DTYPE, mode='r', offset=_DATA_OFFSET, shape=(self.count,))
+                        if self.count else np.zeros(0, dtype=RECORD_DTYPE))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _position(self, ts: float, side: str) -> int:
+        # Block from the sparse index, then a binary search inside that block only
+        block = max(int(np.searchsorted(self.block_ts, ts, side)) - 1, 0)
+        lo, hi = block * BLOCK_RECORDS, min((block + 1) * BLOCK_RECORDS, self.count)
+        return lo + int(np.searchsorted(self.records['ts'][lo:hi], ts, side))
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """Ticks with start <= ts < end, as a view into the file."""
+        lo = 0 if start is None else self._position(start, 'left')
+        hi = self.count if end is None else self._position(end, 'left')
+        return self.records[lo:max(lo, hi)]
+
+    def frame(self, start: Optional[float] = None, end: Optional[float] = None,
+              source: Optional[int] = None) -> pd.DataFrame:
+        """
+        Ticks in [start, end) as a DataFrame (copied), optionally one source only.
+
+        Columns: ts, symbol, expiry ('YYYYMMDD', '' for underlyings), right
+        ('C'/'P'/''), strike, bid, ask, last, iv, greeks, volume and source.
+        """
+        records = self.between(start, end)
+        if source is not None:
+            records = records[records['source'] == source]
+        symbols = np.array(self.symbols or [''], dtype=object)
+        expiry = records['expiry']
+        return pd.DataFrame({
+            'ts': records['ts'],
+            'symbol': symbols[records['symbol']],
+            'expiry': np.where(expiry > 0, expiry.astype(str), ''),
+            'right': np.array(['', 'C', 'P'], dtype=object)[records['right']],
+            'strike': records['strike'],
+            **{field: records[field] for field in _VALUE_FIELDS},
+            'source': np.array(SOURCES, dtype=object)[records['source']],
+        })
+
+
+def list_tick_files(directory: str = TICK_LOG_DIR) -> Dict[str, str]:
+    """Trading day (YYYYMMDD) -> tick file path, oldest first."""
+    if not os.path.isdir(directory):
+        return {}
+    names = sorted(n for n in os.listdir(directory) if n.startswith('ticks-') and n.endswith(TICK_SUFFIX))
+    return {n[len('ticks-'):-len(TICK_SUFFIX)]: os.path.join(directory, n) for n in names}
+
+
+def read_ticks(start: float, end: float, directory: str = TICK_LOG_DIR,
+               source: Optional[int] = None) -> pd.DataFrame:
+    """Ticks in [start, end) across day files, e.g. the model inputs of a session for a backtest."""
+    first, _ = _day_bounds(start)
+    last, _ = _day_bounds(end)
+    frames = [TickLog(path).frame(start, end, source)
+              for day, path in list_tick_files(directory).items() if first <= day <= last]
+    frames = [f for f in frames if len(f)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()